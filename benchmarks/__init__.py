@@ -0,0 +1 @@
+"""离线基准测试工具（无需网络、无需真实API Key）"""
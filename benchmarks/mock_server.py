@@ -0,0 +1,657 @@
+"""本地 OpenAI/Anthropic 兼容模拟服务
+
+在本机启动一个 HTTP 服务，模拟以下接口，供基准测试离线使用：
+- POST /v1/chat/completions   OpenAI/DeepSeek（支持 stream=true 的SSE）
+- POST /v1/messages           Anthropic Claude（支持 stream=true 的SSE）
+- GET  /v1/models             连接测试
+- POST /v1/pages              Notion pages.create（可按速率限制返回 429 + Retry-After）
+- PATCH /v1/blocks/{id}/children  Notion blocks.children.append（同样受速率限制）
+- GET  /v1/databases/{id}     Notion databases.retrieve（API 版本 2025-09-03 的结构：只含数据源列表）
+- GET  /v1/data_sources/{id}  Notion data_sources.retrieve（返回与默认属性映射一致的属性）
+- POST /flomo/...             Flomo Webhook
+- GET  /flomo/...             Flomo 连接探测（返回 405，不创建Memo）
+- GET  /_stats, POST /_reset  调用计数（供压测脚本读取）
+- GET  /_captured             最近记录的请求内容（含 SMTP 模拟服务收到的邮件）
+
+同时可启动 SMTP 模拟服务（见 mock_smtp.py），两者共用行为配置和计数器。
+
+返回的分类结论由"剧本"决定：剧本是 {样本文本: 结论JSON} 的映射，
+请求内容中包含哪条样本文本，就返回哪条结论；未命中时返回 {"valuable": false}。
+
+用法：
+    python -m benchmarks.mock_server --port 8765 --latency lognormal:300,0.5 --error-rate 0.02
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from src.utils.rate_limiter import TokenBucket
+
+
+_RULE_TYPE_RE = re.compile(r'返回的type必须是"(\w+)"')
+# 提示词中待分析内容所在的位置（规则提示词本身带有示例文本，只能在这一段里匹配样本）
+_CONTENT_MARKERS = (
+    ("待分析内容：\n", "\n\n请以JSON格式返回结果"),
+    ("文本：", "\n\n当前时间："),
+)
+
+
+# databases.retrieve 的模拟返回（API 版本 2025-09-03 起属性不在数据库对象上，在数据源上）
+MOCK_NOTION_DATABASE = {
+    "object": "database",
+    "id": "bench-database",
+    "data_sources": [{"id": "bench-data-source", "name": "bench"}],
+}
+
+# data_sources.retrieve 的模拟返回
+MOCK_NOTION_DATA_SOURCE = {
+    "object": "data_source",
+    "id": "bench-data-source",
+    "parent": {"type": "database_id", "database_id": "bench-database"},
+    "properties": {
+        "标题": {"type": "title", "title": {}},
+        "描述": {"type": "rich_text", "rich_text": {}},
+        "状态": {"type": "status", "status": {"options": [{"name": n} for n in ("待处理", "进行中", "已完成")]}},
+        "优先级": {"type": "select", "select": {"options": [{"name": n} for n in ("高", "中", "低")]}},
+        "创建时间": {"type": "date", "date": {}},
+        "标签": {"type": "multi_select", "multi_select": {"options": []}},
+    },
+}
+
+
+class LatencyModel:
+    """
+    延迟分布
+
+    支持的规格字符串：
+    - fixed:300              固定 300ms
+    - uniform:100,500        100~500ms 均匀分布
+    - lognormal:300,0.5      中位数 300ms、sigma=0.5 的对数正态分布（接近真实API长尾）
+    """
+
+    def __init__(self, spec: str = "fixed:0", seed: Optional[int] = None):
+        self.spec = spec
+        self._random = random.Random(seed)
+        kind, _, params = spec.partition(":")
+        values = [float(v) for v in params.split(",") if v.strip()] if params else []
+        if kind == "fixed":
+            self._sample = lambda: values[0] if values else 0.0
+        elif kind == "uniform":
+            low, high = values
+            self._sample = lambda: self._random.uniform(low, high)
+        elif kind == "lognormal":
+            import math
+            median, sigma = values
+            self._sample = lambda: self._random.lognormvariate(math.log(max(median, 0.001)), sigma)
+        else:
+            raise ValueError(f"不支持的延迟分布: {spec}（支持 fixed/uniform/lognormal）")
+
+    def sample_seconds(self) -> float:
+        """采样一次延迟（秒）"""
+        return max(0.0, self._sample()) / 1000.0
+
+
+class MockBehavior:
+    """模拟服务的可配置行为（线程安全）"""
+
+    def __init__(
+        self,
+        latency: str = "fixed:0",
+        chunk_ms: float = 5.0,
+        error_rate: float = 0.0,
+        error_status: int = 500,
+        flip_rate: float = 0.0,
+        seed: Optional[int] = None,
+        notion_rate: float = 0.0,
+        notion_retry_after: float = 1.0,
+    ):
+        """
+        Args:
+            latency: 首个token前的延迟分布
+            chunk_ms: 流式输出时每个分片之间的间隔（毫秒）
+            error_rate: 注入错误的概率（0~1）
+            error_status: 注入错误时返回的HTTP状态码
+            flip_rate: 随机翻转分类结论的概率（模拟模型输出不稳定）
+            seed: 随机种子（便于复现）
+            notion_rate: Notion 接口每秒允许的请求数，超出返回429（0表示不限）
+            notion_retry_after: 429 响应中 Retry-After 的秒数
+        """
+        self.latency = LatencyModel(latency, seed)
+        self.chunk_seconds = chunk_ms / 1000.0
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.flip_rate = flip_rate
+        self.notion_limiter = TokenBucket(notion_rate) if notion_rate > 0 else None
+        self.notion_retry_after = notion_retry_after
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.script: List[Tuple[str, Dict[str, Any]]] = []
+        self.counters: Dict[str, int] = {}
+        self.captured: List[Dict[str, Any]] = []
+        self.capture_limit = 1000
+
+    def load_script(self, samples: List[Dict[str, Any]]):
+        """从语料加载剧本（每条样本需包含 text 和 verdict）"""
+        script = []
+        for sample in samples:
+            text = sample.get("text", "").strip()
+            if text:
+                script.append((text, sample.get("verdict") or {"valuable": False}))
+        # 长文本优先匹配，避免短样本是长样本子串时误命中
+        script.sort(key=lambda item: len(item[0]), reverse=True)
+        with self._lock:
+            self.script = script
+
+    def count(self, key: str):
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + 1
+
+    def capture(self, path: str, body: Any):
+        with self._lock:
+            if len(self.captured) < self.capture_limit:
+                self.captured.append({"path": path, "body": body, "ts": time.time()})
+
+    def should_fail(self) -> bool:
+        with self._lock:
+            return self._random.random() < self.error_rate
+
+    def should_flip(self) -> bool:
+        with self._lock:
+            return self._random.random() < self.flip_rate
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"counters": dict(self.counters), "captured": len(self.captured)}
+
+    def captured_requests(self, limit: int = 100) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self.captured[-limit:])
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.captured.clear()
+
+    def reply_for_prompt(self, prompt: str) -> str:
+        """根据提示词内容生成模型回复（JSON字符串）"""
+        # 时间提取请求
+        if "你是一个时间提取助手" in prompt:
+            verdict = self._match(prompt) or {}
+            if verdict.get("due_datetime"):
+                return json.dumps({
+                    "has_time": True,
+                    "datetime": verdict["due_datetime"],
+                    "original_text": verdict.get("time_text") or "",
+                }, ensure_ascii=False)
+            return json.dumps({"has_time": False})
+
+        verdict = self._match(prompt)
+        if verdict is None:
+            return json.dumps({"valuable": False})
+
+        # 分类请求：按提示词里要求的规则类型作答，类型不同视为不符合该规则
+        rule_match = _RULE_TYPE_RE.search(prompt)
+        rule_type = rule_match.group(1) if rule_match else None
+        valuable = bool(verdict.get("valuable")) and (rule_type is None or verdict.get("type") == rule_type)
+        if self.should_flip():
+            valuable = not valuable
+        if not valuable:
+            return json.dumps({"valuable": False})
+
+        reply = {"valuable": True, "type": rule_type or verdict.get("type")}
+        for key, value in verdict.items():
+            if key not in ("valuable", "type"):
+                reply[key] = value
+        return json.dumps(reply, ensure_ascii=False)
+
+    def _match(self, prompt: str) -> Optional[Dict[str, Any]]:
+        content = _extract_content(prompt)
+        with self._lock:
+            script = self.script
+        for text, verdict in script:
+            if text in content:
+                return verdict
+        return None
+
+
+def _extract_content(prompt: str) -> str:
+    """从完整提示词中取出待分析内容，找不到标记时退回整段提示词"""
+    for head, tail in _CONTENT_MARKERS:
+        start = prompt.rfind(head)
+        if start < 0:
+            continue
+        start += len(head)
+        end = prompt.find(tail, start)
+        return prompt[start:end if end >= 0 else None]
+    return prompt
+
+
+def _split_chunks(text: str, size: int = 8) -> List[str]:
+    """把回复切成小片段，模拟逐token输出"""
+    return [text[i:i + size] for i in range(0, len(text), size)] or [""]
+
+
+class MockRequestHandler(BaseHTTPRequestHandler):
+    """模拟服务请求处理器"""
+
+    protocol_version = "HTTP/1.1"
+    server_version = "QuickNoteMock/1.0"
+
+    @property
+    def behavior(self) -> MockBehavior:
+        return self.server.behavior
+
+    def log_message(self, format, *args):
+        logger.debug(f"[mock] {self.address_string()} {format % args}")
+
+    # ---------- 通用工具 ----------
+
+    def _read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        try:
+            return json.loads(raw.decode("utf-8")) if raw else {}
+        except ValueError:
+            return {}
+
+    def _send_json(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _start_sse(self):
+        # 流式响应不带 Content-Length，发送完毕后关闭连接
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+    def _write_sse(self, data: str, event: Optional[str] = None) -> bool:
+        """写入一个SSE事件，客户端提前断开时返回False"""
+        frame = (f"event: {event}\n" if event else "") + f"data: {data}\n\n"
+        try:
+            self.wfile.write(frame.encode("utf-8"))
+            self.wfile.flush()
+            return True
+        except (BrokenPipeError, ConnectionResetError):
+            self.behavior.count("stream_aborted")
+            return False
+
+    def _maybe_fail(self, key: str) -> bool:
+        """按配置的错误率注入错误"""
+        if self.behavior.should_fail():
+            self.behavior.count(f"{key}_error")
+            self._send_json(self.behavior.error_status, {
+                "error": {"message": "injected error", "type": "server_error"}
+            })
+            return True
+        return False
+
+    def _maybe_throttle_notion(self) -> bool:
+        """超出模拟的 Notion 速率限制时返回 429（格式与 Notion 一致）"""
+        limiter = self.behavior.notion_limiter
+        if limiter is None or limiter.try_acquire() <= 0:
+            return False
+        self.behavior.count("notion_429")
+        retry_after = self.behavior.notion_retry_after
+        self._send_json(429, {
+            "object": "error",
+            "status": 429,
+            "code": "rate_limited",
+            "message": "You have been rate limited. Please try again in a few minutes.",
+        }, headers={"Retry-After": f"{retry_after:g}"})
+        return True
+
+    # ---------- 路由 ----------
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0].rstrip("/").endswith("/v1/models"):
+            self.behavior.count("models")
+            time.sleep(self.behavior.latency.sample_seconds())
+            self._send_json(200, {"object": "list", "data": [{"id": "mock-model", "object": "model"}]})
+        elif "/v1/databases/" in self.path:
+            self.behavior.count("notion_databases")
+            time.sleep(self.behavior.latency.sample_seconds())
+            self._send_json(200, MOCK_NOTION_DATABASE)
+        elif "/v1/data_sources/" in self.path:
+            self.behavior.count("notion_data_sources")
+            time.sleep(self.behavior.latency.sample_seconds())
+            self._send_json(200, MOCK_NOTION_DATA_SOURCE)
+        elif self.path.startswith("/flomo"):
+            # 与真实 Webhook 一样只接受 POST
+            self.behavior.count("flomo_probes")
+            time.sleep(self.behavior.latency.sample_seconds())
+            self._send_json(405, {"code": -1, "message": "method not allowed"})
+        elif self.path == "/_stats":
+            self._send_json(200, self.behavior.snapshot())
+        elif self.path == "/_captured":
+            self._send_json(200, {"requests": self.behavior.captured_requests()})
+        else:
+            self._send_json(404, {"error": {"message": f"not found: {self.path}"}})
+
+    def do_POST(self):
+        body = self._read_json()
+        path = self.path.split("?", 1)[0].rstrip("/")
+        if path == "/_reset":
+            self.behavior.reset()
+            self._send_json(200, {"ok": True})
+        elif path.endswith("/chat/completions"):
+            self._handle_openai(body)
+        elif path.endswith("/v1/messages"):
+            self._handle_anthropic(body)
+        elif path.endswith("/v1/pages"):
+            self._handle_notion_page(body)
+        elif path.startswith("/flomo"):
+            self._handle_flomo(body)
+        else:
+            self._send_json(404, {"error": {"message": f"not found: {self.path}"}})
+
+    def do_PATCH(self):
+        body = self._read_json()
+        path = self.path.split("?", 1)[0].rstrip("/")
+        if "/v1/blocks/" in path and path.endswith("/children"):
+            self._handle_notion_append(body)
+        else:
+            self._send_json(404, {"error": {"message": f"not found: {self.path}"}})
+
+    # ---------- LLM ----------
+
+    @staticmethod
+    def _prompt_of(body: Dict[str, Any]) -> str:
+        parts = []
+        for message in body.get("messages", []):
+            content = message.get("content")
+            if isinstance(content, list):
+                parts.extend(block.get("text", "") for block in content if isinstance(block, dict))
+            elif content:
+                parts.append(str(content))
+        return "\n".join(parts)
+
+    def _handle_openai(self, body: Dict[str, Any]):
+        self.behavior.count("llm")
+        self.behavior.capture(self.path, body)
+        if self._maybe_fail("llm"):
+            return
+        time.sleep(self.behavior.latency.sample_seconds())
+        reply = self.behavior.reply_for_prompt(self._prompt_of(body))
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        model = body.get("model", "mock-model")
+        created = int(time.time())
+
+        if not body.get("stream"):
+            self._send_json(200, {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": reply},
+                    "finish_reason": "stop",
+                }],
+                "usage": {"prompt_tokens": 1, "completion_tokens": len(reply), "total_tokens": 1 + len(reply)},
+            })
+            return
+
+        self._start_sse()
+        for piece in _split_chunks(reply):
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}],
+            }
+            if not self._write_sse(json.dumps(chunk, ensure_ascii=False)):
+                return
+            time.sleep(self.behavior.chunk_seconds)
+        final = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+        }
+        if self._write_sse(json.dumps(final)):
+            self._write_sse("[DONE]")
+
+    def _handle_anthropic(self, body: Dict[str, Any]):
+        self.behavior.count("llm")
+        self.behavior.capture(self.path, body)
+        if self._maybe_fail("llm"):
+            return
+        time.sleep(self.behavior.latency.sample_seconds())
+        reply = self.behavior.reply_for_prompt(self._prompt_of(body))
+        message_id = f"msg_{uuid.uuid4().hex[:12]}"
+        model = body.get("model", "mock-model")
+
+        if not body.get("stream"):
+            self._send_json(200, {
+                "id": message_id,
+                "type": "message",
+                "role": "assistant",
+                "model": model,
+                "content": [{"type": "text", "text": reply}],
+                "stop_reason": "end_turn",
+                "stop_sequence": None,
+                "usage": {"input_tokens": 1, "output_tokens": len(reply)},
+            })
+            return
+
+        self._start_sse()
+        events = [("message_start", {
+            "type": "message_start",
+            "message": {
+                "id": message_id, "type": "message", "role": "assistant", "model": model,
+                "content": [], "stop_reason": None, "stop_sequence": None,
+                "usage": {"input_tokens": 1, "output_tokens": 0},
+            },
+        }), ("content_block_start", {
+            "type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""},
+        })]
+        for name, payload in events:
+            if not self._write_sse(json.dumps(payload), event=name):
+                return
+        for piece in _split_chunks(reply):
+            payload = {"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": piece}}
+            if not self._write_sse(json.dumps(payload, ensure_ascii=False), event="content_block_delta"):
+                return
+            time.sleep(self.behavior.chunk_seconds)
+        tail = [
+            ("content_block_stop", {"type": "content_block_stop", "index": 0}),
+            ("message_delta", {
+                "type": "message_delta",
+                "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                "usage": {"output_tokens": len(reply)},
+            }),
+            ("message_stop", {"type": "message_stop"}),
+        ]
+        for name, payload in tail:
+            if not self._write_sse(json.dumps(payload), event=name):
+                return
+
+    # ---------- 同步目标 ----------
+
+    def _handle_notion_page(self, body: Dict[str, Any]):
+        self.behavior.count("notion_pages")
+        self.behavior.capture(self.path, body)
+        if self._maybe_throttle_notion() or self._maybe_fail("notion"):
+            return
+        time.sleep(self.behavior.latency.sample_seconds())
+        self._send_json(200, {"object": "page", "id": str(uuid.uuid4())})
+
+    def _handle_notion_append(self, body: Dict[str, Any]):
+        self.behavior.count("notion_appends")
+        self.behavior.capture(self.path, body)
+        if self._maybe_throttle_notion() or self._maybe_fail("notion"):
+            return
+        time.sleep(self.behavior.latency.sample_seconds())
+        results = [{"object": "block", "id": str(uuid.uuid4())} for _ in body.get("children", [])]
+        self._send_json(200, {"object": "list", "results": results})
+
+    def _handle_flomo(self, body: Dict[str, Any]):
+        self.behavior.count("flomo")
+        self.behavior.capture(self.path, body)
+        if self._maybe_fail("flomo"):
+            return
+        time.sleep(self.behavior.latency.sample_seconds())
+        self._send_json(200, {"code": 0, "message": "已记录"})
+
+
+class _MockHTTPServer(ThreadingHTTPServer):
+    # 默认 backlog 只有5，高并发压测时连接会被拒绝或重传
+    request_queue_size = 256
+    daemon_threads = True
+
+
+class MockServer:
+    """在后台线程中运行的模拟服务"""
+
+    def __init__(self, behavior: Optional[MockBehavior] = None, host: str = "127.0.0.1", port: int = 0):
+        """
+        Args:
+            behavior: 模拟行为配置
+            host: 监听地址
+            port: 监听端口（0表示自动分配）
+        """
+        self.behavior = behavior or MockBehavior()
+        self.httpd = _MockHTTPServer((host, port), MockRequestHandler)
+        self.httpd.behavior = self.behavior
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockServer":
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        logger.info(f"模拟服务已启动: {self.base_url}")
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        logger.info("模拟服务已停止")
+
+    def __enter__(self) -> "MockServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def load_corpus(path) -> List[Dict[str, Any]]:
+    """加载 JSONL 格式的样本语料"""
+    samples = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                samples.append(json.loads(line))
+    return samples
+
+
+def app_env_for(base_url: str, smtp_address: Optional[Tuple[str, int]] = None, provider: str = "deepseek") -> Dict[str, str]:
+    """把应用的所有外部服务指向模拟服务所需的环境变量"""
+    env = {
+        "AI_PROVIDER": provider,
+        "OPENAI_API_KEY": "bench-key",
+        "OPENAI_BASE_URL": f"{base_url}/v1",
+        "OPENAI_MODEL": "mock-model",
+        "ANTHROPIC_API_KEY": "bench-key",
+        "ANTHROPIC_BASE_URL": base_url,
+        "NOTION_API_KEY": "bench-key",
+        "NOTION_DATABASE_ID": "bench-database",
+        "NOTION_BASE_URL": base_url,
+        "FLOMO_API_URL": f"{base_url}/flomo/bench",
+    }
+    if smtp_address:
+        host, port = smtp_address
+        env.update({
+            "TICKTICK_SMTP_HOST": host,
+            "TICKTICK_SMTP_PORT": str(port),
+            "TICKTICK_SMTP_SSL": "false",
+            "TICKTICK_SMTP_USER": "bench@example.com",
+            "TICKTICK_SMTP_PASS": "bench-pass",
+            "TICKTICK_EMAIL": "todo+bench@mail.dida365.com",
+        })
+    return env
+
+
+def add_behavior_arguments(parser: argparse.ArgumentParser):
+    """注册模拟行为相关的命令行参数（压测脚本复用）"""
+    parser.add_argument("--latency", default="lognormal:300,0.4", help="首token延迟分布，如 fixed:300 / uniform:100,500 / lognormal:300,0.4")
+    parser.add_argument("--chunk-ms", type=float, default=5.0, help="流式分片间隔（毫秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="错误注入概率（0~1）")
+    parser.add_argument("--error-status", type=int, default=500, help="注入错误时的HTTP状态码")
+    parser.add_argument("--flip-rate", type=float, default=0.0, help="随机翻转结论的概率（模拟输出不稳定）")
+    parser.add_argument("--seed", type=int, default=None, help="随机种子")
+    parser.add_argument("--notion-rate", type=float, default=0.0, help="模拟 Notion 每秒允许的请求数，超出返回429（0表示不限）")
+    parser.add_argument("--notion-retry-after", type=float, default=1.0, help="429 响应的 Retry-After 秒数")
+
+
+def behavior_from_args(args) -> MockBehavior:
+    return MockBehavior(
+        latency=args.latency,
+        chunk_ms=args.chunk_ms,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        flip_rate=args.flip_rate,
+        seed=args.seed,
+        notion_rate=args.notion_rate,
+        notion_retry_after=args.notion_retry_after,
+    )
+
+
+def main():
+    from pathlib import Path
+
+    parser = argparse.ArgumentParser(description="QuickNote AI 本地模拟服务（OpenAI/Anthropic/Notion/Flomo/SMTP）")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--smtp-port", type=int, default=8025, help="SMTP 模拟服务端口（0表示不启动）")
+    parser.add_argument("--corpus", default=str(Path(__file__).parent / "corpus" / "clipboard_samples.jsonl"))
+    add_behavior_arguments(parser)
+    args = parser.parse_args()
+
+    behavior = behavior_from_args(args)
+    behavior.load_script(load_corpus(args.corpus))
+    server = MockServer(behavior, host=args.host, port=args.port)
+    smtp = None
+    if args.smtp_port:
+        from benchmarks.mock_smtp import MockSMTPServer
+        smtp = MockSMTPServer(behavior, host=args.host, port=args.smtp_port).start()
+
+    # 把应用指向模拟服务：写入 .env 后启动应用即可端到端离线压测
+    env_lines = [f"{key}={value}" for key, value in app_env_for(server.base_url, smtp.address if smtp else None).items()]
+    logger.info("让应用使用模拟服务，请在 .env 中设置：\n" + "\n".join(env_lines))
+    logger.info(f"模拟服务监听 {server.base_url}（Ctrl+C 退出）")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        if smtp:
+            smtp.stop()
+
+
+if __name__ == "__main__":
+    main()
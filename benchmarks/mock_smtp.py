@@ -0,0 +1,177 @@
+"""本地 SMTP 模拟服务（滴答清单邮件同步的替身）
+
+实现 TickTickAPI 用到的最小 SMTP 子集（明文连接，不支持 TLS）：
+EHLO/HELO、AUTH PLAIN/LOGIN（接受任意账号）、MAIL FROM、RCPT TO、DATA、RSET、NOOP、QUIT。
+
+与 HTTP 模拟服务共用 MockBehavior：
+- 延迟分布：收到完整邮件后等待一次采样延迟再回复
+- 错误注入：按错误率对 DATA 返回 451
+- 请求记录：解码后的邮件主题、收件人、正文计入 captured，计数器 smtp_*
+
+让应用使用本服务：在 .env 中设置
+    TICKTICK_SMTP_HOST=127.0.0.1
+    TICKTICK_SMTP_PORT=8025
+    TICKTICK_SMTP_SSL=false
+"""
+import socketserver
+import threading
+import time
+from email import message_from_bytes
+from email.header import decode_header, make_header
+from typing import Optional
+
+from loguru import logger
+
+from benchmarks.mock_server import MockBehavior
+
+
+def _decode_subject(raw: Optional[str]) -> str:
+    if not raw:
+        return ""
+    try:
+        return str(make_header(decode_header(raw)))
+    except Exception:
+        return raw
+
+
+class MockSMTPHandler(socketserver.StreamRequestHandler):
+    """单个 SMTP 会话"""
+
+    @property
+    def behavior(self) -> MockBehavior:
+        return self.server.behavior
+
+    def _reply(self, line: str):
+        self.wfile.write((line + "\r\n").encode("utf-8"))
+        self.wfile.flush()
+
+    def _readline(self) -> Optional[str]:
+        raw = self.rfile.readline(65536)
+        if not raw:
+            return None
+        return raw.decode("utf-8", errors="replace").rstrip("\r\n")
+
+    def handle(self):
+        self.behavior.count("smtp_connections")
+        self._reply("220 quicknote-mock ESMTP ready")
+        mail_from, rcpt_to = None, []
+        while True:
+            line = self._readline()
+            if line is None:
+                return
+            verb, _, arg = line.partition(" ")
+            verb = verb.upper()
+            if verb == "EHLO":
+                self.wfile.write(b"250-quicknote-mock\r\n250-AUTH PLAIN LOGIN\r\n250 8BITMIME\r\n")
+                self.wfile.flush()
+            elif verb == "HELO":
+                self._reply("250 quicknote-mock")
+            elif verb == "AUTH":
+                self._auth(arg)
+            elif verb == "MAIL":
+                mail_from, rcpt_to = arg, []
+                self._reply("250 OK")
+            elif verb == "RCPT":
+                rcpt_to.append(arg.partition(":")[2].strip().strip("<>"))
+                self._reply("250 OK")
+            elif verb == "DATA":
+                if not mail_from or not rcpt_to:
+                    self._reply("503 need MAIL and RCPT first")
+                    continue
+                self._data(rcpt_to)
+                mail_from, rcpt_to = None, []
+            elif verb == "RSET":
+                mail_from, rcpt_to = None, []
+                self._reply("250 OK")
+            elif verb == "NOOP":
+                self._reply("250 OK")
+            elif verb == "QUIT":
+                self._reply("221 bye")
+                return
+            else:
+                self._reply(f"502 command not implemented: {verb}")
+
+    def _auth(self, arg: str):
+        mechanism, _, initial = arg.partition(" ")
+        mechanism = mechanism.upper()
+        if mechanism == "PLAIN" and not initial:
+            self._reply("334 ")
+            self._readline()
+        elif mechanism == "LOGIN":
+            if not initial:
+                self._reply("334 VXNlcm5hbWU6")
+                self._readline()
+            self._reply("334 UGFzc3dvcmQ6")
+            self._readline()
+        elif mechanism != "PLAIN":
+            self._reply("504 unrecognized authentication type")
+            return
+        self.behavior.count("smtp_auth")
+        self._reply("235 authentication successful")
+
+    def _data(self, rcpt_to):
+        self._reply("354 end data with <CR><LF>.<CR><LF>")
+        lines = []
+        while True:
+            raw = self.rfile.readline(65536)
+            if not raw or raw in (b".\r\n", b".\n"):
+                break
+            # 去掉 SMTP 的点号转义
+            lines.append(raw[1:] if raw.startswith(b"..") else raw)
+        if self.behavior.should_fail():
+            self.behavior.count("smtp_error")
+            self._reply("451 injected error")
+            return
+        time.sleep(self.behavior.latency.sample_seconds())
+        message = message_from_bytes(b"".join(lines))
+        payload = message.get_payload(decode=True) or b""
+        self.behavior.count("smtp_messages")
+        self.behavior.capture("smtp", {
+            "to": rcpt_to,
+            "subject": _decode_subject(message.get("Subject")),
+            "body": payload.decode(message.get_content_charset() or "utf-8", errors="replace"),
+        })
+        self._reply("250 OK queued")
+
+
+class _MockSMTPServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+    request_queue_size = 256
+
+
+class MockSMTPServer:
+    """在后台线程中运行的 SMTP 模拟服务"""
+
+    def __init__(self, behavior: Optional[MockBehavior] = None, host: str = "127.0.0.1", port: int = 0):
+        """
+        Args:
+            behavior: 模拟行为配置（可与 HTTP 模拟服务共用，计数器合并统计）
+            host: 监听地址
+            port: 监听端口（0表示自动分配）
+        """
+        self.behavior = behavior or MockBehavior()
+        self.server = _MockSMTPServer((host, port), MockSMTPHandler)
+        self.server.behavior = self.behavior
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self):
+        return self.server.server_address[:2]
+
+    def start(self) -> "MockSMTPServer":
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        logger.info(f"SMTP模拟服务已启动: {self.address[0]}:{self.address[1]}")
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        logger.info("SMTP模拟服务已停止")
+
+    def __enter__(self) -> "MockSMTPServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
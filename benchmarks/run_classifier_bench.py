@@ -0,0 +1,282 @@
+"""剪切板分类链路离线压测
+
+启动本地模拟服务（或连接已有的模拟服务），用语料样本驱动
+AIProcessor.classify_content 以及同步层（Flomo/Notion），输出：
+- 每条剪切板平均调用AI的次数
+- 单条处理延迟 p50/p90/p99、AI判定耗时（time-to-decision）
+- 吞吐量（条/秒）
+- 结论与期望去向的一致率，以及多轮重复下结论的稳定性
+
+全程只访问 127.0.0.1，不需要网络和真实API Key。
+
+用法（在项目根目录执行）：
+    python -m benchmarks.run_classifier_bench --repeat 3 --concurrency 4 --sinks
+    python -m benchmarks.run_classifier_bench --provider claude --no-stream --json result.json
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from urllib.request import Request, urlopen
+
+# 确保项目根目录在Python路径中
+_root_dir = Path(__file__).parent.parent
+if str(_root_dir) not in sys.path:
+    sys.path.insert(0, str(_root_dir))
+
+from loguru import logger
+
+from benchmarks.mock_server import (
+    MockServer, add_behavior_arguments, app_env_for, behavior_from_args, load_corpus
+)
+
+
+# 压测使用独立的数据库结构缓存，不污染 data/ 目录
+BENCH_SCHEMA_CACHE = Path(tempfile.gettempdir()) / "quicknote_bench_notion_schema.json"
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """最近秩法求百分位数"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100.0 * len(ordered) + 0.5)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def _server_stats(base_url: str) -> Dict[str, int]:
+    with urlopen(f"{base_url}/_stats", timeout=5) as response:
+        return json.loads(response.read().decode("utf-8")).get("counters", {})
+
+
+def _server_reset(base_url: str):
+    request = Request(f"{base_url}/_reset", data=b"{}", method="POST", headers={"Content-Type": "application/json"})
+    with urlopen(request, timeout=5):
+        pass
+
+
+def _point_env_at(base_url: str, provider: str):
+    """把所有外部服务地址指向模拟服务（必须在导入 src.utils.config 之前调用）"""
+    os.environ.update(app_env_for(base_url, provider=provider))
+
+
+class BenchRunner:
+    """压测执行器"""
+
+    def __init__(self, args, base_url: str):
+        from src.core.ai_processor import AIProcessor
+        from src.utils.config import config
+
+        self.args = args
+        self.base_url = base_url
+        self.config = config
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.decision_ms: List[float] = []
+        self.early_stops = 0
+        self.analyze_calls = 0
+
+        runner = self
+
+        class _TimedProcessor(AIProcessor):
+            """记录每一次AI调用的耗时"""
+
+            def _record_timing(self, decision_time, total_time, streamed, early_stop):
+                super()._record_timing(decision_time, total_time, streamed, early_stop)
+                with runner._lock:
+                    runner.analyze_calls += 1
+                    runner.decision_ms.append(decision_time * 1000)
+                    if early_stop:
+                        runner.early_stops += 1
+
+        self._processor_cls = _TimedProcessor
+
+    def _processor(self):
+        # 每个工作线程独立的处理器，避免共享 last_timing
+        processor = getattr(self._local, "processor", None)
+        if processor is None:
+            processor = self._processor_cls(self.config.ai_provider)
+            processor.stream_enabled = not self.args.no_stream
+            self._local.processor = processor
+        return processor
+
+    def _sinks(self):
+        sinks = getattr(self._local, "sinks", None)
+        if sinks is None:
+            from src.integrations.flomo_api import FlomoAPI
+            from src.integrations.notion_api import NotionAPI
+            sinks = {
+                "flomo": FlomoAPI(self.config.flomo_api_url),
+                "notion": NotionAPI(
+                    self.config.notion_api_key, self.config.notion_database_id,
+                    base_url=self.base_url, schema_cache_path=BENCH_SCHEMA_CACHE
+                ),
+            }
+            self._local.sinks = sinks
+        return sinks
+
+    def run_one(self, sample: Dict[str, Any]) -> Dict[str, Any]:
+        """处理一条样本：分类 +（可选）同步"""
+        processor = self._processor()
+        start = time.perf_counter()
+        error = None
+        result: Dict[str, Any] = {}
+        try:
+            result = processor.classify_content(sample["text"]) or {}
+        except Exception as e:
+            error = str(e)
+        target = result.get("type") if result.get("valuable") else None
+        classify_ms = (time.perf_counter() - start) * 1000
+
+        sink_status = None
+        if self.args.sinks and target:
+            sinks = self._sinks()
+            if target == "flomo":
+                sink_status = sinks["flomo"].add_memo(sample["text"], tags=result.get("tags") or [])
+            elif target == "notion":
+                sink_status = sinks["notion"].add_inspiration(
+                    sample["text"], title=result.get("title"), tags=result.get("tags") or []
+                )
+            else:
+                # 滴答清单通过SMTP发送，不经过模拟HTTP服务
+                sink_status = "skipped"
+
+        return {
+            "id": sample.get("id"),
+            "expected": sample.get("expected"),
+            "target": target,
+            "error": error,
+            "sink": sink_status,
+            "classify_ms": classify_ms,
+            "total_ms": (time.perf_counter() - start) * 1000,
+        }
+
+    def run(self, samples: List[Dict[str, Any]]) -> Dict[str, Any]:
+        jobs = [sample for _ in range(self.args.repeat) for sample in samples]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.args.concurrency) as pool:
+            outcomes = list(pool.map(self.run_one, jobs))
+        wall = time.perf_counter() - start
+        return self._report(outcomes, wall)
+
+    def _report(self, outcomes: List[Dict[str, Any]], wall: float) -> Dict[str, Any]:
+        counters = _server_stats(self.base_url)
+        clips = len(outcomes)
+        latencies = [o["total_ms"] for o in outcomes]
+        agree = sum(1 for o in outcomes if o["target"] == o["expected"] and not o["error"])
+
+        # 稳定性：同一条样本多轮结论中，占多数的结论所占比例
+        by_sample: Dict[Any, Counter] = {}
+        for o in outcomes:
+            by_sample.setdefault(o["id"], Counter())[o["target"]] += 1
+        stability = [max(c.values()) / sum(c.values()) for c in by_sample.values()]
+
+        sink_outcomes = Counter(str(o["sink"]) for o in outcomes if o["sink"] is not None)
+
+        def fmt(value):
+            return None if value is None else round(value, 1)
+
+        return {
+            "provider": self.config.ai_provider,
+            "streaming": not self.args.no_stream,
+            "clips": clips,
+            "concurrency": self.args.concurrency,
+            "wall_seconds": round(wall, 3),
+            "throughput_clips_per_s": round(clips / wall, 2) if wall else None,
+            "llm_requests": counters.get("llm", 0),
+            "llm_injected_errors": counters.get("llm_error", 0),
+            "analyze_calls": self.analyze_calls,
+            "calls_per_clip": round(self.analyze_calls / clips, 2) if clips else None,
+            "early_stop_ratio": round(self.early_stops / self.analyze_calls, 3) if self.analyze_calls else None,
+            "latency_ms": {
+                "p50": fmt(percentile(latencies, 50)),
+                "p90": fmt(percentile(latencies, 90)),
+                "p99": fmt(percentile(latencies, 99)),
+                "max": fmt(max(latencies) if latencies else None),
+            },
+            "decision_ms": {
+                "p50": fmt(percentile(self.decision_ms, 50)),
+                "p99": fmt(percentile(self.decision_ms, 99)),
+            },
+            "verdict_agreement": round(agree / clips, 3) if clips else None,
+            "verdict_stability": round(sum(stability) / len(stability), 3) if stability else None,
+            "errors": sum(1 for o in outcomes if o["error"]),
+            "sink_results": dict(sink_outcomes),
+            "sink_requests": {key: counters.get(key, 0) for key in ("flomo", "notion_pages")},
+        }
+
+
+def print_report(report: Dict[str, Any]):
+    print("")
+    print("=" * 56)
+    print(f" 剪切板分类压测  provider={report['provider']}  streaming={report['streaming']}")
+    print("=" * 56)
+    print(f" 样本条数          {report['clips']}（并发 {report['concurrency']}）")
+    print(f" 总耗时            {report['wall_seconds']} s")
+    print(f" 吞吐量            {report['throughput_clips_per_s']} 条/秒")
+    print(f" AI调用次数        {report['analyze_calls']}（HTTP请求 {report['llm_requests']}，注入错误 {report['llm_injected_errors']}）")
+    print(f" 每条调用次数      {report['calls_per_clip']}")
+    print(f" 提前终止占比      {report['early_stop_ratio']}")
+    lat = report["latency_ms"]
+    print(f" 单条延迟(ms)      p50={lat['p50']}  p90={lat['p90']}  p99={lat['p99']}  max={lat['max']}")
+    dec = report["decision_ms"]
+    print(f" 判定耗时(ms)      p50={dec['p50']}  p99={dec['p99']}")
+    print(f" 结论一致率        {report['verdict_agreement']}")
+    print(f" 结论稳定性        {report['verdict_stability']}")
+    print(f" 处理异常          {report['errors']}")
+    if report["sink_results"]:
+        print(f" 同步结果          {report['sink_results']}  请求数 {report['sink_requests']}")
+    print("=" * 56)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="剪切板分类链路离线压测")
+    parser.add_argument("--corpus", default=str(Path(__file__).parent / "corpus" / "clipboard_samples.jsonl"))
+    parser.add_argument("--provider", default="deepseek", choices=["openai", "deepseek", "claude"])
+    parser.add_argument("--server-url", default=None, help="使用已启动的模拟服务（默认在进程内启动一个）")
+    parser.add_argument("--repeat", type=int, default=3, help="语料重复轮数")
+    parser.add_argument("--concurrency", type=int, default=1, help="并发处理的剪切板条数")
+    parser.add_argument("--no-stream", action="store_true", help="关闭流式判定（对比用）")
+    parser.add_argument("--sinks", action="store_true", help="分类后同步到模拟的 Flomo/Notion")
+    parser.add_argument("--json", dest="json_path", default=None, help="把结果写入JSON文件")
+    parser.add_argument("--verbose", action="store_true", help="输出详细日志")
+    add_behavior_arguments(parser)
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logger.remove()
+        logger.add(sys.stderr, level="WARNING")
+
+    samples = load_corpus(args.corpus)
+    server = None
+    if args.server_url:
+        base_url = args.server_url.rstrip("/")
+    else:
+        behavior = behavior_from_args(args)
+        behavior.load_script(samples)
+        server = MockServer(behavior).start()
+        base_url = server.base_url
+
+    try:
+        _point_env_at(base_url, args.provider)
+        _server_reset(base_url)
+        report = BenchRunner(args, base_url).run(samples)
+    finally:
+        if server:
+            server.stop()
+
+    print_report(report)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""剪切板历史存储查询压测
+
+在临时数据库中写入 N 条（默认10万）合成剪切板记录（以语料样本为基础拼接变化），
+统计批量写入吞吐量，以及最近记录（含按 id 深处翻页）、全文搜索（3字以上走 trigram 索引、短词走 LIKE 扫描）、
+按分类结论筛选的查询耗时分位数。任一查询 p90 超过预算时以退出码 1 结束。
+
+用法（在项目根目录执行）：
+    python -m benchmarks.run_clipboard_store_bench --entries 100000 --budget-ms 5
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+# 确保项目根目录在Python路径中
+_root_dir = Path(__file__).parent.parent
+if str(_root_dir) not in sys.path:
+    sys.path.insert(0, str(_root_dir))
+
+from loguru import logger
+
+CORPUS = _root_dir / "benchmarks" / "corpus" / "clipboard_samples.jsonl"
+VERDICTS = ["notion", "flomo", "ticktick", "ignored", "duplicate", None]
+
+
+def _load_texts() -> List[str]:
+    texts = []
+    with open(CORPUS, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                texts.append(json.loads(line)["text"])
+    return texts
+
+
+def _timed(func: Callable, rounds: int) -> Dict[str, float]:
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "p50": round(statistics.median(samples), 3),
+        "p90": round(samples[int(len(samples) * 0.9) - 1], 3),
+        "max": round(samples[-1], 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="剪切板历史存储查询压测")
+    parser.add_argument("--entries", type=int, default=100000, help="写入的记录数")
+    parser.add_argument("--rounds", type=int, default=50, help="每种查询的重复次数")
+    parser.add_argument("--budget-ms", type=float, default=5.0, help="单次查询 p90 预算（毫秒）")
+    parser.add_argument("--json", dest="json_path", default=None, help="把结果写入JSON文件")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="ERROR")
+
+    from src.utils.clipboard_store import ClipboardHistoryStore
+
+    rng = random.Random(42)
+    texts = _load_texts()
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ClipboardHistoryStore(Path(tmp) / "history.db", max_entries=0, max_age_days=0, batch_size=500)
+
+        start = time.perf_counter()
+        now = time.time() - args.entries
+        for i in range(args.entries):
+            text = f"{rng.choice(texts)} #{i} {rng.choice(texts)[:rng.randint(5, 40)]}"
+            store.add(text, created_at=now + i)
+            verdict = rng.choice(VERDICTS)
+            if verdict:
+                store.set_verdict(text, verdict)
+        store.flush(timeout=600)
+        write_seconds = time.perf_counter() - start
+        print(f"写入 {args.entries} 条: {write_seconds:.1f}s（{args.entries / write_seconds:.0f} 条/秒），共 {store.count()} 条")
+
+        words = [t[i:i + 4] for t in texts for i in (0, 5) if len(t) > i + 4]
+        queries = {
+            "recent(50)": lambda: store.recent(50),
+            "recent(50, offset=1000)": lambda: store.recent(50, offset=1000),
+            # 历史窗口滚动加载：按 id 翻页，深处翻页与第一页同样快
+            "recent(200, 深处翻页)": lambda: store.recent(200, before_id=rng.randint(1, args.entries)),
+            "search(4字, 翻页)": lambda: store.search(rng.choice(words), 200, before_id=rng.randint(1, args.entries)),
+            "search(4字+筛选)": lambda: store.search(rng.choice(words), 200, verdict="ticktick"),
+            "search(4字)": lambda: store.search(rng.choice(words), 50),
+            "search(2字)": lambda: store.search(rng.choice(words)[:2], 50),
+            "search(罕见词)": lambda: store.search("#99999 ", 50),
+            # 无结果的短词：LIKE 扫描完整个窗口，是最坏情况
+            "search(2字无结果)": lambda: store.search("鑫鑫", 50),
+            "by_verdict(ticktick)": lambda: store.by_verdict("ticktick", 50),
+            "by_verdict(未分类)": lambda: store.by_verdict(None, 50),
+        }
+        results = {name: _timed(func, args.rounds) for name, func in queries.items()}
+        store.close()
+
+    failures = []
+    print(f"\n{'查询':<26}{'p50ms':>9}{'p90ms':>9}{'maxms':>9}")
+    for name, stats in results.items():
+        over = stats["p90"] > args.budget_ms
+        if over:
+            failures.append(name)
+        print(f"{name:<26}{stats['p50']:>9.3f}{stats['p90']:>9.3f}{stats['max']:>9.3f}{'  超出' if over else ''}")
+    ok = not failures
+    print(f"结果: {'通过' if ok else '未通过（' + ', '.join(failures) + '）'}（预算 p90 ≤ {args.budget_ms:g}ms）")
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "entries": args.entries,
+                "write_seconds": round(write_seconds, 2),
+                "queries": results,
+                "budget_ms": args.budget_ms,
+                "passed": ok,
+            }, f, ensure_ascii=False, indent=2)
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""多目标并行分发压测
+
+把一批笔记同时发送到 Notion、Flomo 和滴答清单（HTTP / SMTP 模拟服务），观察：
+- 每条笔记的总耗时是否接近最慢的单个目标（并行），而不是各目标之和（串行）
+- 各目标的发送次数、成功/失败次数和耗时分位数
+
+用法（在项目根目录执行）：
+    python -m benchmarks.run_fanout_bench --notes 20 --latency fixed:200
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+# 确保项目根目录在Python路径中
+_root_dir = Path(__file__).parent.parent
+if str(_root_dir) not in sys.path:
+    sys.path.insert(0, str(_root_dir))
+
+from loguru import logger
+
+from benchmarks.mock_server import MockBehavior, MockServer
+from benchmarks.mock_smtp import MockSMTPServer
+from benchmarks.run_classifier_bench import BENCH_SCHEMA_CACHE
+
+
+def main():
+    parser = argparse.ArgumentParser(description="多目标并行分发压测")
+    parser.add_argument("--notes", type=int, default=20, help="发送的笔记数")
+    parser.add_argument("--latency", default="fixed:200", help="模拟服务响应延迟分布")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="模拟服务随机失败率")
+    parser.add_argument("--json", dest="json_path", default=None, help="把结果写入JSON文件")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="ERROR")
+
+    from src.integrations.flomo_api import FlomoAPI
+    from src.integrations.notion_api import NotionAPI
+    from src.integrations.notion_writer import NotionWriter
+    from src.integrations.sinks import FanOutDispatcher, FlomoSink, Note, NotionSink, TickTickSink
+    from src.integrations.ticktick_api import TickTickAPI
+    from src.utils.rate_limiter import TokenBucket
+
+    behavior = MockBehavior(latency=args.latency, error_rate=args.error_rate)
+    with MockServer(behavior) as server, MockSMTPServer(behavior) as smtp:
+        api = NotionAPI(
+            "bench-key", "bench-database",
+            base_url=server.base_url,
+            # 只测分发并行度，不让客户端限流成为瓶颈
+            rate_limiter=TokenBucket(1000, 1000),
+            schema_cache_path=BENCH_SCHEMA_CACHE
+        )
+        writer = NotionWriter(api, max_attempts=1)
+        dispatcher = FanOutDispatcher()
+        dispatcher.register(NotionSink(writer))
+        dispatcher.register(FlomoSink(FlomoAPI(f"{server.base_url}/flomo/bench")))
+        smtp_host, smtp_port = smtp.address
+        dispatcher.register(TickTickSink(TickTickAPI(
+            smtp_host, smtp_port, "bench@example.com", "bench-pass", "todo+bench@mail.dida365.com", use_ssl=False
+        )))
+        targets = ["notion", "flomo", "ticktick"]
+
+        note_seconds = []
+        all_succeeded = 0
+        start = time.perf_counter()
+        for i in range(args.notes):
+            note = Note(f"分发压测笔记 {i}", title=f"fanout-{i}", tags=["压测"], due_date="20250101T090000+0800")
+            begin = time.perf_counter()
+            results = dispatcher.dispatch(note, targets).result()
+            note_seconds.append(time.perf_counter() - begin)
+            all_succeeded += all(r.success for r in results)
+        wall = time.perf_counter() - start
+        writer.stop(timeout=0)
+
+    metrics = dispatcher.metrics()
+    note_ms = sorted(round(s * 1000, 1) for s in note_seconds)
+    per_sink_p50_sum = sum(m["latency_ms"]["p50"] or 0 for m in metrics.values())
+    report = {
+        "notes": args.notes,
+        "all_sinks_succeeded": all_succeeded,
+        "wall_seconds": round(wall, 3),
+        "note_latency_ms": {
+            "p50": note_ms[len(note_ms) // 2] if note_ms else None,
+            "max": note_ms[-1] if note_ms else None,
+        },
+        "serial_estimate_ms": round(per_sink_p50_sum, 1),
+        "sinks": metrics,
+    }
+
+    print("")
+    print("=" * 60)
+    print(f" 多目标并行分发压测  延迟={args.latency}  目标=Notion + Flomo + 滴答清单")
+    print("=" * 60)
+    print(f" 笔记数            {report['notes']}（全部目标成功 {all_succeeded}）")
+    print(f" 每条耗时(ms)      p50={report['note_latency_ms']['p50']}  max={report['note_latency_ms']['max']}")
+    print(f" 串行估算(ms)      {report['serial_estimate_ms']}（各目标 p50 之和）")
+    print(f" {'目标':<10}{'发送':>6}{'成功':>6}{'失败':>6}{'p50(ms)':>10}{'p90(ms)':>10}{'max(ms)':>10}")
+    for name, m in metrics.items():
+        lat = m["latency_ms"]
+        print(f" {name:<10}{m['sent']:>6}{m['succeeded']:>6}{m['failed']:>6}{lat['p50']:>10}{lat['p90']:>10}{lat['max']:>10}")
+    print("=" * 60)
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""后台I/O循环并发压测
+
+对比两种并发方式在 N 路同时同步时的吞吐量和线程数：
+- loop：所有请求（AI分类 + Flomo同步）作为协程提交到同一个后台I/O循环
+- threads：每路同步占用一个线程，调用阻塞接口（旧实现方式）
+
+每路同步 = 一次AI分类请求 + 一次Flomo写入，模拟服务带固定延迟，
+预期 loop 模式吞吐量随并发数线性增长，而线程数保持不变。
+
+用法（在项目根目录执行）：
+    python -m benchmarks.run_io_loop_bench --levels 1,10,50 --latency fixed:200
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from pathlib import Path
+
+# 确保项目根目录在Python路径中
+_root_dir = Path(__file__).parent.parent
+if str(_root_dir) not in sys.path:
+    sys.path.insert(0, str(_root_dir))
+
+import requests
+from loguru import logger
+
+from benchmarks.mock_server import MockBehavior, MockServer, load_corpus
+from benchmarks.run_classifier_bench import _point_env_at
+
+
+def _client_thread_count() -> int:
+    """进程内线程数（不含模拟服务处理请求的线程）"""
+    return sum(1 for t in threading.enumerate() if "process_request_thread" not in t.name)
+
+
+class ThreadSampler:
+    """后台采样客户端线程数的峰值"""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.peak = _client_thread_count()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, _client_thread_count())
+            time.sleep(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def run_loop_mode(processor, flomo, samples, prompt: str, concurrency: int):
+    """所有同步作为协程提交到I/O循环"""
+    from src.core.io_loop import get_io_loop
+    io = get_io_loop()
+
+    async def one_sync(sample):
+        result = await processor.analyze_content_async(sample["text"], prompt, stream=False)
+        return await flomo.add_memo_async(sample["text"], tags=(result or {}).get("tags"))
+
+    futures = [io.submit(one_sync(samples[i % len(samples)])) for i in range(concurrency)]
+    wait(futures)
+    return sum(1 for f in futures if f.exception() is None and f.result())
+
+
+def run_thread_mode(processor, flomo_url, samples, prompt: str, concurrency: int):
+    """每路同步一个线程，调用阻塞接口"""
+    def one_sync(sample):
+        response = processor.client.chat.completions.create(
+            model=processor.model,
+            messages=[{"role": "user", "content": prompt.replace("{content}", sample["text"])}],
+        )
+        tags = json.loads(response.choices[0].message.content).get("tags")
+        reply = requests.post(flomo_url, json={"content": sample["text"], "tags": tags}, timeout=10)
+        return reply.status_code == 200
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [pool.submit(one_sync, samples[i % len(samples)]) for i in range(concurrency)]
+        wait(futures)
+    return sum(1 for f in futures if f.exception() is None and f.result())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="后台I/O循环并发压测")
+    parser.add_argument("--levels", default="1,10,50", help="并发同步数（逗号分隔）")
+    parser.add_argument("--latency", default="fixed:200", help="模拟服务延迟分布")
+    parser.add_argument("--modes", default="loop,threads", help="压测模式（loop/threads）")
+    parser.add_argument("--corpus", default=str(Path(__file__).parent / "corpus" / "clipboard_samples.jsonl"))
+    parser.add_argument("--json", dest="json_path", default=None, help="把结果写入JSON文件")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="ERROR")
+
+    samples = [s for s in load_corpus(args.corpus) if (s.get("verdict") or {}).get("valuable")]
+    levels = [int(v) for v in args.levels.split(",") if v.strip()]
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+
+    behavior = MockBehavior(latency=args.latency, chunk_ms=0)
+    behavior.load_script(samples)
+    rows = []
+    with MockServer(behavior) as server:
+        _point_env_at(server.base_url, "deepseek")
+        from src.core.ai_processor import AIProcessor
+        from src.core.io_loop import get_io_loop
+        from src.integrations.flomo_api import FlomoAPI
+
+        processor = AIProcessor("deepseek")
+        flomo_url = f"{server.base_url}/flomo/bench"
+        flomo = FlomoAPI(flomo_url)
+        prompt = "请判断以下内容是否值得保存。\n\n待分析内容：\n{content}"
+        get_io_loop()
+
+        for mode in modes:
+            for level in levels:
+                with ThreadSampler() as sampler:
+                    start = time.perf_counter()
+                    if mode == "loop":
+                        ok = run_loop_mode(processor, flomo, samples, prompt, level)
+                    else:
+                        ok = run_thread_mode(processor, flomo_url, samples, prompt, level)
+                    wall = time.perf_counter() - start
+                rows.append({
+                    "mode": mode,
+                    "concurrency": level,
+                    "succeeded": ok,
+                    "wall_seconds": round(wall, 3),
+                    "syncs_per_second": round(level / wall, 2),
+                    "peak_threads": sampler.peak,
+                })
+
+    print("")
+    print("=" * 64)
+    print(f" 后台I/O循环并发压测  延迟={args.latency}（每路同步 = AI分类 + Flomo写入）")
+    print("=" * 64)
+    print(f" {'模式':<8}{'并发':>6}{'成功':>6}{'耗时(s)':>10}{'同步/秒':>10}{'峰值线程数':>12}")
+    for row in rows:
+        print(
+            f" {row['mode']:<8}{row['concurrency']:>6}{row['succeeded']:>6}"
+            f"{row['wall_seconds']:>10}{row['syncs_per_second']:>10}{row['peak_threads']:>12}"
+        )
+    print("=" * 64)
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(rows, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
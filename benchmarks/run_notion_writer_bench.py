@@ -0,0 +1,105 @@
+"""Notion 写入队列限流压测
+
+启动带速率限制的模拟 Notion 服务（超出速率返回 429 + Retry-After），
+一次性提交一批页面到 NotionWriter，观察：
+- 是否全部写入成功（没有因429丢失）
+- 收到的429次数、重试次数
+- 排队等待时间 p50/p90/max 与实际写入速率
+
+用法（在项目根目录执行）：
+    python -m benchmarks.run_notion_writer_bench --pages 30 --notion-rate 2
+    python -m benchmarks.run_notion_writer_bench --pages 30 --client-rate 10   # 故意超过服务端限额，触发429
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+# 确保项目根目录在Python路径中
+_root_dir = Path(__file__).parent.parent
+if str(_root_dir) not in sys.path:
+    sys.path.insert(0, str(_root_dir))
+
+from loguru import logger
+
+from benchmarks.mock_server import MockBehavior, MockServer
+from benchmarks.run_classifier_bench import BENCH_SCHEMA_CACHE, _server_stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Notion 写入队列限流压测")
+    parser.add_argument("--pages", type=int, default=30, help="提交的页面数")
+    parser.add_argument("--notion-rate", type=float, default=3.0, help="模拟服务端每秒允许的请求数")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="429 响应的 Retry-After 秒数")
+    parser.add_argument("--client-rate", type=float, default=3.0, help="客户端令牌桶速率（次/秒）")
+    parser.add_argument("--burst", type=float, default=3.0, help="客户端令牌桶容量")
+    parser.add_argument("--latency", default="fixed:20", help="模拟服务响应延迟分布")
+    parser.add_argument("--workers", type=int, default=3, help="写入协程数")
+    parser.add_argument("--timeout", type=float, default=120.0, help="等待队列写完的最长时间（秒）")
+    parser.add_argument("--json", dest="json_path", default=None, help="把结果写入JSON文件")
+    parser.add_argument("--verbose", action="store_true", help="输出详细日志")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logger.remove()
+        logger.add(sys.stderr, level="ERROR")
+
+    from src.integrations.notion_api import NotionAPI
+    from src.integrations.notion_writer import NotionWriter
+    from src.utils.rate_limiter import TokenBucket
+
+    behavior = MockBehavior(latency=args.latency, notion_rate=args.notion_rate, notion_retry_after=args.retry_after)
+    with MockServer(behavior) as server:
+        api = NotionAPI(
+            "bench-key", "bench-database",
+            base_url=server.base_url,
+            rate_limiter=TokenBucket(args.client_rate, args.burst),
+            schema_cache_path=BENCH_SCHEMA_CACHE
+        )
+        writer = NotionWriter(api, max_attempts=10, workers=args.workers)
+
+        results = []
+        start = time.perf_counter()
+        for i in range(args.pages):
+            writer.submit(
+                f"压测页面 {i}：令牌桶限流与 Retry-After 重试",
+                callback=lambda ok, info: results.append(ok),
+                title=f"bench-{i}",
+                ai_extract_title=False
+            )
+        drained = writer.flush(args.timeout)
+        wall = time.perf_counter() - start
+        writer.stop(timeout=0)
+        counters = _server_stats(server.base_url)
+
+    metrics = writer.metrics()
+    report = {
+        "pages": args.pages,
+        "drained": drained,
+        "wall_seconds": round(wall, 3),
+        "pages_per_second": round(metrics["succeeded"] / wall, 2) if wall else None,
+        "server_requests": counters.get("notion_pages", 0),
+        "server_429": counters.get("notion_429", 0),
+        **metrics,
+    }
+
+    print("")
+    print("=" * 56)
+    print(f" Notion写入限流压测  服务端 {args.notion_rate}/s  客户端 {args.client_rate}/s")
+    print("=" * 56)
+    print(f" 提交页面          {report['pages']}")
+    print(f" 成功 / 失败       {report['succeeded']} / {report['failed']}（队列已清空: {drained}）")
+    print(f" 服务端请求数      {report['server_requests']}（429: {report['server_429']}，重试 {report['retried']}）")
+    print(f" 总耗时            {report['wall_seconds']} s（{report['pages_per_second']} 页/秒）")
+    wait = report["queue_wait_ms"]
+    print(f" 排队等待(ms)      p50={wait['p50']}  p90={wait['p90']}  max={wait['max']}")
+    print("=" * 56)
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
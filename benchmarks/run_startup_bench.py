@@ -0,0 +1,143 @@
+"""启动导入耗时压测
+
+用 python -X importtime 在子进程中导入启动路径上的模块，统计：
+- 启动导入总耗时（与预算比较）
+- 累计耗时最多的模块
+- 启动时是否误导入了应延迟加载的重型SDK（openai / anthropic / notion_client）
+
+超出预算或导入了重型SDK时以退出码 1 结束，可用作启动时间的回归检查。
+
+用法（在项目根目录执行）：
+    python -m benchmarks.run_startup_bench --budget-ms 400
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+# 确保项目根目录在Python路径中
+_root_dir = Path(__file__).parent.parent
+if str(_root_dir) not in sys.path:
+    sys.path.insert(0, str(_root_dir))
+
+# 完整启动入口（需要 PyQt5 / pynput / pyperclip）
+GUI_MODULES = ["src.main"]
+
+# 不依赖界面库的启动路径（界面库未安装时使用）
+CORE_MODULES = [
+    "src.utils.config",
+    "src.core.ai_processor",
+    "src.core.components",
+    "src.core.deadline",
+    "src.core.io_loop",
+    "src.integrations.notion_writer",
+    "src.integrations.sinks",
+    "src.utils.clipboard_dedupe",
+    "src.utils.resource_monitor",
+]
+
+# 启动时不应导入的重型SDK（应在组件首次使用或空闲预热时导入）
+HEAVY_MODULES = ["openai", "anthropic", "notion_client"]
+
+
+def _gui_available() -> bool:
+    probe = "import PyQt5.QtWidgets, pynput, pyperclip"
+    return subprocess.run([sys.executable, "-c", probe], capture_output=True).returncode == 0
+
+
+def measure(modules: List[str]) -> Tuple[float, Dict[str, Tuple[int, int]], float]:
+    """
+    在子进程中导入模块并解析 -X importtime 输出
+
+    Returns:
+        (导入总耗时ms, {模块: (自身us, 累计us)}, 进程墙钟耗时ms)
+    """
+    code = "import time; _t = time.perf_counter(); " + "; ".join(f"import {m}" for m in modules) + \
+        "; print(f'WALL {(time.perf_counter() - _t) * 1000:.1f}')"
+    env = dict(os.environ, PYTHONPATH=str(_root_dir))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, cwd=str(_root_dir), env=env
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"导入失败:\n{result.stderr[-2000:]}")
+
+    imports: Dict[str, Tuple[int, int]] = {}
+    total_us = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        except ValueError:
+            continue
+        raw_name = name.rstrip()
+        name = raw_name.strip()
+        imports[name] = (int(self_us), int(cumulative_us))
+        # 顶层导入（缩进最少）的累计耗时之和即为导入总耗时
+        if len(raw_name) - len(raw_name.lstrip()) == 1:
+            total_us += int(cumulative_us)
+
+    wall_ms = 0.0
+    for line in result.stdout.splitlines():
+        if line.startswith("WALL "):
+            wall_ms = float(line.split()[1])
+    return total_us / 1000, imports, wall_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description="启动导入耗时压测")
+    parser.add_argument("--budget-ms", type=float, default=400, help="启动导入总耗时预算（毫秒）")
+    parser.add_argument("--runs", type=int, default=3, help="重复次数（取中位数，减少磁盘缓存影响）")
+    parser.add_argument("--top", type=int, default=15, help="显示累计耗时最多的模块数")
+    parser.add_argument("--core", action="store_true", help="只测不依赖界面库的启动路径")
+    parser.add_argument("--json", dest="json_path", default=None, help="把结果写入JSON文件")
+    args = parser.parse_args()
+
+    modules = CORE_MODULES if args.core or not _gui_available() else GUI_MODULES
+    if modules is CORE_MODULES and not args.core:
+        print("未安装界面库（PyQt5 / pynput / pyperclip），只测不依赖界面库的启动路径")
+
+    runs = []
+    for _ in range(max(1, args.runs)):
+        runs.append(measure(modules))
+    runs.sort(key=lambda r: r[0])
+    total_ms, imports, wall_ms = runs[len(runs) // 2]
+
+    heavy_loaded = [m for m in HEAVY_MODULES if m in imports]
+    slowest = sorted(
+        ((name, cumulative) for name, (_, cumulative) in imports.items() if "." not in name),
+        key=lambda item: item[1], reverse=True
+    )[:args.top]
+
+    print(f"导入模块: {', '.join(modules)}")
+    print(f"导入总耗时: {total_ms:.1f}ms（墙钟 {wall_ms:.1f}ms，预算 {args.budget_ms:g}ms，{len(runs)} 次取中位数）")
+    print("累计耗时最多的顶层包:")
+    for name, cumulative in slowest:
+        print(f"  {cumulative / 1000:8.1f}ms  {name}")
+    if heavy_loaded:
+        print(f"启动时导入了应延迟加载的SDK: {', '.join(heavy_loaded)}")
+
+    ok = total_ms <= args.budget_ms and not heavy_loaded
+    print("结果: " + ("通过" if ok else "未通过"))
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "modules": modules,
+                "total_ms": round(total_ms, 1),
+                "wall_ms": wall_ms,
+                "budget_ms": args.budget_ms,
+                "heavy_loaded": heavy_loaded,
+                "slowest": [{"module": n, "cumulative_ms": round(c / 1000, 1)} for n, c in slowest],
+                "passed": ok,
+            }, f, ensure_ascii=False, indent=2)
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
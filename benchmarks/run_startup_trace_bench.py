@@ -0,0 +1,158 @@
+"""启动阶段耗时压测
+
+在 Xvfb 虚拟显示中无界面启动完整应用（所有外部服务指向本地模拟服务），
+读取应用写出的启动计时（src/utils/startup_trace.py），统计：
+- 托盘可见时间（tray_ready）、快捷键可用时间（hotkey_ready）、事件循环开始时间（event_loop）
+- 各启动阶段耗时（托盘、快捷键监听、去重记录加载等）
+- 预热前按下快捷键时快速输入窗口的显示耗时（quick_input_show）
+
+多次运行取中位数，任一时间点或阶段超出预算时以退出码 1 结束，可用作启动时间的回归检查。
+需要 PyQt5 / pynput / pyperclip；未设置 DISPLAY 时需要 xvfb-run。
+
+用法（在项目根目录执行）：
+    python -m benchmarks.run_startup_trace_bench --runs 3
+    python -m benchmarks.run_startup_trace_bench --budget tray_ready=1500 --budget hotkey_listener=300
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List
+
+# 确保项目根目录在Python路径中
+_root_dir = Path(__file__).parent.parent
+if str(_root_dir) not in sys.path:
+    sys.path.insert(0, str(_root_dir))
+
+from loguru import logger
+
+from benchmarks.mock_server import MockBehavior, MockServer, app_env_for
+from benchmarks.mock_smtp import MockSMTPServer
+
+# 默认预算（毫秒）：时间点为距进程启动的时间，阶段为单个阶段的耗时
+DEFAULT_BUDGETS = {
+    "tray_ready": 2500,
+    "hotkey_ready": 3000,
+    "event_loop": 3500,
+    "config_validate": 100,
+    "tray_icon": 300,
+    "hotkey_listener": 400,
+    "integrations": 200,
+    "clipboard_dedupe": 200,
+    "resource_monitor": 200,
+    # 预热前按下快捷键时窗口从创建到可见的耗时
+    "quick_input_show": 1200,
+}
+
+
+def _parse_budgets(items: List[str]) -> Dict[str, float]:
+    budgets = dict(DEFAULT_BUDGETS)
+    for item in items:
+        name, _, value = item.partition("=")
+        if not name or not value:
+            raise SystemExit(f"预算格式应为 名称=毫秒: {item}")
+        budgets[name.strip()] = float(value)
+    return budgets
+
+
+def run_once(env: Dict[str, str], use_xvfb: bool, timeout: float) -> Dict:
+    """启动一次应用，等待其写出启动计时后退出，返回计时汇总"""
+    with tempfile.TemporaryDirectory() as tmp:
+        trace_path = Path(tmp) / "startup.json"
+        run_env = dict(os.environ, **env)
+        run_env["QUICKNOTE_STARTUP_TRACE"] = str(trace_path)
+        run_env["QUICKNOTE_EXIT_AFTER_STARTUP"] = "1"
+        # 独立的单实例名称，避免已运行的应用实例把本次启动当成重复启动
+        run_env["QUICKNOTE_INSTANCE_NAME"] = f"QuickNoteAI-bench-{os.getpid()}"
+        command = [sys.executable, str(_root_dir / "src" / "main.py")]
+        if use_xvfb:
+            command = ["xvfb-run", "-a", "-s", "-screen 0 1920x1080x24"] + command
+        result = subprocess.run(
+            command, cwd=str(_root_dir), env=run_env,
+            capture_output=True, text=True, timeout=timeout
+        )
+        if not trace_path.exists():
+            raise RuntimeError(f"应用未写出启动计时（退出码 {result.returncode}）:\n{result.stderr[-2000:]}")
+        with open(trace_path, encoding="utf-8") as f:
+            return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="启动阶段耗时压测")
+    parser.add_argument("--runs", type=int, default=3, help="启动次数（取中位数）")
+    parser.add_argument("--budget", action="append", default=[], help="覆盖预算：名称=毫秒（可重复）")
+    parser.add_argument("--timeout", type=float, default=60, help="单次启动超时（秒）")
+    parser.add_argument("--no-xvfb", action="store_true", help="直接使用当前 DISPLAY，不启动 Xvfb")
+    parser.add_argument("--json", dest="json_path", default=None, help="把结果写入JSON文件")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="ERROR")
+
+    budgets = _parse_budgets(args.budget)
+    use_xvfb = not args.no_xvfb
+    if use_xvfb and not shutil.which("xvfb-run"):
+        if os.environ.get("DISPLAY"):
+            use_xvfb = False
+            print("未找到 xvfb-run，使用当前 DISPLAY")
+        else:
+            print("未找到 xvfb-run 且未设置 DISPLAY，无法无界面启动应用")
+            sys.exit(2)
+
+    behavior = MockBehavior(latency="fixed:20")
+    with MockServer(behavior) as server, MockSMTPServer(behavior) as smtp:
+        env = app_env_for(server.base_url, smtp.address)
+        traces = []
+        for i in range(max(1, args.runs)):
+            trace = run_once(env, use_xvfb, args.timeout)
+            traces.append(trace)
+            print(f"第 {i + 1} 次: 托盘 {trace['marks'].get('tray_ready', '-')}ms，"
+                  f"快捷键 {trace['marks'].get('hotkey_ready', '-')}ms，总计 {trace['total_ms']}ms")
+
+    # 各时间点和阶段取中位数（同名阶段在一次启动中累加）
+    values: Dict[str, List[float]] = {}
+    for trace in traces:
+        per_run: Dict[str, float] = dict(trace["marks"])
+        for phase in trace["phases"]:
+            per_run[phase["name"]] = per_run.get(phase["name"], 0.0) + phase["duration_ms"]
+        for name, value in per_run.items():
+            values.setdefault(name, []).append(value)
+    medians = {name: round(statistics.median(v), 1) for name, v in values.items()}
+
+    failures = []
+    print(f"\n{'名称':<24}{'中位数ms':>10}{'预算ms':>10}")
+    for name, value in sorted(medians.items(), key=lambda item: item[1], reverse=True):
+        budget = budgets.get(name)
+        over = budget is not None and value > budget
+        if over:
+            failures.append(name)
+        print(f"{name:<24}{value:>10.1f}{(f'{budget:g}' if budget is not None else '-'):>10}{'  超出' if over else ''}")
+    missing = [name for name in ("tray_ready", "hotkey_ready") if name not in medians]
+    if missing:
+        print(f"未记录的时间点: {', '.join(missing)}")
+        failures.extend(missing)
+
+    ok = not failures
+    print("结果: " + ("通过" if ok else f"未通过（{', '.join(failures)}）"))
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "runs": len(traces),
+                "medians_ms": medians,
+                "budgets_ms": budgets,
+                "failures": failures,
+                "traces": traces,
+                "passed": ok,
+            }, f, ensure_ascii=False, indent=2)
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+"""QuickNote AI - 批量导入（回填历史笔记）
+
+把已有的文本导出、Markdown 文件等按 ai_rules 逐条分类并同步，与剪切板自动同步走同一条处理链路：
+- 线程池并发处理；AI请求按提供商限速，各同步目标按目标限速（backfill 配置或命令行参数）
+- 进度写入检查点文件，中断后重新运行同一命令会跳过已完成的条目
+- 与剪切板自动同步共用去重记录（data/clipboard_dedupe.json），已同步过的内容不会重复保存
+- 标准错误定期输出进度、吞吐量和预计剩余时间；每条结果以一行 JSON 输出到标准输出
+
+用法（在项目根目录执行）：
+    python -m src.backfill exports/ --pattern "*.md" --workers 8 > backfill_results.jsonl
+    python -m src.backfill notes.txt --split line --ai-rate 2 --sink-rate flomo=0.5
+    python -m src.backfill exports/ --dry-run --report report.json
+
+退出码与命令行模式相同：0 全部成功；1 有条目处理失败（重新运行会重试）；2 参数或配置错误；130 被中断。
+"""
+import argparse
+import hashlib
+import json
+import signal
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# 确保项目根目录在Python路径中
+_current_dir = Path(__file__).parent.parent
+if str(_current_dir) not in sys.path:
+    sys.path.insert(0, str(_current_dir))
+
+from loguru import logger
+
+from src.cli import (
+    EXIT_OK, EXIT_FAILURES, EXIT_USAGE, EXIT_INTERRUPTED, SPLIT_MODES, ResultWriter, iter_files
+)
+
+
+def collect_files(inputs: List[str], patterns: List[str]) -> List[Path]:
+    """展开输入：文件直接使用，目录递归匹配 patterns（按路径排序，去重）"""
+    files = []
+    for item in inputs:
+        path = Path(item)
+        if path.is_dir():
+            for pattern in patterns:
+                files.extend(p for p in path.rglob(pattern) if p.is_file() and not p.name.startswith("."))
+        elif path.is_file():
+            files.append(path)
+        else:
+            logger.error(f"输入不存在: {item}")
+    return sorted(dict.fromkeys(p.resolve() for p in files))
+
+
+def job_name(files: List[Path]) -> str:
+    """按输入文件列表生成任务名（同一批输入重新运行时使用同一个检查点）"""
+    digest = hashlib.sha1("\n".join(str(p) for p in files).encode("utf-8")).hexdigest()
+    return f"backfill-{digest[:12]}"
+
+
+def item_key(source: str, text: str) -> str:
+    from src.utils.clipboard_dedupe import fingerprint_text
+    return f"{source}|{fingerprint_text(text)}"
+
+
+def _format_duration(seconds: float) -> str:
+    seconds = int(max(0, seconds))
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    if hours:
+        return f"{hours}小时{minutes:02d}分"
+    if minutes:
+        return f"{minutes}分{secs:02d}秒"
+    return f"{secs}秒"
+
+
+def _parse_rates(items: List[str]) -> Dict[str, float]:
+    rates = {}
+    for item in items:
+        name, _, value = item.partition("=")
+        try:
+            rates[name.strip()] = float(value)
+        except ValueError:
+            raise SystemExit(f"限速格式应为 目标=每秒请求数: {item}")
+    return rates
+
+
+class Progress:
+    """进度统计（线程安全）"""
+
+    def __init__(self, total: int, resumed: int):
+        self.total = total
+        self.resumed = resumed
+        self.done = 0
+        self.started_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def advance(self):
+        with self._lock:
+            self.done += 1
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            done = self.done
+        elapsed = time.monotonic() - self.started_at
+        rate = done / elapsed if elapsed > 0 else 0.0
+        remaining = max(0, self.total - done)
+        return {
+            "done": done,
+            "total": self.total,
+            "elapsed_seconds": round(elapsed, 1),
+            "items_per_second": round(rate, 3),
+            "eta_seconds": round(remaining / rate, 1) if rate > 0 else None,
+        }
+
+    def line(self) -> str:
+        snap = self.snapshot()
+        percent = snap["done"] / snap["total"] * 100 if snap["total"] else 100.0
+        eta = _format_duration(snap["eta_seconds"]) if snap["eta_seconds"] is not None else "-"
+        return (f"进度 {snap['done']}/{snap['total']}（{percent:.1f}%），"
+                f"{snap['items_per_second']:.2f} 条/秒，已用 {_format_duration(snap['elapsed_seconds'])}，预计剩余 {eta}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m src.backfill",
+        description="批量导入已有笔记：按 ai_rules 分类并同步，支持限速、断点续传和去重"
+    )
+    parser.add_argument("inputs", nargs="+", help="输入文件或目录（目录递归查找）")
+    parser.add_argument("--pattern", action="append", default=None,
+                        help="目录中匹配的文件名（可重复，默认 *.txt 和 *.md）")
+    parser.add_argument("--split", choices=SPLIT_MODES, default=None,
+                        help="文本切分方式（默认 backfill.split）")
+    parser.add_argument("--input-format", choices=("text", "jsonl"), default="text",
+                        help="jsonl：每行一个JSON（字符串，或含 text、可选 id 的对象）")
+    parser.add_argument("--workers", type=int, default=None, help="并发处理的线程数（默认 backfill.workers）")
+    parser.add_argument("--ai-rate", type=float, default=None,
+                        help="AI请求速率上限（每秒，默认 backfill.ai_requests_per_second.<提供商>，0 表示不限）")
+    parser.add_argument("--sink-rate", action="append", default=[],
+                        help="同步目标速率上限：目标=每秒请求数（可重复，覆盖 backfill.sink_requests_per_second）")
+    parser.add_argument("--classify-budget", type=float, default=None,
+                        help="单条分类的时间预算（秒，含限速等待，默认 backfill.classify_budget_seconds）")
+    parser.add_argument("--checkpoint", default=None, help="检查点文件（默认按输入生成，位于 backfill.checkpoint_dir）")
+    parser.add_argument("--restart", action="store_true", help="丢弃已有检查点，从头开始")
+    parser.add_argument("--dry-run", action="store_true", help="只分类，不同步、不记录去重和检查点")
+    parser.add_argument("--no-dedupe", action="store_true", help="不做去重")
+    parser.add_argument("--dedupe-file", default=None, help="去重记录文件（默认与剪切板自动同步共用）")
+    parser.add_argument("--progress-interval", type=float, default=None, help="进度输出间隔（秒）")
+    parser.add_argument("--report", default=None, help="结束时把汇总写入JSON文件")
+    parser.add_argument("--include-text", action="store_true", help="在结果中附带原文")
+    parser.add_argument("--log-level", default="WARNING", help="标准错误的日志级别（默认 WARNING）")
+    parser.add_argument("-q", "--quiet", action="store_true", help="不输出进度和汇总")
+    return parser
+
+
+def main(argv: Optional[list] = None) -> int:
+    """批量导入主函数，返回退出码"""
+    args = build_parser().parse_args(argv)
+
+    logger.remove()
+    logger.add(sys.stderr, level=args.log_level.upper())
+
+    from src.utils.config import config
+    from src.core.components import components
+    from src.core.io_loop import get_io_loop
+    from src.core.pipeline import STATUS_SYNCED, ai_configured, build_pipeline
+    from src.utils.checkpoint import Checkpoint
+    from src.utils.rate_limiter import TokenBucket
+
+    if not ai_configured(config):
+        logger.error(f"AI未配置（{config.ai_provider}），请检查 .env 中的API Key")
+        return EXIT_USAGE
+    files = collect_files(args.inputs, args.pattern or ["*.txt", "*.md"])
+    if not files:
+        logger.error("没有找到可导入的文件")
+        return EXIT_USAGE
+
+    split = args.split or config.get("backfill.split", "paragraph")
+    workers = max(1, int(args.workers or config.get("backfill.workers", 4)))
+    classify_budget = float(args.classify_budget or config.get("backfill.classify_budget_seconds", 30))
+    interval = float(args.progress_interval or config.get("backfill.progress_interval_seconds", 5))
+    sync_timeout = float(config.get("cli.sync_timeout_seconds", 120))
+
+    def iter_items() -> Iterator[Tuple[str, str]]:
+        return iter_files([str(p) for p in files], split, args.input_format)
+
+    # 预先扫描一遍，得到总条数和需要处理的条数（用于进度和预计剩余时间）
+    checkpoint = None
+    if not args.dry_run:
+        checkpoint_path = Path(args.checkpoint) if args.checkpoint else (
+            config.root_dir / config.get("backfill.checkpoint_dir", "data/backfill") / f"{job_name(files)}.jsonl"
+        )
+        checkpoint = Checkpoint(checkpoint_path, meta={"inputs": [str(p) for p in files], "split": split},
+                                restart=args.restart)
+    total = resumed = 0
+    for source, text in iter_items():
+        total += 1
+        if checkpoint is not None and checkpoint.is_done(item_key(source, text)):
+            resumed += 1
+    if not args.quiet:
+        print(f"共 {len(files)} 个文件、{total} 条内容；检查点中已完成 {resumed} 条，本次处理 {total - resumed} 条",
+              file=sys.stderr)
+
+    dedupe_path = None
+    if not args.no_dedupe and config.get("clipboard.dedupe.enabled", True):
+        dedupe_path = Path(args.dedupe_file or config.root_dir / "data" / "clipboard_dedupe.json")
+    pipeline = build_pipeline(
+        config,
+        dry_run=args.dry_run,
+        dedupe_path=dedupe_path,
+        sync_timeout=sync_timeout,
+        classify_budget=classify_budget,
+        source="backfill"
+    )
+
+    # 限速：AI按当前提供商，同步目标按目标名称（Notion 另有自身的限流器）
+    ai_rate = args.ai_rate if args.ai_rate is not None else float(
+        config.get(f"backfill.ai_requests_per_second.{config.ai_provider}", 0) or 0
+    )
+    if ai_rate > 0:
+        components.get("ai_processor").rate_limiter = TokenBucket(ai_rate, max(1.0, ai_rate))
+    sink_rates = dict(config.get("backfill.sink_requests_per_second", {}) or {})
+    sink_rates.update(_parse_rates(args.sink_rate))
+    for name, rate in sink_rates.items():
+        pipeline.dispatcher.set_rate_limit(name, float(rate or 0))
+    limits = ", ".join(f"{name} {rate:g}/s" for name, rate in sink_rates.items() if rate)
+    logger.info(f"批量导入: {workers} 线程, AI限速 {ai_rate:g}/s" + (f", 目标限速 {limits}" if limits else ""))
+
+    writer = ResultWriter()
+    progress = Progress(total - resumed, resumed)
+    slots = threading.BoundedSemaphore(workers * 2)
+    stop = threading.Event()
+
+    def mark_late(key: str, late):
+        if any(r.success for r in late.result()):
+            checkpoint.mark_done(key, STATUS_SYNCED)
+
+    def run_one(index: int, source: str, text: str, key: str):
+        result = None
+        try:
+            result = pipeline.process(text, dry_run=args.dry_run)
+            record = {"index": index, "source": source, **result.to_dict()}
+            ok = result.ok
+        except Exception as e:
+            logger.error(f"处理失败: {source}: {e}")
+            record = {"index": index, "source": source, "status": "error", "reason": str(e)}
+            ok = False
+        # 只记录成功的条目；失败的条目下次运行时重试
+        if ok and checkpoint is not None:
+            checkpoint.mark_done(key, record["status"])
+        elif checkpoint is not None and result is not None and result.late_sync is not None:
+            # 同步超时但之后成功了：同样记为完成，避免重新运行时再保存一次
+            result.late_sync.add_done_callback(lambda late: mark_late(key, late))
+        if args.include_text:
+            record["text"] = text
+        writer.write(record, ok)
+        progress.advance()
+
+    def report_progress():
+        while not stop.wait(interval):
+            print(progress.line(), file=sys.stderr)
+
+    def on_signal(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, on_signal)
+    if not args.quiet:
+        threading.Thread(target=report_progress, name="backfill-progress", daemon=True).start()
+
+    interrupted = False
+    index = 0
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="backfill-worker")
+    try:
+        for source, text in iter_items():
+            index += 1
+            key = item_key(source, text)
+            if checkpoint is not None and checkpoint.is_done(key):
+                continue
+            while not slots.acquire(timeout=0.2):
+                pass
+            executor.submit(run_one, index, source, text, key).add_done_callback(lambda _: slots.release())
+    except KeyboardInterrupt:
+        interrupted = True
+        logger.warning("收到中断信号，不再提交新条目，等待处理中的条目完成（进度已保存，重新运行同一命令即可继续）")
+    try:
+        executor.shutdown(wait=True, cancel_futures=interrupted)
+        pipeline.close(sync_timeout)
+    except KeyboardInterrupt:
+        interrupted = True
+    stop.set()
+    if checkpoint is not None:
+        checkpoint.close()
+    get_io_loop().stop()
+
+    snap = progress.snapshot()
+    summary = {
+        "files": len(files),
+        "total": total,
+        "resumed": resumed,
+        "processed": snap["done"],
+        "statuses": dict(writer.counts),
+        "failures": writer.failures,
+        "elapsed_seconds": snap["elapsed_seconds"],
+        "items_per_second": snap["items_per_second"],
+        "sinks": pipeline.dispatcher.metrics(),
+        "checkpoint": str(checkpoint.path) if checkpoint is not None else None,
+        "interrupted": interrupted,
+    }
+    if not args.quiet:
+        statuses = "，".join(f"{status} {count}" for status, count in sorted(writer.counts.items()))
+        print(f"完成 {snap['done']} 条，耗时 {_format_duration(snap['elapsed_seconds'])}，"
+              f"{snap['items_per_second']:.2f} 条/秒：{statuses or '无'}", file=sys.stderr)
+        if writer.failures:
+            print(f"{writer.failures} 条失败，重新运行同一命令会重试", file=sys.stderr)
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+
+    if interrupted:
+        return EXIT_INTERRUPTED
+    return EXIT_FAILURES if writer.failures else EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,296 @@
+"""QuickNote AI - 命令行（无界面）入口
+
+不依赖 Qt、托盘和全局键盘钩子，在服务器、脚本或测试中运行剪切板处理链路：
+从标准输入、文件或监视目录读取文本，逐条经过预过滤、去重、AI分类并分发到同步目标，
+每条结果以一行 JSON 输出到标准输出（日志输出到标准错误）。
+
+用法（在项目根目录执行）：
+    echo "明天下午3点产品评审会议" | python -m src.cli
+    python -m src.cli notes.txt --split paragraph --concurrency 8
+    python -m src.cli --watch inbox/ --split file
+    python -m src.cli --input-format jsonl --dry-run < items.jsonl
+
+退出码：0 全部处理成功（含被过滤、重复、判定无需保存的内容）；1 有内容处理失败；
+2 参数或配置错误；130 被中断。
+"""
+import argparse
+import json
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional, TextIO, Tuple
+
+# 确保项目根目录在Python路径中
+_current_dir = Path(__file__).parent.parent
+if str(_current_dir) not in sys.path:
+    sys.path.insert(0, str(_current_dir))
+
+from loguru import logger
+
+EXIT_OK = 0
+EXIT_FAILURES = 1
+EXIT_USAGE = 2
+EXIT_INTERRUPTED = 130
+
+SPLIT_MODES = ("line", "paragraph", "file")
+
+
+def _split_text(text: str, split: str) -> Iterator[Tuple[int, str]]:
+    """按切分方式拆成条目，返回 (序号, 内容)（序号从1开始，按行切分时为行号）"""
+    if split == "file":
+        if text.strip():
+            yield 1, text.strip()
+    elif split == "paragraph":
+        block = []
+        number = 0
+        for line in text.splitlines():
+            if line.strip():
+                block.append(line)
+            elif block:
+                number += 1
+                yield number, "\n".join(block).strip()
+                block = []
+        if block:
+            yield number + 1, "\n".join(block).strip()
+    else:
+        for number, line in enumerate(text.splitlines(), 1):
+            if line.strip():
+                yield number, line.strip()
+
+
+def iter_stream(stream: TextIO, name: str, split: str, input_format: str) -> Iterator[Tuple[str, str]]:
+    """
+    从文本流读取条目（按行切分时逐行读取，不把整个输入读入内存）
+
+    Returns:
+        (来源标识, 内容) 迭代器
+    """
+    if input_format == "jsonl":
+        for number, line in enumerate(stream, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                item = json.loads(line)
+            except ValueError as e:
+                logger.error(f"{name}:{number} 不是有效的JSON，已跳过: {e}")
+                continue
+            if isinstance(item, dict):
+                text = item.get("text")
+                source = str(item.get("id", f"{name}:{number}"))
+            else:
+                text, source = item, f"{name}:{number}"
+            if isinstance(text, str) and text.strip():
+                yield source, text
+        return
+    if split == "line":
+        for number, line in enumerate(stream, 1):
+            if line.strip():
+                yield f"{name}:{number}", line.strip()
+        return
+    for number, text in _split_text(stream.read(), split):
+        yield (name if split == "file" else f"{name}#{number}"), text
+
+
+def iter_files(paths: Iterable[str], split: str, input_format: str,
+               on_error: Optional[Callable[[str, str], None]] = None) -> Iterator[Tuple[str, str]]:
+    """依次读取多个文件（"-" 表示标准输入；读取失败时调用 on_error(路径, 原因)）"""
+    for path in paths:
+        if path == "-":
+            yield from iter_stream(sys.stdin, "stdin", split, input_format)
+            continue
+        try:
+            with open(path, encoding="utf-8") as f:
+                yield from iter_stream(f, path, split, input_format)
+        except (OSError, UnicodeDecodeError) as e:
+            logger.error(f"读取文件失败: {path}: {e}")
+            if on_error is not None:
+                on_error(path, str(e))
+
+
+def iter_watch(directory: Path, pattern: str, split: str, input_format: str, interval: float,
+               stop: threading.Event, skip_existing: bool = False,
+               on_error: Optional[Callable[[str, str], None]] = None) -> Iterator[Tuple[str, str]]:
+    """
+    监视目录：新文件（或内容有变化的文件）写完后读取其中的条目，直到 stop 被设置
+
+    文件在连续两次检查中大小和修改时间都不变才视为写完。
+    """
+    seen = {}
+    last = {}
+    if skip_existing:
+        for path in directory.glob(pattern):
+            if path.is_file():
+                stat = path.stat()
+                seen[path] = (stat.st_mtime_ns, stat.st_size)
+    logger.info(f"开始监视目录: {directory}（{pattern}）")
+    while not stop.is_set():
+        current = {}
+        for path in sorted(directory.glob(pattern)):
+            if not path.is_file() or path.name.startswith("."):
+                continue
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            current[path] = (stat.st_mtime_ns, stat.st_size)
+        for path, signature in current.items():
+            if seen.get(path) == signature or last.get(path) != signature:
+                continue
+            seen[path] = signature
+            yield from iter_files([str(path)], split, input_format, on_error)
+        last = current
+        stop.wait(interval)
+
+
+class ResultWriter:
+    """把处理结果逐行写到标准输出（线程安全）并统计"""
+
+    def __init__(self, stream: TextIO = sys.stdout):
+        self.stream = stream
+        self.counts = Counter()
+        self.failures = 0
+        self._lock = threading.Lock()
+
+    def write(self, record: dict, ok: bool):
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            self.counts[record["status"]] += 1
+            if not ok:
+                self.failures += 1
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m src.cli",
+        description="QuickNote AI 命令行：分类文本并同步到 Notion / Flomo / 滴答清单，结果以 JSON Lines 输出"
+    )
+    parser.add_argument("inputs", nargs="*", help="输入文件（\"-\" 或不指定表示标准输入）")
+    parser.add_argument("--watch", metavar="DIR", help="监视目录，处理新增或修改的文件（持续运行直到中断）")
+    parser.add_argument("--pattern", default="*.txt", help="监视目录时匹配的文件名（默认 *.txt）")
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="监视目录的检查间隔（秒）")
+    parser.add_argument("--skip-existing", action="store_true", help="监视目录时跳过已存在的文件")
+    parser.add_argument("--split", choices=SPLIT_MODES, default="line",
+                        help="文本切分方式：每行一条 / 空行分隔的段落 / 整个文件一条（默认 line）")
+    parser.add_argument("--input-format", choices=("text", "jsonl"), default="text",
+                        help="jsonl：每行一个JSON（字符串，或含 text、可选 id 的对象）")
+    parser.add_argument("--concurrency", type=int, default=None, help="同时处理的条数（默认 cli.concurrency）")
+    parser.add_argument("--dry-run", action="store_true", help="只分类，不同步、不记录去重")
+    parser.add_argument("--no-dedupe", action="store_true", help="不做去重")
+    parser.add_argument("--dedupe-file", default=None, help="去重记录文件（默认 cli.dedupe_path）")
+    parser.add_argument("--no-prefilter", action="store_true", help="不做预过滤（长度、纯数字、URL）")
+    parser.add_argument("--sync-timeout", type=float, default=None, help="单条同步的等待上限（秒）")
+    parser.add_argument("--include-text", action="store_true", help="在结果中附带原文")
+    parser.add_argument("--log-level", default="WARNING", help="标准错误的日志级别（默认 WARNING）")
+    parser.add_argument("-q", "--quiet", action="store_true", help="结束时不输出汇总")
+    return parser
+
+
+def main(argv: Optional[list] = None) -> int:
+    """命令行主函数，返回退出码"""
+    args = build_parser().parse_args(argv)
+
+    # 标准输出只写结果，日志写到标准错误（在导入配置前设置，避免配置加载日志混入）
+    logger.remove()
+    logger.add(sys.stderr, level=args.log_level.upper())
+
+    from src.utils.config import config
+    from src.core.io_loop import get_io_loop
+    from src.core.pipeline import ai_configured, build_pipeline
+
+    if args.watch and args.inputs:
+        logger.error("--watch 不能与输入文件同时使用")
+        return EXIT_USAGE
+    if args.watch and not Path(args.watch).is_dir():
+        logger.error(f"监视目录不存在: {args.watch}")
+        return EXIT_USAGE
+    if not ai_configured(config):
+        logger.error(f"AI未配置（{config.ai_provider}），请检查 .env 中的API Key")
+        return EXIT_USAGE
+
+    concurrency = max(1, int(args.concurrency or config.get("cli.concurrency", 4)))
+    sync_timeout = float(args.sync_timeout or config.get("cli.sync_timeout_seconds", 120))
+    dedupe_path = None
+    if not args.no_dedupe and config.get("clipboard.dedupe.enabled", True):
+        dedupe_path = Path(args.dedupe_file or config.root_dir / config.get("cli.dedupe_path", "data/cli_dedupe.json"))
+    pipeline = build_pipeline(
+        config,
+        dry_run=args.dry_run,
+        dedupe_path=dedupe_path,
+        use_prefilter=not args.no_prefilter,
+        sync_timeout=sync_timeout,
+        source="cli"
+    )
+
+    writer = ResultWriter()
+
+    def on_read_error(path: str, reason: str):
+        writer.write({"index": None, "source": path, "status": "error", "reason": f"读取失败: {reason}"}, False)
+
+    stop = threading.Event()
+    if args.watch:
+        items = iter_watch(Path(args.watch), args.pattern, args.split, args.input_format,
+                           args.poll_interval, stop, args.skip_existing, on_read_error)
+    else:
+        items = iter_files(args.inputs or ["-"], args.split, args.input_format, on_read_error)
+    # 限制已提交未完成的条数，输入很大或持续输入时不会全部读入内存
+    slots = threading.BoundedSemaphore(concurrency * 2)
+
+    def run_one(index: int, source: str, text: str):
+        try:
+            result = pipeline.process(text, dry_run=args.dry_run)
+            record = {"index": index, "source": source, **result.to_dict()}
+            ok = result.ok
+        except Exception as e:
+            logger.error(f"处理失败: {source}: {e}")
+            record = {"index": index, "source": source, "status": "error", "reason": str(e)}
+            ok = False
+        if args.include_text:
+            record["text"] = text
+        writer.write(record, ok)
+
+    def on_signal(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, on_signal)
+
+    start = time.perf_counter()
+    interrupted = False
+    total = 0
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="cli-worker")
+    try:
+        for source, text in items:
+            while not slots.acquire(timeout=0.2):
+                pass
+            total += 1
+            executor.submit(run_one, total, source, text).add_done_callback(lambda _: slots.release())
+    except KeyboardInterrupt:
+        interrupted = True
+        stop.set()
+        logger.warning("收到中断信号，不再读取新内容，等待处理中的内容完成")
+    try:
+        # 中断时丢弃尚未开始的条目，只等待处理中的条目
+        executor.shutdown(wait=True, cancel_futures=interrupted)
+        pipeline.close(sync_timeout)
+    except KeyboardInterrupt:
+        interrupted = True
+    get_io_loop().stop()
+
+    if not args.quiet:
+        elapsed = time.perf_counter() - start
+        summary = "，".join(f"{status} {count}" for status, count in sorted(writer.counts.items()))
+        print(f"共 {total} 条，耗时 {elapsed:.1f}s：{summary or '无输入'}", file=sys.stderr)
+
+    if interrupted:
+        return EXIT_INTERRUPTED
+    return EXIT_FAILURES if writer.failures else EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,116 @@
 """AI内容处理器"""
 import json
-from typing import Dict, Any, Optional
+import re
+import time
+from datetime import datetime, timezone, timedelta
+from typing import Dict, Any, Optional, AsyncIterator, Tuple
 from loguru import logger
 
+from src.core.deadline import Deadline, DeadlineExceeded, CallCancelled
+from src.core.io_loop import get_io_loop
+from src.utils.rate_limiter import TokenBucket
+from src.utils.metrics import metrics
+
+AI_REQUESTS = metrics.counter(
+    "quicknote_ai_requests_total", "AI请求数（outcome: ok/invalid_json/error/timeout/cancelled）",
+    ("provider", "kind", "outcome")
+)
+AI_SECONDS = metrics.histogram("quicknote_ai_request_seconds", "AI请求完整响应耗时", ("provider", "kind"))
+AI_DECISION_SECONDS = metrics.histogram("quicknote_ai_decision_seconds", "AI分类得出判定的耗时（流式可提前）", ("provider",))
+AI_EARLY_STOPS = metrics.counter("quicknote_ai_early_stops_total", "流式判定提前终止次数", ("provider",))
+AI_VERDICTS = metrics.counter("quicknote_ai_verdicts_total", "分类结论数（目标名，或 ignored/failed）", ("verdict",))
+
+
+class VerdictScanner:
+    """
+    分类结果增量扫描器
+    
+    流式接收模型输出的JSON片段，在完整JSON返回之前尽早识别结论：
+    - 一旦出现 "valuable": false，立即判定为否定
+    - 一旦出现与期望规则不符的 "type"，立即判定为不匹配
+    """
+    
+    _VALUABLE_RE = re.compile(r'"valuable"\s*:\s*(true|false)')
+    _TYPE_RE = re.compile(r'"type"\s*:\s*(null|"([^"]*)")')
+    
+    def __init__(self, expected_type: Optional[str] = None):
+        """
+        Args:
+            expected_type: 期望的分类类型（None表示不校验类型）
+        """
+        self.expected_type = expected_type
+        self.text = ""
+        self.valuable: Optional[bool] = None
+        self.type: Optional[str] = None
+        self._type_seen = False
+    
+    @property
+    def decided(self) -> bool:
+        """是否已经可以确定结论（否定，或肯定且类型已知）"""
+        if self.valuable is False:
+            return True
+        if self.valuable is True:
+            return self.expected_type is None or self._type_seen
+        return False
+    
+    def feed(self, chunk: str) -> Optional[str]:
+        """
+        追加一段输出文本
+        
+        Returns:
+            需要提前终止时返回原因，否则返回None
+        """
+        self.text += chunk
+        
+        if self.valuable is None:
+            match = self._VALUABLE_RE.search(self.text)
+            if match:
+                self.valuable = match.group(1) == "true"
+        if not self._type_seen:
+            match = self._TYPE_RE.search(self.text)
+            if match:
+                self._type_seen = True
+                self.type = match.group(2)
+        
+        if self.valuable is False:
+            return "valuable=false"
+        if self.expected_type and self._type_seen and self.type != self.expected_type:
+            return f"type={self.type} 与规则 {self.expected_type} 不符"
+        return None
+
+
+def _current_time_context() -> Tuple[str, str]:
+    """获取当前时间（东八区 UTC+8）及星期，用于时间换算提示词"""
+    tz_cn = timezone(timedelta(hours=8))
+    current_time = datetime.now(tz_cn)
+    return current_time.strftime("%Y-%m-%d %H:%M"), current_time.strftime("%A")
+
+
+def _to_ticktick_datetime(dt_str: str) -> str:
+    """将 AI 返回的时间（YYYY-MM-DD HH:MM）转换为滴答清单需要的格式（带时区）"""
+    dt = datetime.strptime(dt_str, "%Y-%m-%d %H:%M")
+    return dt.strftime("%Y-%m-%dT%H:%M:%S") + "+0800"
+
+
+async def _close_stream(response_stream):
+    """关闭流式响应（释放HTTP连接，让服务端停止生成）"""
+    try:
+        close = getattr(response_stream, "close", None)
+        if close is None and getattr(response_stream, "response", None) is not None:
+            close = response_stream.response.aclose
+        if close:
+            result = close()
+            if hasattr(result, "__await__"):
+                await result
+    except Exception as e:
+        logger.debug(f"关闭流式响应失败: {e}")
+
 
 class AIProcessor:
     """AI内容处理器"""
     
+    CLASSIFY_SYSTEM_PROMPT = "你是一个专业的内容分类助手，请严格按照JSON格式返回结果。"
+    
     def __init__(self, provider: str = "openai"):
         """
         初始化AI处理器
@@ -14,8 +118,24 @@ class AIProcessor:
         Args:
             provider: AI提供商（openai/deepseek/claude）
         """
+        from src.utils.config import config
+        
         self.provider = provider
         self.client = None
+        # 异步客户端：分类、时间提取等调用在后台I/O循环中执行
+        self.async_client = None
+        # 流式模式：增量解析JSON，遇到否定结论提前终止
+        self.stream_enabled = bool(config.get("ai.stream", True))
+        # 分类结果只是一个短JSON，不需要预留过多token
+        self.classify_max_tokens = int(config.get("ai.classify_max_tokens", 256))
+        self.last_timing: Dict[str, Any] = {}
+        # 超时与重试：SDK默认超时长达数分钟，这里按阶段预算显式控制
+        self.request_timeout = float(config.get("ai.timeouts.request", 15))
+        self.classify_budget = float(config.get("ai.timeouts.classify", 8))
+        self.time_extract_budget = float(config.get("ai.timeouts.time_extract", 3))
+        self.max_retries = int(config.get("ai.max_retries", 1))
+        # 请求限流（批量导入时按提供商限速；None 表示不限）
+        self.rate_limiter: Optional[TokenBucket] = None
         
         if provider in ["openai", "deepseek"]:
             # DeepSeek使用和OpenAI兼容的API格式
@@ -28,14 +148,18 @@ class AIProcessor:
     def _init_openai(self):
         """初始化OpenAI/DeepSeek客户端"""
         try:
-            from openai import OpenAI
+            from openai import AsyncOpenAI, OpenAI
             from src.utils.config import config
             
             provider = config.ai_provider
-            self.client = OpenAI(
+            client_kwargs = dict(
                 api_key=config.openai_api_key,
-                base_url=config.openai_base_url
+                base_url=config.openai_base_url,
+                timeout=self.request_timeout,
+                max_retries=self.max_retries
             )
+            self.client = OpenAI(**client_kwargs)
+            self.async_client = AsyncOpenAI(**client_kwargs)
             self.model = config.openai_model
             provider_name = "DeepSeek" if provider == "deepseek" else "OpenAI"
             logger.info(f"{provider_name}客户端已初始化，模型: {self.model}, Base URL: {config.openai_base_url}")
@@ -46,30 +170,88 @@ class AIProcessor:
     def _init_claude(self):
         """初始化Claude客户端"""
         try:
-            from anthropic import Anthropic
+            from anthropic import Anthropic, AsyncAnthropic
             from src.utils.config import config
             
-            self.client = Anthropic(api_key=config.anthropic_api_key)
+            client_kwargs = dict(
+                api_key=config.anthropic_api_key,
+                timeout=self.request_timeout,
+                max_retries=self.max_retries
+            )
+            self.client = Anthropic(**client_kwargs)
+            self.async_client = AsyncAnthropic(**client_kwargs)
             self.model = "claude-3-haiku-20240307"
             logger.info(f"Claude客户端已初始化，模型: {self.model}")
         except Exception as e:
             logger.error(f"Claude初始化失败: {e}")
             raise
     
+    def _client_for(self, deadline: Optional[Deadline], client=None):
+        """
+        获取受截止时间约束的客户端
+        
+        单次请求超时取剩余预算；剩余预算不足以再重试一次时关闭SDK重试，
+        保证整次调用（含重试）不会超出阶段预算。
+        """
+        client = client or self.client
+        if deadline is None:
+            return client
+        timeout = deadline.timeout(cap=self.request_timeout)
+        retries = self.max_retries if timeout * (self.max_retries + 1) <= deadline.remaining() else 0
+        return client.with_options(timeout=timeout, max_retries=retries)
+    
+    async def _wait_rate_limit(self, deadline: Optional[Deadline]):
+        """按限流器等待发送许可（等待时间计入阶段预算；被取消或预算内等不到许可时抛出异常）"""
+        if self.rate_limiter is None:
+            return
+        if deadline is None:
+            await self.rate_limiter.acquire_async()
+            return
+        acquired = await self.rate_limiter.acquire_async(
+            timeout=max(0.0, deadline.remaining()),
+            cancelled=lambda: deadline.cancelled
+        )
+        deadline.check()
+        if not acquired:
+            raise DeadlineExceeded(f"{deadline.name} 等待限流许可超出时间预算（{deadline.budget:.1f}s）")
+    
     def analyze_content(
         self, 
         content: str, 
-        prompt_template: str
+        prompt_template: str,
+        expected_type: Optional[str] = None,
+        stream: Optional[bool] = None,
+        deadline: Optional[Deadline] = None
+    ) -> Optional[Dict[str, Any]]:
+        """分析内容（同步等待I/O循环中的请求完成，参数见 analyze_content_async）"""
+        return get_io_loop().call(
+            self.analyze_content_async(content, prompt_template, expected_type, stream, deadline)
+        )
+    
+    async def analyze_content_async(
+        self, 
+        content: str, 
+        prompt_template: str,
+        expected_type: Optional[str] = None,
+        stream: Optional[bool] = None,
+        deadline: Optional[Deadline] = None
     ) -> Optional[Dict[str, Any]]:
         """
-        分析内容
+        分析内容（协程）
         
         Args:
             content: 待分析内容
             prompt_template: 提示词模板（包含{content}占位符）
+            expected_type: 期望的分类类型（流式模式下类型不符时提前终止）
+            stream: 是否使用流式模式（None表示读取配置 ai.stream）
+            deadline: 截止时间（超时或被取消时抛出异常）
             
         Returns:
             分析结果（JSON格式）
+            
+        Raises:
+            DeadlineExceeded: 超出时间预算
+            CallCancelled: 已被取消
         """
         try:
             # 构建提示词（用户提示词可能不包含{content}，需要添加）
@@ -80,22 +262,36 @@ class AIProcessor:
                 prompt = prompt_template + f"\n\n待分析内容：\n{content}"
             
             # 自动添加JSON格式要求（用户提示词中不包含这些技术细节）
+            # 注意：valuable 必须放在第一个字段，流式模式依赖它尽早做出判定
             json_instruction = """
 
 请以JSON格式返回结果：
 - 如果内容符合条件，返回：{"valuable": true, "type": "flomo"或"notion"或"ticktick", "category": "分类", "tags": ["标签1", "标签2"], "title": "简短标题（25字内）", "priority": "高/中/低"}
 - 如果内容不符合条件，返回：{"valuable": false}
+- valuable字段必须是JSON中的第一个字段，type字段紧随其后
 - tags字段必须返回，用于标记内容的关键分类（如"会议"、"产品"、"评审"等）
 - title字段是对内容的精炼总结，不超过25个字符"""
             
             prompt = prompt + json_instruction
             
+            if stream is None:
+                stream = self.stream_enabled
+            
+            await self._wait_rate_limit(deadline)
+            client = self._client_for(deadline, self.async_client)
+            if stream:
+                result = await self._analyze_streaming(client, prompt, expected_type, deadline)
+                AI_REQUESTS.inc(provider=self.provider, kind="classify", outcome="ok")
+                return result
+            
+            start = time.perf_counter()
+            
             # 调用AI（OpenAI和DeepSeek使用相同的API格式）
             if self.provider in ["openai", "deepseek"]:
-                response = self.client.chat.completions.create(
+                response = await client.chat.completions.create(
                     model=self.model,
                     messages=[
-                        {"role": "system", "content": "你是一个专业的内容分类助手，请严格按照JSON格式返回结果。"},
+                        {"role": "system", "content": self.CLASSIFY_SYSTEM_PROMPT},
                         {"role": "user", "content": prompt}
                     ],
                     temperature=0.3,
@@ -104,9 +300,9 @@ class AIProcessor:
                 result_text = response.choices[0].message.content
                 
             elif self.provider == "claude":
-                response = self.client.messages.create(
+                response = await client.messages.create(
                     model=self.model,
-                    max_tokens=1024,
+                    max_tokens=self.classify_max_tokens,
                     messages=[
                         {"role": "user", "content": prompt}
                     ],
@@ -114,39 +310,183 @@ class AIProcessor:
                 )
                 result_text = response.content[0].text
             
+            elapsed = time.perf_counter() - start
+            # 非流式模式下，判定时间即完整响应时间
+            self._record_timing(elapsed, elapsed, streamed=False, early_stop=False)
+            
             # 解析JSON
             result = json.loads(result_text)
+            AI_REQUESTS.inc(provider=self.provider, kind="classify", outcome="ok")
             logger.info(f"AI分析完成: {result}")
             return result
             
+        except (DeadlineExceeded, CallCancelled) as e:
+            outcome = "cancelled" if isinstance(e, CallCancelled) else "timeout"
+            AI_REQUESTS.inc(provider=self.provider, kind="classify", outcome=outcome)
+            raise
         except json.JSONDecodeError as e:
+            AI_REQUESTS.inc(provider=self.provider, kind="classify", outcome="invalid_json")
             logger.error(f"AI返回的不是有效的JSON: {e}")
             return None
         except Exception as e:
+            AI_REQUESTS.inc(provider=self.provider, kind="classify", outcome="error")
+            if deadline is not None:
+                # 请求超时/失败后若预算已耗尽或已被取消，直接终止整条链路
+                deadline.check()
             logger.error(f"AI分析失败: {e}")
             return None
     
-    def classify_content(self, content: str) -> Dict[str, Any]:
+    async def _analyze_streaming(
+        self,
+        client,
+        prompt: str,
+        expected_type: Optional[str],
+        deadline: Optional[Deadline] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        流式分析：边接收边增量解析，遇到否定结论立即终止
+        
+        Args:
+            client: 本次调用使用的客户端
+            prompt: 完整提示词
+            expected_type: 期望的分类类型
+            deadline: 截止时间（每收到一个分片检查一次）
+            
+        Returns:
+            分析结果（提前终止时返回 {"valuable": false, "early_stop": true}）
+        """
+        scanner = VerdictScanner(expected_type)
+        start = time.perf_counter()
+        decision_time = None
+        abort_reason = None
+        
+        if self.provider in ["openai", "deepseek"]:
+            response_stream = await client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": self.CLASSIFY_SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.3,
+                response_format={"type": "json_object"},
+                stream=True
+            )
+        else:
+            response_stream = await client.messages.create(
+                model=self.model,
+                max_tokens=self.classify_max_tokens,
+                messages=[
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.3,
+                stream=True
+            )
+        
+        try:
+            async for delta in self._iter_stream_text(response_stream):
+                if deadline is not None:
+                    deadline.check()
+                abort_reason = scanner.feed(delta)
+                if scanner.decided and decision_time is None:
+                    decision_time = time.perf_counter() - start
+                if abort_reason:
+                    break
+        finally:
+            # 提前终止时关闭连接，服务端停止生成
+            await _close_stream(response_stream)
+        
+        total_time = time.perf_counter() - start
+        if decision_time is None:
+            decision_time = total_time
+        self._record_timing(decision_time, total_time, streamed=True, early_stop=bool(abort_reason))
+        
+        if abort_reason:
+            logger.info(f"AI流式判定提前终止: {abort_reason}（判定耗时 {decision_time * 1000:.0f}ms）")
+            return {"valuable": False, "type": scanner.type, "early_stop": True, "reason": abort_reason}
+        
+        result = json.loads(scanner.text)
+        logger.info(f"AI分析完成: {result}")
+        return result
+    
+    async def _iter_stream_text(self, response_stream) -> AsyncIterator[str]:
+        """从流式响应中逐段取出文本（兼容OpenAI和Claude的事件格式）"""
+        if self.provider in ["openai", "deepseek"]:
+            async for chunk in response_stream:
+                if not chunk.choices:
+                    continue
+                text = chunk.choices[0].delta.content
+                if text:
+                    yield text
+        else:
+            async for event in response_stream:
+                if getattr(event, "type", None) != "content_block_delta":
+                    continue
+                text = getattr(event.delta, "text", None)
+                if text:
+                    yield text
+    
+    def _record_timing(self, decision_time: float, total_time: float, streamed: bool, early_stop: bool):
+        """记录最近一次调用的耗时（判定耗时与完整响应耗时分开统计）"""
+        AI_SECONDS.observe(total_time, provider=self.provider, kind="classify")
+        AI_DECISION_SECONDS.observe(decision_time, provider=self.provider)
+        if early_stop:
+            AI_EARLY_STOPS.inc(provider=self.provider)
+        self.last_timing = {
+            "time_to_decision_ms": round(decision_time * 1000, 1),
+            "total_ms": round(total_time * 1000, 1),
+            "streamed": streamed,
+            "early_stop": early_stop,
+        }
+        logger.debug(
+            f"AI调用耗时: 判定={self.last_timing['time_to_decision_ms']}ms, "
+            f"总计={self.last_timing['total_ms']}ms, 流式={streamed}, 提前终止={early_stop}"
+        )
+    
+    def classify_content(self, content: str, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
         """
         智能分类内容
         
         Args:
             content: 待分类内容
+            deadline: 分类阶段的截止时间（默认使用 ai.timeouts.classify）
             
         Returns:
-            分类结果
+            分类结果（都不符合时若有规则的AI调用失败，附带 ai_errors 失败次数）
+            
+        Raises:
+            DeadlineExceeded: 超出分类阶段的时间预算
+            CallCancelled: 已被取消（例如被更新的剪切板内容取代）
         """
+        if deadline is None:
+            deadline = Deadline(self.classify_budget, "分类")
+        try:
+            result = self._classify_by_rules(content, deadline)
+        except (DeadlineExceeded, CallCancelled):
+            AI_VERDICTS.inc(verdict="failed")
+            raise
+        if result.get("valuable"):
+            AI_VERDICTS.inc(verdict=result.get("type"))
+        else:
+            AI_VERDICTS.inc(verdict="failed" if result.get("ai_errors") else "ignored")
+        return result
+    
+    def _classify_by_rules(self, content: str, deadline: Deadline) -> Dict[str, Any]:
+        """按滴答清单 → Flomo → Notion 的顺序逐条规则调用AI，返回第一个命中的结果"""
         from src.utils.config import config
         
+        # 整次分类使用同一份规则（分类途中重新加载配置不会让前后规则不一致）
+        rules = config.snapshot.rules
+        
+        # AI调用失败（请求异常或返回无效JSON）的规则数，全部规则都未命中时一并返回
+        ai_errors = 0
+        
         # 检查是否启用自动同步
-        clipboard_monitor_enabled = config.get("ai_rules.clipboard_monitor", True)
-        if not clipboard_monitor_enabled:
+        if not rules.clipboard_monitor:
             logger.debug("剪切板监控已禁用")
             return {"valuable": False, "type": None}
         
         # 1️⃣ 优先尝试滴答清单规则（如果启用且包含时间信息）
-        ticktick_enabled = config.get("ai_rules.ticktick.enabled", True)
-        if ticktick_enabled:
+        if rules.ticktick_enabled:
             # 先快速检查是否有时间相关关键词
             time_keywords = ["明天", "今天", "后天", "下周", "点", "时", "上午", "下午", "晚上", "会议", "评审", "开会"]
             has_time_keyword = any(keyword in content for keyword in time_keywords)
@@ -171,18 +511,24 @@ class AIProcessor:
                         # 不调用AI，继续检查其他规则
                     else:
                         # 通过预检查，调用AI进行详细分析
-                        ticktick_prompt = config.get("ai_rules.ticktick.prompt", "")
+                        ticktick_prompt = rules.ticktick_prompt
                         if ticktick_prompt:
                             # 添加类型标识和标签提取要求
-                            ticktick_prompt_with_type = ticktick_prompt + "\n\n如果符合条件，返回的type必须是\"ticktick\"，并且需要提取tags（任务标签，如['会议', '产品评审']）。"
-                            result = self.analyze_content(content, ticktick_prompt_with_type)
+                            # 同时要求返回截止时间，一次请求完成分流+标题+标签+时间提取
+                            ticktick_prompt_with_type = (
+                                ticktick_prompt
+                                + "\n\n如果符合条件，返回的type必须是\"ticktick\"，并且需要提取tags（任务标签，如['会议', '产品评审']）。"
+                                + self._fused_time_instruction()
+                            )
+                            result = self.analyze_content(content, ticktick_prompt_with_type, expected_type="ticktick", deadline=deadline)
+                            ai_errors += result is None
                             if result and result.get("valuable") and result.get("type") == "ticktick":
+                                self._attach_time_info(result)
                                 logger.info(f"AI分类结果：TickTick - {result}")
                                 return result
         
         # 2️⃣ 再尝试Flomo规则（如果启用）
-        flomo_enabled = config.get("ai_rules.flomo.enabled", True)
-        if flomo_enabled:
+        if rules.flomo_enabled:
             # 【严格预检查】过滤明显不符合的内容（提升性能）
             content_length = len(content)
             
@@ -217,18 +563,18 @@ class AIProcessor:
                     if is_daily_report:
                         logger.debug(f"Flomo预检查：日报/新闻汇总类内容，已拒绝（关键词={has_report_keyword}, 日期标题={has_date_title}, bullet点数={bullet_count}）")
                     else:
-                        flomo_prompt = config.get("ai_rules.flomo.prompt", "")
+                        flomo_prompt = rules.flomo_prompt
                         if flomo_prompt:
                             # 添加类型标识
                             flomo_prompt_with_type = flomo_prompt + "\n\n如果符合条件，返回的type必须是\"flomo\"。"
-                            result = self.analyze_content(content, flomo_prompt_with_type)
+                            result = self.analyze_content(content, flomo_prompt_with_type, expected_type="flomo", deadline=deadline)
+                            ai_errors += result is None
                             if result and result.get("valuable") and result.get("type") == "flomo":
                                 logger.info(f"AI分类结果：Flomo - {result}")
                                 return result
         
         # 3️⃣ 最后尝试Notion规则（如果启用）
-        notion_enabled = config.get("ai_rules.notion.enabled", True)
-        if notion_enabled:
+        if rules.notion_enabled:
             # 【预检查】过滤明显不符合的内容
             content_length = len(content)
             
@@ -236,37 +582,81 @@ class AIProcessor:
             if content_length > 1000:
                 logger.debug(f"Notion预检查：内容过长({content_length}字)，已拒绝")
             else:
-                notion_prompt = config.get("ai_rules.notion.prompt", "")
+                notion_prompt = rules.notion_prompt
                 if notion_prompt:
                     # 添加类型标识和标签提取要求
                     notion_prompt_with_type = notion_prompt + "\n\n如果符合条件，返回的type必须是\"notion\"，并且需要提取tags（标签，如['产品', '待办']）。"
-                    result = self.analyze_content(content, notion_prompt_with_type)
+                    result = self.analyze_content(content, notion_prompt_with_type, expected_type="notion", deadline=deadline)
+                    ai_errors += result is None
                     if result and result.get("valuable") and result.get("type") == "notion":
                         logger.info(f"AI分类结果：Notion - {result}")
                         return result
         
         # 都不符合
+        if ai_errors:
+            return {"valuable": False, "type": None, "ai_errors": ai_errors}
         return {"valuable": False, "type": None}
     
-    def extract_time_info(self, content: str) -> Optional[Dict[str, Any]]:
+    def _fused_time_instruction(self) -> str:
+        """滴答清单规则的附加要求：在分类结果中同时返回截止时间"""
+        current_str, current_weekday = _current_time_context()
+        return f"""
+
+同时请提取任务的截止时间（当前时间：{current_str}，{current_weekday}，东八区时间）：
+- due_datetime：换算后的标准时间，格式 "YYYY-MM-DD HH:MM"（24小时制）；如果没有时间信息则为 null
+- time_text：原文中的时间描述（如"明天下午3点"）；没有则为 null
+- 请基于当前时间准确计算相对时间；只有日期没有具体时间时默认 09:00"""
+    
+    def _attach_time_info(self, result: Dict[str, Any]) -> bool:
         """
-        从文本中提取时间信息
+        将分类结果中附带的时间字段规范化为 extract_time_info 的返回格式
+        
+        Args:
+            result: 滴答清单规则的分类结果（原地更新）
+            
+        Returns:
+            是否包含有效时间
+        """
+        dt_str = result.get("due_datetime")
+        if not dt_str:
+            result["has_time"] = False
+            return False
+        try:
+            result["datetime_ticktick"] = _to_ticktick_datetime(dt_str)
+        except (TypeError, ValueError):
+            logger.warning(f"分类结果中的时间格式无效，将单独提取时间: {dt_str}")
+            result["has_time"] = False
+            return False
+        result["has_time"] = True
+        result["datetime"] = dt_str
+        result["original_text"] = result.get("time_text") or ""
+        return True
+    
+    def extract_time_info(self, content: str, deadline: Optional[Deadline] = None) -> Optional[Dict[str, Any]]:
+        """从文本中提取时间信息（同步等待I/O循环中的请求完成，参数见 extract_time_info_async）"""
+        return get_io_loop().call(self.extract_time_info_async(content, deadline))
+    
+    async def extract_time_info_async(
+        self,
+        content: str,
+        deadline: Optional[Deadline] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        从文本中提取时间信息（协程）
         
         Args:
             content: 待分析的文本
+            deadline: 时间提取阶段的截止时间（默认使用 ai.timeouts.time_extract）
             
         Returns:
             包含时间信息的字典，如 {"has_time": true, "datetime": "2025-12-16 07:30", "original": "明天上午7点半"}
             如果没有时间信息，返回 {"has_time": false}
         """
+        if deadline is None:
+            deadline = Deadline(self.time_extract_budget, "时间提取")
+        
         try:
-            from datetime import datetime, timezone, timedelta
-            
-            # 获取当前时间（东八区 UTC+8）
-            tz_cn = timezone(timedelta(hours=8))
-            current_time = datetime.now(tz_cn)
-            current_str = current_time.strftime("%Y-%m-%d %H:%M")
-            current_weekday = current_time.strftime("%A")  # Monday, Tuesday, etc.
+            current_str, current_weekday = _current_time_context()
             
             prompt = f"""你是一个时间提取助手。请从以下文本中提取时间信息，并转换为标准格式。
 
@@ -285,8 +675,11 @@ class AIProcessor:
 4. "上午7点半" = 07:30, "下午3点" = 15:00
 5. "晚上8点" = 20:00"""
 
+            await self._wait_rate_limit(deadline)
+            client = self._client_for(deadline, self.async_client)
+            start = time.perf_counter()
             if self.provider in ["openai", "deepseek"]:
-                response = self.client.chat.completions.create(
+                response = await client.chat.completions.create(
                     model=self.model,
                     messages=[
                         {"role": "system", "content": "你是一个专业的时间信息提取助手，请严格按照JSON格式返回结果。"},
@@ -298,7 +691,7 @@ class AIProcessor:
                 result_text = response.choices[0].message.content
                 
             elif self.provider == "claude":
-                response = self.client.messages.create(
+                response = await client.messages.create(
                     model=self.model,
                     max_tokens=512,
                     messages=[
@@ -308,16 +701,15 @@ class AIProcessor:
                 )
                 result_text = response.content[0].text
             
+            AI_SECONDS.observe(time.perf_counter() - start, provider=self.provider, kind="time_extract")
             result = json.loads(result_text)
+            AI_REQUESTS.inc(provider=self.provider, kind="time_extract", outcome="ok")
             
             # 如果识别到时间，转换为滴答清单需要的格式
             if result.get("has_time") and result.get("datetime"):
                 try:
                     dt_str = result.get("datetime")
-                    # 解析 AI 返回的时间（格式: YYYY-MM-DD HH:MM）
-                    dt = datetime.strptime(dt_str, "%Y-%m-%d %H:%M")
-                    # 转换为滴答清单需要的格式（带时区）
-                    ticktick_format = dt.strftime("%Y-%m-%dT%H:%M:%S") + "+0800"
+                    ticktick_format = _to_ticktick_datetime(dt_str)
                     result["datetime_ticktick"] = ticktick_format
                     logger.info(f"时间格式已转换: {dt_str} -> {ticktick_format}")
                 except Exception as e:
@@ -326,7 +718,13 @@ class AIProcessor:
             logger.info(f"时间提取完成: {result}")
             return result
             
+        except (DeadlineExceeded, CallCancelled) as e:
+            # 被取代或超时不等于"没有时间"：向上抛出，由调用方放弃本条任务
+            outcome = "cancelled" if isinstance(e, CallCancelled) else "timeout"
+            AI_REQUESTS.inc(provider=self.provider, kind="time_extract", outcome=outcome)
+            raise
         except Exception as e:
+            AI_REQUESTS.inc(provider=self.provider, kind="time_extract", outcome="error")
             logger.error(f"时间提取失败: {e}")
             return {"has_time": False, "error": str(e)}
 
@@ -1,10 +1,22 @@
 """剪切板监控模块"""
 import time
 import pyperclip
+from collections import deque
 from threading import Thread, Event
-from typing import Callable, Optional
+from typing import TYPE_CHECKING, Callable, Optional
 from loguru import logger
 
+from src.utils.prefilter import prefilter
+from src.utils.metrics import metrics
+
+if TYPE_CHECKING:
+    from src.utils.clipboard_store import ClipboardHistoryStore
+
+POLL_SECONDS = metrics.histogram("quicknote_clipboard_poll_seconds", "读取一次剪切板的耗时")
+CHANGES = metrics.counter("quicknote_clipboard_changes_total", "剪切板内容变化次数")
+ACCEPTED = metrics.counter("quicknote_clipboard_accepted_total", "通过预过滤、交给处理的剪切板内容数")
+ERRORS = metrics.counter("quicknote_clipboard_errors_total", "剪切板监控异常次数")
+
 
 class ClipboardMonitor:
     """剪切板监控器"""
@@ -14,7 +26,8 @@ class ClipboardMonitor:
         callback: Callable[[str], None],
         check_interval: float = 1.0,
         min_length: int = 10,
-        max_length: int = 5000
+        max_length: int = 5000,
+        store: Optional["ClipboardHistoryStore"] = None
     ):
         """
         初始化剪切板监控器
@@ -24,6 +37,7 @@ class ClipboardMonitor:
             check_interval: 检查间隔（秒）
             min_length: 最小字符数
             max_length: 最大字符数
+            store: 剪切板历史持久化存储（可选；未提供时只保留内存中的最近记录）
         """
         self.callback = callback
         self.check_interval = check_interval
@@ -34,8 +48,9 @@ class ClipboardMonitor:
         self.thread: Optional[Thread] = None
         self.stop_event = Event()
         self.last_content = ""
-        self.history: list = []  # 剪切板历史记录
-        self.max_history = 50  # 最多保存50条历史
+        self.max_history = 50  # 内存中最多保存50条历史
+        self.history: deque = deque(maxlen=self.max_history)  # 剪切板历史记录
+        self.store = store
         
         logger.info("剪切板监控器已初始化")
     
@@ -89,12 +104,15 @@ class ClipboardMonitor:
         while not self.stop_event.is_set():
             try:
                 # 获取当前剪切板内容
-                current_content = pyperclip.paste()
+                with POLL_SECONDS.time():
+                    current_content = pyperclip.paste()
                 
                 # 检查是否有新内容
                 if current_content != self.last_content:
+                    CHANGES.inc()
                     # 验证内容
                     if self._validate_content(current_content):
+                        ACCEPTED.inc()
                         logger.info(f"检测到新的剪切板内容: {current_content[:50]}...")
                         
                         # 添加到历史记录
@@ -110,6 +128,7 @@ class ClipboardMonitor:
                     self.last_content = current_content
                 
             except Exception as e:
+                ERRORS.inc()
                 logger.error(f"剪切板监控异常: {e}")
             
             # 等待下一次检查
@@ -118,27 +137,11 @@ class ClipboardMonitor:
         logger.info("剪切板监控循环已退出")
     
     def _validate_content(self, content: str) -> bool:
-        """验证内容是否有效"""
-        # 检查是否为空
-        if not content or not content.strip():
-            return False
-        
-        # 检查长度
-        content_length = len(content)
-        if content_length < self.min_length or content_length > self.max_length:
-            logger.debug(f"内容长度不符合要求: {content_length}")
-            return False
-        
-        # 过滤纯数字
-        if content.strip().isdigit():
-            logger.debug("过滤纯数字内容")
+        """验证内容是否有效（空内容、长度不符、纯数字、单个URL 不处理）"""
+        reason = prefilter(content, self.min_length, self.max_length)
+        if reason:
+            logger.debug(f"剪切板内容已过滤: {reason}")
             return False
-        
-        # 过滤单个URL
-        if content.strip().startswith(('http://', 'https://', 'www.')):
-            logger.debug("过滤URL")
-            return False
-        
         return True
     
     def _add_to_history(self, content: str):
@@ -148,12 +151,16 @@ class ClipboardMonitor:
             return
         
         self.history.append(content)
-        
-        # 限制历史记录数量
-        if len(self.history) > self.max_history:
-            self.history = self.history[-self.max_history:]
+        if self.store is not None:
+            self.store.add(content)
     
     def get_history(self, limit: int = 20) -> list:
-        """获取历史记录"""
-        return self.history[-limit:] if limit else self.history
+        """获取历史记录（从旧到新；有持久化存储时从存储读取）"""
+        if self.store is not None:
+            try:
+                return [entry.content for entry in reversed(self.store.recent(limit or self.max_history))]
+            except Exception as e:
+                logger.warning(f"读取剪切板历史存储失败，使用内存记录: {e}")
+        history = list(self.history)
+        return history[-limit:] if limit else history
 
@@ -0,0 +1,138 @@
+"""延迟初始化的组件注册表
+
+启动时只登记各组件的创建函数，不导入 SDK（openai / anthropic / notion_client 等），
+也不创建客户端。组件在以下两种情况下才真正创建：
+- 首次使用（访问代理对象的属性，或调用 get()）
+- 托盘图标出现后，warm_up() 在后台线程中空闲预热
+
+重新加载配置时用同名 register() 覆盖即可，已发出的代理对象会自动指向新实例。
+"""
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from loguru import logger
+
+
+class LazyComponent:
+    """单个延迟创建的组件（线程安全，只创建一次）"""
+
+    def __init__(self, name: str, factory: Callable[[], Any], warm: bool = True):
+        self.name = name
+        self.warm = warm
+        self._factory = factory
+        self._instance: Any = None
+        self._created = False
+        self._lock = threading.Lock()
+
+    @property
+    def created(self) -> bool:
+        return self._created
+
+    def get(self) -> Any:
+        if self._created:
+            return self._instance
+        with self._lock:
+            if not self._created:
+                start = time.perf_counter()
+                self._instance = self._factory()
+                self._created = True
+                logger.info(f"组件已初始化: {self.name}（{(time.perf_counter() - start) * 1000:.0f}ms）")
+        return self._instance
+
+
+class LazyProxy:
+    """组件代理：首次访问属性时才创建组件，之后按名称转发到注册表中的当前实例"""
+
+    __slots__ = ("_registry", "_name")
+
+    def __init__(self, registry: "ComponentRegistry", name: str):
+        object.__setattr__(self, "_registry", registry)
+        object.__setattr__(self, "_name", name)
+
+    def __getattr__(self, item: str) -> Any:
+        return getattr(self._registry.get(self._name), item)
+
+    def __repr__(self) -> str:
+        return f"<LazyProxy {self._name}>"
+
+
+class ComponentRegistry:
+    """组件注册表"""
+
+    def __init__(self):
+        self._components: Dict[str, LazyComponent] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, factory: Callable[[], Any], warm: bool = True):
+        """
+        登记组件（同名组件会被替换，旧实例在下次访问时不再使用）
+
+        Args:
+            name: 组件名称
+            factory: 创建函数（在其中导入SDK、创建客户端）
+            warm: 是否参与空闲预热
+        """
+        with self._lock:
+            self._components[name] = LazyComponent(name, factory, warm)
+
+    def unregister(self, name: str):
+        with self._lock:
+            self._components.pop(name, None)
+
+    def has(self, name: str) -> bool:
+        with self._lock:
+            return name in self._components
+
+    def _component(self, name: str) -> LazyComponent:
+        with self._lock:
+            component = self._components.get(name)
+        if component is None:
+            raise KeyError(f"组件未注册: {name}")
+        return component
+
+    def get(self, name: str) -> Any:
+        """获取组件（首次调用时创建，创建失败时抛出异常，下次调用会重试）"""
+        return self._component(name).get()
+
+    def instance(self, name: str) -> Any:
+        """已创建的组件实例（未登记或尚未创建时返回 None，不触发创建）"""
+        with self._lock:
+            component = self._components.get(name)
+        if component is None or not component.created:
+            return None
+        return component.get()
+
+    def proxy(self, name: str) -> LazyProxy:
+        """获取组件代理（不触发创建）"""
+        return LazyProxy(self, name)
+
+    def warm_up(self, names: Optional[Iterable[str]] = None) -> threading.Thread:
+        """
+        在后台线程中依次创建组件（默认所有 warm=True 的组件）
+
+        Returns:
+            预热线程
+        """
+        with self._lock:
+            if names is None:
+                targets = [c for c in self._components.values() if c.warm]
+            else:
+                targets = [self._components[n] for n in names if n in self._components]
+
+        def run():
+            start = time.perf_counter()
+            for component in targets:
+                try:
+                    component.get()
+                except Exception as e:
+                    logger.warning(f"组件预热失败: {component.name}: {e}")
+            logger.info(f"组件预热完成（{len(targets)} 个，{(time.perf_counter() - start) * 1000:.0f}ms）")
+
+        thread = threading.Thread(target=run, name="component-warmup", daemon=True)
+        thread.start()
+        return thread
+
+
+# 全局注册表
+components = ComponentRegistry()
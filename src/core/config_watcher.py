@@ -0,0 +1,84 @@
+"""配置文件监视
+
+用 QFileSystemWatcher 监视 config.yaml 和 .env，手动编辑保存后自动重新加载配置（不必重启应用）。
+- 很多编辑器保存时先写临时文件再改名替换，原文件会从监视列表中消失，所以同时监视所在目录，
+  每次变化后重新加入文件
+- 一次保存常常触发多次变化通知，防抖合并为一次；目录中其他文件的变化按文件大小和修改时间过滤掉
+"""
+import os
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+from PyQt5.QtCore import QObject, QFileSystemWatcher, QTimer, pyqtSignal
+from loguru import logger
+
+
+class ConfigWatcher(QObject):
+    """配置文件监视器（在主线程中使用）"""
+
+    # 被监视的文件内容有变化（已防抖）
+    changed = pyqtSignal()
+
+    def __init__(self, paths: Iterable[Path], debounce_ms: int = 500, parent=None):
+        """
+        初始化配置文件监视器
+
+        Args:
+            paths: 要监视的文件（可以暂不存在，创建后开始生效）
+            debounce_ms: 防抖间隔（毫秒）
+            parent: 父对象
+        """
+        super().__init__(parent)
+        self.paths = [Path(p) for p in paths]
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.fileChanged.connect(self._on_changed)
+        self._watcher.directoryChanged.connect(self._on_changed)
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(max(0, int(debounce_ms)))
+        self._timer.timeout.connect(self._check)
+        self._stamps: Dict[Path, Optional[Tuple[int, int]]] = {}
+
+    def start(self) -> "ConfigWatcher":
+        """开始监视"""
+        self._stamps = {path: self._stamp(path) for path in self.paths}
+        directories = sorted({str(path.parent) for path in self.paths if path.parent.is_dir()})
+        if directories:
+            self._watcher.addPaths(directories)
+        self._rearm()
+        logger.info(f"配置文件监视已启动: {', '.join(path.name for path in self.paths)}")
+        return self
+
+    def stop(self):
+        """停止监视"""
+        self._timer.stop()
+        watched = self._watcher.files() + self._watcher.directories()
+        if watched:
+            self._watcher.removePaths(watched)
+
+    @staticmethod
+    def _stamp(path: Path) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _rearm(self):
+        """把存在但不在监视列表中的文件重新加入（改名替换保存后需要）"""
+        watched = set(self._watcher.files())
+        missing = [str(path) for path in self.paths if str(path) not in watched and path.exists()]
+        if missing:
+            self._watcher.addPaths(missing)
+
+    def _on_changed(self, _path: str):
+        self._timer.start()
+
+    def _check(self):
+        self._rearm()
+        stamps = {path: self._stamp(path) for path in self.paths}
+        changed = [path.name for path in self.paths if stamps[path] != self._stamps.get(path)]
+        self._stamps = stamps
+        if changed:
+            logger.info(f"检测到配置文件变化: {', '.join(changed)}")
+            self.changed.emit()
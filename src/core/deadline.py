@@ -0,0 +1,96 @@
+"""截止时间与协作式取消
+
+每个处理阶段（分类、时间提取等）携带一个 Deadline：
+- 根据剩余预算计算单次请求的超时时间，避免一个卡住的请求拖住整条链路
+- 同一条剪切板内容的各阶段共享取消标记，新内容到来时可取消旧内容的后续工作
+"""
+import threading
+import time
+from typing import Optional
+
+
+class DeadlineExceeded(TimeoutError):
+    """阶段预算已用完"""
+
+
+class CallCancelled(Exception):
+    """调用已被取消（例如被更新的剪切板内容取代）"""
+
+
+class Deadline:
+    """截止时间（线程安全，可跨阶段共享取消标记）"""
+
+    def __init__(
+        self,
+        budget_seconds: float,
+        name: str = "",
+        cancel_event: Optional[threading.Event] = None
+    ):
+        """
+        初始化截止时间
+
+        Args:
+            budget_seconds: 本阶段的时间预算（秒）
+            name: 阶段名称（用于日志）
+            cancel_event: 共享的取消标记（不传则新建）
+        """
+        self.name = name
+        self.budget = float(budget_seconds)
+        self.expires_at = time.monotonic() + self.budget
+        self._cancel_event = cancel_event or threading.Event()
+        self.cancel_reason = ""
+
+    def remaining(self) -> float:
+        """剩余时间（秒），可能为负数"""
+        return self.expires_at - time.monotonic()
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def cancel(self, reason: str = ""):
+        """取消（共享同一标记的所有阶段都会感知到）"""
+        self.cancel_reason = reason
+        self._cancel_event.set()
+
+    def check(self, stage: str = ""):
+        """
+        检查是否可以继续执行
+
+        Raises:
+            CallCancelled: 已被取消
+            DeadlineExceeded: 预算已用完
+        """
+        label = stage or self.name
+        if self.cancelled:
+            raise CallCancelled(f"{label} 已取消{('：' + self.cancel_reason) if self.cancel_reason else ''}")
+        if self.expired:
+            raise DeadlineExceeded(f"{label} 超出时间预算（{self.budget:.1f}s）")
+
+    def timeout(self, cap: Optional[float] = None) -> float:
+        """
+        根据剩余预算计算单次请求的超时时间
+
+        Args:
+            cap: 超时上限（秒）
+
+        Returns:
+            超时时间（秒）
+        """
+        self.check()
+        remaining = self.remaining()
+        return min(remaining, cap) if cap else remaining
+
+    def next_stage(self, budget_seconds: float, name: str = "") -> "Deadline":
+        """
+        派生下一阶段的截止时间（拥有独立预算，但共享取消标记）
+
+        Args:
+            budget_seconds: 下一阶段的预算（秒）
+            name: 阶段名称
+        """
+        return Deadline(budget_seconds, name, self._cancel_event)
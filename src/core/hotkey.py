@@ -5,6 +5,12 @@ from loguru import logger
 import threading
 import time
 
+from src.utils.metrics import metrics
+
+KEY_EVENT_SECONDS = metrics.histogram("quicknote_hotkey_key_event_seconds", "键盘钩子处理一次按键的耗时")
+TRIGGERS = metrics.counter("quicknote_hotkey_triggers_total", "快捷键触发次数", ("hotkey",))
+RESTARTS = metrics.counter("quicknote_hotkey_listener_restarts_total", "看门狗重启快捷键监听器的次数")
+
 
 class HotkeyListener:
     """全局快捷键监听器"""
@@ -34,9 +40,24 @@ class HotkeyListener:
         """
         # 标准化快捷键格式
         hotkey_normalized = self._normalize_hotkey(hotkey)
-        self.hotkeys[hotkey_normalized] = callback
+        # 复制后整体替换：监听线程读取的始终是完整的字典，运行中也可以注册
+        hotkeys = dict(self.hotkeys)
+        hotkeys[hotkey_normalized] = callback
+        self.hotkeys = hotkeys
         logger.info(f"已注册快捷键: {hotkey}")
     
+    def unregister(self, hotkey: str):
+        """
+        取消注册快捷键（监听器运行中也可调用，下一次按键即生效）
+        
+        Args:
+            hotkey: 快捷键字符串
+        """
+        hotkeys = dict(self.hotkeys)
+        if hotkeys.pop(self._normalize_hotkey(hotkey), None) is not None:
+            self.hotkeys = hotkeys
+            logger.info(f"已取消快捷键: {hotkey}")
+    
     def start(self):
         """启动监听"""
         if self.is_running:
@@ -164,6 +185,7 @@ class HotkeyListener:
                 # 如果需要重启
                 if listener_dead:
                     self.restart_count += 1
+                    RESTARTS.inc()
                     logger.info(f"开始第 {self.restart_count} 次重启...")
                     
                     # 完全停止旧监听器
@@ -259,6 +281,11 @@ class HotkeyListener:
     
     def _on_press(self, key):
         """按键按下事件"""
+        with KEY_EVENT_SECONDS.time():
+            return self._handle_press(key)
+    
+    def _handle_press(self, key):
+        """处理按键按下：更新心跳和按键集合，匹配快捷键"""
         try:
             # 更新活动时间（心跳）
             self.last_activity_time = time.time()
@@ -383,11 +410,12 @@ class HotkeyListener:
             logger.debug(f"检测到按键组合: {current_combo}, 已注册快捷键: {list(self.hotkeys.keys())}")
         
         # 检查是否匹配
-        if current_combo in self.hotkeys:
+        callback = self.hotkeys.get(current_combo)
+        if callback is not None:
             logger.info(f"触发快捷键: {current_combo}")
+            TRIGGERS.inc(hotkey=current_combo)
             # 更新快捷键触发时间（关键！用于检测监听器是否真正工作）
             self.last_hotkey_trigger_time = time.time()
-            callback = self.hotkeys[current_combo]
             try:
                 # 在新线程中执行回调，避免阻塞监听线程
                 threading.Thread(target=self._safe_callback, args=(callback,), daemon=True).start()
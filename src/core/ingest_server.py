@@ -0,0 +1,421 @@
+"""本地 HTTP 接入接口（不依赖 Qt）
+
+浏览器扩展、脚本等本机工具可以不经过剪切板直接提交内容，与剪切板自动同步共用
+同步目标分发器、Notion 写入队列和去重记录：
+
+- POST /notes        提交一条：指定 target（notion/flomo/ticktick）直接发送，不指定时由AI分类
+- POST /notes/batch  一次提交多条，并发处理，每完成一条就以一行 JSON 流式返回（NDJSON，分块传输）
+- GET  /health       存活检查（不需要令牌）
+
+只监听本机地址，除 /health 外都需要令牌（Authorization: Bearer <令牌> 或 X-QuickNote-Token）。
+连接保持（HTTP/1.1 keep-alive），同一连接可连续提交多次。
+"""
+import hmac
+import json
+import os
+import queue
+import secrets
+import threading
+import time
+from collections import Counter
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from src.core.pipeline import (
+    ClipPipeline, ClipResult, STATUS_CANCELLED, STATUS_ERROR, STATUS_TIMEOUT, STATUS_UNROUTED
+)
+from src.integrations.sinks import Note
+from src.utils.metrics import metrics
+
+TOKEN_ENV = "QUICKNOTE_INGEST_TOKEN"
+AUTO_TARGET = "auto"
+TARGETS = ("notion", "flomo", "ticktick")
+LOOPBACK_HOSTS = ("127.0.0.1", "localhost", "::1", "[::1]")
+ENDPOINTS = ("/notes", "/notes/batch", "/health", "/stats")
+CLOSED_REASON = "接入服务已关闭"
+
+REQUESTS = metrics.counter("quicknote_ingest_requests_total", "本地接入接口请求数", ("endpoint", "code"))
+
+
+class RequestError(Exception):
+    """请求内容无效（返回给调用方的 4xx 错误）"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def load_or_create_token(path: Path) -> str:
+    """读取令牌文件，不存在时生成一个新令牌并保存（仅当前用户可读）"""
+    path = Path(path)
+    try:
+        token = path.read_text(encoding="utf-8").strip()
+        if token:
+            return token
+    except FileNotFoundError:
+        pass
+    token = secrets.token_urlsafe(32)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(str(path), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(token + "\n")
+    logger.info(f"已生成本地接入令牌: {path}")
+    return token
+
+
+def resolve_token(cfg) -> str:
+    """令牌来源优先级：环境变量 > ingest.token 配置 > 令牌文件（不存在时自动生成）"""
+    token = cfg.get_env(TOKEN_ENV) or str(cfg.get("ingest.token", "") or "")
+    if token:
+        return token
+    return load_or_create_token(cfg.root_dir / cfg.get("ingest.token_path", "data/ingest_token"))
+
+
+def _parse_tags(value: Any) -> List[str]:
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [tag.strip() for tag in value.replace(",", " ").split() if tag.strip()]
+    if isinstance(value, list):
+        return [str(tag).strip() for tag in value if str(tag).strip()]
+    raise RequestError(400, "tags 应为字符串或字符串列表")
+
+
+class IngestService:
+    """把接入请求交给处理链路（单条在请求线程中处理，批量在共享线程池中并发处理）"""
+
+    def __init__(self, pipeline: ClipPipeline, workers: int = 4, max_batch: int = 500,
+                 max_text_length: int = 20000):
+        """
+        Args:
+            pipeline: 处理链路（与托盘应用共用分发器和去重记录）
+            workers: 批量处理的并发数（所有批量请求共用）
+            max_batch: 单个批量请求最多条数
+            max_text_length: 单条内容最大字符数
+        """
+        self.pipeline = pipeline
+        self.max_batch = int(max_batch)
+        self.max_text_length = int(max_text_length)
+        self.counts = Counter()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, int(workers)), thread_name_prefix="ingest-worker")
+
+    def parse_note(self, item: Any) -> Tuple[Optional[str], str, Note]:
+        """
+        校验一条提交内容
+
+        Returns:
+            (调用方的 id, 目标（auto 表示AI分类）, 笔记)
+        """
+        if isinstance(item, str):
+            item = {"text": item}
+        if not isinstance(item, dict):
+            raise RequestError(400, "每条内容应为字符串或对象")
+        text = item.get("text")
+        if not isinstance(text, str) or not text.strip():
+            raise RequestError(400, "缺少 text")
+        if len(text) > self.max_text_length:
+            raise RequestError(413, f"内容过长: {len(text)} 字符（上限 {self.max_text_length}）")
+        target = str(item.get("target") or AUTO_TARGET).lower()
+        if target != AUTO_TARGET and target not in TARGETS:
+            raise RequestError(400, f"未知的目标: {target}（可选 {AUTO_TARGET}、{'、'.join(TARGETS)}）")
+        note = Note(
+            text,
+            title=item.get("title"),
+            tags=_parse_tags(item.get("tags")),
+            priority=str(item.get("priority") or "中"),
+            status=str(item.get("status") or "待处理"),
+            due_date=item.get("due_date"),
+            source="api"
+        )
+        item_id = item.get("id")
+        return (None if item_id is None else str(item_id)), target, note
+
+    def handle(self, target: str, note: Note, dry_run: bool = False) -> ClipResult:
+        """处理一条（阻塞直到分类和同步完成）"""
+        try:
+            if target == AUTO_TARGET:
+                result = self.pipeline.process(note.content, dry_run=dry_run)
+            else:
+                result = self.pipeline.deliver(note, target, dry_run=dry_run)
+        except Exception as e:
+            logger.error(f"接入内容处理失败: {e}")
+            result = ClipResult(STATUS_ERROR, reason=str(e))
+        with self._lock:
+            self.counts[result.status] += 1
+        return result
+
+    def submit(self, target: str, note: Note, dry_run: bool = False) -> Future:
+        try:
+            return self._executor.submit(self.handle, target, note, dry_run)
+        except RuntimeError:
+            # 服务已关闭：直接返回已取消的结果，调用方照常收尾
+            future = Future()
+            future.set_result(ClipResult(STATUS_CANCELLED, reason=CLOSED_REASON))
+            return future
+
+    def close(self):
+        """不再接收新的批量条目，取消尚未开始的条目"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class IngestRequestHandler(BaseHTTPRequestHandler):
+    """接入接口请求处理器"""
+
+    protocol_version = "HTTP/1.1"
+    server_version = "QuickNoteIngest/1.0"
+
+    @property
+    def service(self) -> IngestService:
+        return self.server.service
+
+    def log_message(self, format, *args):
+        logger.debug(f"[ingest] {self.address_string()} {format % args}")
+
+    def log_request(self, code="-", size="-"):
+        path = self.path.split("?", 1)[0]
+        REQUESTS.inc(endpoint=path if path in ENDPOINTS else "other", code=str(int(code)))
+        super().log_request(code, size)
+
+    # ---------- 通用工具 ----------
+
+    def _send_json(self, status: int, payload: Dict[str, Any]):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status: int, message: str):
+        self._send_json(status, {"error": message})
+
+    def _read_json(self) -> Any:
+        self._body_read = True
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            self._body_read = False
+            raise RequestError(411, "需要 Content-Length")
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            self._body_read = False
+            raise RequestError(400, "Content-Length 无效")
+        if length > self.server.max_body_bytes:
+            self._body_read = False
+            raise RequestError(413, f"请求体过大（上限 {self.server.max_body_bytes} 字节）")
+        raw = self.rfile.read(length) if length else b""
+        try:
+            return json.loads(raw.decode("utf-8")) if raw else {}
+        except (ValueError, UnicodeDecodeError):
+            raise RequestError(400, "请求体不是有效的 JSON")
+
+    def _authorized(self) -> bool:
+        supplied = self.headers.get("X-QuickNote-Token", "")
+        auth = self.headers.get("Authorization", "")
+        if not supplied and auth.lower().startswith("bearer "):
+            supplied = auth[7:].strip()
+        return bool(supplied) and hmac.compare_digest(supplied.encode("utf-8"), self.server.token.encode("utf-8"))
+
+    def _host_allowed(self) -> bool:
+        """拒绝非本机 Host，防止网页通过 DNS 重绑定访问本地接口"""
+        if not self.server.loopback_only:
+            return True
+        host = (self.headers.get("Host") or "").strip().lower()
+        if host.startswith("["):
+            host = host[:host.find("]") + 1]
+        else:
+            host = host.rsplit(":", 1)[0]
+        return host in LOOPBACK_HOSTS
+
+    def _write_chunk(self, data: bytes) -> bool:
+        """写入一个分块，客户端提前断开时返回False"""
+        try:
+            self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+            return True
+        except (BrokenPipeError, ConnectionResetError):
+            return False
+
+    # ---------- 路由 ----------
+
+    def do_GET(self):
+        if not self._host_allowed():
+            return self._send_error(403, "Host 不允许")
+        path = self.path.split("?", 1)[0]
+        if path == "/health":
+            return self._send_json(200, {"ok": True})
+        if not self._authorized():
+            return self._send_error(401, "令牌无效")
+        if path == "/stats":
+            with self.service._lock:
+                counts = dict(self.service.counts)
+            return self._send_json(200, {"counts": counts, "uptime_seconds": round(time.time() - self.server.started_at)})
+        self._send_error(404, "未找到")
+
+    def do_POST(self):
+        path = self.path.split("?", 1)[0]
+        self._body_read = False
+        try:
+            if not self._host_allowed():
+                raise RequestError(403, "Host 不允许")
+            if not self._authorized():
+                raise RequestError(401, "令牌无效")
+            if path == "/notes":
+                return self._post_note(self._read_json())
+            if path == "/notes/batch":
+                return self._post_batch(self._read_json())
+            raise RequestError(404, "未找到")
+        except RequestError as e:
+            if not self._body_read:
+                # 未读取的请求体会被当成下一个请求，回复后关闭连接
+                self.close_connection = True
+            self._send_error(e.status, e.message)
+
+    def _post_note(self, payload: Any):
+        item_id, target, note = self.service.parse_note(payload)
+        dry_run = bool(payload.get("dry_run")) if isinstance(payload, dict) else False
+        result = self.service.handle(target, note, dry_run)
+        record = {"id": item_id, "target": target, **result.to_dict()}
+        if result.status == STATUS_UNROUTED and target != AUTO_TARGET:
+            status = 409
+        elif result.ok:
+            status = 200
+        else:
+            status = 504 if result.status == STATUS_TIMEOUT else 502
+        self._send_json(status, record)
+
+    def _post_batch(self, payload: Any):
+        items = payload.get("notes") if isinstance(payload, dict) else payload
+        if not isinstance(items, list) or not items:
+            raise RequestError(400, "缺少 notes 列表")
+        if len(items) > self.service.max_batch:
+            raise RequestError(413, f"单次最多 {self.service.max_batch} 条，收到 {len(items)} 条")
+        dry_run = bool(payload.get("dry_run")) if isinstance(payload, dict) else False
+
+        # 先整体校验：任一条无效时整个请求返回 400，避免部分提交
+        parsed = []
+        for index, item in enumerate(items):
+            try:
+                parsed.append(self.service.parse_note(item))
+            except RequestError as e:
+                raise RequestError(e.status, f"第 {index} 条: {e.message}")
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson; charset=utf-8")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+
+        start = time.perf_counter()
+        # 用完成回调收集结果：服务关闭时被取消的条目也会触发回调（as_completed 收不到这种取消，会一直等待）
+        done = queue.Queue()
+        futures = {}
+        for index, (item_id, target, note) in enumerate(parsed):
+            future = self.service.submit(target, note, dry_run)
+            futures[future] = (index, item_id, target)
+            future.add_done_callback(done.put)
+        logger.info(f"收到批量提交: {len(parsed)} 条")
+
+        counts = Counter()
+        connected = True
+        for _ in range(len(futures)):
+            future = done.get()
+            index, item_id, target = futures[future]
+            try:
+                result = future.result()
+            except CancelledError:
+                # 服务关闭时尚未开始的条目被取消，照常返回一行结果，最后仍发送汇总和结束块
+                result = ClipResult(STATUS_CANCELLED, reason=CLOSED_REASON)
+            counts[result.status] += 1
+            record = {"index": index, "id": item_id, "target": target, **result.to_dict()}
+            if connected and not self._write_chunk((json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")):
+                connected = False
+                # 调用方已断开：取消尚未开始的条目，处理中的条目照常完成
+                cancelled = sum(1 for f in futures if f.cancel())
+                logger.warning(f"批量提交的调用方已断开，取消未开始的 {cancelled} 条")
+                self.close_connection = True
+                break
+
+        if connected:
+            summary = {
+                "done": True,
+                "total": len(parsed),
+                "counts": dict(counts),
+                "elapsed_ms": round((time.perf_counter() - start) * 1000, 1),
+            }
+            if self._write_chunk((json.dumps(summary, ensure_ascii=False) + "\n").encode("utf-8")):
+                self._write_chunk(b"")
+        logger.info(f"批量提交处理完成: {dict(counts)}")
+
+
+class _IngestHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 64
+
+
+class IngestServer:
+    """在后台线程中运行的本地接入接口"""
+
+    def __init__(self, service: IngestService, token: str, host: str = "127.0.0.1", port: int = 8766,
+                 max_body_bytes: int = 4 * 1024 * 1024):
+        """
+        Args:
+            service: 接入处理服务
+            token: 访问令牌
+            host: 监听地址（默认只监听本机）
+            port: 监听端口（0表示自动分配）
+            max_body_bytes: 请求体大小上限
+        """
+        if not token:
+            raise ValueError("本地接入接口需要访问令牌")
+        self.service = service
+        self.httpd = _IngestHTTPServer((host, int(port)), IngestRequestHandler)
+        self.httpd.service = service
+        self.httpd.token = token
+        self.httpd.max_body_bytes = int(max_body_bytes)
+        self.httpd.loopback_only = host in LOOPBACK_HOSTS
+        self.httpd.started_at = time.time()
+        self.thread: Optional[threading.Thread] = None
+        if not self.httpd.loopback_only:
+            logger.warning(f"本地接入接口监听在非本机地址: {host}，请确认令牌足够安全")
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "IngestServer":
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="ingest-server", daemon=True)
+        self.thread.start()
+        logger.info(f"本地接入接口已启动: {self.base_url}")
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.service.close()
+        logger.info("本地接入接口已停止")
+
+
+def build_ingest_server(cfg, pipeline: ClipPipeline) -> IngestServer:
+    """按 ingest 配置创建本地接入接口（未启动）"""
+    service = IngestService(
+        pipeline,
+        workers=cfg.get("ingest.workers", 4),
+        max_batch=cfg.get("ingest.max_batch", 500),
+        max_text_length=cfg.get("ingest.max_text_length", 20000)
+    )
+    return IngestServer(
+        service,
+        token=resolve_token(cfg),
+        host=cfg.get("ingest.host", "127.0.0.1"),
+        port=cfg.get("ingest.port", 8766),
+        max_body_bytes=cfg.get("ingest.max_body_bytes", 4 * 1024 * 1024)
+    )
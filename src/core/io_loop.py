@@ -0,0 +1,106 @@
+"""后台 asyncio I/O 循环
+
+所有对外请求（LLM、Notion、Flomo、滴答清单）都在同一个后台事件循环中执行：
+- 网络请求使用异步客户端，并发数不再受线程数限制
+- 无异步实现的阻塞调用（SMTP、SDK同步方法）交给固定大小的线程池
+- 任意线程都可以通过 submit() 提交协程，拿到 concurrent.futures.Future
+"""
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Optional
+
+from loguru import logger
+
+
+class IOLoop:
+    """在后台线程中运行的事件循环"""
+
+    def __init__(self, blocking_workers: int = 4, name: str = "io-loop"):
+        """
+        初始化并启动事件循环
+
+        Args:
+            blocking_workers: 执行阻塞调用的线程数（固定大小）
+            name: 线程名称
+        """
+        self.name = name
+        self._executor = ThreadPoolExecutor(max_workers=blocking_workers, thread_name_prefix=f"{name}-blocking")
+        self._loop = asyncio.new_event_loop()
+        self._loop.set_default_executor(self._executor)
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        logger.info(f"后台I/O循环已启动（阻塞调用线程数 {blocking_workers}）")
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.call_soon(self._ready.set)
+        self._loop.run_forever()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        return self._loop
+
+    def in_loop_thread(self) -> bool:
+        return threading.current_thread() is self._thread
+
+    def submit(self, coro: Awaitable) -> Future:
+        """
+        提交协程（线程安全）
+
+        Returns:
+            concurrent.futures.Future，可 result() 等待或 add_done_callback()
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def call(self, coro: Awaitable, timeout: Optional[float] = None) -> Any:
+        """
+        提交协程并阻塞等待结果（供同步接口使用，不能在事件循环线程内调用）
+        """
+        if self.in_loop_thread():
+            coro.close()
+            raise RuntimeError("不能在I/O循环线程内同步等待协程，请直接 await")
+        return self.submit(coro).result(timeout)
+
+    async def run_blocking(self, func: Callable, *args) -> Any:
+        """在固定大小的线程池中执行阻塞函数"""
+        return await self._loop.run_in_executor(None, func, *args)
+
+    @staticmethod
+    async def _cancel_pending():
+        current = asyncio.current_task()
+        tasks = [task for task in asyncio.all_tasks() if task is not current]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await asyncio.get_running_loop().shutdown_asyncgens()
+
+    def stop(self, timeout: float = 5.0):
+        """停止事件循环"""
+        if not self._loop.is_running():
+            return
+        # 先取消未完成的协程、关闭异步生成器（流式响应），避免退出时报告任务被销毁
+        try:
+            self.submit(self._cancel_pending()).result(timeout)
+        except Exception as e:
+            logger.debug(f"取消未完成的协程失败: {e}")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        logger.info("后台I/O循环已停止")
+
+
+_io_loop: Optional[IOLoop] = None
+_io_loop_lock = threading.Lock()
+
+
+def get_io_loop() -> IOLoop:
+    """获取全局I/O循环（首次调用时创建）"""
+    global _io_loop
+    with _io_loop_lock:
+        if _io_loop is None:
+            from src.utils.config import config
+            _io_loop = IOLoop(blocking_workers=int(config.get("io.blocking_workers", 4)))
+        return _io_loop
@@ -0,0 +1,521 @@
+"""剪切板内容处理链路（不依赖 Qt）
+
+托盘应用、命令行（src/cli.py）和本地接入接口（src/core/ingest_server.py）共用的处理步骤：
+- 预过滤：空内容、长度不符、纯数字、单个URL 直接跳过（不调用AI）
+- 去重：一两天内已同步过的内容直接跳过
+- AI 分类，按分类结果生成笔记，分发到同步目标（含 fanout 额外目标）
+- 外部服务组件和同步目标按配置登记
+
+ClipPipeline 以阻塞方式处理一条内容（或直接发送已指定目标的笔记）并返回结构化结果，可在多个线程中并发调用。
+"""
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from loguru import logger
+
+from src.core.ai_processor import AIProcessor
+from src.core.components import components
+from src.core.deadline import Deadline, DeadlineExceeded, CallCancelled
+from src.integrations.sinks import FanOutDispatcher, Note, SinkResult, NotionSink, FlomoSink, TickTickSink
+from src.utils.clipboard_dedupe import ClipboardDedupeStore, fingerprint_text
+from src.utils.metrics import metrics
+from src.utils.prefilter import prefilter
+
+
+# 处理结果状态
+STATUS_FILTERED = "filtered"        # 未通过预过滤
+STATUS_DUPLICATE = "duplicate"      # 命中去重缓存
+STATUS_IGNORED = "ignored"          # AI判定不需要保存
+STATUS_CLASSIFIED = "classified"    # 只分类不同步（dry run）
+STATUS_UNROUTED = "unrouted"        # 分类目标未配置
+STATUS_SYNCED = "synced"            # 所有目标都已保存
+STATUS_PARTIAL = "partial"          # 部分目标保存失败
+STATUS_FAILED = "failed"            # 所有目标都保存失败
+STATUS_TIMEOUT = "timeout"          # 分类或同步超时
+STATUS_CANCELLED = "cancelled"      # 已取消
+STATUS_ERROR = "error"              # 处理异常
+
+# 视为处理失败的状态（命令行据此决定退出码）
+FAILURE_STATUSES = frozenset({STATUS_PARTIAL, STATUS_FAILED, STATUS_TIMEOUT, STATUS_CANCELLED, STATUS_ERROR})
+
+RESULTS = metrics.counter("quicknote_pipeline_results_total", "处理链路结果数", ("source", "status"))
+PROCESS_SECONDS = metrics.histogram("quicknote_pipeline_seconds", "处理链路单条耗时（分类+同步）", ("source",))
+
+
+def ai_configured(cfg) -> bool:
+    """当前AI提供商是否已配置API Key"""
+    provider = cfg.ai_provider
+    if provider in ("openai", "deepseek"):
+        return bool(cfg.openai_api_key)
+    if provider == "claude":
+        return bool(cfg.anthropic_api_key)
+    return False
+
+
+# 各外部服务组件依赖的配置：配置快照的字段名，或 config.yaml 点号路径前缀（以"."结尾）
+SERVICE_SETTINGS = {
+    "ai_processor": ("ai_provider", "openai_api_key", "openai_base_url", "openai_model", "anthropic_api_key", "ai."),
+    "notion_api": ("notion_api_key", "notion_database_id", "notion_base_url",
+                   "notion.rate_limit.", "notion.schema_ttl_hours", "notion.properties."),
+    "flomo_api": ("flomo_api_url",),
+    "ticktick_api": ("ticktick_smtp_host", "ticktick_smtp_port", "ticktick_smtp_ssl",
+                     "ticktick_smtp_user", "ticktick_smtp_pass", "ticktick_email"),
+}
+
+
+def affected_services(changed) -> List[str]:
+    """按变化的配置项（ConfigSnapshot.changed_keys）找出需要重新创建的服务组件"""
+    def matches(key: str, setting: str) -> bool:
+        return key.startswith(setting) if setting.endswith(".") else key == setting
+
+    return [
+        name for name, settings in SERVICE_SETTINGS.items()
+        if any(matches(key, setting) for key in changed for setting in settings)
+    ]
+
+
+def register_services(cfg, initial: bool = False, names: Optional[List[str]] = None):
+    """
+    登记外部服务组件的创建函数（不导入SDK、不创建客户端）
+
+    Args:
+        cfg: 配置对象
+        initial: 是否为启动时登记（启动时Notion和AI处理器总是登记；重新加载时只在配置有效时替换）
+        names: 只重新登记这些组件（默认全部）；重新加载时未配置的 Flomo/滴答清单会被移除
+    """
+    names = list(SERVICE_SETTINGS) if names is None else names
+    def make_ai_processor():
+        return AIProcessor(cfg.ai_provider)
+
+    def make_notion_api():
+        from src.integrations.notion_api import NotionAPI
+        return NotionAPI(cfg.notion_api_key, cfg.notion_database_id)
+
+    def make_flomo_api():
+        from src.integrations.flomo_api import FlomoAPI
+        return FlomoAPI(cfg.flomo_api_url)
+
+    def make_ticktick_api():
+        from src.integrations.ticktick_api import TickTickAPI
+        return TickTickAPI(
+            smtp_host=cfg.ticktick_smtp_host,
+            smtp_port=cfg.ticktick_smtp_port,
+            smtp_user=cfg.ticktick_smtp_user,
+            smtp_pass=cfg.ticktick_smtp_pass,
+            ticktick_email=cfg.ticktick_email,
+            use_ssl=cfg.ticktick_smtp_ssl
+        )
+
+    if "ai_processor" in names and (initial or cfg.validate()):
+        components.register("ai_processor", make_ai_processor)
+        logger.info("AI处理器已登记")
+    if "notion_api" in names and (initial or (cfg.notion_api_key and cfg.notion_database_id)):
+        components.register("notion_api", make_notion_api)
+        logger.info("Notion API已登记")
+    if "flomo_api" in names:
+        if not initial:
+            # 旧实例即将被替换或移除：先关闭它的连接
+            close_flomo_api()
+        if cfg.flomo_api_url:
+            components.register("flomo_api", make_flomo_api)
+            logger.info("Flomo API已登记")
+        elif not initial:
+            components.unregister("flomo_api")
+    if "ticktick_api" in names:
+        if cfg.ticktick_smtp_user and cfg.ticktick_smtp_pass and cfg.ticktick_email:
+            components.register("ticktick_api", make_ticktick_api)
+            logger.info("TickTick API已登记")
+        elif not initial:
+            components.unregister("ticktick_api")
+
+
+def close_flomo_api(timeout: float = 5.0):
+    """关闭已创建的 Flomo 客户端的连接（未创建时不做任何事）"""
+    flomo_api = components.instance("flomo_api")
+    if flomo_api is not None:
+        flomo_api.close(timeout)
+
+
+def register_sinks(dispatcher: FanOutDispatcher, notion_writer=None, flomo_api=None, ticktick_api=None, ai_processor=None):
+    """按已配置的服务注册同步目标（未配置的目标会被移除）"""
+    if notion_writer is not None:
+        dispatcher.register(NotionSink(notion_writer))
+    else:
+        dispatcher.unregister("notion")
+    if flomo_api:
+        dispatcher.register(FlomoSink(flomo_api))
+    else:
+        dispatcher.unregister("flomo")
+    if ticktick_api:
+        dispatcher.register(TickTickSink(ticktick_api, ai_processor))
+    else:
+        dispatcher.unregister("ticktick")
+
+
+def fanout_targets(cfg, primary: str) -> List[str]:
+    """主目标 + 配置的额外目标（fanout.<主目标>），去重并保持顺序"""
+    extra = cfg.get(f"fanout.{primary}", []) or []
+    return list(dict.fromkeys([primary, *extra]))
+
+
+def note_from_classification(content: str, result: Dict[str, Any], source: str = "clipboard",
+                             deadline: Optional[Deadline] = None) -> Note:
+    """按分类结果生成自动同步的笔记"""
+    return Note(
+        content,
+        title=result.get("title"),
+        tags=list(result.get("tags") or []),
+        category=result.get("category"),
+        priority=result.get("priority", "中"),
+        # 分类结果已包含有效时间时直接使用，省去第二次AI调用
+        due_date=result.get("datetime_ticktick") if result.get("has_time") else None,
+        auto_sync=True,
+        source=source,
+        deadline=deadline
+    )
+
+
+@dataclass
+class ClipResult:
+    """一条内容的处理结果"""
+    status: str
+    verdict: Optional[str] = None
+    title: Optional[str] = None
+    tags: List[str] = field(default_factory=list)
+    reason: Optional[str] = None
+    sinks: List[SinkResult] = field(default_factory=list)
+    fingerprint: Optional[str] = None
+    elapsed_ms: float = 0.0
+    # 同步超时（STATUS_TIMEOUT）时仍在进行的发送：完成后结果为各目标的 SinkResult 列表，
+    # 有目标成功时已补记去重，调用方可据此补记自己的进度（如批量导入的检查点）
+    late_sync: Optional[Future] = field(default=None, repr=False, compare=False)
+
+    @property
+    def ok(self) -> bool:
+        return self.status not in FAILURE_STATUSES
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "status": self.status,
+            "verdict": self.verdict,
+            "title": self.title,
+            "tags": self.tags,
+            "reason": self.reason,
+            "sinks": [
+                {
+                    "sink": r.sink,
+                    "success": r.success,
+                    "detail": r.detail or None,
+                    "error": r.error,
+                    "latency_ms": r.latency_ms,
+                }
+                for r in self.sinks
+            ],
+            "fingerprint": self.fingerprint,
+            "elapsed_ms": self.elapsed_ms,
+        }
+
+
+class ClipPipeline:
+    """预过滤 → 去重 → AI分类 → 分发到同步目标（线程安全，阻塞执行）"""
+
+    def __init__(
+        self,
+        ai_processor,
+        dispatcher: FanOutDispatcher,
+        targets_for: Callable[[str], List[str]],
+        dedupe: Optional[ClipboardDedupeStore] = None,
+        min_length: int = 10,
+        max_length: int = 5000,
+        use_prefilter: bool = True,
+        sync_timeout: float = 120.0,
+        source: str = "clipboard",
+        classify_budget: Optional[float] = None,
+        notion_writer=None
+    ):
+        """
+        初始化处理链路
+
+        Args:
+            ai_processor: AI处理器
+            dispatcher: 同步目标分发器
+            targets_for: 分类目标 → 实际发送的目标列表（含 fanout 额外目标）
+            dedupe: 去重存储（None 表示不去重）
+            min_length: 预过滤最小字符数
+            max_length: 预过滤最大字符数
+            use_prefilter: 是否启用预过滤
+            sync_timeout: 等待同步目标完成的时间上限（秒）
+            source: 笔记来源标识
+            classify_budget: 分类阶段预算（秒，默认使用 ai.timeouts.classify）
+            notion_writer: Notion写入队列（close() 时等待写完并停止）
+        """
+        self.ai_processor = ai_processor
+        self.dispatcher = dispatcher
+        self.targets_for = targets_for
+        self.dedupe = dedupe
+        self.min_length = int(min_length)
+        self.max_length = int(max_length)
+        self.use_prefilter = use_prefilter
+        self.sync_timeout = float(sync_timeout)
+        self.source = source
+        self.classify_budget = classify_budget
+        self.notion_writer = notion_writer
+        # 正在处理中的内容指纹：并发处理同一内容时只处理一次
+        self._in_flight = set()
+        self._lock = threading.Lock()
+        # 已超时但仍在发送的内容指纹（发送完成前相同内容同样视为正在处理）
+        self._late = set()
+        self._late_done = threading.Condition(self._lock)
+
+    def close(self, timeout: float = 30.0):
+        """等待 Notion 写入队列写完并停止，等待超时后仍在进行的发送结束，关闭 Flomo 连接"""
+        if self.notion_writer is not None:
+            self.notion_writer.stop(timeout)
+        with self._late_done:
+            if not self._late_done.wait_for(lambda: not self._late, timeout):
+                logger.warning(f"仍有 {len(self._late)} 条超时的发送未结束")
+        close_flomo_api()
+
+    def process(self, content: str, dry_run: bool = False, deadline: Optional[Deadline] = None) -> ClipResult:
+        """
+        处理一条内容（阻塞直到分类和同步完成）
+
+        Args:
+            content: 内容
+            dry_run: 只分类，不发送到同步目标、不记录去重
+            deadline: 分类阶段的截止时间（默认按 classify_budget 新建；调用方传入时可从外部取消）
+        """
+        start = time.perf_counter()
+        result = self._process(content, dry_run, deadline)
+        return self._finish(result, start)
+
+    def _process(self, content: str, dry_run: bool, deadline: Optional[Deadline]) -> ClipResult:
+        if self.use_prefilter:
+            reason = prefilter(content, self.min_length, self.max_length)
+            if reason:
+                return ClipResult(STATUS_FILTERED, reason=reason)
+
+        fingerprint = fingerprint_text(content)
+        if self.dedupe is not None:
+            decision = self.dedupe.check(content)
+            if decision.is_duplicate:
+                return ClipResult(STATUS_DUPLICATE, reason=f"{decision.age_seconds}s 内已同步", fingerprint=fingerprint)
+        with self._lock:
+            if fingerprint in self._in_flight or fingerprint in self._late:
+                return ClipResult(STATUS_DUPLICATE, reason="相同内容正在处理", fingerprint=fingerprint)
+            self._in_flight.add(fingerprint)
+        try:
+            return self._classify_and_sync(content, fingerprint, dry_run, deadline)
+        finally:
+            with self._lock:
+                self._in_flight.discard(fingerprint)
+
+    def deliver(self, note: Note, target: str, dry_run: bool = False) -> ClipResult:
+        """
+        把已指定目标的笔记直接发送（不经过AI分类和预过滤，仍做去重）
+
+        Args:
+            note: 笔记
+            target: 主目标（实际发送时包含 fanout 额外目标）
+            dry_run: 只检查，不发送、不记录去重
+        """
+        start = time.perf_counter()
+        result = self._deliver(note, target, dry_run)
+        return self._finish(result, start)
+
+    def _finish(self, result: ClipResult, start: float) -> ClipResult:
+        elapsed = time.perf_counter() - start
+        result.elapsed_ms = round(elapsed * 1000, 1)
+        RESULTS.inc(source=self.source, status=result.status)
+        if result.status not in (STATUS_FILTERED, STATUS_DUPLICATE):
+            PROCESS_SECONDS.observe(elapsed, source=self.source)
+        return result
+
+    def _deliver(self, note: Note, target: str, dry_run: bool) -> ClipResult:
+        if not note.content or not note.content.strip():
+            return ClipResult(STATUS_FILTERED, reason="空内容")
+        fingerprint = fingerprint_text(note.content)
+        if self.dedupe is not None:
+            decision = self.dedupe.check(note.content)
+            if decision.is_duplicate:
+                return ClipResult(STATUS_DUPLICATE, reason=f"{decision.age_seconds}s 内已同步", fingerprint=fingerprint)
+        result = ClipResult(STATUS_CLASSIFIED, verdict=target, title=note.title, tags=list(note.tags), fingerprint=fingerprint)
+        if not self.dispatcher.has(target):
+            result.status = STATUS_UNROUTED
+            result.reason = f"同步目标未配置: {target}"
+            return result
+        if dry_run:
+            return result
+        with self._lock:
+            if fingerprint in self._in_flight or fingerprint in self._late:
+                return ClipResult(STATUS_DUPLICATE, reason="相同内容正在处理", fingerprint=fingerprint)
+            self._in_flight.add(fingerprint)
+        try:
+            return self._sync(note, target, result)
+        finally:
+            with self._lock:
+                self._in_flight.discard(fingerprint)
+
+    def _classify_and_sync(
+        self, content: str, fingerprint: str, dry_run: bool, deadline: Optional[Deadline]
+    ) -> ClipResult:
+        try:
+            if deadline is None:
+                deadline = Deadline(self.classify_budget or self.ai_processor.classify_budget, "分类")
+            result = self.ai_processor.classify_content(content, deadline=deadline)
+        except CallCancelled as e:
+            return ClipResult(STATUS_CANCELLED, reason=str(e), fingerprint=fingerprint)
+        except DeadlineExceeded as e:
+            return ClipResult(STATUS_TIMEOUT, reason=str(e), fingerprint=fingerprint)
+        except Exception as e:
+            logger.error(f"分类失败: {e}")
+            return ClipResult(STATUS_ERROR, reason=str(e), fingerprint=fingerprint)
+
+        if not result.get("valuable"):
+            if result.get("ai_errors"):
+                return ClipResult(STATUS_ERROR, reason=f"AI分析失败 {result['ai_errors']} 次", fingerprint=fingerprint)
+            return ClipResult(STATUS_IGNORED, fingerprint=fingerprint)
+
+        target_type = result.get("type")
+        classified = ClipResult(
+            STATUS_CLASSIFIED,
+            verdict=target_type,
+            title=result.get("title"),
+            tags=list(result.get("tags") or []),
+            fingerprint=fingerprint
+        )
+        if dry_run:
+            return classified
+        if not self.dispatcher.has(target_type):
+            classified.status = STATUS_UNROUTED
+            classified.reason = f"同步目标未配置: {target_type}"
+            return classified
+
+        note = note_from_classification(content, result, source=self.source, deadline=deadline)
+        return self._sync(note, target_type, classified)
+
+    def _sync(self, note: Note, target: str, result: ClipResult) -> ClipResult:
+        """发送到主目标及 fanout 目标，等待完成并填写结果；至少一个目标成功后记录去重"""
+        future = self.dispatcher.dispatch(note, self.targets_for(target))
+        try:
+            sinks = future.result(self.sync_timeout)
+        except FutureTimeoutError:
+            # 已发出的请求无法撤回（Notion 写入队列还会继续重试）：发送完成后再补记去重
+            result.status = STATUS_TIMEOUT
+            result.reason = f"同步超过 {self.sync_timeout:g}s 未完成"
+            result.late_sync = self._track_late(future, result.fingerprint)
+            return result
+        except Exception as e:
+            result.status = STATUS_ERROR
+            result.reason = str(e)
+            return result
+
+        result.sinks = list(sinks)
+        succeeded = [r for r in sinks if r.success]
+        if not sinks or not succeeded:
+            result.status = STATUS_FAILED
+        elif len(succeeded) < len(sinks):
+            result.status = STATUS_PARTIAL
+        else:
+            result.status = STATUS_SYNCED
+        if succeeded:
+            self._mark_synced(result.fingerprint)
+        return result
+
+    def _mark_synced(self, fingerprint: Optional[str]):
+        if self.dedupe is None or fingerprint is None:
+            return
+        try:
+            self.dedupe.mark_fingerprint(fingerprint)
+        except Exception as e:
+            logger.warning(f"写入去重缓存失败: {e}")
+
+    def _track_late(self, future: Future, fingerprint: Optional[str]) -> Future:
+        """跟踪超时后仍在进行的发送，返回完成后结果为 SinkResult 列表的 Future"""
+        late = Future()
+        with self._lock:
+            if fingerprint is not None:
+                self._late.add(fingerprint)
+
+        def on_done(done: Future):
+            try:
+                sinks = [] if done.cancelled() or done.exception() is not None else list(done.result())
+                if any(r.success for r in sinks):
+                    logger.info(f"超时的同步已完成: {', '.join(r.sink for r in sinks if r.success)}")
+                    self._mark_synced(fingerprint)
+                late.set_result(sinks)
+            finally:
+                with self._late_done:
+                    self._late.discard(fingerprint)
+                    self._late_done.notify_all()
+
+        future.add_done_callback(on_done)
+        return late
+
+
+def build_pipeline(
+    cfg,
+    dry_run: bool = False,
+    dedupe_path: Optional[Path] = None,
+    use_prefilter: bool = True,
+    sync_timeout: float = 120.0,
+    classify_budget: Optional[float] = None,
+    source: str = "cli"
+) -> ClipPipeline:
+    """
+    按配置组装无界面的处理链路（命令行、批量导入使用）
+
+    Args:
+        cfg: 配置对象
+        dry_run: 只分类（不创建 Notion 写入队列）
+        dedupe_path: 去重记录文件（None 表示不去重）
+        use_prefilter: 是否启用预过滤
+        sync_timeout: 单条同步的等待上限（秒）
+        classify_budget: 分类阶段预算（秒）
+        source: 笔记来源标识
+    """
+    register_services(cfg, initial=True)
+    ai_processor = components.proxy("ai_processor")
+    notion_writer = None
+    if not dry_run and cfg.notion_api_key and cfg.notion_database_id:
+        from src.integrations.notion_writer import NotionWriter
+        notion_writer = NotionWriter(
+            components.proxy("notion_api"),
+            max_attempts=cfg.get("notion.max_attempts", 5),
+            max_backoff=cfg.get("notion.max_backoff", 60),
+            workers=cfg.get("notion.workers", 3)
+        )
+    dispatcher = FanOutDispatcher()
+    register_sinks(
+        dispatcher,
+        notion_writer,
+        components.proxy("flomo_api") if components.has("flomo_api") else None,
+        components.proxy("ticktick_api") if components.has("ticktick_api") else None,
+        ai_processor
+    )
+
+    dedupe = None
+    if dedupe_path is not None:
+        try:
+            ttl_seconds = int(float(cfg.get("clipboard.dedupe.ttl_hours", 48)) * 3600)
+        except Exception:
+            ttl_seconds = 48 * 3600
+        dedupe = ClipboardDedupeStore(path=dedupe_path, ttl_seconds=ttl_seconds)
+
+    return ClipPipeline(
+        ai_processor,
+        dispatcher,
+        targets_for=lambda primary: fanout_targets(cfg, primary),
+        dedupe=dedupe,
+        min_length=cfg.clipboard_min_length,
+        max_length=cfg.clipboard_max_length,
+        use_prefilter=use_prefilter,
+        sync_timeout=sync_timeout,
+        source=source,
+        classify_budget=classify_budget,
+        notion_writer=notion_writer
+    )
@@ -0,0 +1,203 @@
+"""单实例守护与重启交接
+
+用本地套接字（QLocalServer / QLocalSocket）保证同一用户只运行一个实例：
+- 首个实例监听本地套接字；再次启动时连接到它，转发命令（显示快速输入、打开设置）后退出，
+  不会出现两个剪切板监控和两套快捷键钩子互相抢占
+- 重启时旧实例先停止监控、整理运行状态（剪切板历史、待写入Notion的内容、去重记录），
+  再以 --successor 启动新实例；新实例连接旧实例取走状态，旧实例随即退出，新实例接管监听
+
+协议：每条消息是一行 JSON。请求 {"cmd": ..., "args": {...}}，回复 {"ok": bool, ...}。
+环境变量 QUICKNOTE_INSTANCE_NAME 可覆盖套接字名称（基准测试并行运行时使用）。
+"""
+import getpass
+import json
+import os
+import time
+from typing import Any, Dict, Optional
+
+from PyQt5.QtCore import QObject, pyqtSignal
+from PyQt5.QtNetwork import QLocalServer, QLocalSocket
+from loguru import logger
+
+# 命令行参数与转发命令的对应关系
+COMMAND_FLAGS = {
+    "--show-input": "show_input",
+    "--settings": "settings",
+}
+SUCCESSOR_FLAG = "--successor"
+HANDOFF_COMMAND = "handoff"
+
+
+def instance_name() -> str:
+    """本地套接字名称（按用户区分）"""
+    override = os.getenv("QUICKNOTE_INSTANCE_NAME")
+    if override:
+        return override
+    try:
+        user = getpass.getuser()
+    except Exception:
+        user = "default"
+    return f"QuickNoteAI-{user}"
+
+
+def command_from_argv(argv) -> str:
+    """从命令行参数取出要转发的命令（默认显示快速输入窗口）"""
+    for arg in argv[1:]:
+        if arg in COMMAND_FLAGS:
+            return COMMAND_FLAGS[arg]
+    return "show_input"
+
+
+def _request(name: str, message: Dict[str, Any], timeout_ms: int) -> Optional[Dict[str, Any]]:
+    """连接到已运行的实例并发送一条请求，连接不上时返回None"""
+    socket = QLocalSocket()
+    socket.connectToServer(name)
+    if not socket.waitForConnected(timeout_ms):
+        return None
+    try:
+        socket.write((json.dumps(message, ensure_ascii=False) + "\n").encode("utf-8"))
+        socket.flush()
+        socket.waitForBytesWritten(timeout_ms)
+        data = b""
+        deadline = time.monotonic() + timeout_ms / 1000
+        while not data.endswith(b"\n"):
+            remaining = int((deadline - time.monotonic()) * 1000)
+            if remaining <= 0 or not socket.waitForReadyRead(remaining):
+                break
+            data += bytes(socket.readAll())
+        if not data.strip():
+            return {"ok": False, "error": "未收到回复"}
+        return json.loads(data.decode("utf-8"))
+    except Exception as e:
+        return {"ok": False, "error": str(e)}
+    finally:
+        socket.disconnectFromServer()
+
+
+class SingleInstance(QObject):
+    """单实例守护（在界面线程中创建和使用）"""
+
+    # 收到其他启动转发的命令（命令名，参数）
+    command_received = pyqtSignal(str, dict)
+    # 重启交接：状态已交给新实例
+    handoff_delivered = pyqtSignal()
+
+    def __init__(self, name: Optional[str] = None):
+        super().__init__()
+        self.name = name or instance_name()
+        self.server: Optional[QLocalServer] = None
+        # 重启时待交给新实例的状态（None 表示当前没有在重启）
+        self.handoff_state: Optional[Dict[str, Any]] = None
+        self._buffers: Dict[QLocalSocket, bytes] = {}
+
+    def forward(self, command: str, args: Optional[Dict[str, Any]] = None, timeout_ms: int = 2000) -> Optional[Dict[str, Any]]:
+        """
+        把命令转发给已运行的实例
+
+        Returns:
+            对方的回复；没有已运行的实例时返回None
+        """
+        return _request(self.name, {"cmd": command, "args": args or {}}, timeout_ms)
+
+    def take_over(self, timeout: float = 15.0) -> Optional[Dict[str, Any]]:
+        """
+        作为重启后的新实例：从旧实例取走运行状态，等旧实例退出后接管监听
+
+        Returns:
+            旧实例交出的状态（没有旧实例或交接失败时为None）
+        """
+        state = None
+        reply = _request(self.name, {"cmd": HANDOFF_COMMAND, "args": {"pid": os.getpid()}}, int(timeout * 1000))
+        if reply and reply.get("ok"):
+            state = reply.get("state")
+            logger.info("已从旧实例取得运行状态")
+        elif reply:
+            logger.warning(f"旧实例未交出运行状态: {reply.get('error')}")
+
+        # 旧实例交出状态后退出，监听名称随之释放
+        end = time.monotonic() + timeout
+        while not self.listen():
+            if time.monotonic() >= end:
+                logger.error("等待旧实例退出超时，无法接管单实例监听")
+                break
+            time.sleep(0.1)
+        return state
+
+    def listen(self) -> bool:
+        """
+        开始监听
+
+        Unix 上进程异常退出会留下套接字文件，连接不上时先清理再监听。
+
+        Returns:
+            是否为唯一实例（已有实例在运行时为False；监听本身失败时仍返回True，只是不提供单实例保护）
+        """
+        probe = QLocalSocket()
+        probe.connectToServer(self.name)
+        if probe.waitForConnected(300):
+            probe.disconnectFromServer()
+            return False
+        QLocalServer.removeServer(self.name)
+        server = QLocalServer(self)
+        server.setSocketOptions(QLocalServer.UserAccessOption)
+        if not server.listen(self.name):
+            logger.warning(f"单实例监听失败，本次运行不做单实例保护: {server.errorString()}")
+            return True
+        server.newConnection.connect(self._on_new_connection)
+        self.server = server
+        logger.info(f"单实例监听已启动: {self.name}")
+        return True
+
+    def close(self):
+        """停止监听"""
+        if self.server is not None:
+            self.server.close()
+            self.server = None
+
+    def _on_new_connection(self):
+        while self.server is not None and self.server.hasPendingConnections():
+            socket = self.server.nextPendingConnection()
+            self._buffers[socket] = b""
+            socket.readyRead.connect(lambda s=socket: self._on_ready_read(s))
+            socket.disconnected.connect(lambda s=socket: self._on_disconnected(s))
+
+    def _on_disconnected(self, socket: QLocalSocket):
+        self._buffers.pop(socket, None)
+        socket.deleteLater()
+
+    def _on_ready_read(self, socket: QLocalSocket):
+        buffer = self._buffers.get(socket, b"") + bytes(socket.readAll())
+        while b"\n" in buffer:
+            line, buffer = buffer.split(b"\n", 1)
+            if line.strip():
+                self._handle(socket, line)
+        self._buffers[socket] = buffer
+
+    def _reply(self, socket: QLocalSocket, message: Dict[str, Any]):
+        socket.write((json.dumps(message, ensure_ascii=False) + "\n").encode("utf-8"))
+        socket.flush()
+        socket.waitForBytesWritten(2000)
+
+    def _handle(self, socket: QLocalSocket, line: bytes):
+        try:
+            message = json.loads(line.decode("utf-8"))
+            command = str(message.get("cmd", ""))
+            args = message.get("args") or {}
+        except Exception as e:
+            self._reply(socket, {"ok": False, "error": f"无法解析请求: {e}"})
+            return
+
+        if command == HANDOFF_COMMAND:
+            if self.handoff_state is None:
+                self._reply(socket, {"ok": False, "error": "当前实例没有在重启"})
+                return
+            logger.info(f"交出运行状态给新实例（pid={args.get('pid')}）")
+            self._reply(socket, {"ok": True, "state": self.handoff_state})
+            self.handoff_state = None
+            self.handoff_delivered.emit()
+            return
+
+        # 先回复再处理（命令可能打开模态对话框）
+        logger.info(f"收到其他启动转发的命令: {command}")
+        self._reply(socket, {"ok": True})
+        self.command_received.emit(command, dict(args))
@@ -1,13 +1,178 @@
-"""剪切板历史窗口"""
+"""剪切板历史窗口
+
+列表基于 QAbstractListModel 按需加载：打开时只查询第一页，滚动到底部时由视图调用
+canFetchMore / fetchMore 按 id 翻页加载下一页；查询在后台I/O线程池执行，不阻塞界面。
+视图使用统一行高，只为可见行生成预览文本，10万条历史下打开和搜索同样流畅。
+"""
 from PyQt5.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel, 
-    QListWidget, QListWidgetItem, QPushButton, QTextEdit
+    QListView, QPushButton, QTextEdit, QLineEdit, QComboBox
 )
-from PyQt5.QtCore import Qt, pyqtSignal
-from PyQt5.QtGui import QFont
+from PyQt5.QtCore import Qt, pyqtSignal, QTimer, QAbstractListModel, QModelIndex
 from loguru import logger
+from datetime import datetime
 import pyperclip
 
+from src.core.io_loop import get_io_loop
+from src.utils.clipboard_store import ClipEntry
+
+
+# 分类结论筛选项（显示名, verdict；"全部"不筛选）
+VERDICT_FILTERS = [
+    ("全部", "*"),
+    ("Notion", "notion"),
+    ("Flomo", "flomo"),
+    ("滴答清单", "ticktick"),
+    ("已忽略", "ignored"),
+    ("重复", "duplicate"),
+    ("处理失败", "failed"),
+]
+VERDICT_NAMES = {verdict: name for name, verdict in VERDICT_FILTERS if verdict != "*"}
+
+
+class ClipboardHistoryModel(QAbstractListModel):
+    """剪切板历史列表模型（分页加载，查询在后台线程执行）"""
+    
+    PAGE_SIZE = 200
+    PREVIEW_CHARS = 60
+    
+    # 后台查询完成（查询代次, 记录列表, 总条数或None）
+    _page_loaded = pyqtSignal(int, object, object)
+    # 一页加载完成（已加载条数, 总条数或None）
+    page_loaded = pyqtSignal(int, object)
+    
+    def __init__(self, store=None, parent=None):
+        """
+        初始化模型
+        
+        Args:
+            store: 剪切板历史存储（None 时只能通过 set_history 显示内存中的最近记录）
+            parent: 父对象
+        """
+        super().__init__(parent)
+        self.store = store
+        self._entries = []
+        self._query = ""
+        self._verdict = None
+        self._has_more = False
+        self._loading = False
+        self._total = None
+        # 每次重新查询递增，丢弃过期查询的结果
+        self._generation = 0
+        self._page_loaded.connect(self._on_page_loaded)
+    
+    def set_filter(self, query: str = "", verdict=None):
+        """
+        按搜索词和分类结论重新查询（verdict 为None时不筛选）
+        """
+        self.beginResetModel()
+        self._generation += 1
+        self._entries = []
+        self._query = (query or "").strip()
+        self._verdict = verdict
+        self._has_more = self.store is not None
+        self._loading = False
+        self._total = None
+        self.endResetModel()
+        self._request_page()
+    
+    def set_history(self, history):
+        """显示内存中的历史（没有历史存储时使用，最新的在前）"""
+        self.beginResetModel()
+        self._generation += 1
+        self._entries = [ClipEntry(0, 0, content) for content in history]
+        self._has_more = False
+        self._loading = False
+        self.endResetModel()
+        self.page_loaded.emit(len(self._entries), len(self._entries))
+    
+    def entry(self, index: QModelIndex):
+        if not index.isValid() or index.row() >= len(self._entries):
+            return None
+        return self._entries[index.row()]
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._entries)
+    
+    def data(self, index, role=Qt.DisplayRole):
+        entry = self.entry(index)
+        if entry is None:
+            return None
+        if role == Qt.DisplayRole:
+            # 视图只为可见行请求预览
+            return self._preview(index.row(), entry)
+        if role == Qt.UserRole:
+            return entry.content
+        return None
+    
+    def _preview(self, row: int, entry: ClipEntry) -> str:
+        content = " ".join(entry.content[:self.PREVIEW_CHARS + 1].split())
+        if len(entry.content) > self.PREVIEW_CHARS:
+            content = content[:self.PREVIEW_CHARS] + "..."
+        parts = [f"[{row + 1}]"]
+        if entry.created_at:
+            parts.append(datetime.fromtimestamp(entry.created_at).strftime("%m-%d %H:%M"))
+        if entry.verdict:
+            parts.append(f"[{VERDICT_NAMES.get(entry.verdict, entry.verdict)}]")
+        parts.append(content)
+        return " ".join(parts)
+    
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._has_more and not self._loading
+    
+    def fetchMore(self, parent=QModelIndex()):
+        if not parent.isValid():
+            self._request_page()
+    
+    def _request_page(self):
+        """在后台线程查询下一页（按 id 翻页）"""
+        if self.store is None or self._loading or not self._has_more:
+            return
+        self._loading = True
+        store = self.store
+        generation = self._generation
+        query, verdict = self._query, self._verdict
+        before_id = self._entries[-1].id if self._entries else None
+        
+        def load():
+            entries = store.search(query, self.PAGE_SIZE, before_id=before_id, verdict=verdict)
+            # 第一页附带总条数（不筛选时才有意义）
+            total = store.count() if before_id is None and not query and verdict is None else None
+            return entries, total
+        
+        def done(future):
+            try:
+                entries, total = future.result()
+            except Exception as e:
+                logger.error(f"加载剪切板历史失败: {e}")
+                entries, total = None, None
+            try:
+                self._page_loaded.emit(generation, entries, total)
+            except RuntimeError:
+                # 窗口已关闭，模型已销毁
+                pass
+        
+        io = get_io_loop()
+        io.submit(io.run_blocking(load)).add_done_callback(done)
+    
+    def _on_page_loaded(self, generation: int, entries, total):
+        if generation != self._generation:
+            return
+        self._loading = False
+        if total is not None:
+            self._total = total
+        if entries is None:
+            self._has_more = False
+            self.page_loaded.emit(len(self._entries), self._total)
+            return
+        self._has_more = len(entries) >= self.PAGE_SIZE
+        if entries:
+            start = len(self._entries)
+            self.beginInsertRows(QModelIndex(), start, start + len(entries) - 1)
+            self._entries.extend(entries)
+            self.endInsertRows()
+        self.page_loaded.emit(len(self._entries), self._total)
+
 
 class ClipboardHistoryDialog(QDialog):
     """剪切板历史对话框"""
@@ -22,6 +187,7 @@ class ClipboardHistoryDialog(QDialog):
         """
         super().__init__(parent)
         self.main_app = main_app
+        self.store = getattr(main_app, "clipboard_store", None)
         self._init_ui()
         self._load_history()
         logger.info("剪切板历史窗口已初始化")
@@ -48,7 +214,7 @@ class ClipboardHistoryDialog(QDialog):
         layout.addWidget(title)
         
         # 提示信息
-        hint = QLabel("💡 点击列表项查看详情，点击「复制」按钮复制到剪切板")
+        hint = QLabel("💡 点击列表项查看详情，点击「复制」按钮复制到剪切板；可按内容搜索或按分类结论筛选")
         hint.setStyleSheet("""
             QLabel {
                 color: #666;
@@ -58,30 +224,72 @@ class ClipboardHistoryDialog(QDialog):
         """)
         layout.addWidget(hint)
         
-        # 历史列表
-        self.history_list = QListWidget()
+        # 搜索和筛选（需要剪切板历史存储）
+        filter_layout = QHBoxLayout()
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("🔍 搜索剪切板历史...")
+        self.search_edit.setStyleSheet("""
+            QLineEdit {
+                padding: 8px;
+                border: 2px solid #ccc;
+                border-radius: 4px;
+                font-size: 14px;
+            }
+        """)
+        self.verdict_combo = QComboBox()
+        for name, verdict in VERDICT_FILTERS:
+            self.verdict_combo.addItem(name, verdict)
+        self.verdict_combo.setStyleSheet("QComboBox { padding: 8px; font-size: 14px; }")
+        filter_layout.addWidget(self.search_edit, stretch=1)
+        filter_layout.addWidget(self.verdict_combo)
+        layout.addLayout(filter_layout)
+        
+        # 输入停顿后再查询
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(200)
+        self._search_timer.timeout.connect(self._load_history)
+        self.search_edit.textChanged.connect(lambda _: self._search_timer.start())
+        self.verdict_combo.currentIndexChanged.connect(lambda _: self._load_history())
+        
+        if self.store is None:
+            self.search_edit.setEnabled(False)
+            self.verdict_combo.setEnabled(False)
+            self.search_edit.setPlaceholderText("剪切板历史存储未启用，只显示最近记录")
+        
+        # 历史列表（分页加载，统一行高以便只渲染可见行）
+        self.history_model = ClipboardHistoryModel(self.store, self)
+        self.history_model.page_loaded.connect(self._on_page_loaded)
+        self.history_list = QListView()
+        self.history_list.setModel(self.history_model)
+        self.history_list.setUniformItemSizes(True)
         self.history_list.setStyleSheet("""
-            QListWidget {
+            QListView {
                 background: white;
                 border: 2px solid #ccc;
                 border-radius: 4px;
                 padding: 5px;
                 font-size: 14px;
             }
-            QListWidget::item {
+            QListView::item {
                 padding: 10px;
                 border-bottom: 1px solid #eee;
             }
-            QListWidget::item:hover {
+            QListView::item:hover {
                 background: #f0f0f0;
             }
-            QListWidget::item:selected {
+            QListView::item:selected {
                 background: #e3f2fd;
             }
         """)
-        self.history_list.itemDoubleClicked.connect(self._on_item_double_clicked)
+        self.history_list.doubleClicked.connect(self._on_item_double_clicked)
         layout.addWidget(self.history_list, stretch=1)
         
+        # 加载状态
+        self.status_label = QLabel("")
+        self.status_label.setStyleSheet("color: #666; font-size: 12px;")
+        layout.addWidget(self.status_label)
+        
         # 详情显示区域
         detail_label = QLabel("内容详情：")
         detail_label.setStyleSheet("font-weight: bold; font-size: 14px;")
@@ -172,67 +380,67 @@ class ClipboardHistoryDialog(QDialog):
         self.setLayout(layout)
         
         # 连接列表选择事件
-        self.history_list.itemSelectionChanged.connect(self._on_selection_changed)
+        self.history_list.selectionModel().currentChanged.connect(lambda *_: self._on_selection_changed())
     
     def _load_history(self):
-        """加载剪切板历史"""
-        try:
-            self.history_list.clear()
-            self.detail_text.clear()
-            self.copy_btn.setEnabled(False)
-            
-            # 从主程序获取历史
-            history = []
-            if self.main_app and hasattr(self.main_app, 'clipboard_monitor'):
-                try:
-                    history = self.main_app.clipboard_monitor.get_history(limit=50)
-                except Exception as e:
-                    logger.warning(f"获取剪切板历史失败: {e}")
-            
-            if not history:
-                item = QListWidgetItem("暂无剪切板历史记录")
-                item.setFlags(Qt.NoItemFlags)  # 不可选择
-                self.history_list.addItem(item)
-                return
-            
-            # 显示历史（最新的在前）
-            for i, content in enumerate(reversed(history), 1):
-                preview = content[:60] + "..." if len(content) > 60 else content
-                item = QListWidgetItem(f"[{i}] {preview}")
-                item.setData(Qt.UserRole, content)  # 存储完整内容
-                self.history_list.addItem(item)
-            
-            logger.info(f"已加载 {len(history)} 条剪切板历史")
-            
-        except Exception as e:
-            logger.error(f"加载剪切板历史失败: {e}")
-            item = QListWidgetItem("加载失败，请重试")
-            item.setFlags(Qt.NoItemFlags)
-            self.history_list.addItem(item)
+        """加载剪切板历史（有历史存储时按搜索词和筛选条件分页查询）"""
+        self._search_timer.stop()
+        self.detail_text.clear()
+        self.copy_btn.setEnabled(False)
+        
+        if self.store is not None:
+            verdict = self.verdict_combo.currentData()
+            self.status_label.setText("正在加载...")
+            self.history_model.set_filter(self.search_edit.text(), None if verdict == "*" else verdict)
+            return
+        
+        # 从主程序获取历史
+        history = []
+        if self.main_app and hasattr(self.main_app, 'clipboard_monitor'):
+            try:
+                history = self.main_app.clipboard_monitor.get_history(limit=50)
+            except Exception as e:
+                logger.warning(f"获取剪切板历史失败: {e}")
+        
+        # 显示历史（最新的在前）
+        self.history_model.set_history(list(reversed(history)))
+        logger.info(f"已加载 {len(history)} 条剪切板历史")
+    
+    def _on_page_loaded(self, loaded: int, total):
+        """一页加载完成，更新状态"""
+        if loaded == 0:
+            filtered = self.search_edit.text().strip() or self.verdict_combo.currentData() != "*"
+            self.status_label.setText("没有匹配的剪切板历史" if filtered else "暂无剪切板历史记录")
+        else:
+            text = f"已加载 {loaded} 条" + (f"（共 {total} 条）" if total is not None else "")
+            if self.history_model.canFetchMore():
+                text += "，滚动到底部加载更多"
+            self.status_label.setText(text)
+    
+    def _current_content(self):
+        return self.history_model.data(self.history_list.currentIndex(), Qt.UserRole)
     
     def _on_selection_changed(self):
         """列表选择变化"""
-        current_item = self.history_list.currentItem()
-        if current_item and current_item.data(Qt.UserRole):
-            content = current_item.data(Qt.UserRole)
+        content = self._current_content()
+        if content:
             self.detail_text.setText(content)
             self.copy_btn.setEnabled(True)
         else:
             self.detail_text.clear()
             self.copy_btn.setEnabled(False)
     
-    def _on_item_double_clicked(self, item):
+    def _on_item_double_clicked(self, index):
         """双击列表项"""
-        if item and item.data(Qt.UserRole):
-            content = item.data(Qt.UserRole)
+        content = self.history_model.data(index, Qt.UserRole)
+        if content:
             self.detail_text.setText(content)
             self.copy_btn.setEnabled(True)
     
     def _copy_selected(self):
         """复制选中项到剪切板"""
-        current_item = self.history_list.currentItem()
-        if current_item and current_item.data(Qt.UserRole):
-            content = current_item.data(Qt.UserRole)
+        content = self._current_content()
+        if content:
             try:
                 pyperclip.copy(content)
                 logger.info("已复制到剪切板")
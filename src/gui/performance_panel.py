@@ -0,0 +1,234 @@
+"""性能面板
+
+显示进程内指标（src/utils/metrics.py）：顶部是剪切板处理漏斗（内容变化 → 预过滤 → 去重 →
+AI请求 → 判定保存 → 同步成功），下方按指标列出各标签组合的计数或延迟分位数。
+窗口打开期间定时刷新，关闭后停止刷新；读取指标只是复制计数，不影响后台处理。
+"""
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel,
+    QTreeWidget, QTreeWidgetItem, QPushButton, QHeaderView
+)
+from PyQt5.QtCore import Qt, QTimer
+from loguru import logger
+from datetime import datetime
+
+from src.utils.config import config
+from src.utils.metrics import metrics
+
+
+def _format_seconds(value):
+    if value is None:
+        return "-"
+    if value >= 1:
+        return f"{value:.2f}s"
+    return f"{value * 1000:.1f}ms"
+
+
+def _format_count(value):
+    if value is None:
+        return "-"
+    if float(value).is_integer():
+        return f"{int(value):,}"
+    return f"{value:,.2f}"
+
+
+def _format_labels(labels: dict) -> str:
+    return ", ".join(f"{name}={value}" for name, value in labels.items() if value != "") or "（全部）"
+
+
+class PerformancePanel(QDialog):
+    """性能面板（非模态）"""
+    
+    COLUMNS = ["指标 / 标签", "次数 / 值", "p50", "p90", "p99", "最大"]
+    
+    def __init__(self, refresh_ms: int = 2000, parent=None):
+        """
+        初始化性能面板
+        
+        Args:
+            refresh_ms: 刷新间隔（毫秒）
+            parent: 父窗口
+        """
+        super().__init__(parent)
+        self._items = {}
+        self._init_ui()
+        self._timer = QTimer(self)
+        self._timer.setInterval(max(500, int(refresh_ms)))
+        self._timer.timeout.connect(self.refresh)
+        logger.info("性能面板已初始化")
+    
+    def _init_ui(self):
+        """初始化UI"""
+        self.setWindowTitle("性能")
+        self.resize(900, 620)
+        
+        layout = QVBoxLayout()
+        layout.setSpacing(12)
+        layout.setContentsMargins(20, 20, 20, 20)
+        
+        title = QLabel("📊 性能")
+        title.setStyleSheet("""
+            QLabel {
+                color: #007acc;
+                font-size: 18px;
+                font-weight: bold;
+                padding: 10px 0;
+            }
+        """)
+        layout.addWidget(title)
+        
+        # 处理漏斗
+        self.funnel_label = QLabel()
+        self.funnel_label.setWordWrap(True)
+        self.funnel_label.setStyleSheet("""
+            QLabel {
+                color: #333;
+                font-size: 13px;
+                padding: 8px;
+                background: #f5f9fc;
+                border: 1px solid #d6e6f2;
+                border-radius: 4px;
+            }
+        """)
+        layout.addWidget(self.funnel_label)
+        
+        # 指标明细
+        self.tree = QTreeWidget()
+        self.tree.setColumnCount(len(self.COLUMNS))
+        self.tree.setHeaderLabels(self.COLUMNS)
+        self.tree.setUniformRowHeights(True)
+        self.tree.header().setSectionResizeMode(0, QHeaderView.Stretch)
+        for column in range(1, len(self.COLUMNS)):
+            self.tree.header().setSectionResizeMode(column, QHeaderView.ResizeToContents)
+        layout.addWidget(self.tree, stretch=1)
+        
+        self.status_label = QLabel()
+        self.status_label.setStyleSheet("QLabel { color: #666; font-size: 12px; }")
+        layout.addWidget(self.status_label)
+        
+        # 按钮
+        button_layout = QHBoxLayout()
+        # 不复制到剪切板：否则会被剪切板监控当作新内容处理
+        export_button = QPushButton("导出")
+        export_button.setToolTip("以 Prometheus 文本格式保存到 data/diagnostics")
+        export_button.clicked.connect(self._export)
+        reset_button = QPushButton("清零")
+        reset_button.clicked.connect(self._reset)
+        close_button = QPushButton("关闭")
+        close_button.clicked.connect(self.close)
+        button_layout.addWidget(export_button)
+        button_layout.addWidget(reset_button)
+        button_layout.addStretch()
+        button_layout.addWidget(close_button)
+        layout.addLayout(button_layout)
+        
+        self.setLayout(layout)
+    
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+        self._timer.start()
+    
+    def closeEvent(self, event):
+        self._timer.stop()
+        super().closeEvent(event)
+    
+    def hideEvent(self, event):
+        self._timer.stop()
+        super().hideEvent(event)
+    
+    def refresh(self):
+        """读取指标并更新界面（保留展开状态）"""
+        snapshot = metrics.snapshot()
+        self._update_funnel(snapshot)
+        self._update_tree(snapshot)
+        if metrics.enabled:
+            self.status_label.setText(f"每 {self._timer.interval() / 1000:g} 秒刷新；延迟分位数误差约6%")
+        else:
+            self.status_label.setText("⚠️ 指标采集已关闭（config.yaml 中 metrics.enabled）")
+    
+    def _update_funnel(self, snapshot: list):
+        by_name = {metric["name"]: metric for metric in snapshot}
+        
+        def total(name, **match):
+            metric = by_name.get(name)
+            if metric is None:
+                return 0
+            return sum(
+                sample.get("value", 0) for sample in metric["samples"]
+                if all(sample["labels"].get(k) == v for k, v in match.items())
+            )
+        
+        verdicts = total("quicknote_ai_verdicts_total")
+        positive = verdicts - total("quicknote_ai_verdicts_total", verdict="ignored") \
+            - total("quicknote_ai_verdicts_total", verdict="failed")
+        steps = [
+            ("剪切板变化", total("quicknote_clipboard_changes_total")),
+            ("预过滤跳过", total("quicknote_prefilter_rejected_total")),
+            ("去重命中", total("quicknote_dedupe_checks_total", result="hit")),
+            ("AI请求", total("quicknote_ai_requests_total")),
+            ("判定保存", positive),
+            ("同步成功", total("quicknote_sink_sends_total", outcome="ok")),
+            ("同步失败", total("quicknote_sink_sends_total", outcome="failed")),
+        ]
+        self.funnel_label.setText("  →  ".join(f"{name} <b>{_format_count(value)}</b>" for name, value in steps))
+    
+    def _update_tree(self, snapshot: list):
+        self.tree.setUpdatesEnabled(False)
+        try:
+            for metric in snapshot:
+                parent = self._items.get(metric["name"])
+                if parent is None:
+                    parent = QTreeWidgetItem([metric["name"]])
+                    parent.setToolTip(0, metric["help"])
+                    self.tree.addTopLevelItem(parent)
+                    self._items[metric["name"]] = parent
+                samples = metric["samples"]
+                key = "count" if metric["type"] == "histogram" else "value"
+                parent.setText(1, _format_count(sum(sample[key] for sample in samples)) if samples else "-")
+                parent.setTextAlignment(1, Qt.AlignRight | Qt.AlignVCenter)
+                rows = [self._row(metric["type"], sample) for sample in samples]
+                # 标签组合只增不减（清零时除外），按顺序复用子项
+                while parent.childCount() > len(rows):
+                    parent.removeChild(parent.child(parent.childCount() - 1))
+                for index, row in enumerate(rows):
+                    child = parent.child(index) if index < parent.childCount() else None
+                    if child is None:
+                        child = QTreeWidgetItem()
+                        parent.addChild(child)
+                    for column, text in enumerate(row):
+                        child.setText(column, text)
+                        if column:
+                            child.setTextAlignment(column, Qt.AlignRight | Qt.AlignVCenter)
+        finally:
+            self.tree.setUpdatesEnabled(True)
+    
+    @staticmethod
+    def _row(kind: str, sample: dict) -> list:
+        labels = _format_labels(sample["labels"])
+        if kind == "histogram":
+            return [
+                labels,
+                _format_count(sample["count"]),
+                _format_seconds(sample["p50"]),
+                _format_seconds(sample["p90"]),
+                _format_seconds(sample["p99"]),
+                _format_seconds(sample["max"]),
+            ]
+        return [labels, _format_count(sample["value"]), "", "", "", ""]
+    
+    def _export(self):
+        path = config.root_dir / "data" / "diagnostics" / f"metrics_{datetime.now():%Y%m%d_%H%M%S}.prom"
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(metrics.render_text(), encoding="utf-8")
+            self.status_label.setText(f"✅ 已导出: {path}")
+            logger.info(f"性能指标已导出: {path}")
+        except Exception as e:
+            logger.error(f"导出指标失败: {e}")
+            self.status_label.setText(f"❌ 导出失败: {e}")
+    
+    def _reset(self):
+        metrics.reset()
+        self.refresh()
+        logger.info("性能指标已清零")
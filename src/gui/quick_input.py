@@ -4,7 +4,7 @@ from PyQt5.QtCore import Qt, pyqtSignal, QTimer, QPoint, QTime, QThread, pyqtSlo
 from PyQt5.QtGui import QFont, QColor, QPalette, QKeyEvent, QMouseEvent, QCursor, QPainter, QBrush, QPen, QLinearGradient
 from loguru import logger
 import datetime
-from src.services.quote_service import QuoteService
+import time
 
 
 class CustomTextEdit(QTextEdit):
@@ -495,8 +495,9 @@ class QuickInputWindow(QWidget):
         # 确保窗口可以接收输入法事件（支持中文输入）
         self.setAttribute(Qt.WA_InputMethodEnabled, True)
         
-        # 初始化金句服务
-        self.quote_service = QuoteService()
+        # 金句服务和冥想面板在首次进入冥想模式时才创建
+        self._quote_service = None
+        self._meditation_built = False
         
         self._init_ui()
         logger.info("快速输入窗口已初始化")
@@ -534,6 +535,17 @@ class QuickInputWindow(QWidget):
         accent_glow = "#3d8fb3"  # 发光用的更深青色
         border_color = "#3a3a3a"  # 边框颜色
         glow_color = "rgba(94, 184, 217, 0.4)"  # 柔和的发光效果
+        # 冥想面板延迟创建时沿用同一套颜色
+        self._theme = {
+            "bg_secondary": bg_secondary,
+            "bg_input": bg_input,
+            "fg_color": fg_color,
+            "fg_secondary": fg_secondary,
+            "accent_color": accent_color,
+            "accent_secondary": accent_secondary,
+            "accent_glow": accent_glow,
+            "border_color": border_color,
+        }
         
         # 当前目标平台（默认Notion）
         self.target_platform = "notion"
@@ -1019,6 +1031,147 @@ class QuickInputWindow(QWidget):
         self.ticktick_options = QWidget()
         self.ticktick_options.setVisible(False)
         
+        # 添加到选项容器
+        self.options_layout.addWidget(self.notion_options)
+        self.options_layout.addWidget(self.flomo_options)
+        self.options_layout.addWidget(self.ticktick_options)
+        self.options_container.setLayout(self.options_layout)
+        content_layout.addWidget(self.options_container)
+        
+        # 输入框
+        self.text_edit = CustomTextEdit()  # 使用自定义的TextEdit
+        self.text_edit.setPlaceholderText("输入你的灵感...")
+        self.text_edit.setStyleSheet(f"""
+            QTextEdit {{
+                background: {bg_input};
+                color: {fg_color};
+                border: 1px solid {border_color};
+                border-radius: 14px;
+                padding: 20px;
+                font-size: 16px;
+                font-family: 'Microsoft YaHei', 'PingFang SC', sans-serif;
+                line-height: 1.8;
+                selection-background-color: {accent_color};
+                selection-color: white;
+            }}
+            QTextEdit:focus {{
+                border: 2px solid {accent_color};
+                background: {bg_secondary};
+            }}
+        """)
+        # 连接自定义信号
+        self.text_edit.submit_requested.connect(self._submit_content)
+        self.text_edit.cancel_requested.connect(self._cancel)
+        
+        # 为输入框添加内阴影效果，增强立体感
+        text_shadow = QGraphicsDropShadowEffect()
+        text_shadow.setBlurRadius(15)
+        text_shadow.setColor(QColor(0, 0, 0, 60))
+        text_shadow.setOffset(0, 2)
+        self.text_edit.setGraphicsEffect(text_shadow)
+        
+        content_layout.addWidget(self.text_edit, stretch=1)
+        # 冥想金句和计时器区域在首次切换到冥想模式时插入到输入框之后
+        self._content_layout = content_layout
+        
+        # 底部按钮区域
+        button_layout = QHBoxLayout()
+        button_layout.setSpacing(10)
+        button_layout.setContentsMargins(0, 8, 0, 0)  # 增加顶部边距
+        
+        # 提示标签
+        hint_label = QLabel("💡 Enter发送 | Ctrl+Enter换行 | Esc取消")
+        hint_label.setStyleSheet(f"""
+            QLabel {{
+                color: {fg_secondary};
+                font-size: 12px;
+                padding: 5px;
+                background: transparent;
+            }}
+        """)
+        button_layout.addWidget(hint_label)
+        button_layout.addStretch()
+        
+        # 取消按钮
+        cancel_btn = QPushButton("✕ 取消")
+        cancel_btn.setFixedSize(100, 44)
+        cancel_btn.setStyleSheet(f"""
+            QPushButton {{
+                background: {bg_secondary};
+                color: {fg_secondary};
+                border: 1px solid {border_color};
+                border-radius: 10px;
+                font-size: 14px;
+                font-weight: bold;
+            }}
+            QPushButton:hover {{
+                background: {bg_input};
+                color: {fg_color};
+                border: 1px solid rgba(94, 184, 217, 0.5);
+            }}
+        """)
+        cancel_btn.clicked.connect(self._cancel)
+        button_layout.addWidget(cancel_btn)
+        
+        # 发送按钮（流动渐变边框，酷炫 AI 氛围）
+        send_btn = FlowGradientButton(
+            "🚀 发送",
+            bg_color=bg_input,
+            text_color=fg_color,
+            gradient_colors=[
+                (168, 85, 247, 230),   # 紫
+                (34, 197, 94, 230),    # 绿
+                (59, 130, 246, 230),   # 蓝
+            ],
+        )
+        send_btn.setFixedSize(120, 44)
+        send_btn.setStyleSheet("""
+            QPushButton {
+                border: none;
+                border-radius: 10px;
+                font-size: 15px;
+                font-weight: bold;
+                background: transparent;
+            }
+        """)
+        send_btn.clicked.connect(self._submit_content)
+        
+        # 为发送按钮添加柔和发光效果（AI风格）
+        send_glow = QGraphicsDropShadowEffect()
+        send_glow.setBlurRadius(25)
+        send_glow.setColor(QColor(94, 184, 217, 100))  # 更柔和的发光
+        send_glow.setOffset(0, 2)
+        send_btn.setGraphicsEffect(send_glow)
+        
+        button_layout.addWidget(send_btn)
+        
+        content_layout.addLayout(button_layout)
+        content_widget.setLayout(content_layout)
+        layout.addWidget(content_widget)
+        
+        main_container.setLayout(layout)
+        
+        # 外层布局（增加边距以确保圆角和阴影完整显示）
+        outer_layout = QVBoxLayout()
+        outer_layout.setContentsMargins(15, 15, 15, 15)  # 四周留出空间
+        outer_layout.addWidget(main_container)
+        self.setLayout(outer_layout)
+    
+    def _build_meditation_panels(self):
+        """创建冥想模式的选项、金句和计时器区域（首次切换到冥想模式时才创建，缩短窗口创建时间）"""
+        if self._meditation_built:
+            return
+        start = time.perf_counter()
+        theme = self._theme
+        bg_secondary = theme["bg_secondary"]
+        bg_input = theme["bg_input"]
+        fg_color = theme["fg_color"]
+        fg_secondary = theme["fg_secondary"]
+        accent_color = theme["accent_color"]
+        accent_secondary = theme["accent_secondary"]
+        accent_glow = theme["accent_glow"]
+        border_color = theme["border_color"]
+        
         # 冥想选填项: 倒计时和正向计时（同一行）
         self.meditation_options = QWidget()
         meditation_options_layout = QHBoxLayout()
@@ -1118,48 +1271,7 @@ class QuickInputWindow(QWidget):
         meditation_options_layout.addStretch()
         self.meditation_options.setLayout(meditation_options_layout)
         self.meditation_options.setVisible(False)
-        
-        # 添加到选项容器
-        self.options_layout.addWidget(self.notion_options)
-        self.options_layout.addWidget(self.flomo_options)
-        self.options_layout.addWidget(self.ticktick_options)
         self.options_layout.addWidget(self.meditation_options)
-        self.options_container.setLayout(self.options_layout)
-        content_layout.addWidget(self.options_container)
-        
-        # 输入框
-        self.text_edit = CustomTextEdit()  # 使用自定义的TextEdit
-        self.text_edit.setPlaceholderText("输入你的灵感...")
-        self.text_edit.setStyleSheet(f"""
-            QTextEdit {{
-                background: {bg_input};
-                color: {fg_color};
-                border: 1px solid {border_color};
-                border-radius: 14px;
-                padding: 20px;
-                font-size: 16px;
-                font-family: 'Microsoft YaHei', 'PingFang SC', sans-serif;
-                line-height: 1.8;
-                selection-background-color: {accent_color};
-                selection-color: white;
-            }}
-            QTextEdit:focus {{
-                border: 2px solid {accent_color};
-                background: {bg_secondary};
-            }}
-        """)
-        # 连接自定义信号
-        self.text_edit.submit_requested.connect(self._submit_content)
-        self.text_edit.cancel_requested.connect(self._cancel)
-        
-        # 为输入框添加内阴影效果，增强立体感
-        text_shadow = QGraphicsDropShadowEffect()
-        text_shadow.setBlurRadius(15)
-        text_shadow.setColor(QColor(0, 0, 0, 60))
-        text_shadow.setOffset(0, 2)
-        self.text_edit.setGraphicsEffect(text_shadow)
-        
-        content_layout.addWidget(self.text_edit, stretch=1)
         
         # ========== 冥想金句展示区域（默认隐藏）==========
         self.meditation_quote_widget = QWidget()
@@ -1325,7 +1437,8 @@ class QuickInputWindow(QWidget):
         meditation_quote_layout.addLayout(quote_btn_layout)
         
         self.meditation_quote_widget.setLayout(meditation_quote_layout)
-        content_layout.addWidget(self.meditation_quote_widget, stretch=1)
+        index = self._content_layout.indexOf(self.text_edit) + 1
+        self._content_layout.insertWidget(index, self.meditation_quote_widget, stretch=1)
         
         # ========== 冥想计时器显示区域（默认隐藏）==========
         self.meditation_timer_widget = QWidget()
@@ -1418,7 +1531,7 @@ class QuickInputWindow(QWidget):
         meditation_timer_layout.addLayout(meditation_btn_layout)
         
         self.meditation_timer_widget.setLayout(meditation_timer_layout)
-        content_layout.addWidget(self.meditation_timer_widget, stretch=1)
+        self._content_layout.insertWidget(index + 1, self.meditation_timer_widget, stretch=1)
         
         # 冥想计时器状态
         self.meditation_timer = QTimer(self)
@@ -1428,88 +1541,24 @@ class QuickInputWindow(QWidget):
         self.meditation_current_seconds = 0
         self.meditation_is_running = False
         
-        # 底部按钮区域
-        button_layout = QHBoxLayout()
-        button_layout.setSpacing(10)
-        button_layout.setContentsMargins(0, 8, 0, 0)  # 增加顶部边距
-        
-        # 提示标签
-        hint_label = QLabel("💡 Enter发送 | Ctrl+Enter换行 | Esc取消")
-        hint_label.setStyleSheet(f"""
-            QLabel {{
-                color: {fg_secondary};
-                font-size: 12px;
-                padding: 5px;
-                background: transparent;
-            }}
-        """)
-        button_layout.addWidget(hint_label)
-        button_layout.addStretch()
-        
-        # 取消按钮
-        cancel_btn = QPushButton("✕ 取消")
-        cancel_btn.setFixedSize(100, 44)
-        cancel_btn.setStyleSheet(f"""
-            QPushButton {{
-                background: {bg_secondary};
-                color: {fg_secondary};
-                border: 1px solid {border_color};
-                border-radius: 10px;
-                font-size: 14px;
-                font-weight: bold;
-            }}
-            QPushButton:hover {{
-                background: {bg_input};
-                color: {fg_color};
-                border: 1px solid rgba(94, 184, 217, 0.5);
-            }}
-        """)
-        cancel_btn.clicked.connect(self._cancel)
-        button_layout.addWidget(cancel_btn)
-        
-        # 发送按钮（流动渐变边框，酷炫 AI 氛围）
-        send_btn = FlowGradientButton(
-            "🚀 发送",
-            bg_color=bg_input,
-            text_color=fg_color,
-            gradient_colors=[
-                (168, 85, 247, 230),   # 紫
-                (34, 197, 94, 230),    # 绿
-                (59, 130, 246, 230),   # 蓝
-            ],
-        )
-        send_btn.setFixedSize(120, 44)
-        send_btn.setStyleSheet("""
-            QPushButton {
-                border: none;
-                border-radius: 10px;
-                font-size: 15px;
-                font-weight: bold;
-                background: transparent;
-            }
-        """)
-        send_btn.clicked.connect(self._submit_content)
-        
-        # 为发送按钮添加柔和发光效果（AI风格）
-        send_glow = QGraphicsDropShadowEffect()
-        send_glow.setBlurRadius(25)
-        send_glow.setColor(QColor(94, 184, 217, 100))  # 更柔和的发光
-        send_glow.setOffset(0, 2)
-        send_btn.setGraphicsEffect(send_glow)
-        
-        button_layout.addWidget(send_btn)
-        
-        content_layout.addLayout(button_layout)
-        content_widget.setLayout(content_layout)
-        layout.addWidget(content_widget)
-        
-        main_container.setLayout(layout)
-        
-        # 外层布局（增加边距以确保圆角和阴影完整显示）
-        outer_layout = QVBoxLayout()
-        outer_layout.setContentsMargins(15, 15, 15, 15)  # 四周留出空间
-        outer_layout.addWidget(main_container)
-        self.setLayout(outer_layout)
+        self._meditation_built = True
+        logger.info(f"冥想面板已创建（{(time.perf_counter() - start) * 1000:.0f}ms）")
+    
+    def _hide_meditation_panels(self):
+        """隐藏冥想相关widget（尚未创建时无需处理）"""
+        if not self._meditation_built:
+            return
+        self.meditation_options.setVisible(False)
+        self.meditation_timer_widget.setVisible(False)
+        self.meditation_quote_widget.setVisible(False)
+    
+    @property
+    def quote_service(self):
+        """金句服务（首次使用时创建）"""
+        if self._quote_service is None:
+            from src.services.quote_service import QuoteService
+            self._quote_service = QuoteService()
+        return self._quote_service
     
     def _title_bar_mouse_press(self, event: QMouseEvent):
         """标题栏鼠标按下事件（开始拖动）"""
@@ -1593,7 +1642,7 @@ class QuickInputWindow(QWidget):
             mask_alpha = 255
         
         # 确保颜色是元组格式
-        if isinstance(mask_color_rgb, list):
+        if isinstance(mask_color_rgb, (list, tuple)):
             mask_color = tuple(mask_color_rgb)
         else:
             mask_color = (0, 0, 0)  # 默认黑色
@@ -1785,11 +1834,9 @@ class QuickInputWindow(QWidget):
             self.notion_options.setVisible(True)
             self.flomo_options.setVisible(False)
             self.ticktick_options.setVisible(False)
-            self.meditation_options.setVisible(False)
             self.options_container.setVisible(True)  # 显示选项容器
             # 隐藏冥想相关widget，显示输入框
-            self.meditation_timer_widget.setVisible(False)
-            self.meditation_quote_widget.setVisible(False)
+            self._hide_meditation_panels()
             self.text_edit.setVisible(True)
             self.text_edit.setPlaceholderText("输入你的灵感...")
             logger.info("切换到Notion模式")
@@ -1801,11 +1848,9 @@ class QuickInputWindow(QWidget):
             self.notion_options.setVisible(False)
             self.flomo_options.setVisible(True)
             self.ticktick_options.setVisible(False)
-            self.meditation_options.setVisible(False)
             self.options_container.setVisible(True)  # 显示选项容器
             # 隐藏冥想相关widget，显示输入框
-            self.meditation_timer_widget.setVisible(False)
-            self.meditation_quote_widget.setVisible(False)
+            self._hide_meditation_panels()
             self.text_edit.setVisible(True)
             # 如果标签为空，设置为默认值
             if not self.flomo_tags.text().strip():
@@ -1820,15 +1865,14 @@ class QuickInputWindow(QWidget):
             self.notion_options.setVisible(False)
             self.flomo_options.setVisible(False)
             self.ticktick_options.setVisible(False)  # TickTick无选填项，隐藏
-            self.meditation_options.setVisible(False)
             self.options_container.setVisible(False)  # 隐藏整个选项容器，减少间隔
             # 隐藏冥想相关widget，显示输入框
-            self.meditation_timer_widget.setVisible(False)
-            self.meditation_quote_widget.setVisible(False)
+            self._hide_meditation_panels()
             self.text_edit.setVisible(True)
             self.text_edit.setPlaceholderText("输入待办任务...")
             logger.info("切换到滴答清单模式")
         elif platform == "meditation":
+            self._build_meditation_panels()
             self.notion_tab_btn.setChecked(False)
             self.flomo_tab_btn.setChecked(False)
             self.ticktick_tab_btn.setChecked(False)
@@ -208,6 +208,9 @@ class SettingsDialog(QDialog):
     
     # 信号：设置已保存
     settings_saved = pyqtSignal()
+    # 信号：连接测试进度（在I/O循环线程中发射，切回界面线程处理）
+    probe_progress = pyqtSignal(object)
+    probes_finished = pyqtSignal(list)
     
     def __init__(self, config_obj, parent=None):
         """
@@ -220,6 +223,9 @@ class SettingsDialog(QDialog):
         super().__init__(parent)
         self.config_obj = config_obj
         self.main_app = None  # 主程序实例引用（稍后由主程序设置）
+        self._probe_future = None
+        self.probe_progress.connect(self._on_probe_progress)
+        self.probes_finished.connect(self._on_probes_finished)
         self._init_ui()
         self._load_settings()
         logger.info("设置界面已初始化")
@@ -991,7 +997,7 @@ class SettingsDialog(QDialog):
   4. 点击"重置"可恢复默认快捷键
 
 ⚠️ 注意：
-  • 修改后需要重启应用才能生效
+  • 保存后立即生效，无需重启应用
   • 建议使用 Ctrl/Shift/Alt 组合键，避免与系统冲突
   • 支持的修饰键：ctrl、shift、alt、cmd
         """)
@@ -1214,7 +1220,7 @@ class SettingsDialog(QDialog):
             
             # 加载颜色到输入框
             if hasattr(self, 'mask_color_r') and hasattr(self, 'mask_color_g') and hasattr(self, 'mask_color_b'):
-                if isinstance(mask_color, list) and len(mask_color) >= 3:
+                if isinstance(mask_color, (list, tuple)) and len(mask_color) >= 3:
                     self.mask_color_r.setText(str(mask_color[0]))
                     self.mask_color_g.setText(str(mask_color[1]))
                     self.mask_color_b.setText(str(mask_color[2]))
@@ -1237,8 +1243,7 @@ class SettingsDialog(QDialog):
         
         # 加载AI规则
         try:
-            import yaml
-            rules = self.config_obj.config.get('ai_rules', {})
+            rules = self.config_obj.get('ai_rules', {})
             
             # 加载Flomo提示词
             if hasattr(self, 'flomo_prompt'):
@@ -1329,12 +1334,6 @@ class SettingsDialog(QDialog):
     def _save_settings(self):
         """保存设置"""
         try:
-            import os
-            import yaml
-            
-            # 保存到.env文件
-            env_file = self.config_obj.env_file
-            
             # 获取当前选择的AI提供商
             provider = self.ai_provider.currentText()
             
@@ -1348,6 +1347,7 @@ OPENAI_MODEL={self.openai_model.text()}
 # Notion配置
 NOTION_API_KEY={self.notion_key.text()}
 NOTION_DATABASE_ID={self.notion_db.text()}
+NOTION_BASE_URL={self.config_obj.notion_base_url}
 
 # Flomo配置
 FLOMO_API_URL={self.flomo_url.text()}
@@ -1355,28 +1355,14 @@ FLOMO_API_URL={self.flomo_url.text()}
 # 滴答清单配置（通过邮件）
 TICKTICK_SMTP_HOST={self.ticktick_smtp_host.text()}
 TICKTICK_SMTP_PORT={self.ticktick_smtp_port.text()}
+TICKTICK_SMTP_SSL={'true' if self.config_obj.ticktick_smtp_ssl else 'false'}
 TICKTICK_SMTP_USER={self.ticktick_smtp_user.text()}
 TICKTICK_SMTP_PASS={self.ticktick_smtp_pass.text()}
 TICKTICK_EMAIL={self.ticktick_email.text()}
 """
             
-            # 写入.env文件
-            with open(env_file, 'w', encoding='utf-8') as f:
-                f.write(env_content)
-            
-            # 保存快捷键配置到config.yaml
-            config_file = self.config_obj.config_file
-            
-            # 读取现有配置
-            if config_file.exists():
-                with open(config_file, 'r', encoding='utf-8') as f:
-                    config_data = yaml.safe_load(f) or {}
-            else:
-                config_data = {}
-            
-            # 更新遮罩设置
-            if 'ui' not in config_data:
-                config_data['ui'] = {}
+            # 要写入config.yaml的配置项（点号路径 → 值）
+            edits = {}
             
             # 读取遮罩颜色RGB值
             try:
@@ -1393,15 +1379,15 @@ TICKTICK_EMAIL={self.ticktick_email.text()}
                     mask_r = max(0, min(255, mask_r))
                     mask_g = max(0, min(255, mask_g))
                     mask_b = max(0, min(255, mask_b))
-                    config_data['ui']['mask_color'] = [mask_r, mask_g, mask_b]
+                    edits['ui.mask_color'] = [mask_r, mask_g, mask_b]
                 elif hasattr(self, '_mask_color'):
                     # 如果使用颜色选择器
-                    config_data['ui']['mask_color'] = self._mask_color
+                    edits['ui.mask_color'] = self._mask_color
                 else:
-                    config_data['ui']['mask_color'] = [0, 0, 0]
+                    edits['ui.mask_color'] = [0, 0, 0]
             except (ValueError, AttributeError) as e:
                 logger.warning(f"读取遮罩颜色失败: {e}，使用默认值")
-                config_data['ui']['mask_color'] = [0, 0, 0]
+                edits['ui.mask_color'] = [0, 0, 0]
             
             # 读取遮罩透明度百分比
             try:
@@ -1412,75 +1398,58 @@ TICKTICK_EMAIL={self.ticktick_email.text()}
                     mask_alpha_percent = max(0, min(100, mask_alpha_percent))
                     # 转换为alpha值（0-255）
                     mask_alpha = int((mask_alpha_percent / 100) * 255)
-                    config_data['ui']['mask_alpha'] = mask_alpha
+                    edits['ui.mask_alpha'] = mask_alpha
                 else:
-                    config_data['ui']['mask_alpha'] = 255
+                    edits['ui.mask_alpha'] = 255
             except (ValueError, AttributeError) as e:
                 logger.warning(f"读取遮罩透明度失败: {e}，使用默认值")
-                config_data['ui']['mask_alpha'] = 255
+                edits['ui.mask_alpha'] = 255
             
             # 更新快捷键配置
-            if 'hotkeys' not in config_data:
-                config_data['hotkeys'] = {}
-            
-            config_data['hotkeys']['quick_input'] = self.hotkey_quick.text().strip()
-            config_data['hotkeys']['toggle_clipboard'] = self.hotkey_clipboard.text().strip()
-            
-            # 更新AI规则配置
-            if 'ai_rules' not in config_data:
-                config_data['ai_rules'] = {}
+            edits['hotkeys.quick_input'] = self.hotkey_quick.text().strip()
+            edits['hotkeys.toggle_clipboard'] = self.hotkey_clipboard.text().strip()
             
             # 保存剪切板监控总开关
             if hasattr(self, 'clipboard_monitor_enabled'):
                 try:
-                    config_data['ai_rules']['clipboard_monitor'] = self.clipboard_monitor_enabled.isChecked()
+                    edits['ai_rules.clipboard_monitor'] = self.clipboard_monitor_enabled.isChecked()
                 except Exception as e:
                     logger.warning(f"保存剪切板监控开关失败: {e}")
-                    config_data['ai_rules']['clipboard_monitor'] = True  # 默认值
+                    edits['ai_rules.clipboard_monitor'] = True  # 默认值
             
             # 保存Flomo规则
             if hasattr(self, 'flomo_auto_sync') and hasattr(self, 'flomo_prompt'):
                 try:
-                    if 'flomo' not in config_data['ai_rules']:
-                        config_data['ai_rules']['flomo'] = {}
-                    
-                    config_data['ai_rules']['flomo']['enabled'] = self.flomo_auto_sync.isChecked()
-                    config_data['ai_rules']['flomo']['prompt'] = self.flomo_prompt.toPlainText().strip()
+                    edits['ai_rules.flomo.enabled'] = self.flomo_auto_sync.isChecked()
+                    edits['ai_rules.flomo.prompt'] = self.flomo_prompt.toPlainText().strip()
                 except Exception as e:
                     logger.warning(f"保存Flomo规则失败: {e}")
             
             # 保存Notion规则
             if hasattr(self, 'notion_auto_sync') and hasattr(self, 'notion_prompt'):
                 try:
-                    if 'notion' not in config_data['ai_rules']:
-                        config_data['ai_rules']['notion'] = {}
-                    
-                    config_data['ai_rules']['notion']['enabled'] = self.notion_auto_sync.isChecked()
-                    config_data['ai_rules']['notion']['prompt'] = self.notion_prompt.toPlainText().strip()
+                    edits['ai_rules.notion.enabled'] = self.notion_auto_sync.isChecked()
+                    edits['ai_rules.notion.prompt'] = self.notion_prompt.toPlainText().strip()
                 except Exception as e:
                     logger.warning(f"保存Notion规则失败: {e}")
             
             # 保存滴答清单规则
             if hasattr(self, 'ticktick_auto_sync') and hasattr(self, 'ticktick_prompt'):
                 try:
-                    if 'ticktick' not in config_data['ai_rules']:
-                        config_data['ai_rules']['ticktick'] = {}
-                    
-                    config_data['ai_rules']['ticktick']['enabled'] = self.ticktick_auto_sync.isChecked()
-                    config_data['ai_rules']['ticktick']['prompt'] = self.ticktick_prompt.toPlainText().strip()
+                    edits['ai_rules.ticktick.enabled'] = self.ticktick_auto_sync.isChecked()
+                    edits['ai_rules.ticktick.prompt'] = self.ticktick_prompt.toPlainText().strip()
                 except Exception as e:
                     logger.warning(f"保存滴答清单规则失败: {e}")
             
-            # 写入config.yaml
-            with open(config_file, 'w', encoding='utf-8') as f:
-                yaml.dump(config_data, f, allow_unicode=True, default_flow_style=False, sort_keys=False)
+            # 立即生效（通知主程序按变化重新配置），文件稍后写入
+            self.config_obj.update(edits, env_content=env_content)
             
             logger.info("设置已保存（包括快捷键配置）")
             
             QMessageBox.information(
                 self,
                 "保存成功",
-                "设置已保存！\n\n⚠️ 快捷键修改需要重启应用才能生效。\n其他设置已立即生效。"
+                "设置已保存并已立即生效！"
             )
             
             self.settings_saved.emit()
@@ -1566,46 +1535,22 @@ TICKTICK_EMAIL={self.ticktick_email.text()}
     def _save_prompt(self, prompt_type: str):
         """保存提示词"""
         try:
-            import yaml
-            config_file = self.config_obj.config_file
-            
-            # 读取现有配置
-            if config_file.exists():
-                with open(config_file, 'r', encoding='utf-8') as f:
-                    config_data = yaml.safe_load(f) or {}
-            else:
-                config_data = {}
-            
-            # 更新AI规则配置
-            if 'ai_rules' not in config_data:
-                config_data['ai_rules'] = {}
-            
             if prompt_type == 'flomo':
-                if 'flomo' not in config_data['ai_rules']:
-                    config_data['ai_rules']['flomo'] = {}
-                config_data['ai_rules']['flomo']['prompt'] = self.flomo_prompt.toPlainText().strip()
+                self.config_obj.update({'ai_rules.flomo.prompt': self.flomo_prompt.toPlainText().strip()})
                 self._flomo_prompt_original = self.flomo_prompt.toPlainText()
                 self.flomo_save_btn.setVisible(False)
                 logger.info("Flomo提示词已保存")
             elif prompt_type == 'notion':
-                if 'notion' not in config_data['ai_rules']:
-                    config_data['ai_rules']['notion'] = {}
-                config_data['ai_rules']['notion']['prompt'] = self.notion_prompt.toPlainText().strip()
+                self.config_obj.update({'ai_rules.notion.prompt': self.notion_prompt.toPlainText().strip()})
                 self._notion_prompt_original = self.notion_prompt.toPlainText()
                 self.notion_save_btn.setVisible(False)
                 logger.info("Notion提示词已保存")
             elif prompt_type == 'ticktick':
-                if 'ticktick' not in config_data['ai_rules']:
-                    config_data['ai_rules']['ticktick'] = {}
-                config_data['ai_rules']['ticktick']['prompt'] = self.ticktick_prompt.toPlainText().strip()
+                self.config_obj.update({'ai_rules.ticktick.prompt': self.ticktick_prompt.toPlainText().strip()})
                 self._ticktick_prompt_original = self.ticktick_prompt.toPlainText()
                 self.ticktick_save_btn.setVisible(False)
                 logger.info("滴答清单提示词已保存")
             
-            # 写入config.yaml
-            with open(config_file, 'w', encoding='utf-8') as f:
-                yaml.dump(config_data, f, allow_unicode=True, default_flow_style=False, sort_keys=False)
-            
             from PyQt5.QtWidgets import QMessageBox
             prompt_name = {
                 'flomo': 'Flomo',
@@ -1628,6 +1573,38 @@ TICKTICK_EMAIL={self.ticktick_email.text()}
                 f"保存提示词时出错：\n{str(e)}"
             )
     
+    def _show_stored_clipboard_history(self, store):
+        """显示持久化存储中最近的剪切板历史（完整历史在托盘菜单的剪切板历史窗口中分页浏览）"""
+        from datetime import datetime
+        from src.gui.clipboard_history import VERDICT_NAMES
+        
+        try:
+            entries = store.recent(limit=10)
+            total = store.count()
+        except Exception as e:
+            logger.warning(f"读取剪切板历史存储失败: {e}")
+            self.clipboard_history_list.setText("无法加载剪切板历史")
+            return
+        
+        if not entries:
+            self.clipboard_history_list.setText("暂无剪切板历史记录\n\n提示：当剪切板监控启用时，检测到的内容会自动记录在这里")
+            return
+        
+        history_text = ""
+        for i, entry in enumerate(entries, 1):
+            preview = entry.content[:80] + "..." if len(entry.content) > 80 else entry.content
+            header = f"[{i}]"
+            if entry.created_at:
+                header += " " + datetime.fromtimestamp(entry.created_at).strftime("%m-%d %H:%M")
+            if entry.verdict:
+                header += f" [{VERDICT_NAMES.get(entry.verdict, entry.verdict)}]"
+            history_text += f"{header} {preview}\n"
+            history_text += "─" * 50 + "\n\n"
+        
+        if total > len(entries):
+            history_text += f"共 {total} 条记录，完整历史请在托盘菜单「剪切板历史」中查看"
+        self.clipboard_history_list.setText(history_text.strip())
+    
     def _refresh_clipboard_history(self):
         """刷新剪切板历史"""
         try:
@@ -1640,7 +1617,12 @@ TICKTICK_EMAIL={self.ticktick_email.text()}
                 self.clipboard_history_list.setText("等待主程序连接...")
                 return
             
-            # 尝试从主程序获取剪切板历史
+            # 启用了持久化存储时从存储读取最近的记录（最新的在前），否则退回内存中的历史
+            store = getattr(self.main_app, 'clipboard_store', None)
+            if store is not None:
+                self._show_stored_clipboard_history(store)
+                return
+            
             history = []
             try:
                 if hasattr(self.main_app, 'clipboard_monitor') and self.main_app.clipboard_monitor:
@@ -1678,113 +1660,116 @@ TICKTICK_EMAIL={self.ticktick_email.text()}
                     pass
     
     def _test_connection(self):
-        """测试连接"""
-        from PyQt5.QtWidgets import QMessageBox
-        
-        # 直接执行测试，不使用进度对话框（避免弹窗问题）
-        result_text = ""
-        
-        try:
-            # 测试AI连接
-            provider = self.ai_provider.currentText()
-            ai_ok = False
-            
-            if provider in ["openai", "deepseek"]:
-                try:
-                    from openai import OpenAI
-                    base_url = self.openai_base_url.text() if self.openai_base_url.text() else None
-                    if not base_url:
-                        if provider == "deepseek":
-                            base_url = "https://api.deepseek.com/v1"
-                        else:
-                            base_url = "https://api.openai.com/v1"
-                    
-                    client = OpenAI(
-                        api_key=self.openai_key.text(),
-                        base_url=base_url
-                    )
-                    # 简单测试：调用models接口
-                    list(client.models.list())
-                    ai_ok = True
-                    provider_name = "DeepSeek" if provider == "deepseek" else "OpenAI"
-                    result_text += f"✅ {provider_name} 连接成功\n"
-                except Exception as e:
-                    provider_name = "DeepSeek" if provider == "deepseek" else "OpenAI"
-                    error_msg = str(e)[:100] if len(str(e)) > 100 else str(e)
-                    result_text += f"❌ {provider_name} 连接失败: {error_msg}\n"
-            
-            elif provider == "claude":
-                # Claude测试需要ANTHROPIC_API_KEY，这里暂时跳过
-                result_text += "⚠️ Claude连接测试暂未实现\n"
-                ai_ok = True  # 暂时标记为成功
-            
-            # 测试Notion连接
-            notion_ok = False
-            if self.notion_key.text() and self.notion_db.text():
-                try:
-                    from src.integrations.notion_api import NotionAPI
-                    notion = NotionAPI(
-                        self.notion_key.text(),
-                        self.notion_db.text()
-                    )
-                    notion_ok = notion.test_connection()
-                    if notion_ok:
-                        result_text += "✅ Notion 连接成功\n"
-                except Exception as e:
-                    error_msg = str(e)[:100] if len(str(e)) > 100 else str(e)
-                    result_text += f"❌ Notion 连接失败: {error_msg}\n"
-            else:
-                result_text += "⚠️ Notion 配置不完整\n"
-            
-            # 测试Flomo连接
-            if self.flomo_url.text():
-                try:
-                    from src.integrations.flomo_api import FlomoAPI
-                    flomo = FlomoAPI(self.flomo_url.text())
-                    flomo_ok = flomo.test_connection()
-                    if flomo_ok:
-                        result_text += "✅ Flomo 连接成功\n"
-                    else:
-                        result_text += "❌ Flomo 连接失败\n"
-                except Exception as e:
-                    error_msg = str(e)[:100] if len(str(e)) > 100 else str(e)
-                    result_text += f"❌ Flomo 连接失败: {error_msg}\n"
+        """测试连接（各服务在后台并行探测，界面不阻塞）"""
+        from src.integrations.probes import (
+            Probe, probe_anthropic, probe_flomo, probe_notion, probe_openai, run_probes
+        )
+        
+        if self._probe_future is not None and not self._probe_future.done():
+            return
+        
+        probes = []
+        skipped = []
+        
+        # AI：列出模型
+        provider = self.ai_provider.currentText()
+        if provider in ["openai", "deepseek"]:
+            base_url = self.openai_base_url.text() if self.openai_base_url.text() else None
+            if not base_url:
+                if provider == "deepseek":
+                    base_url = "https://api.deepseek.com/v1"
+                else:
+                    base_url = "https://api.openai.com/v1"
+            provider_name = "DeepSeek" if provider == "deepseek" else "OpenAI"
+            api_key = self.openai_key.text()
+            probes.append(Probe(provider_name, lambda: probe_openai(api_key, base_url)))
+        elif provider == "claude":
+            # Claude 使用 .env 中的 ANTHROPIC_API_KEY
+            anthropic_key = self.config_obj.anthropic_api_key
+            if anthropic_key:
+                probes.append(Probe("Claude", lambda: probe_anthropic(anthropic_key)))
             else:
-                result_text += "⚠️ Flomo 未配置（可选）\n"
-            
-            # 测试滴答清单连接
-            if (self.ticktick_smtp_user.text() and 
-                self.ticktick_smtp_pass.text() and 
-                self.ticktick_email.text()):
-                try:
-                    from src.integrations.ticktick_api import TickTickAPI
-                    smtp_port = int(self.ticktick_smtp_port.text() or "465")
-                    ticktick = TickTickAPI(
-                        smtp_host=self.ticktick_smtp_host.text() or "smtp.qq.com",
-                        smtp_port=smtp_port,
-                        smtp_user=self.ticktick_smtp_user.text(),
-                        smtp_pass=self.ticktick_smtp_pass.text(),
-                        ticktick_email=self.ticktick_email.text()
-                    )
-                    ticktick_ok = ticktick.test_connection()
-                    if ticktick_ok:
-                        result_text += "✅ 滴答清单 连接成功\n"
-                    else:
-                        result_text += "❌ 滴答清单 连接失败\n"
-                except Exception as e:
-                    error_msg = str(e)[:100] if len(str(e)) > 100 else str(e)
-                    result_text += f"❌ 滴答清单 连接失败: {error_msg}\n"
+                skipped.append("⚠️ Claude 未配置ANTHROPIC_API_KEY")
+        
+        # Notion：读取数据库（结果写入结构缓存）
+        if self.notion_key.text() and self.notion_db.text():
+            try:
+                from src.integrations.notion_api import NotionAPI
+                notion = NotionAPI(
+                    self.notion_key.text(),
+                    self.notion_db.text()
+                )
+                probes.append(Probe("Notion", lambda: probe_notion(notion)))
+            except Exception as e:
+                skipped.append(f"❌ Notion 连接失败: {str(e)[:100]}")
+        else:
+            skipped.append("⚠️ Notion 配置不完整")
+        
+        # Flomo：探测Webhook地址（不创建Memo）
+        if self.flomo_url.text():
+            from src.integrations.flomo_api import FlomoAPI
+            flomo = FlomoAPI(self.flomo_url.text())
+            probes.append(Probe("Flomo", lambda: probe_flomo(flomo)))
+        else:
+            skipped.append("⚠️ Flomo 未配置（可选）")
+        
+        # 滴答清单：SMTP登录后直接退出（不发送邮件）
+        if (self.ticktick_smtp_user.text() and 
+            self.ticktick_smtp_pass.text() and 
+            self.ticktick_email.text()):
+            try:
+                from src.integrations.ticktick_api import TickTickAPI
+                smtp_port = int(self.ticktick_smtp_port.text() or "465")
+                ticktick = TickTickAPI(
+                    smtp_host=self.ticktick_smtp_host.text() or "smtp.qq.com",
+                    smtp_port=smtp_port,
+                    smtp_user=self.ticktick_smtp_user.text(),
+                    smtp_pass=self.ticktick_smtp_pass.text(),
+                    ticktick_email=self.ticktick_email.text(),
+                    use_ssl=self.config_obj.ticktick_smtp_ssl
+                )
+                probes.append(Probe("滴答清单", ticktick.test_connection_async))
+            except Exception as e:
+                skipped.append(f"❌ 滴答清单 连接失败: {str(e)[:100]}")
+        else:
+            skipped.append("⚠️ 滴答清单 未配置（可选）")
+        
+        if not probes:
+            QMessageBox.information(self, "连接测试结果", "\n".join(skipped) or "测试完成，但未检测到任何结果")
+            return
+        
+        # 按钮显示进度（不使用进度对话框，避免弹窗问题）
+        self._probe_total = len(probes)
+        self._probe_done = 0
+        self._probe_skipped = skipped
+        self.test_btn.setEnabled(False)
+        self.test_btn.setText(f"⏳ 测试中 0/{self._probe_total}")
+        
+        # 探测结果在I/O循环线程中产生，通过信号切回界面线程
+        self._probe_future = run_probes(probes, on_result=self.probe_progress.emit)
+        self._probe_future.add_done_callback(
+            lambda future: self.probes_finished.emit(future.result() if future.exception() is None else [])
+        )
+    
+    def _on_probe_progress(self, result):
+        """单个服务探测完成"""
+        self._probe_done += 1
+        self.test_btn.setText(f"⏳ 测试中 {self._probe_done}/{self._probe_total}（{result.service} {result.latency_ms}ms）")
+    
+    def _on_probes_finished(self, results):
+        """全部探测完成，显示结果"""
+        self.test_btn.setEnabled(True)
+        self.test_btn.setText("🧪 测试连接")
+        
+        lines = []
+        for r in results:
+            if r.ok:
+                lines.append(f"✅ {r.service} 连接成功（{r.latency_ms}ms）")
             else:
-                result_text += "⚠️ 滴答清单 未配置（可选）\n"
-            
-            # 显示结果
-            if not result_text:
-                result_text = "测试完成，但未检测到任何结果"
-            
-            QMessageBox.information(self, "连接测试结果", result_text)
-            
-        except Exception as e:
-            logger.error(f"测试连接失败: {e}")
-            error_msg = str(e)[:200] if len(str(e)) > 200 else str(e)
-            QMessageBox.critical(self, "测试失败", f"测试连接时出错：\n{error_msg}")
+                lines.append(f"❌ {r.service} 连接失败: {r.message}（{r.latency_ms}ms）")
+        lines.extend(self._probe_skipped)
+        if not results:
+            lines.insert(0, "❌ 连接测试出错，请查看日志")
+        
+        QMessageBox.information(self, "连接测试结果", "\n".join(lines))
 
@@ -17,6 +17,7 @@ class TrayIcon(QObject):
     restart_hotkey_triggered = pyqtSignal()  # 重启快捷键监听
     clipboard_toggled = pyqtSignal(bool)
     clipboard_history_triggered = pyqtSignal()
+    performance_triggered = pyqtSignal()
     
     def __init__(self, app):
         """
@@ -86,6 +87,11 @@ class TrayIcon(QObject):
         history_action.triggered.connect(self.clipboard_history_triggered.emit)
         menu.addAction(history_action)
         
+        # 性能面板
+        performance_action = QAction("📊 性能", menu)
+        performance_action.triggered.connect(self.performance_triggered.emit)
+        menu.addAction(performance_action)
+        
         # 设置
         settings_action = QAction("⚙️ 设置", menu)
         settings_action.triggered.connect(self.settings_triggered.emit)
@@ -1,8 +1,10 @@
 """Flomo API集成"""
-import requests
+import httpx
 from typing import Optional, List
 from loguru import logger
 
+from src.core.io_loop import get_io_loop
+
 
 class FlomoAPI:
     """Flomo API封装类"""
@@ -15,6 +17,8 @@ class FlomoAPI:
             webhook_url: Flomo Webhook URL
         """
         self.webhook_url = webhook_url
+        # 异步HTTP客户端在I/O循环中首次使用时创建（复用连接）
+        self._http: Optional[httpx.AsyncClient] = None
         logger.info("Flomo API已初始化")
     
     def add_memo(
@@ -23,7 +27,28 @@ class FlomoAPI:
         tags: Optional[List[str]] = None
     ) -> bool:
         """
-        添加Memo到Flomo
+        添加Memo到Flomo（同步等待I/O循环中的请求完成）
+        
+        Args:
+            content: 内容
+            tags: 标签列表（可选）
+            
+        Returns:
+            是否成功
+        """
+        return self.submit_memo(content, tags).result()
+    
+    def submit_memo(self, content: str, tags: Optional[List[str]] = None):
+        """提交到I/O循环，立即返回 Future（结果为是否成功）"""
+        return get_io_loop().submit(self.add_memo_async(content, tags))
+    
+    async def add_memo_async(
+        self, 
+        content: str, 
+        tags: Optional[List[str]] = None
+    ) -> bool:
+        """
+        添加Memo到Flomo（协程，在I/O循环中执行）
         
         Args:
             content: 内容
@@ -44,10 +69,11 @@ class FlomoAPI:
                     full_content = f"{content}\n\n{tag_str}"
             
             # 发送POST请求
-            response = requests.post(
+            if self._http is None:
+                self._http = httpx.AsyncClient(timeout=10)
+            response = await self._http.post(
                 self.webhook_url,
-                json={"content": full_content},
-                timeout=10
+                json={"content": full_content}
             )
             
             if response.status_code == 200:
@@ -62,23 +88,43 @@ class FlomoAPI:
             return False
     
     def test_connection(self) -> bool:
-        """测试Flomo连接"""
+        """测试Flomo连接（同步等待I/O循环中的探测完成）"""
+        return get_io_loop().call(self.test_connection_async())
+    
+    async def test_connection_async(self, timeout: float = 10) -> bool:
+        """
+        测试Flomo连接（不创建Memo）
+        
+        Webhook 只接受 POST，用 GET 探测：地址可达且令牌有效时返回 405，
+        令牌错误或地址不存在时返回 401/403/404。
+        """
         try:
-            # 发送一个测试memo
-            response = requests.post(
-                self.webhook_url,
-                json={"content": "QuickNote AI 连接测试"},
-                timeout=10
-            )
+            if self._http is None:
+                self._http = httpx.AsyncClient(timeout=10)
+            response = await self._http.get(self.webhook_url, timeout=timeout)
             
-            if response.status_code == 200:
-                logger.info("Flomo连接测试成功")
-                return True
-            else:
+            if response.status_code in (401, 403, 404) or response.status_code >= 500:
                 logger.error(f"Flomo连接测试失败: {response.status_code}")
                 return False
+            logger.info(f"Flomo连接测试成功（{response.status_code}）")
+            return True
                 
         except Exception as e:
             logger.error(f"Flomo连接测试失败: {e}")
             return False
-
+    
+    async def aclose(self):
+        """关闭异步HTTP客户端（协程，在I/O循环中执行；之后再使用会重新创建）"""
+        http, self._http = self._http, None
+        if http is not None:
+            await http.aclose()
+    
+    def close(self, timeout: float = 5.0):
+        """关闭异步HTTP客户端（同步等待I/O循环中的关闭完成）"""
+        if self._http is None:
+            return
+        try:
+            get_io_loop().call(self.aclose(), timeout=timeout)
+            logger.info("Flomo API连接已关闭")
+        except Exception as e:
+            logger.warning(f"关闭Flomo API连接失败: {e}")
@@ -1,23 +1,186 @@
 """Notion API集成"""
-from typing import Dict, Any, Optional
-from notion_client import Client
+import re
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+from notion_client import AsyncClient, Client
 from loguru import logger
 from datetime import datetime
 
+from src.utils.config import config as app_config
+from src.utils.rate_limiter import TokenBucket
+from src.integrations.notion_schema import NotionSchemaCache, PropertyMapping
+from src.core.io_loop import get_io_loop
+
+
+# Notion 接口限制
+RICH_TEXT_LIMIT = 2000          # 单个 rich_text 片段最多字符数
+RICH_TEXT_PER_BLOCK = 100       # 单个块最多 rich_text 片段数
+BLOCKS_PER_REQUEST = 100        # 单次请求最多携带的子块数
+DESCRIPTION_PREVIEW_CHARS = 200 # “描述”属性只放预览，正文在页面内容块中
+
+_PARAGRAPH_RE = re.compile(r"\n[ \t]*\n+")
+# 句子边界：中英文句末标点（含后面紧跟的引号/括号）或换行
+_SENTENCE_RE = re.compile(r".*?(?:[。！？!?；;…]+[」』”’\"')）]*|\.(?=\s)|\n|$)", re.S)
+
+
+def _notion_len(text: str) -> int:
+    """按 Notion 的计数方式（UTF-16 码元）计算长度，emoji 等字符计为2"""
+    return len(text.encode("utf-16-le")) // 2
+
+
+def _hard_split(text: str, limit: int) -> List[str]:
+    """没有合适边界时按长度硬切"""
+    parts, current, size = [], [], 0
+    for ch in text:
+        width = _notion_len(ch)
+        if size + width > limit:
+            parts.append("".join(current))
+            current, size = [], 0
+        current.append(ch)
+        size += width
+    if current:
+        parts.append("".join(current))
+    return parts
+
+
+def split_text(text: str, limit: int = RICH_TEXT_LIMIT) -> List[str]:
+    """
+    把一段文本切成不超过 limit 的片段，优先在句子边界处切分
+    
+    Args:
+        text: 文本（一个段落）
+        limit: 单个片段的长度上限
+        
+    Returns:
+        片段列表（拼接后与原文完全一致）
+    """
+    if _notion_len(text) <= limit:
+        return [text]
+    
+    segments, current = [], ""
+    for sentence in _SENTENCE_RE.findall(text):
+        if not sentence:
+            continue
+        if _notion_len(current + sentence) <= limit:
+            current += sentence
+            continue
+        if current:
+            segments.append(current)
+        if _notion_len(sentence) <= limit:
+            current = sentence
+        else:
+            *full, current = _hard_split(sentence, limit)
+            segments.extend(full)
+    if current:
+        segments.append(current)
+    return segments
+
+
+def _paragraph_block(segments: List[str]) -> Dict[str, Any]:
+    return {
+        "object": "block",
+        "type": "paragraph",
+        "paragraph": {
+            "rich_text": [
+                {"type": "text", "text": {"content": segment}}
+                for segment in segments
+            ]
+        }
+    }
+
+
+def build_content_blocks(content: str) -> List[Dict[str, Any]]:
+    """
+    把正文转换为 Notion 段落块
+    
+    空行分隔的每一段对应一个段落块；超过 2000 字符的段落按句子切成多个 rich_text 片段
+    （同一块内最多100个片段，再多则拆到下一个块）。
+    
+    Args:
+        content: 正文
+        
+    Returns:
+        段落块列表（至少一个）
+    """
+    blocks = []
+    for paragraph in _PARAGRAPH_RE.split(content.strip()):
+        if not paragraph.strip():
+            continue
+        segments = split_text(paragraph)
+        for i in range(0, len(segments), RICH_TEXT_PER_BLOCK):
+            blocks.append(_paragraph_block(segments[i:i + RICH_TEXT_PER_BLOCK]))
+    return blocks or [_paragraph_block([content])]
+
+
+def preview_text(content: str, limit: int = DESCRIPTION_PREVIEW_CHARS) -> str:
+    """生成属性中使用的简短预览"""
+    text = " ".join(content.split())
+    return text if len(text) <= limit else text[:limit] + "..."
+
+
+def _data_source_id(database: Dict[str, Any]) -> Optional[str]:
+    """
+    数据库属性所在的数据源ID
+
+    API 版本 2025-09-03 起 databases.retrieve 不再返回 properties，属性在数据源上
+    （data_sources[0]，由 data_sources.retrieve 获取）；旧版本直接返回属性时为 None。
+    """
+    if "properties" in database:
+        return None
+    data_sources = database.get("data_sources") or []
+    return data_sources[0].get("id") if data_sources else None
+
 
 class NotionAPI:
     """Notion API封装类"""
     
-    def __init__(self, api_key: str, database_id: str):
+    def __init__(
+        self,
+        api_key: str,
+        database_id: str,
+        base_url: Optional[str] = None,
+        rate_limiter: Optional[TokenBucket] = None,
+        schema_cache_path: Optional[Path] = None
+    ):
         """
         初始化Notion客户端
         
         Args:
             api_key: Notion API密钥
             database_id: Database ID
+            base_url: API地址（可选，默认读取 NOTION_BASE_URL，用于指向本地模拟服务）
+            rate_limiter: 请求限流器（可选，不传则按配置新建）
+            schema_cache_path: 数据库结构缓存文件（可选，默认 data/notion_schema.json）
         """
-        self.client = Client(auth=api_key)
+        client_kwargs = {"auth": api_key}
+        base_url = base_url or app_config.notion_base_url
+        if base_url:
+            client_kwargs["base_url"] = base_url
+        try:
+            # 429/5xx 的重试由 NotionWriter 统一处理（遵循 Retry-After），关闭SDK自带重试避免叠加
+            self.client = Client(retry=False, **client_kwargs)
+            # 写入走I/O循环中的异步客户端
+            self.async_client = AsyncClient(retry=False, **client_kwargs)
+        except TypeError:
+            # 旧版SDK不支持 retry 参数，本身也不会自动重试
+            self.client = Client(**client_kwargs)
+            self.async_client = AsyncClient(**client_kwargs)
         self.database_id = database_id
+        self.rate_limiter = rate_limiter or TokenBucket(
+            app_config.get("notion.rate_limit.requests_per_second", 3),
+            app_config.get("notion.rate_limit.burst", 3)
+        )
+        
+        # 数据库结构缓存：过期或缺失时后台拉取，不阻塞初始化
+        self.schema_cache = NotionSchemaCache(
+            schema_cache_path or app_config.root_dir / "data" / "notion_schema.json",
+            database_id,
+            fetcher=self._retrieve_database,
+            ttl_seconds=int(float(app_config.get("notion.schema_ttl_hours", 24)) * 3600)
+        )
+        self._mapping: Optional[PropertyMapping] = None
+        if database_id:
+            self.schema_cache.get()
         logger.info("Notion API已初始化")
     
     def add_inspiration(
@@ -30,7 +193,7 @@ class NotionAPI:
         ai_extract_title: bool = True
     ) -> bool:
         """
-        添加灵感到Notion Database
+        添加灵感到Notion Database（同步调用，失败不重试；需要排队重试请使用 NotionWriter）
         
         Args:
             content: 内容
@@ -43,15 +206,154 @@ class NotionAPI:
             是否成功
         """
         try:
-            # 如果启用AI提取且没有提供标题，尝试用AI提取
-            if ai_extract_title and not title:
-                try:
-                    from src.core.ai_processor import AIProcessor
-                    from src.utils.config import config as app_config
-                    ai = AIProcessor(app_config.ai_provider)
-                    
-                    # 使用特殊提示词，只获取标题文本
-                    prompt = f"""请从以下内容中提取一个简短的标题（不超过25个字符），概括核心内容。
+            page = self.build_page(
+                content,
+                title=title,
+                priority=priority,
+                status=status,
+                tags=tags,
+                ai_extract_title=ai_extract_title
+            )
+            self.create_page(page)
+            logger.info(f"成功添加灵感到Notion: {page['title']}")
+            return True
+            
+        except Exception as e:
+            logger.error(f"添加到Notion失败: {e}")
+            return False
+    
+    def build_page(
+        self,
+        content: str,
+        title: Optional[str] = None,
+        priority: str = "中",
+        status: str = "待处理",
+        tags: Optional[list] = None,
+        ai_extract_title: bool = True
+    ) -> Dict[str, Any]:
+        """
+        构建 pages.create 的请求参数（不发送请求）
+        
+        Args:
+            同 add_inspiration
+            
+        Returns:
+            {"title": 标题, "properties": 页面属性, "children": 内容块}
+        """
+        # 如果启用AI提取且没有提供标题，尝试用AI提取
+        if ai_extract_title and not title:
+            title = self._extract_title(content)
+        
+        # 如果仍然没有标题，使用内容前30个字符
+        if not title:
+            title = content[:30] + "..." if len(content) > 30 else content
+        
+        # 构建页面属性（按数据库结构映射属性名并在本地校验，不匹配时抛出 NotionSchemaError）
+        properties = self.property_mapping().build({
+            "title": title,
+            "description": preview_text(content),  # 只放预览，完整内容在页面正文
+            "status": status,
+            "priority": priority,
+            "created": datetime.now().astimezone().isoformat(),
+            "tags": tags or [],
+        })
+        
+        # 构建内容块（长文本按段落/句子切分，突破单个 rich_text 2000 字符的限制）
+        children = build_content_blocks(content)
+        
+        return {"title": title, "properties": properties, "children": children}
+    
+    def create_page(self, page: Dict[str, Any]) -> Dict[str, Any]:
+        """创建页面（同步等待I/O循环中的请求完成，参见 create_page_async）"""
+        return get_io_loop().call(self.create_page_async(page))
+    
+    async def create_page_async(self, page: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        创建页面（协程，经过限流器，异常直接抛出）
+        
+        前100个内容块随 pages.create 一起发送，其余通过 blocks.children.append 分批追加。
+        进度记录在 page 中（page_id / next_block），失败后用同一个 page 重试会从断点继续，
+        不会重复创建页面。
+        
+        Args:
+            page: build_page 的返回值
+            
+        Returns:
+            Notion 返回的页面对象
+        """
+        children = page["children"]
+        if not page.get("page_id"):
+            await self.rate_limiter.acquire_async()
+            try:
+                response = await self.async_client.pages.create(
+                    parent={"database_id": self.database_id},
+                    properties=page["properties"],
+                    children=children[:BLOCKS_PER_REQUEST]
+                )
+            except Exception as e:
+                if getattr(e, "status", None) == 400:
+                    # 属性校验失败，数据库结构可能已变化
+                    self.schema_cache.invalidate()
+                raise
+            page["page_id"] = response["id"]
+            page["response"] = response
+            page["next_block"] = min(len(children), BLOCKS_PER_REQUEST)
+        
+        while page["next_block"] < len(children):
+            start = page["next_block"]
+            batch = children[start:start + BLOCKS_PER_REQUEST]
+            await self.rate_limiter.acquire_async()
+            await self.async_client.blocks.children.append(block_id=page["page_id"], children=batch)
+            page["next_block"] = start + len(batch)
+            logger.debug(f"已追加Notion内容块 {page['next_block']}/{len(children)}")
+        
+        return page["response"]
+    
+    def property_mapping(self) -> PropertyMapping:
+        """当前数据库结构对应的属性映射（结构更新后自动重建）"""
+        schema = self.schema_cache.get()
+        mapping = self._mapping
+        if mapping is None or mapping.schema is not schema:
+            mapping = PropertyMapping(schema, app_config.get("notion.properties", {}))
+            for warning in mapping.warnings:
+                logger.warning(f"Notion属性映射: {warning}")
+            self._mapping = mapping
+        return mapping
+    
+    def _retrieve_database(self) -> Dict[str, Any]:
+        """拉取数据库结构（返回带 properties 的数据库对象）"""
+        self.rate_limiter.acquire()
+        database = self.client.databases.retrieve(database_id=self.database_id)
+        data_source_id = _data_source_id(database)
+        if data_source_id:
+            self.rate_limiter.acquire()
+            data_source = self.client.data_sources.retrieve(data_source_id=data_source_id)
+            database = {**database, "properties": data_source.get("properties") or {}}
+        return database
+    
+    async def _retrieve_database_async(self) -> Dict[str, Any]:
+        """拉取数据库结构（协程）"""
+        await self.rate_limiter.acquire_async()
+        database = await self.async_client.databases.retrieve(database_id=self.database_id)
+        data_source_id = _data_source_id(database)
+        if data_source_id:
+            await self.rate_limiter.acquire_async()
+            data_source = await self.async_client.data_sources.retrieve(data_source_id=data_source_id)
+            database = {**database, "properties": data_source.get("properties") or {}}
+        return database
+    
+    def _extract_title(self, content: str) -> Optional[str]:
+        """使用AI提取标题，失败时返回None"""
+        try:
+            from src.core.components import components
+            if components.has("ai_processor"):
+                ai = components.get("ai_processor")
+            else:
+                from src.core.ai_processor import AIProcessor
+                ai = AIProcessor(app_config.ai_provider)
+            
+            # 使用特殊提示词，只获取标题文本
+            prompt = f"""请从以下内容中提取一个简短的标题（不超过25个字符），概括核心内容。
 
 内容：{content}
 
@@ -61,109 +363,42 @@ class NotionAPI:
 3. 不超过25个字符
 
 直接返回标题即可。"""
-                    
-                    if ai.provider in ["openai", "deepseek"]:
-                        response = ai.client.chat.completions.create(
-                            model=ai.model,
-                            messages=[
-                                {"role": "system", "content": "你是一个标题提取助手，只返回简短的标题文本，不要返回JSON。"},
-                                {"role": "user", "content": prompt}
-                            ],
-                            temperature=0.3,
-                            max_tokens=50
-                        )
-                        extracted_title = response.choices[0].message.content.strip()
-                        # 移除可能的引号
-                        extracted_title = extracted_title.strip('"\'')
-                        if extracted_title and len(extracted_title) <= 50:
-                            title = extracted_title
-                except Exception as e:
-                    logger.warning(f"AI提取标题失败，使用默认方式: {e}")
-            
-            # 如果仍然没有标题，使用内容前30个字符
-            if not title:
-                title = content[:30] + "..." if len(content) > 30 else content
-            
-            # 构建页面属性
-            properties = {
-                "标题": {
-                    "title": [
-                        {
-                            "text": {
-                                "content": title
-                            }
-                        }
-                    ]
-                },
-                "描述": {
-                    "rich_text": [
-                        {
-                            "text": {
-                                "content": content[:2000]  # Notion限制，最多2000字符
-                            }
-                        }
-                    ]
-                },
-                "状态": {
-                    "status": {
-                        "name": status
-                    }
-                },
-                "优先级": {
-                    "select": {
-                        "name": priority
-                    }
-                },
-                "创建时间": {
-                    "date": {
-                        "start": datetime.now().astimezone().isoformat()
-                    }
-                }
-            }
-            
-            # 添加标签（如果有）
-            if tags:
-                properties["标签"] = {
-                    "multi_select": [{"name": tag} for tag in tags]
-                }
-            
-            # 构建内容块
-            children = [
-                {
-                    "object": "block",
-                    "type": "paragraph",
-                    "paragraph": {
-                        "rich_text": [
-                            {
-                                "type": "text",
-                                "text": {
-                                    "content": content
-                                }
-                            }
-                        ]
-                    }
-                }
-            ]
-            
-            # 创建页面
-            response = self.client.pages.create(
-                parent={"database_id": self.database_id},
-                properties=properties,
-                children=children
-            )
-            
-            logger.info(f"成功添加灵感到Notion: {title}")
-            return True
             
+            if ai.provider in ["openai", "deepseek"]:
+                response = ai.client.chat.completions.create(
+                    model=ai.model,
+                    messages=[
+                        {"role": "system", "content": "你是一个标题提取助手，只返回简短的标题文本，不要返回JSON。"},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0.3,
+                    max_tokens=50,
+                    timeout=ai.time_extract_budget
+                )
+                extracted_title = response.choices[0].message.content.strip()
+                # 移除可能的引号
+                extracted_title = extracted_title.strip('"\'')
+                if extracted_title and len(extracted_title) <= 50:
+                    return extracted_title
         except Exception as e:
-            logger.error(f"添加到Notion失败: {e}")
-            return False
+            logger.warning(f"AI提取标题失败，使用默认方式: {e}")
+        return None
     
     def test_connection(self) -> bool:
         """测试Notion连接"""
         try:
-            # 尝试获取database信息
-            self.client.databases.retrieve(database_id=self.database_id)
+            # 获取database信息，顺便更新结构缓存
+            self.schema_cache.store(self._retrieve_database())
+            logger.info("Notion连接测试成功")
+            return True
+        except Exception as e:
+            logger.error(f"Notion连接测试失败: {e}")
+            return False
+
+    async def test_connection_async(self) -> bool:
+        """测试Notion连接（协程，结果同样写入结构缓存，后续写入不必再拉取）"""
+        try:
+            self.schema_cache.store(await self._retrieve_database_async())
             logger.info("Notion连接测试成功")
             return True
         except Exception as e:
@@ -0,0 +1,265 @@
+"""Notion 数据库结构缓存与属性映射
+
+- 数据库结构（属性名、类型、select/status 选项）只在缓存过期时拉取一次，写入磁盘跨重启复用
+- 缓存过期后先继续使用旧结构，后台线程刷新，不阻塞写入
+- 根据结构把逻辑字段（标题、描述、状态……）映射到实际属性名，并在本地校验，
+  属性不存在、类型不符、状态选项不存在等问题在发请求前发现
+"""
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from loguru import logger
+
+
+class NotionSchemaError(ValueError):
+    """写入内容与数据库结构不匹配（本地校验失败，无需发请求）"""
+
+
+# 逻辑字段 -> (默认属性名, 可接受的属性类型)
+DEFAULT_PROPERTY_MAP = {
+    "title": ("标题", ("title",)),
+    "description": ("描述", ("rich_text",)),
+    "status": ("状态", ("status", "select")),
+    "priority": ("优先级", ("select", "status")),
+    "created": ("创建时间", ("date",)),
+    "tags": ("标签", ("multi_select",)),
+}
+
+
+@dataclass
+class DatabaseSchema:
+    """数据库结构快照"""
+    database_id: str
+    # 属性名 -> {"type": 类型, "options": [选项名]}
+    properties: Dict[str, Dict[str, Any]]
+    fetched_at: float = field(default_factory=time.time)
+
+    @classmethod
+    def from_database(cls, database_id: str, database: Dict[str, Any]) -> "DatabaseSchema":
+        """从 databases.retrieve 的返回值解析"""
+        properties = {}
+        for name, prop in (database.get("properties") or {}).items():
+            prop_type = prop.get("type")
+            options = []
+            if prop_type in ("select", "multi_select", "status"):
+                options = [opt.get("name") for opt in (prop.get(prop_type) or {}).get("options", []) if opt.get("name")]
+            properties[name] = {"type": prop_type, "options": options}
+        return cls(database_id, properties)
+
+    def title_property(self) -> Optional[str]:
+        """数据库唯一的标题属性名"""
+        for name, prop in self.properties.items():
+            if prop["type"] == "title":
+                return name
+        return None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"properties": self.properties, "fetched_at": self.fetched_at}
+
+
+class PropertyMapping:
+    """逻辑字段到实际属性的映射（附带本地校验）"""
+
+    def __init__(self, schema: Optional[DatabaseSchema], overrides: Optional[Dict[str, str]] = None):
+        """
+        Args:
+            schema: 数据库结构（None 表示结构未知，按默认属性名写入，不做校验）
+            overrides: 配置中自定义的属性名 {逻辑字段: 属性名}
+        """
+        self.schema = schema
+        self.names: Dict[str, str] = {}
+        self.types: Dict[str, str] = {}
+        self.warnings: List[str] = []
+        overrides = overrides or {}
+
+        for key, (default_name, accepted) in DEFAULT_PROPERTY_MAP.items():
+            name = overrides.get(key) or default_name
+            if schema is None:
+                self.names[key] = name
+                self.types[key] = accepted[0]
+                continue
+
+            prop = schema.properties.get(name)
+            if key == "title" and (prop is None or prop["type"] != "title"):
+                # 标题属性每个数据库都有且只有一个，名字不同时直接使用实际的标题属性
+                name = schema.title_property()
+                prop = schema.properties.get(name) if name else None
+            if prop is None:
+                self.warnings.append(f"数据库中没有属性“{name}”，将跳过{key}")
+                continue
+            if prop["type"] not in accepted:
+                self.warnings.append(f"属性“{name}”类型为 {prop['type']}，不能写入{key}，将跳过")
+                continue
+            self.names[key] = name
+            self.types[key] = prop["type"]
+
+    def build(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        按映射构建页面属性
+
+        Args:
+            values: {逻辑字段: 值}，tags 为列表，created 为 ISO 时间字符串
+
+        Raises:
+            NotionSchemaError: 缺少标题属性，或状态值不在数据库已有选项中
+        """
+        if "title" not in self.names:
+            raise NotionSchemaError("数据库中没有标题属性")
+
+        properties = {}
+        for key, value in values.items():
+            name = self.names.get(key)
+            if name is None or value in (None, "", []):
+                continue
+            prop_type = self.types[key]
+            self._validate_option(key, name, prop_type, value)
+            if prop_type == "title":
+                properties[name] = {"title": [{"text": {"content": value}}]}
+            elif prop_type == "rich_text":
+                properties[name] = {"rich_text": [{"text": {"content": value}}]}
+            elif prop_type in ("status", "select"):
+                properties[name] = {prop_type: {"name": value}}
+            elif prop_type == "multi_select":
+                properties[name] = {"multi_select": [{"name": tag} for tag in value]}
+            elif prop_type == "date":
+                properties[name] = {"date": {"start": value}}
+        return properties
+
+    def _validate_option(self, key: str, name: str, prop_type: str, value: Any):
+        if self.schema is None:
+            return
+        options = self.schema.properties[name]["options"]
+        if prop_type == "status" and options and value not in options:
+            # 状态选项无法通过API新建，写入不存在的值必定失败
+            raise NotionSchemaError(f"属性“{name}”没有状态选项“{value}”（可选：{'、'.join(options)}）")
+        if prop_type == "multi_select":
+            for tag in value:
+                if "," in tag:
+                    raise NotionSchemaError(f"标签“{tag}”包含逗号，Notion不允许")
+
+
+class NotionSchemaCache:
+    """数据库结构缓存（内存 + 磁盘，线程安全）"""
+
+    def __init__(
+        self,
+        path: Path,
+        database_id: str,
+        fetcher: Callable[[], Dict[str, Any]],
+        ttl_seconds: int = 24 * 3600,
+        empty_ttl_seconds: int = 600
+    ):
+        """
+        Args:
+            path: 缓存文件路径（多个数据库共用一个文件，按 database_id 区分）
+            database_id: 数据库ID
+            fetcher: 拉取数据库结构的函数（返回带 properties 的数据库对象）
+            ttl_seconds: 缓存有效期（秒）
+            empty_ttl_seconds: 拉取结果中没有属性时，多久之后再重新拉取（秒）
+        """
+        self.path = Path(path)
+        self.database_id = database_id
+        self.fetcher = fetcher
+        self.ttl_seconds = int(ttl_seconds)
+        self.empty_ttl_seconds = int(empty_ttl_seconds)
+        self._lock = threading.Lock()
+        self._refreshing = False
+        # 最近一次拉取结果没有属性的时间（0 表示没有）；期间不再每次读取都触发拉取
+        self._empty_at = 0.0
+        self._schema: Optional[DatabaseSchema] = self._load()
+
+    def _load(self) -> Optional[DatabaseSchema]:
+        try:
+            if not self.path.exists():
+                return None
+            with open(self.path, "r", encoding="utf-8") as f:
+                entry = (json.load(f) or {}).get(self.database_id)
+            if not entry:
+                return None
+            return DatabaseSchema(self.database_id, entry["properties"], float(entry["fetched_at"]))
+        except Exception as e:
+            logger.warning(f"加载Notion数据库结构缓存失败，将重新拉取: {e}")
+            return None
+
+    def _save(self, schema: DatabaseSchema):
+        try:
+            data = {}
+            if self.path.exists():
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f) or {}
+            data[self.database_id] = schema.to_dict()
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            tmp.replace(self.path)
+        except Exception as e:
+            logger.warning(f"保存Notion数据库结构缓存失败: {e}")
+
+    @property
+    def stale(self) -> bool:
+        now = time.time()
+        if self._empty_at and now - self._empty_at <= self.empty_ttl_seconds:
+            return False
+        schema = self._schema
+        return schema is None or now - schema.fetched_at > self.ttl_seconds
+
+    def get(self) -> Optional[DatabaseSchema]:
+        """
+        获取数据库结构（不阻塞）
+
+        缓存过期或不存在时触发后台刷新，本次返回旧结构（可能为None）。
+        """
+        if self.stale:
+            self.refresh_async()
+        return self._schema
+
+    def store(self, database: Dict[str, Any]) -> Optional[DatabaseSchema]:
+        """用拉取到的数据库对象更新缓存"""
+        schema = DatabaseSchema.from_database(self.database_id, database)
+        if not schema.properties:
+            # 没有属性信息时保留原有缓存，并在 empty_ttl_seconds 内不再重新拉取
+            logger.warning("Notion数据库结构中没有属性信息，暂不更新结构缓存")
+            with self._lock:
+                self._empty_at = time.time()
+            return self._schema
+        with self._lock:
+            self._schema = schema
+            self._empty_at = 0.0
+        self._save(schema)
+        logger.info(f"Notion数据库结构已缓存: {len(schema.properties)} 个属性")
+        return schema
+
+    def invalidate(self):
+        """写入被服务端拒绝（结构可能已变化）时调用，立即后台刷新"""
+        with self._lock:
+            if self._schema is not None:
+                self._schema.fetched_at = 0.0
+            self._empty_at = 0.0
+        self.refresh_async()
+
+    def refresh(self) -> Optional[DatabaseSchema]:
+        """同步刷新"""
+        return self.store(self.fetcher())
+
+    def refresh_async(self):
+        """后台刷新（同一时间只有一个刷新线程）"""
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.warning(f"刷新Notion数据库结构失败: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+        threading.Thread(target=run, name="notion-schema-refresh", daemon=True).start()
@@ -0,0 +1,390 @@
+"""Notion 排队写入器
+
+把 pages.create 从调用方线程移到后台I/O循环中的写入队列：
+- 通过 NotionAPI 的令牌桶按 Notion 限额（平均约3次/秒）匀速写入；几个写入协程共用令牌桶并发发送，
+  单次请求较慢时也能按限额写满（每条内容由一个协程完整写完，分批追加的内容块保持顺序）
+- 429 按 Retry-After 暂停整个写入器后重试同一条，5xx/网络错误指数退避重试
+- 其他 4xx（参数错误、无权限等）和本地结构校验失败不重试，直接判定失败
+- 统计排队等待时间、重试和限流次数
+"""
+import asyncio
+import email.utils
+import functools
+import threading
+import time
+import weakref
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+
+from loguru import logger
+
+from src.integrations.notion_schema import NotionSchemaError
+from src.core.io_loop import get_io_loop
+from src.utils.metrics import metrics
+
+if TYPE_CHECKING:
+    # notion_client 较重，只在实际创建 NotionAPI 时导入
+    from src.integrations.notion_api import NotionAPI
+
+
+# 可重试的HTTP状态码
+RETRYABLE_STATUS = {409, 429, 500, 502, 503, 504}
+
+QUEUE_PENDING = metrics.gauge("quicknote_notion_queue_pending", "Notion写入队列中排队（含正在写入）的条数")
+QUEUE_WAIT_SECONDS = metrics.histogram("quicknote_notion_queue_wait_seconds", "Notion写入从提交到开始写入的等待时间")
+WRITES = metrics.counter("quicknote_notion_writes_total", "Notion写入结果数", ("outcome",))
+RETRIES = metrics.counter("quicknote_notion_retries_total", "Notion写入重试次数", ("status",))
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    解析 Retry-After 响应头（秒数或 HTTP 日期）
+
+    Returns:
+        需要等待的秒数，无法解析时返回None
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at is None:
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+def _error_status(error: Exception) -> Optional[int]:
+    """取出 notion_client 异常中的HTTP状态码（超时/网络错误返回None）"""
+    status = getattr(error, "status", None)
+    return status if isinstance(status, int) else None
+
+
+def _error_retry_after(error: Exception) -> Optional[float]:
+    headers = getattr(error, "headers", None)
+    if not headers:
+        return None
+    try:
+        return parse_retry_after(headers.get("retry-after"))
+    except Exception:
+        return None
+
+
+@dataclass
+class PendingPage:
+    """排队中的一条写入"""
+    content: str
+    options: Dict[str, Any]
+    callback: Optional[Callable[[bool, Dict[str, Any]], None]] = None
+    enqueued_at: float = field(default_factory=time.monotonic)
+    attempts: int = 0
+    page: Optional[Dict[str, Any]] = None
+
+
+class NotionWriter:
+    """Notion 排队写入器（I/O循环中的几个写入协程，共用令牌桶）"""
+
+    def __init__(
+        self,
+        notion_api: "NotionAPI",
+        max_attempts: int = 5,
+        max_backoff: float = 60.0,
+        max_queue: int = 1000,
+        workers: int = 3
+    ):
+        """
+        初始化写入器
+
+        Args:
+            notion_api: Notion API实例（提供限流器和 pages.create）
+            max_attempts: 单条最多尝试次数
+            max_backoff: 单次重试等待上限（秒）
+            max_queue: 队列容量
+            workers: 写入协程数（并发请求数上限；速率仍由令牌桶限制）
+        """
+        self.notion_api = notion_api
+        self.max_attempts = max(1, int(max_attempts))
+        self.max_backoff = float(max_backoff)
+        self.max_queue = int(max_queue)
+        self.workers = max(1, int(workers))
+        self._io = get_io_loop()
+        self._queue: "asyncio.Queue[Optional[PendingPage]]" = self._io.call(self._new_queue())
+        self._pending = 0
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self._wait_ms: List[float] = []
+        self._stats = {
+            "submitted": 0,
+            "succeeded": 0,
+            "failed": 0,
+            "retried": 0,
+            "rate_limited": 0,
+        }
+        self._tasks = [self._io.submit(self._run()) for _ in range(self.workers)]
+        # 弱引用：指标不延长写入器的生命周期
+        ref = weakref.ref(self)
+
+        def queue_pending() -> Optional[int]:
+            writer = ref()
+            return None if writer is None else writer.pending()
+
+        QUEUE_PENDING.set_function(queue_pending)
+        logger.info(f"Notion写入队列已启动（{self.workers} 个写入协程）")
+
+    @staticmethod
+    async def _new_queue() -> asyncio.Queue:
+        # 在I/O循环中创建，保证队列绑定到该循环
+        return asyncio.Queue()
+
+    def set_api(self, notion_api: "NotionAPI"):
+        """更换 Notion API 实例（配置重载时使用，队列中的内容保留）"""
+        self.notion_api = notion_api
+
+    def submit(
+        self,
+        content: str,
+        callback: Optional[Callable[[bool, Dict[str, Any]], None]] = None,
+        **options
+    ) -> bool:
+        """
+        提交一条写入（立即返回）
+
+        Args:
+            content: 内容
+            callback: 完成回调 callback(success, info)，在写入线程中调用；
+                info 包含 title、attempts、queue_wait_ms、error
+            **options: 传给 NotionAPI.build_page 的参数（title/priority/status/tags/ai_extract_title）
+
+        Returns:
+            是否已进入队列
+        """
+        if self._stop_event.is_set():
+            logger.error("Notion写入队列已停止，无法提交")
+            return False
+        with self._lock:
+            if self._pending >= self.max_queue:
+                logger.error(f"Notion写入队列已满，丢弃: {content[:50]}...")
+                return False
+            self._pending += 1
+            self._stats["submitted"] += 1
+            pending = self._pending
+        self._io.loop.call_soon_threadsafe(self._queue.put_nowait, PendingPage(content, options, callback))
+        logger.debug(f"已加入Notion写入队列，当前排队 {pending} 条")
+        return True
+
+    def pending(self) -> int:
+        """排队中（含正在写入）的条数"""
+        with self._lock:
+            return self._pending
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待队列写完
+
+        Returns:
+            是否在超时前全部处理完
+        """
+        end = None if timeout is None else time.monotonic() + timeout
+        while self.pending():
+            if end is not None and time.monotonic() >= end:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def stop(self, timeout: float = 5.0):
+        """停止写入协程（先尽量写完队列中的内容）"""
+        drained = self.flush(timeout)
+        self._stop_event.set()
+        if not drained:
+            logger.warning(f"Notion写入队列未写完即退出，剩余 {self.pending()} 条")
+            self._cancel_workers()
+        else:
+            for _ in self._tasks:
+                self._io.loop.call_soon_threadsafe(self._queue.put_nowait, None)
+    
+    def _cancel_workers(self):
+        for task in self._tasks:
+            task.cancel()
+
+    def handoff(self, timeout: float = 5.0) -> List[Dict[str, Any]]:
+        """
+        停止写入并取出尚未开始写入的内容（重启时交给新实例）
+
+        正在写入的内容会等它们完成（最多 timeout 秒，且不再重试），不会交接，避免重复写入。
+
+        Returns:
+            [{"content", "options", "page"}]，page 为已构建好的页面（可能为None）
+        """
+        self._stop_event.set()
+
+        async def take_queued() -> List[PendingPage]:
+            items = []
+            while not self._queue.empty():
+                item = self._queue.get_nowait()
+                if item is not None:
+                    items.append(item)
+            # 让各写入协程处理完当前这条后退出
+            for _ in self._tasks:
+                self._queue.put_nowait(None)
+            return items
+
+        items = self._io.call(take_queued())
+        with self._lock:
+            self._pending -= len(items)
+        if not self.flush(timeout):
+            logger.warning(f"交接时仍有 {self.pending()} 条正在写入Notion，未等到结果")
+            self._cancel_workers()
+        logger.info(f"Notion写入队列已停止，交接 {len(items)} 条未写入内容")
+        return [{"content": item.content, "options": item.options, "page": item.page} for item in items]
+
+    def restore(self, items: List[Dict[str, Any]]) -> int:
+        """
+        放回交接来的未写入内容（新实例启动时调用）
+
+        Returns:
+            放回队列的条数
+        """
+        restored = 0
+        for data in items or []:
+            try:
+                content = str(data["content"])
+                options = dict(data.get("options") or {})
+                page = data.get("page")
+            except Exception as e:
+                logger.warning(f"忽略无法识别的交接内容: {e}")
+                continue
+            with self._lock:
+                if self._pending >= self.max_queue:
+                    logger.error(f"Notion写入队列已满，丢弃交接内容: {content[:50]}...")
+                    continue
+                self._pending += 1
+                self._stats["submitted"] += 1
+            self._io.loop.call_soon_threadsafe(self._queue.put_nowait, PendingPage(content, options, page=page))
+            restored += 1
+        if restored:
+            logger.info(f"已放回 {restored} 条交接的Notion写入")
+        return restored
+
+    def metrics(self) -> Dict[str, Any]:
+        """写入统计（排队等待时间：从提交到轮到该条写入）"""
+        with self._lock:
+            stats = dict(self._stats)
+            waits = sorted(self._wait_ms)
+        stats["pending"] = self.pending()
+
+        def pct(p: float) -> Optional[float]:
+            if not waits:
+                return None
+            return round(waits[min(len(waits) - 1, int(p / 100.0 * len(waits)))], 1)
+
+        stats["queue_wait_ms"] = {
+            "p50": pct(50),
+            "p90": pct(90),
+            "max": round(waits[-1], 1) if waits else None,
+        }
+        return stats
+
+    # ---------- 写入协程 ----------
+
+    async def _run(self):
+        while True:
+            item = await self._queue.get()
+            if item is None:
+                return
+            try:
+                await self._process(item)
+            except Exception as e:
+                logger.error(f"Notion写入协程异常: {e}")
+            finally:
+                with self._lock:
+                    self._pending -= 1
+
+    async def _process(self, item: PendingPage):
+        api = self.notion_api
+        if item.page is None:
+            try:
+                # build_page 可能同步调用AI提取标题，放到线程池执行，不阻塞I/O循环
+                item.page = await self._io.run_blocking(
+                    functools.partial(api.build_page, item.content, **item.options)
+                )
+            except Exception as e:
+                # 本地结构校验失败（NotionSchemaError）等，不发请求直接判定失败
+                self._finish(item, False, e)
+                return
+
+        error: Optional[Exception] = None
+        while item.attempts < self.max_attempts:
+            if item.attempts == 0:
+                self._record_wait(item)
+            item.attempts += 1
+            try:
+                # create_page 内部每个请求先从共用的令牌桶取令牌，429 暂停期间所有写入协程都在这里等待
+                await api.create_page_async(item.page)
+                self._finish(item, True)
+                return
+            except Exception as e:
+                error = e
+                delay = self._retry_delay(e, item.attempts)
+                if delay is None or item.attempts >= self.max_attempts or self._stop_event.is_set():
+                    break
+                with self._lock:
+                    self._stats["retried"] += 1
+                RETRIES.inc(status=_error_status(e) or "network")
+                logger.warning(
+                    f"写入Notion失败（第{item.attempts}次，状态 {_error_status(e)}），{delay:.1f}s 后重试: {e}"
+                )
+                # 暂停整个写入器：Notion 的限额按集成计算，换下一条也会被限流
+                api.rate_limiter.pause(delay)
+
+        self._finish(item, False, error)
+
+    def _retry_delay(self, error: Exception, attempt: int) -> Optional[float]:
+        """计算重试等待时间，不可重试时返回None"""
+        if isinstance(error, NotionSchemaError):
+            return None
+        status = _error_status(error)
+        if status is not None and status not in RETRYABLE_STATUS:
+            return None
+        if status == 429:
+            with self._lock:
+                self._stats["rate_limited"] += 1
+        retry_after = _error_retry_after(error)
+        if retry_after is None:
+            retry_after = 0.5 * (2 ** (attempt - 1))
+        return min(retry_after, self.max_backoff)
+
+    def _record_wait(self, item: PendingPage):
+        wait = time.monotonic() - item.enqueued_at
+        QUEUE_WAIT_SECONDS.observe(wait)
+        with self._lock:
+            self._wait_ms.append(wait * 1000)
+            # 只保留最近的样本
+            if len(self._wait_ms) > 1000:
+                del self._wait_ms[:-1000]
+
+    def _finish(self, item: PendingPage, success: bool, error: Optional[Exception] = None):
+        title = (item.page or {}).get("title") or item.content[:30]
+        with self._lock:
+            self._stats["succeeded" if success else "failed"] += 1
+        WRITES.inc(outcome="ok" if success else "failed")
+        if success:
+            logger.info(f"成功添加灵感到Notion: {title}（尝试 {item.attempts} 次）")
+        else:
+            # 记录完整内容，避免写入失败后内容丢失
+            logger.error(f"添加到Notion失败（已尝试 {item.attempts} 次）: {error}\n未写入的内容: {item.content}")
+        if item.callback:
+            info = {
+                "title": title,
+                "attempts": item.attempts,
+                "queue_wait_ms": round((time.monotonic() - item.enqueued_at) * 1000, 1),
+                "error": str(error) if error else None,
+            }
+            try:
+                item.callback(success, info)
+            except Exception as e:
+                logger.warning(f"Notion写入回调异常: {e}")
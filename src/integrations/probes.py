@@ -0,0 +1,117 @@
+"""连接探测
+
+设置界面的"测试连接"：各服务的探测在后台I/O循环中并行执行，
+总耗时约等于最慢的一个服务，而不是各服务之和。探测不产生副作用
+（不创建Memo、不发送邮件、不调用模型生成）。
+"""
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, List, Optional
+
+from anthropic import AsyncAnthropic
+from loguru import logger
+from openai import AsyncOpenAI
+
+from src.core.io_loop import get_io_loop
+
+
+@dataclass
+class ProbeResult:
+    """单个服务的探测结果"""
+    service: str
+    ok: bool
+    message: str = ""
+    latency_ms: Optional[float] = None
+
+
+@dataclass
+class Probe:
+    """待执行的探测：factory 返回协程，结果为是否成功（失败也可以直接抛出异常）"""
+    service: str
+    factory: Callable[[], Awaitable[bool]]
+
+
+async def probe_openai(api_key: str, base_url: str, timeout: float = 10) -> bool:
+    """OpenAI/DeepSeek：列出模型（不产生调用费用）"""
+    client = AsyncOpenAI(api_key=api_key, base_url=base_url, timeout=timeout, max_retries=0)
+    try:
+        await client.models.list()
+        return True
+    finally:
+        await client.close()
+
+
+async def probe_anthropic(api_key: str, base_url: Optional[str] = None, timeout: float = 10) -> bool:
+    """Claude：列出模型（不产生调用费用）"""
+    kwargs = {"api_key": api_key, "timeout": timeout, "max_retries": 0}
+    if base_url:
+        kwargs["base_url"] = base_url
+    client = AsyncAnthropic(**kwargs)
+    try:
+        await client.models.list(limit=1)
+        return True
+    finally:
+        await client.close()
+
+
+async def probe_notion(notion) -> bool:
+    """Notion：读取数据库（结果写入结构缓存），结束后关闭临时客户端的异步连接"""
+    try:
+        return await notion.test_connection_async()
+    finally:
+        await notion.async_client.aclose()
+
+
+async def probe_flomo(flomo) -> bool:
+    """Flomo：探测Webhook地址（不创建Memo），结束后关闭临时客户端的连接"""
+    try:
+        return await flomo.test_connection_async()
+    finally:
+        await flomo.aclose()
+
+
+async def _run_one(probe: Probe, timeout: float) -> ProbeResult:
+    start = time.perf_counter()
+    try:
+        ok = await asyncio.wait_for(probe.factory(), timeout)
+        message = "连接成功" if ok else "连接失败（详见日志）"
+    except asyncio.TimeoutError:
+        ok, message = False, f"超时（>{timeout:g}s）"
+    except Exception as e:
+        ok = False
+        message = str(e)[:100]
+    latency_ms = round((time.perf_counter() - start) * 1000)
+    if not ok:
+        logger.warning(f"{probe.service} 连接测试失败: {message}")
+    return ProbeResult(probe.service, ok, message, latency_ms)
+
+
+def run_probes(
+    probes: List[Probe],
+    on_result: Optional[Callable[[ProbeResult], None]] = None,
+    timeout: float = 15
+):
+    """
+    并行执行探测（立即返回）
+
+    Args:
+        probes: 探测列表
+        on_result: 每个探测完成时的回调（在I/O循环线程中调用）
+        timeout: 单个探测的最长时间（秒）
+
+    Returns:
+        concurrent.futures.Future，结果为与 probes 顺序一致的 List[ProbeResult]
+    """
+    async def run_all():
+        async def run_and_report(probe):
+            result = await _run_one(probe, timeout)
+            if on_result:
+                try:
+                    on_result(result)
+                except Exception as e:
+                    logger.warning(f"连接测试回调失败: {e}")
+            return result
+        return list(await asyncio.gather(*(run_and_report(p) for p in probes)))
+
+    return get_io_loop().submit(run_all())
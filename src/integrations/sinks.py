@@ -0,0 +1,373 @@
+"""同步目标（Sink）与并行分发
+
+一条笔记可以同时发送到多个目标（Notion / Flomo / 滴答清单）：
+- 各目标实现统一的 Sink 接口，自行处理本目标的格式（标签、标题、优先级、截止时间）
+- FanOutDispatcher 在后台I/O循环中并行发送，汇总结果用于一次通知
+- 按目标统计发送次数、成功率和耗时；可按目标限速（批量导入时使用）
+"""
+import asyncio
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from src.core.deadline import Deadline, DeadlineExceeded, CallCancelled
+from src.core.io_loop import get_io_loop
+from src.utils.rate_limiter import TokenBucket
+from src.utils.metrics import metrics
+
+SINK_SENDS = metrics.counter("quicknote_sink_sends_total", "发送到同步目标的次数", ("sink", "outcome"))
+SINK_SECONDS = metrics.histogram("quicknote_sink_send_seconds", "发送到同步目标的耗时（不含限速等待）", ("sink",))
+
+
+@dataclass
+class Note:
+    """待同步的笔记"""
+    content: str
+    title: Optional[str] = None
+    tags: List[str] = field(default_factory=list)
+    category: Optional[str] = None
+    priority: str = "中"
+    status: str = "待处理"
+    # 滴答清单格式的截止时间（分类结果已包含时间时直接使用）
+    due_date: Optional[str] = None
+    # 剪切板自动同步：各目标会加上自己的自动同步标签
+    auto_sync: bool = False
+    source: str = "quick_input"
+    # 所属链路的截止时间（共享取消标记，被新内容取代时后续AI调用会终止）
+    deadline: Optional[Deadline] = None
+
+
+@dataclass
+class SinkResult:
+    """单个目标的发送结果"""
+    sink: str
+    display_name: str
+    success: bool
+    detail: str = ""
+    error: Optional[str] = None
+    latency_ms: float = 0.0
+
+
+class Sink:
+    """同步目标基类"""
+
+    name = ""
+    display_name = ""
+
+    async def send(self, note: Note) -> SinkResult:
+        raise NotImplementedError
+
+    def result(self, success: bool, detail: str = "", error: Optional[str] = None) -> SinkResult:
+        return SinkResult(self.name, self.display_name, success, detail, error)
+
+
+class NotionSink(Sink):
+    """Notion（经过 NotionWriter 排队限流写入）"""
+
+    name = "notion"
+    display_name = "Notion"
+    AUTO_SYNC_TAG = "QuickNote_AI自动同步"
+
+    def __init__(self, writer):
+        self.writer = writer
+
+    async def send(self, note: Note) -> SinkResult:
+        tags = list(note.tags)
+        if note.auto_sync:
+            # 合并标签，去重，保持顺序（强制标签在前）
+            tags = [self.AUTO_SYNC_TAG] + [tag for tag in tags if tag != self.AUTO_SYNC_TAG]
+
+        loop = asyncio.get_running_loop()
+        done = loop.create_future()
+
+        def on_saved(success: bool, info: dict):
+            def resolve():
+                if not done.done():
+                    done.set_result((success, info))
+            loop.call_soon_threadsafe(resolve)
+
+        if not self.writer.submit(
+            note.content,
+            callback=on_saved,
+            title=note.title,
+            priority=note.priority,
+            status=note.status,
+            tags=tags
+        ):
+            return self.result(False, error="写入队列不可用")
+
+        success, info = await done
+        return self.result(success, error=info.get("error"))
+
+
+class FlomoSink(Sink):
+    """Flomo"""
+
+    name = "flomo"
+    display_name = "Flomo"
+    AUTO_SYNC_TAG = "Quick_Note_AI同步"
+
+    def __init__(self, flomo_api):
+        self.flomo_api = flomo_api
+
+    async def send(self, note: Note) -> SinkResult:
+        tags = list(note.tags)
+        if note.category and note.category not in tags:
+            tags.insert(0, note.category)
+        if note.auto_sync and self.AUTO_SYNC_TAG not in tags:
+            tags.append(self.AUTO_SYNC_TAG)
+        success = await self.flomo_api.add_memo_async(note.content, tags=tags)
+        return self.result(success, detail=f"标签: {', '.join(tags)}" if tags else "")
+
+
+# 优先级关键词映射（按顺序匹配，优先匹配完整词；中文不支持\b词边界）
+_TICKTICK_PRIORITY_PATTERNS = [
+    (r'高优先级', '!1'),
+    (r'高优', '!1'),
+    (r'中优先级', '!2'),
+    (r'中优', '!2'),
+    (r'低优先级', '!3'),
+    (r'低优', '!3'),
+    (r'无优先级', '!4'),
+    (r'无优', '!4'),
+]
+_TICKTICK_PRIORITY_MARKS = ('!1', '!2', '!3', '!4')
+
+
+def process_ticktick_priority(content: str) -> Tuple[str, str]:
+    """
+    处理滴答清单优先级转换
+    识别文本中的优先级关键词并转换为!1/!2/!3/!4格式
+
+    Args:
+        content: 原始内容
+
+    Returns:
+        (处理后的内容, 优先级标记) 元组
+        优先级标记格式: !1(高优), !2(中优), !3(低优), !4(无优先级，默认)
+    """
+    priority_mark = '!4'  # 默认无优先级
+    processed_content = content
+
+    for pattern, mark in _TICKTICK_PRIORITY_PATTERNS:
+        match = re.search(pattern, processed_content, re.IGNORECASE)
+        if match:
+            # 找到优先级关键词，记录优先级标记并从文本中移除
+            priority_mark = mark
+            processed_content = re.sub(pattern, '', processed_content, flags=re.IGNORECASE)
+            logger.info(f"识别到优先级关键词: '{match.group()}' (模式: {pattern})，转换为: {mark}")
+            break  # 只处理第一个匹配的优先级
+
+    # 清理多余的空格（将多个连续空格替换为单个空格）
+    processed_content = re.sub(r'\s+', ' ', processed_content).strip()
+
+    # 在内容末尾添加优先级标记（内容为空时只保留标记）
+    if processed_content:
+        if not processed_content.endswith(priority_mark):
+            processed_content = f"{processed_content}{priority_mark}"
+    else:
+        processed_content = priority_mark
+
+    logger.info(f"优先级处理: 原文={content}, 处理后={processed_content}, 优先级={priority_mark}")
+    return processed_content, priority_mark
+
+
+def ticktick_title(processed_content: str, limit: int = 50) -> str:
+    """生成任务标题（取前50个字符，保留末尾的优先级标记）"""
+    if len(processed_content) <= limit:
+        return processed_content
+    if processed_content.endswith(_TICKTICK_PRIORITY_MARKS):
+        priority_suffix = processed_content[-2:]
+        main_content = processed_content[:-2].strip()
+        return main_content[:limit] + "..." + priority_suffix
+    return processed_content[:limit] + "..."
+
+
+class TickTickSink(Sink):
+    """滴答清单（邮件）"""
+
+    name = "ticktick"
+    display_name = "滴答清单"
+
+    def __init__(self, ticktick_api, ai_processor=None):
+        """
+        Args:
+            ticktick_api: TickTickAPI 实例
+            ai_processor: AI处理器（笔记没有截止时间时用于提取时间，可选）
+        """
+        self.ticktick_api = ticktick_api
+        self.ai_processor = ai_processor
+
+    async def _extract_due_date(self, note: Note, processed_content: str) -> Optional[str]:
+        if note.due_date:
+            logger.info(f"分类结果已包含时间: {note.due_date}，跳过单独的时间提取")
+            return note.due_date
+        if not self.ai_processor:
+            return None
+        budget = self.ai_processor.time_extract_budget
+        deadline = (
+            note.deadline.next_stage(budget, "滴答清单时间提取")
+            if note.deadline else Deadline(budget, "滴答清单时间提取")
+        )
+        try:
+            time_info = await self.ai_processor.extract_time_info_async(processed_content, deadline=deadline)
+        except (DeadlineExceeded, CallCancelled):
+            # 被取代或超时：放弃创建任务，而不是当作没有时间继续创建
+            raise
+        except Exception as e:
+            logger.warning(f"时间提取失败，将不设置截止时间: {e}")
+            return None
+        if time_info and time_info.get("datetime_ticktick"):
+            logger.info(f"识别到时间: {time_info['datetime_ticktick']} (原文: {processed_content})")
+            return time_info["datetime_ticktick"]
+        return None
+
+    async def send(self, note: Note) -> SinkResult:
+        processed_content, priority_mark = process_ticktick_priority(note.content)
+        title = ticktick_title(processed_content)
+        due_date = await self._extract_due_date(note, processed_content)
+
+        extra = {}
+        if due_date:
+            extra["due_date"] = due_date
+        if priority_mark:
+            extra["priority_mark"] = priority_mark
+
+        success = await self.ticktick_api.add_task_async(
+            title=title,
+            content=processed_content,
+            extra=extra or None
+        )
+        return self.result(success, detail=f"提醒: {due_date}" if due_date else "")
+
+
+class FanOutDispatcher:
+    """把一条笔记并行发送到多个目标（线程安全）"""
+
+    def __init__(self):
+        self._sinks: Dict[str, Sink] = {}
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, object]] = {}
+        self._limits: Dict[str, TokenBucket] = {}
+
+    def register(self, sink: Sink):
+        with self._lock:
+            self._sinks[sink.name] = sink
+
+    def unregister(self, name: str):
+        with self._lock:
+            self._sinks.pop(name, None)
+
+    def has(self, name: str) -> bool:
+        with self._lock:
+            return name in self._sinks
+
+    def set_rate_limit(self, name: str, rate: Optional[float], burst: Optional[float] = None):
+        """
+        限制发送到某个目标的速率
+
+        Args:
+            name: 目标名称
+            rate: 每秒请求数（None 或 0 表示不限）
+            burst: 允许的突发请求数（默认等于 rate，至少为1）
+        """
+        with self._lock:
+            if rate:
+                self._limits[name] = TokenBucket(rate, burst)
+            else:
+                self._limits.pop(name, None)
+
+    def display_name(self, name: str) -> str:
+        with self._lock:
+            sink = self._sinks.get(name)
+        return sink.display_name if sink else name
+
+    def dispatch(self, note: Note, targets: List[str]):
+        """
+        并行发送到多个目标（立即返回）
+
+        Args:
+            note: 笔记
+            targets: 目标名称列表（未注册的目标会被跳过）
+
+        Returns:
+            concurrent.futures.Future，结果为 List[SinkResult]
+        """
+        return get_io_loop().submit(self.dispatch_async(note, targets))
+
+    async def dispatch_async(self, note: Note, targets: List[str]) -> List[SinkResult]:
+        with self._lock:
+            sinks = [self._sinks[name] for name in dict.fromkeys(targets) if name in self._sinks]
+        skipped = [name for name in targets if not any(s.name == name for s in sinks)]
+        if skipped:
+            logger.warning(f"以下同步目标未配置，已跳过: {skipped}")
+        return list(await asyncio.gather(*(self._send_one(sink, note) for sink in sinks)))
+
+    async def _send_one(self, sink: Sink, note: Note) -> SinkResult:
+        with self._lock:
+            limiter = self._limits.get(sink.name)
+        if limiter is not None:
+            await limiter.acquire_async()
+        start = time.perf_counter()
+        try:
+            result = await sink.send(note)
+        except Exception as e:
+            logger.error(f"同步到{sink.display_name}失败: {e}")
+            result = sink.result(False, error=str(e))
+        result.latency_ms = round((time.perf_counter() - start) * 1000, 1)
+        self._record(result)
+        return result
+
+    def _record(self, result: SinkResult):
+        SINK_SENDS.inc(sink=result.sink, outcome="ok" if result.success else "failed")
+        SINK_SECONDS.observe(result.latency_ms / 1000, sink=result.sink)
+        with self._lock:
+            stats = self._stats.setdefault(result.sink, {"sent": 0, "succeeded": 0, "failed": 0, "latency_ms": []})
+            stats["sent"] += 1
+            stats["succeeded" if result.success else "failed"] += 1
+            latencies = stats["latency_ms"]
+            latencies.append(result.latency_ms)
+            if len(latencies) > 500:
+                del latencies[:-500]
+
+    def metrics(self) -> Dict[str, Dict[str, object]]:
+        """各目标的发送次数、成功/失败次数和耗时分位数"""
+        with self._lock:
+            snapshot = {name: dict(stats, latency_ms=sorted(stats["latency_ms"])) for name, stats in self._stats.items()}
+        for stats in snapshot.values():
+            latencies = stats.pop("latency_ms")
+            stats["latency_ms"] = {
+                "p50": latencies[len(latencies) // 2] if latencies else None,
+                "p90": latencies[min(len(latencies) - 1, int(len(latencies) * 0.9))] if latencies else None,
+                "max": latencies[-1] if latencies else None,
+            }
+        return snapshot
+
+
+def summarize_results(results: List[SinkResult]) -> Tuple[str, str]:
+    """
+    汇总多个目标的结果为一条通知
+
+    Returns:
+        (通知标题, 通知内容)
+    """
+    if not results:
+        return "保存失败", "没有可用的同步目标 ❌"
+    succeeded = [r for r in results if r.success]
+    if len(succeeded) == len(results):
+        title = "保存成功"
+    elif succeeded:
+        title = "部分保存失败"
+    else:
+        title = "保存失败"
+    lines = []
+    for r in results:
+        line = f"{r.display_name} {'✅' if r.success else '❌'}"
+        if r.success and r.detail:
+            line += f"（{r.detail}）"
+        lines.append(line)
+    return title, "\n".join(lines)
@@ -5,6 +5,8 @@ from email.header import Header
 from typing import Optional, Dict, Any
 from loguru import logger
 
+from src.core.io_loop import get_io_loop
+
 
 class TickTickAPI:
     """通过邮件将任务发送到滴答清单"""
@@ -16,6 +18,7 @@ class TickTickAPI:
         smtp_user: str,
         smtp_pass: str,
         ticktick_email: str,
+        use_ssl: bool = True,
     ):
         """
         初始化 TickTick 邮件客户端
@@ -26,14 +29,21 @@ class TickTickAPI:
             smtp_user: 发件邮箱地址
             smtp_pass: SMTP授权码（不是邮箱密码）
             ticktick_email: 滴答清单专属邮箱地址（格式：todo+xxxxx@mail.dida365.com）
+            use_ssl: 是否使用SSL连接（本地SMTP模拟服务使用明文连接）
         """
         self.smtp_host = smtp_host
         self.smtp_port = smtp_port
         self.smtp_user = smtp_user
         self.smtp_pass = smtp_pass
         self.ticktick_email = ticktick_email
+        self.use_ssl = use_ssl
         logger.info("TickTick API (Email) 已初始化")
 
+    def _connect(self, timeout: float = 30) -> smtplib.SMTP:
+        if self.use_ssl:
+            return smtplib.SMTP_SSL(self.smtp_host, self.smtp_port, timeout=timeout)
+        return smtplib.SMTP(self.smtp_host, self.smtp_port, timeout=timeout)
+
     def add_task(
         self,
         title: str,
@@ -110,7 +120,7 @@ class TickTickAPI:
             message['To'] = self.ticktick_email
 
             # 发送邮件
-            server = smtplib.SMTP_SSL(self.smtp_host, self.smtp_port)
+            server = self._connect()
             server.login(self.smtp_user, self.smtp_pass)
             server.sendmail(self.smtp_user, [self.ticktick_email], message.as_string())
             server.quit()
@@ -122,21 +132,45 @@ class TickTickAPI:
             logger.error(f"TickTick 邮件发送异常: {e}")
             return False
 
-    def test_connection(self) -> bool:
-        """测试邮件发送是否可用（发送一条简单测试消息）"""
-        try:
-            test_subject = "QuickNote AI 连接测试"
-            test_body = "来自 QuickNote AI 的 TickTick 集成测试。如果收到此邮件，说明配置成功！"
-            
-            message = MIMEText(test_body, 'plain', 'utf-8')
-            message['Subject'] = Header(test_subject, 'utf-8')
-            message['From'] = self.smtp_user
-            message['To'] = self.ticktick_email
+    async def add_task_async(
+        self,
+        title: str,
+        content: Optional[str] = None,
+        list_name: Optional[str] = None,
+        extra: Optional[Dict[str, Any]] = None,
+    ) -> bool:
+        """
+        创建任务（协程）
 
-            server = smtplib.SMTP_SSL(self.smtp_host, self.smtp_port)
-            server.login(self.smtp_user, self.smtp_pass)
-            server.sendmail(self.smtp_user, [self.ticktick_email], message.as_string())
-            server.quit()
+        smtplib 没有异步接口，发送在I/O循环的固定线程池中执行，不额外创建线程。
+        """
+        return await get_io_loop().run_blocking(self.add_task, title, content, list_name, extra)
+
+    def submit_task(
+        self,
+        title: str,
+        content: Optional[str] = None,
+        list_name: Optional[str] = None,
+        extra: Optional[Dict[str, Any]] = None,
+    ):
+        """提交到I/O循环，立即返回 Future（结果为是否发送成功）"""
+        return get_io_loop().submit(self.add_task_async(title, content, list_name, extra))
+
+    def test_connection(self, timeout: float = 10) -> bool:
+        """
+        测试SMTP配置是否可用（连接 + EHLO + 登录后直接 QUIT，不发送邮件）
+
+        只验证发件邮箱和授权码，滴答清单专属邮箱地址无法在不发信的情况下验证。
+        """
+        try:
+            server = self._connect(timeout)
+            try:
+                server.ehlo()
+                server.login(self.smtp_user, self.smtp_pass)
+                server.quit()
+            except Exception:
+                server.close()
+                raise
 
             logger.info("TickTick 邮件连接测试成功")
             return True
@@ -144,4 +178,7 @@ class TickTickAPI:
             logger.error(f"TickTick 邮件连接测试异常: {e}")
             return False
 
+    async def test_connection_async(self, timeout: float = 10) -> bool:
+        """测试SMTP配置（协程，在I/O循环的固定线程池中执行）"""
+        return await get_io_loop().run_blocking(self.test_connection, timeout)
 
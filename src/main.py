@@ -1,13 +1,18 @@
 """QuickNote AI - 主程序入口"""
 import sys
 import os
+import time
 from pathlib import Path
+from typing import Optional
 
 # 确保项目根目录在Python路径中
 _current_dir = Path(__file__).parent.parent
 if str(_current_dir) not in sys.path:
     sys.path.insert(0, str(_current_dir))
 
+# 启动计时最先导入，以便覆盖后续模块导入耗时
+from src.utils.startup_trace import startup_tracer
+
 from PyQt5.QtWidgets import QApplication, QMessageBox
 from PyQt5.QtCore import QObject, pyqtSignal, QThread, Qt
 from loguru import logger
@@ -35,11 +40,29 @@ from src.gui.tray_icon import TrayIcon
 from src.gui.settings import SettingsDialog
 from src.core.hotkey import HotkeyListener
 from src.core.clipboard import ClipboardMonitor
-from src.core.ai_processor import AIProcessor
-from src.integrations.notion_api import NotionAPI
-from src.integrations.flomo_api import FlomoAPI
-from src.integrations.ticktick_api import TickTickAPI
+from src.integrations.notion_writer import NotionWriter
+from src.integrations.sinks import FanOutDispatcher, Note, summarize_results
+from src.core.pipeline import (
+    ClipPipeline, register_services, register_sinks, fanout_targets, affected_services, close_flomo_api,
+    STATUS_DUPLICATE, STATUS_IGNORED, STATUS_UNROUTED, STATUS_CANCELLED, STATUS_TIMEOUT, STATUS_ERROR
+)
 from src.utils.clipboard_dedupe import ClipboardDedupeStore
+from src.core.deadline import Deadline
+from src.core.io_loop import get_io_loop
+from src.core.components import components
+from src.utils.metrics import metrics
+
+startup_tracer.mark("imports_done")
+
+# 剪切板历史中记录的结论：已分类的内容记录目标，其余按处理结果记录
+CLIP_STATUS_VERDICTS = {STATUS_DUPLICATE: "duplicate", STATUS_IGNORED: "ignored"}
+
+# 重新加载时不会自动生效的配置（启动时创建的线程、端口、存储等），修改后提示重启
+RESTART_SETTINGS = (
+    "io.", "startup.", "single_instance.", "ingest.", "metrics.http.", "monitor.",
+    "clipboard.history.", "clipboard.dedupe.", "clipboard.sync_timeout_seconds", "notion.max_attempts", "notion.max_backoff", "notion.workers",
+    "config_watch.",
+)
 
 
 class QuickNoteApp(QObject):
@@ -48,94 +71,135 @@ class QuickNoteApp(QObject):
     # 定义信号（用于线程安全的 GUI 操作）
     show_quick_input_signal = pyqtSignal()
     toggle_clipboard_signal = pyqtSignal()
+    config_changed_signal = pyqtSignal(object, object)
+    # 快速输入的保存结果（结果列表, 出错时的说明），从I/O循环线程转到主线程显示通知
+    quick_input_done_signal = pyqtSignal(list, str)
     
-    def __init__(self, app: QApplication):
-        """初始化应用"""
+    def __init__(self, app: QApplication, instance=None, handoff_state: Optional[dict] = None):
+        """
+        初始化应用
+        
+        Args:
+            app: QApplication实例
+            instance: 单实例守护（SingleInstance，未启用时为None）
+            handoff_state: 重启时旧实例交出的运行状态
+        """
         super().__init__()
         self.app = app
+        self.instance = instance
         
         logger.info("=" * 50)
         logger.info("QuickNote AI 启动中...")
         logger.info("=" * 50)
         
         # 验证配置（允许通过设置界面配置，不强制退出）
-        if not config.validate():
-            logger.warning("配置验证失败，将在设置界面中配置")
-            # 不强制退出，允许用户通过设置界面配置
-            # 后续在使用时会再次验证
+        with startup_tracer.phase("config_validate"):
+            if not config.validate():
+                logger.warning("配置验证失败，将在设置界面中配置")
+                # 不强制退出，允许用户通过设置界面配置
+                # 后续在使用时会再次验证
         
         # 初始化组件
-        self._init_components()
+        with startup_tracer.phase("init_components"):
+            self._init_components()
         self._connect_signals()
         
+        # 重启后接着旧实例的状态继续（剪切板历史、未写完的Notion内容、去重记录）
+        if handoff_state:
+            with startup_tracer.phase("restore_state"):
+                self._restore_state(handoff_state)
+        
         # 启动定期状态检查（每2分钟检查一次快捷键状态）
         self._start_status_check()
         
-        # 启动定时自动重启（每1小时重启一次，避免长时间运行导致的闪屏问题）
-        self._start_auto_restart()
+        # 启动资源监控（资源持续超过阈值时才自动重启）
+        with startup_tracer.phase("resource_monitor"):
+            self._start_resource_monitor()
+        
+        # 托盘可用后再在空闲时创建快速输入窗口、在后台预热SDK和客户端，避免拖慢启动
+        from PyQt5.QtCore import QTimer
+        QTimer.singleShot(int(config.get("startup.quick_input_prewarm_ms", 500)), self._ensure_quick_input_window)
+        QTimer.singleShot(int(config.get("startup.warmup_delay_ms", 1500)), components.warm_up)
         
         logger.info("QuickNote AI 启动完成")
     
     def _init_components(self):
         """初始化所有组件"""
         try:
-            # GUI组件
-            ui_config = config.get("ui.quick_input", {})
-            # 遮罩配置：默认黑色 + 100%不透明（alpha=255），且启动即生效
-            mask_color = config.get('ui.mask_color', [0, 0, 0])
-            mask_alpha = config.get('ui.mask_alpha', 255)
-            self.quick_input_window = QuickInputWindow({
-                **ui_config,
-                'mask_color': mask_color,
-                'mask_alpha': mask_alpha,
-            })
-            self.tray_icon = TrayIcon(self.app)
+            # 进程内指标（关闭时各处记录调用直接返回）
+            metrics.enabled = bool(config.get("metrics.enabled", True))
+            self.metrics_server = None
+            self.performance_panel = None
+            if metrics.enabled and config.get("metrics.http.enabled", False):
+                self._start_metrics_server()
+            
+            # GUI组件（快速输入窗口在托盘出现后空闲预热，或首次按快捷键时创建）
+            self.quick_input_window = None
+            with startup_tracer.phase("tray_icon"):
+                self.tray_icon = TrayIcon(self.app)
+            startup_tracer.mark("tray_ready")
             self.settings_dialog = None
             
             # 快捷键监听器
-            self.hotkey_listener = HotkeyListener()
-            # 使用信号发射，确保 GUI 操作在主线程执行
-            self.hotkey_listener.register(
-                config.hotkey_quick_input,
-                lambda: self.show_quick_input_signal.emit()
-            )
-            self.hotkey_listener.register(
-                config.hotkey_toggle_clipboard,
-                lambda: self.toggle_clipboard_signal.emit()
-            )
-            self.hotkey_listener.start()
-            
-            # API集成
-            self.notion_api = NotionAPI(
-                config.notion_api_key,
-                config.notion_database_id
-            )
-            
-            self.flomo_api = None
-            if config.flomo_api_url:
-                self.flomo_api = FlomoAPI(config.flomo_api_url)
+            with startup_tracer.phase("hotkey_listener"):
+                self.hotkey_listener = HotkeyListener()
+                # 使用信号发射，确保 GUI 操作在主线程执行
+                self.hotkey_listener.register(
+                    config.hotkey_quick_input,
+                    lambda: self.show_quick_input_signal.emit()
+                )
+                self.hotkey_listener.register(
+                    config.hotkey_toggle_clipboard,
+                    lambda: self.toggle_clipboard_signal.emit()
+                )
+                self.hotkey_listener.start()
+            if self.hotkey_listener.listener is not None:
+                startup_tracer.mark("hotkey_ready")
             
-            self.ticktick_api = None
-            if (config.ticktick_smtp_user and 
-                config.ticktick_smtp_pass and 
-                config.ticktick_email):
-                self.ticktick_api = TickTickAPI(
-                    smtp_host=config.ticktick_smtp_host,
-                    smtp_port=config.ticktick_smtp_port,
-                    smtp_user=config.ticktick_smtp_user,
-                    smtp_pass=config.ticktick_smtp_pass,
-                    ticktick_email=config.ticktick_email
+            with startup_tracer.phase("integrations"):
+                # API集成和AI处理器：只登记创建函数，SDK在首次使用或托盘出现后的空闲预热中才导入
+                self._register_components(config, initial=True)
+                
+                # Notion写入走后台队列（限流 + 429重试）
+                self.notion_writer = NotionWriter(
+                    self.notion_api,
+                    max_attempts=config.get("notion.max_attempts", 5),
+                    max_backoff=config.get("notion.max_backoff", 60),
+                    workers=config.get("notion.workers", 3)
                 )
+                
+                # 同步目标（一条笔记可并行发送到多个目标）
+                self.dispatcher = FanOutDispatcher()
+                self._register_sinks()
             
-            # AI处理器
-            self.ai_processor = AIProcessor(config.ai_provider)
+            # 剪切板内容处理（单线程顺序处理；新内容到来时取消旧内容尚未完成的AI调用）
+            from concurrent.futures import ThreadPoolExecutor
+            import threading
+            self._clip_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="clipboard-worker")
+            self._clip_lock = threading.Lock()
+            self._clip_deadline = None
+            
+            # 剪切板历史持久化（SQLite + 全文索引，跨重启保留）
+            self.clipboard_store = None
+            if config.get("clipboard.history.enabled", True):
+                with startup_tracer.phase("clipboard_store"):
+                    try:
+                        from src.utils.clipboard_store import ClipboardHistoryStore
+                        self.clipboard_store = ClipboardHistoryStore(
+                            config.root_dir / "data" / "clipboard_history.db",
+                            max_entries=config.get("clipboard.history.max_entries", 100000),
+                            max_age_days=config.get("clipboard.history.max_age_days", 180)
+                        )
+                    except Exception as e:
+                        logger.error(f"打开剪切板历史存储失败，只保留内存中的最近记录: {e}")
             
             # 剪切板监控
             self.clipboard_monitor = ClipboardMonitor(
                 callback=self._on_clipboard_content,
                 check_interval=config.clipboard_check_interval,
                 min_length=config.clipboard_min_length,
-                max_length=config.clipboard_max_length
+                max_length=config.clipboard_max_length,
+                store=self.clipboard_store
             )
 
             # 剪切板自动同步去重（跨重启持久化；仅影响自动同步，不影响手动输入）
@@ -147,19 +211,50 @@ class QuickNoteApp(QObject):
                 dedupe_ttl_seconds = 48 * 3600
             dedupe_persist = config.get("clipboard.dedupe.persist", True)
             dedupe_path = config.root_dir / "data" / "clipboard_dedupe.json"
-            self.clipboard_dedupe = ClipboardDedupeStore(
-                path=dedupe_path if dedupe_persist else (config.root_dir / "data" / "clipboard_dedupe.tmp.json"),
-                ttl_seconds=dedupe_ttl_seconds,
-                enabled=bool(dedupe_enabled),
+            with startup_tracer.phase("clipboard_dedupe"):
+                self.clipboard_dedupe = ClipboardDedupeStore(
+                    path=dedupe_path if dedupe_persist else (config.root_dir / "data" / "clipboard_dedupe.tmp.json"),
+                    ttl_seconds=dedupe_ttl_seconds,
+                    enabled=bool(dedupe_enabled),
+                )
+            
+            # 剪切板自动同步的处理链路（与命令行、本地接入接口相同的去重 → 分类 → 分发步骤；
+            # 预过滤已在剪切板监控中完成）
+            self.clip_pipeline = ClipPipeline(
+                self.ai_processor,
+                self.dispatcher,
+                targets_for=self._fanout_targets,
+                dedupe=self.clipboard_dedupe,
+                use_prefilter=False,
+                sync_timeout=config.get("clipboard.sync_timeout_seconds", 30),
+                source="clipboard"
             )
             
+            # 本地HTTP接入接口（可选，与剪切板自动同步共用分发器和去重记录）
+            self.ingest_server = None
+            if config.get("ingest.enabled", False):
+                with startup_tracer.phase("ingest_server"):
+                    self._start_ingest_server()
+            
             # 检查总开关（从ai_rules读取）
-            clipboard_monitor_enabled = config.config.get('ai_rules', {}).get('clipboard_monitor', True)
+            snapshot = config.snapshot
             
             # 如果配置启用，则启动剪切板监控
-            if config.clipboard_enabled and clipboard_monitor_enabled:
+            if snapshot.clipboard_enabled and snapshot.rules.clipboard_monitor:
                 self.clipboard_monitor.start()
             
+            # 监视 config.yaml 和 .env，手动修改后自动重新加载
+            self.config_watcher = None
+            if config.get("config_watch.enabled", True):
+                from src.core.config_watcher import ConfigWatcher
+                self.config_watcher = ConfigWatcher(
+                    [config.config_file, config.env_file],
+                    debounce_ms=config.get("config_watch.debounce_ms", 500),
+                    parent=self
+                )
+                self.config_watcher.changed.connect(self._reload_config)
+                self.config_watcher.start()
+            
             logger.info("所有组件初始化完成")
             
         except Exception as e:
@@ -168,11 +263,6 @@ class QuickNoteApp(QObject):
     
     def _connect_signals(self):
         """连接信号和槽"""
-        # 快速输入窗口
-        self.quick_input_window.content_submitted.connect(self._on_quick_input_submitted)
-        # 【自愈机制】窗口显示时检查快捷键
-        self.quick_input_window.window_shown.connect(self._check_and_heal_hotkey)
-        
         # 系统托盘
         self.tray_icon.quick_input_triggered.connect(self._show_quick_input)
         self.tray_icon.settings_triggered.connect(self._show_settings)
@@ -180,15 +270,22 @@ class QuickNoteApp(QObject):
         self.tray_icon.restart_triggered.connect(self._restart_app)
         self.tray_icon.restart_hotkey_triggered.connect(self._restart_hotkey_listener)
         self.tray_icon.clipboard_toggled.connect(self._on_clipboard_toggled)
+        
+        # 其他启动转发来的命令
+        if self.instance is not None:
+            self.instance.command_received.connect(self._on_instance_command)
         self.tray_icon.clipboard_history_triggered.connect(self._show_clipboard_history)
+        self.tray_icon.performance_triggered.connect(self._show_performance_panel)
         
         # 线程安全的快捷键信号（从 pynput 线程到主线程）
         self.show_quick_input_signal.connect(self._show_quick_input)
         self.toggle_clipboard_signal.connect(self._toggle_clipboard)
+        self.quick_input_done_signal.connect(self._on_quick_input_done)
         
-        # 设置保存后重新初始化
-        if self.settings_dialog:
-            self.settings_dialog.settings_saved.connect(self._reload_config)
+        # 配置变化（设置界面保存、手动编辑配置文件）后只重新配置受影响的组件；
+        # 订阅回调可能来自其他线程，经信号转到主线程执行
+        self.config_changed_signal.connect(self._on_config_changed)
+        config.subscribe(self.config_changed_signal.emit)
     
     def _start_status_check(self):
         """启动定期状态检查"""
@@ -228,39 +325,118 @@ class QuickNoteApp(QObject):
         self.status_timer.start(120000)  # 120秒 = 2分钟
         logger.info("快捷键状态定期检查已启动（每2分钟）")
     
-    def _start_auto_restart(self):
-        """启动定时自动重启（每1小时重启一次，避免长时间运行导致的闪屏问题）"""
+    def _start_resource_monitor(self):
+        """启动资源监控（取代定时重启：只有资源持续超过阈值时才重启，重启前保存诊断快照）"""
         from PyQt5.QtCore import QTimer
+        from src.utils.resource_monitor import ResourceMonitor, ResourceThresholds
+        
+        interval_seconds = max(5.0, float(config.get("monitor.interval_seconds", 60)))
+        log_every = max(1, int(config.get("monitor.log_every", 10)))
+        self.resource_monitor = ResourceMonitor(
+            ResourceThresholds.from_config(config.get("monitor.thresholds", {})),
+            snapshot_dir=config.root_dir / "data" / "diagnostics",
+            widget_counter=lambda: len(QApplication.allWidgets()),
+            consecutive=config.get("monitor.consecutive", 3),
+            min_uptime_seconds=float(config.get("monitor.min_uptime_minutes", 30)) * 60,
+            tracemalloc_frames=int(config.get("monitor.tracemalloc_frames", 1))
+        )
+        self._resource_checks = 0
+        
+        def on_check():
+            try:
+                verdict = self.resource_monitor.check()
+                self._resource_checks += 1
+                if self._resource_checks % log_every == 1:
+                    self.resource_monitor.log_summary()
+                if verdict.should_restart:
+                    self.resource_monitor_timer.stop()
+                    self.resource_monitor.save_snapshot(verdict.breaches)
+                    logger.warning(f"资源持续超过阈值，自动重启: {', '.join(verdict.breaches)}")
+                    self.tray_icon.show_message("自动重启", "资源占用持续过高，程序将重启以保持稳定")
+                    self._restart_app()
+            except Exception as e:
+                logger.error(f"资源监控异常: {e}", exc_info=True)
         
-        auto_restart_hours = config.get("auto_restart_hours", 1)
+        # 在界面线程中采样（统计Qt控件数需要在界面线程）
+        self.resource_monitor_timer = QTimer()
+        self.resource_monitor_timer.timeout.connect(on_check)
+        self.resource_monitor_timer.start(int(interval_seconds * 1000))
+        logger.info(f"资源监控已启动（每 {interval_seconds:g} 秒采样，阈值 {self.resource_monitor.thresholds}）")
+    
+    def _quick_input_config(self, cfg) -> dict:
+        """快速输入窗口配置（遮罩配置：默认黑色 + 100%不透明（alpha=255））"""
+        return {
+            **cfg.get("ui.quick_input", {}),
+            'mask_color': cfg.get('ui.mask_color', [0, 0, 0]),
+            'mask_alpha': cfg.get('ui.mask_alpha', 255),
+        }
+    
+    def _ensure_quick_input_window(self) -> QuickInputWindow:
+        """创建快速输入窗口（只创建一次；空闲预热和首次按快捷键共用）"""
+        if self.quick_input_window is None:
+            start = time.perf_counter()
+            self.quick_input_window = QuickInputWindow(self._quick_input_config(config))
+            self.quick_input_window.content_submitted.connect(self._on_quick_input_submitted)
+            # 【自愈机制】窗口显示时检查快捷键
+            self.quick_input_window.window_shown.connect(self._check_and_heal_hotkey)
+            logger.info(f"快速输入窗口已创建（{(time.perf_counter() - start) * 1000:.0f}ms）")
+        return self.quick_input_window
+    
+    def _on_instance_command(self, command: str, args: dict):
+        """处理其他启动转发来的命令"""
+        if command == "show_input":
+            self._show_quick_input()
+        elif command == "settings":
+            self._show_settings()
+        else:
+            logger.warning(f"未知的转发命令: {command}")
+    
+    def _export_state(self) -> dict:
+        """整理重启时交给新实例的运行状态（会停止Notion写入队列）"""
+        state = {
+            "version": 1,
+            "clipboard_history": list(self.clipboard_monitor.history),
+            "dedupe": self.clipboard_dedupe.export(),
+            "notion_pending": [],
+        }
         try:
-            auto_restart_hours = float(auto_restart_hours)
-            if auto_restart_hours <= 0:
-                auto_restart_hours = 1
-        except (TypeError, ValueError):
-            auto_restart_hours = 1
-        
-        interval_ms = int(auto_restart_hours * 3600 * 1000)
-        
-        def on_auto_restart():
-            logger.info(f"定时自动重启触发（每 {auto_restart_hours} 小时，间隔 {interval_ms} 毫秒）")
-            logger.info(f"定时器状态：isActive={self.auto_restart_timer.isActive()}, remainingTime={self.auto_restart_timer.remainingTime()}")
-            self.tray_icon.show_message("自动重启", f"程序将重启以保持稳定（每 {int(auto_restart_hours)} 小时）")
-            # 注意：重启后新进程会重新初始化定时器，所以这里不需要手动重启定时器
-            self._restart_app()
-        
-        self.auto_restart_timer = QTimer()
-        # 确保定时器是重复触发的（不是单次触发）
-        self.auto_restart_timer.setSingleShot(False)
-        self.auto_restart_timer.timeout.connect(on_auto_restart)
-        self.auto_restart_timer.start(interval_ms)
-        logger.info(f"定时自动重启已启动（每 {auto_restart_hours} 小时，间隔 {interval_ms} 毫秒，重复触发）")
-        logger.info(f"定时器初始状态：isActive={self.auto_restart_timer.isActive()}, interval={self.auto_restart_timer.interval()}")
+            state["notion_pending"] = self.notion_writer.handoff(
+                timeout=float(config.get("single_instance.handoff_flush_seconds", 5))
+            )
+        except Exception as e:
+            logger.error(f"取出Notion待写入内容失败: {e}")
+        logger.info(
+            f"运行状态已整理: 剪切板历史 {len(state['clipboard_history'])} 条, "
+            f"去重记录 {len(state['dedupe'])} 条, Notion待写入 {len(state['notion_pending'])} 条"
+        )
+        return state
+    
+    def _restore_state(self, state: dict):
+        """恢复旧实例交出的运行状态"""
+        try:
+            monitor = self.clipboard_monitor
+            history = [str(item) for item in state.get("clipboard_history") or []]
+            from collections import deque
+            monitor.history = deque(history + list(monitor.history), maxlen=monitor.max_history)
+            added = self.clipboard_dedupe.merge(state.get("dedupe") or {})
+            restored = self.notion_writer.restore(state.get("notion_pending") or [])
+            logger.info(f"已恢复运行状态: 剪切板历史 {len(history)} 条, 新增去重记录 {added} 条, Notion待写入 {restored} 条")
+            if restored:
+                self.tray_icon.show_message("QuickNote AI", f"已接续重启前未写完的 {restored} 条Notion内容")
+        except Exception as e:
+            logger.error(f"恢复运行状态失败: {e}", exc_info=True)
     
     def _show_quick_input(self):
         """显示快速输入窗口"""
         logger.info("显示快速输入窗口")
-        self.quick_input_window.show_at_center()
+        start = time.perf_counter()
+        self._ensure_quick_input_window().show_at_center()
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        budget_ms = config.get("startup.quick_input_budget_ms", 300)
+        if budget_ms and elapsed_ms > budget_ms:
+            logger.warning(f"快速输入窗口显示耗时 {elapsed_ms:.0f}ms，超过预算 {budget_ms}ms")
+        else:
+            logger.debug(f"快速输入窗口显示耗时 {elapsed_ms:.0f}ms")
     
     def _show_settings(self):
         """显示设置界面"""
@@ -268,7 +444,6 @@ class QuickNoteApp(QObject):
         if not self.settings_dialog:
             # QDialog的parent应该是QWidget或None，不能是QApplication
             self.settings_dialog = SettingsDialog(config, parent=None)
-            self.settings_dialog.settings_saved.connect(self._reload_config)
             # 设置主程序引用，用于访问剪切板历史
             self.settings_dialog.main_app = self
         self.settings_dialog.exec_()
@@ -281,81 +456,147 @@ class QuickNoteApp(QObject):
         history_dialog = ClipboardHistoryDialog(self, parent=None)
         history_dialog.exec_()
     
+    def _show_performance_panel(self):
+        """显示性能面板（非模态，关闭后保留窗口，下次打开时继续使用）"""
+        if self.performance_panel is None:
+            from src.gui.performance_panel import PerformancePanel
+            self.performance_panel = PerformancePanel(refresh_ms=config.get("metrics.panel_refresh_ms", 2000))
+        self.performance_panel.show()
+        self.performance_panel.raise_()
+        self.performance_panel.activateWindow()
+    
+    def _start_metrics_server(self):
+        """启动指标导出端点（端口被占用等失败时只记录日志）"""
+        from src.utils.metrics import MetricsServer
+        try:
+            self.metrics_server = MetricsServer(
+                metrics,
+                host=config.get("metrics.http.host", "127.0.0.1"),
+                port=config.get("metrics.http.port", 9464)
+            ).start()
+        except Exception as e:
+            logger.error(f"指标导出端点启动失败: {e}")
+    
+    def _stop_metrics_server(self):
+        if self.metrics_server is not None:
+            try:
+                self.metrics_server.stop()
+            except Exception as e:
+                logger.warning(f"停止指标导出端点失败: {e}")
+            self.metrics_server = None
+    
     def _reload_config(self):
-        """重新加载配置（设置保存后）"""
-        logger.info("重新加载配置")
-        from src.utils.config import config as new_config
+        """config.yaml 或 .env 被手动修改：重新读取（有变化时经订阅通知 _on_config_changed）"""
+        try:
+            config.reload()
+        except Exception as e:
+            logger.error(f"重新加载配置失败，继续使用当前配置: {e}")
+            self.tray_icon.show_message("⚠️ 配置未生效", f"config.yaml 读取失败: {e}")
+    
+    def _stop_config_watcher(self):
+        if getattr(self, "config_watcher", None) is not None:
+            self.config_watcher.stop()
+            self.config_watcher = None
+    
+    def _on_config_changed(self, old, new):
+        """
+        配置快照已替换，只重新配置受影响的组件
+        
+        Args:
+            old: 旧配置快照
+            new: 新配置快照
+        """
+        start = time.perf_counter()
+        changed = new.changed_keys(old)
+        if not changed:
+            logger.info("配置无变化")
+            return
+        
+        try:
+            applied, needs_restart = self._reconfigure(old, new, changed)
+        except Exception as e:
+            logger.error(f"应用配置失败: {e}", exc_info=True)
+            self.tray_icon.show_message("配置更新失败", f"请检查配置: {str(e)}")
+            return
         
-        # 重新加载环境变量和YAML配置
-        if new_config.env_file.exists():
-            from dotenv import load_dotenv
-            load_dotenv(new_config.env_file, override=True)
+        logger.info(
+            f"配置已更新（版本 {new.version}，{(time.perf_counter() - start) * 1000:.1f}ms）: "
+            f"{'、'.join(applied) or '无需重新配置组件'}"
+        )
+        message = f"已应用: {'、'.join(applied) or '配置项'}"
+        if needs_restart:
+            logger.info(f"以下配置需要重启应用才能生效: {', '.join(needs_restart)}")
+            message += f"\n⚠️ 需重启生效: {', '.join(needs_restart)}"
+        self.tray_icon.show_message("配置已更新", message)
+    
+    def _reconfigure(self, old, new, changed) -> tuple:
+        """
+        按新旧配置快照的差异重新配置组件（其余组件保持不变）
         
-        # 重新加载YAML配置
-        new_config.config = new_config._load_config()
+        Args:
+            old: 旧配置快照
+            new: 新配置快照
+            changed: 变化的配置项（ConfigSnapshot.changed_keys）
         
-        # 更新快速输入窗口的配置（包括遮罩设置）
-        if self.quick_input_window:
-            try:
-                new_ui_config = new_config.get("ui.quick_input", {})
-                # 更新遮罩配置（从ui节点读取）
-                mask_color = new_config.get('ui.mask_color', [0, 0, 0])
-                mask_alpha = new_config.get('ui.mask_alpha', 255)
-                # 更新遮罩配置
-                self.quick_input_window.config = {
-                    **new_ui_config,
-                    'mask_color': mask_color,
-                    'mask_alpha': mask_alpha,
-                }
-                logger.info(f"快速输入窗口配置已更新（包括遮罩设置: 颜色={mask_color}, 透明度={mask_alpha}）")
-            except Exception as e:
-                logger.error(f"更新快速输入窗口配置失败: {e}", exc_info=True)
+        Returns:
+            (已应用的变更说明列表, 需要重启才能生效的配置节列表)
+        """
+        applied = []
+        
+        # 快捷键：在运行中的监听器上改绑，不重启键盘钩子
+        for name, signal in (
+            ("hotkey_quick_input", self.show_quick_input_signal),
+            ("hotkey_toggle_clipboard", self.toggle_clipboard_signal),
+        ):
+            if name in changed:
+                self.hotkey_listener.unregister(getattr(old, name))
+                self.hotkey_listener.register(getattr(new, name), signal.emit)
+                applied.append(f"快捷键 {getattr(new, name)}")
+        
+        # 快速输入窗口（遮罩等界面设置；窗口尚未创建时首次创建会读取新配置）
+        if self.quick_input_window and any(key.startswith("ui.") for key in changed):
+            self.quick_input_window.config = self._quick_input_config(config)
+            applied.append("快速输入窗口")
         
-        # 更新剪切板监控状态（根据总开关）
-        clipboard_monitor_enabled = new_config.config.get('ai_rules', {}).get('clipboard_monitor', True)
-        if clipboard_monitor_enabled and new_config.clipboard_enabled:
-            if not self.clipboard_monitor.enabled:
+        # 剪切板预过滤参数：直接更新监控器属性，下一次检查即生效
+        if changed & {"clipboard_check_interval", "clipboard_min_length", "clipboard_max_length"}:
+            self.clipboard_monitor.check_interval = new.clipboard_check_interval
+            self.clipboard_monitor.min_length = new.clipboard_min_length
+            self.clipboard_monitor.max_length = new.clipboard_max_length
+            applied.append("剪切板预过滤")
+        
+        # 剪切板监控开关（总开关在 ai_rules 中）
+        if "clipboard_enabled" in changed or new.rules.clipboard_monitor != old.rules.clipboard_monitor:
+            enabled = new.clipboard_enabled and new.rules.clipboard_monitor
+            if enabled and not self.clipboard_monitor.enabled:
                 self.clipboard_monitor.start()
-        else:
-            if self.clipboard_monitor.enabled:
+            elif not enabled and self.clipboard_monitor.enabled:
                 self.clipboard_monitor.stop()
+            self.tray_icon.set_clipboard_status(self.clipboard_monitor.enabled)
+            applied.append(f"剪切板监控{'开启' if enabled else '关闭'}")
         
-        # 重新初始化API
-        try:
-            if new_config.validate():
-                self.ai_processor = AIProcessor(new_config.ai_provider)
-                logger.info("AI处理器已重新初始化")
-            
-            if new_config.notion_api_key and new_config.notion_database_id:
-                self.notion_api = NotionAPI(
-                    new_config.notion_api_key,
-                    new_config.notion_database_id
-                )
-                logger.info("Notion API已重新初始化")
-            
-            if new_config.flomo_api_url:
-                self.flomo_api = FlomoAPI(new_config.flomo_api_url)
-                logger.info("Flomo API已重新初始化")
-            
-                if (new_config.ticktick_smtp_user and 
-                    new_config.ticktick_smtp_pass and 
-                    new_config.ticktick_email):
-                    self.ticktick_api = TickTickAPI(
-                        smtp_host=new_config.ticktick_smtp_host,
-                        smtp_port=new_config.ticktick_smtp_port,
-                        smtp_user=new_config.ticktick_smtp_user,
-                        smtp_pass=new_config.ticktick_smtp_pass,
-                        ticktick_email=new_config.ticktick_email
-                    )
-                    logger.info("TickTick API已重新初始化")
-            
-            # 快捷键配置已保存到config.yaml，但需要重启才能生效
-            logger.info("快捷键配置已更新，需要重启应用才能生效")
-            
-            self.tray_icon.show_message("配置已更新", "设置已保存并重新加载 ✅\n⚠️ 快捷键需重启生效")
-        except Exception as e:
-            logger.error(f"重新加载配置失败: {e}")
-            self.tray_icon.show_message("配置更新失败", f"请检查配置: {str(e)}")
+        # 分类规则和多目标分发每条内容都从当前快照读取，无需重建
+        if "rules" in changed or any(key.startswith(("ai_rules.", "fanout.")) for key in changed):
+            applied.append("分类规则")
+        
+        if "metrics.enabled" in changed:
+            metrics.enabled = bool(new.get("metrics.enabled", True))
+            applied.append("指标采集")
+        
+        # 外部服务：只重新登记配置有变化的客户端，其余实例继续使用
+        names = affected_services(changed)
+        if names:
+            self._register_components(config, names=names)
+            if {"notion_api", "flomo_api", "ticktick_api"} & set(names):
+                self._register_sinks()
+            components.warm_up(names)
+            applied.extend(names)
+        
+        needs_restart = sorted({
+            prefix.rstrip(".") for prefix in RESTART_SETTINGS
+            for key in changed if key == prefix or key.startswith(prefix)
+        })
+        return applied, needs_restart
     
     def _toggle_clipboard(self):
         """切换剪切板监控"""
@@ -372,329 +613,165 @@ class QuickNoteApp(QObject):
         else:
             self.clipboard_monitor.stop()
     
-    def _process_ticktick_priority(self, content: str):
+    def _register_components(self, cfg, initial: bool = False, names: Optional[list] = None):
         """
-        处理滴答清单优先级转换
-        识别文本中的优先级关键词并转换为!1/!2/!3/!4格式
+        登记外部服务组件的创建函数（不导入SDK、不创建客户端）
         
         Args:
-            content: 原始内容
-            
-        Returns:
-            (处理后的内容, 优先级标记) 元组
-            优先级标记格式: !1(高优), !2(中优), !3(低优), !4(无优先级，默认)
+            cfg: 配置对象
+            initial: 是否为启动时登记（启动时Notion和AI处理器总是登记；重新加载时只在配置有效时替换）
+            names: 只重新登记这些组件（默认全部）
         """
-        import re
-        
-        # 优先级关键词映射（支持多种表达方式）
-        # 使用空格或字符串边界来确保完整匹配（中文不支持\b词边界）
-        priority_patterns = [
-            (r'高优先级', '!1'),  # 匹配"高优先级"
-            (r'高优', '!1'),      # 匹配"高优"
-            (r'中优先级', '!2'),  # 匹配"中优先级"
-            (r'中优', '!2'),      # 匹配"中优"
-            (r'低优先级', '!3'),  # 匹配"低优先级"
-            (r'低优', '!3'),      # 匹配"低优"
-            (r'无优先级', '!4'),  # 匹配"无优先级"
-            (r'无优', '!4'),      # 匹配"无优"
-        ]
-        
-        priority_mark = '!4'  # 默认无优先级
-        processed_content = content
-        
-        # 查找并替换优先级关键词（按顺序匹配，优先匹配完整词）
-        for pattern, mark in priority_patterns:
-            # 使用正则表达式查找（不区分大小写）
-            match = re.search(pattern, processed_content, re.IGNORECASE)
-            if match:
-                # 找到优先级关键词，记录优先级标记
-                priority_mark = mark
-                # 移除文本中的优先级关键词（保留其他内容）
-                processed_content = re.sub(pattern, '', processed_content, flags=re.IGNORECASE)
-                logger.info(f"识别到优先级关键词: '{match.group()}' (模式: {pattern})，转换为: {mark}")
-                logger.debug(f"移除关键词后的内容: '{processed_content}'")
-                break  # 只处理第一个匹配的优先级
-        
-        # 清理多余的空格（将多个连续空格替换为单个空格）
-        processed_content = re.sub(r'\s+', ' ', processed_content).strip()
-        
-        # 在内容末尾添加优先级标记（如果内容不为空）
-        if processed_content:
-            # 确保优先级标记在末尾（如果还没有的话）
-            if not processed_content.endswith(priority_mark):
-                processed_content = f"{processed_content}{priority_mark}"
-        else:
-            # 如果内容为空，只保留优先级标记
-            processed_content = priority_mark
+        register_services(cfg, initial=initial, names=names)
         
-        logger.info(f"优先级处理: 原文={content}, 处理后={processed_content}, 优先级={priority_mark}")
-        return processed_content, priority_mark
+        # 代理对象按名称转发到当前实例，重新登记后自动使用新实例
+        self.ai_processor = components.proxy("ai_processor")
+        self.notion_api = components.proxy("notion_api")
+        self.flomo_api = components.proxy("flomo_api") if components.has("flomo_api") else None
+        self.ticktick_api = components.proxy("ticktick_api") if components.has("ticktick_api") else None
+    
+    def _register_sinks(self):
+        """按当前配置注册同步目标（Notion 始终可用，Flomo/滴答清单需已配置）"""
+        register_sinks(self.dispatcher, self.notion_writer, self.flomo_api, self.ticktick_api, self.ai_processor)
+    
+    def _fanout_targets(self, primary: str) -> list:
+        """主目标 + 配置的额外目标（fanout.<主目标>），去重并保持顺序"""
+        return fanout_targets(config, primary)
+    
+    def _start_ingest_server(self):
+        """启动本地HTTP接入接口（端口被占用等失败时只记录日志，不影响其他功能）"""
+        from src.core.ingest_server import build_ingest_server
+        pipeline = ClipPipeline(
+            self.ai_processor,
+            self.dispatcher,
+            targets_for=self._fanout_targets,
+            dedupe=self.clipboard_dedupe,
+            min_length=config.clipboard_min_length,
+            max_length=config.clipboard_max_length,
+            sync_timeout=config.get("ingest.sync_timeout_seconds", 120),
+            source="api"
+        )
+        try:
+            self.ingest_server = build_ingest_server(config, pipeline).start()
+        except Exception as e:
+            logger.error(f"本地接入接口启动失败: {e}")
+    
+    def _stop_ingest_server(self):
+        if self.ingest_server is not None:
+            try:
+                self.ingest_server.stop()
+            except Exception as e:
+                logger.warning(f"停止本地接入接口失败: {e}")
+            self.ingest_server = None
     
     def _on_quick_input_submitted(self, platform: str, content: str, extra_params: dict = None):
         """处理快速输入的内容"""
         extra_params = extra_params or {}
         logger.info(f"收到快速输入: 平台={platform}, 内容={content[:50]}..., 参数={extra_params}")
         
-        if platform == "notion":
-            # 保存到Notion
-            if not self.notion_api:
-                self.tray_icon.show_message("配置错误", "请先在设置界面配置Notion API")
-                logger.error("Notion API未初始化")
-                return
-            
-            self.tray_icon.show_message("处理中", "正在保存到Notion...")
-            
-            # 从额外参数中提取
-            status = extra_params.get("status", "待处理")
-            priority = extra_params.get("priority", "中")
-            tags = extra_params.get("tags", [])
-            
-            success = self.notion_api.add_inspiration(
-                content,
-                priority=priority,
-                status=status,
-                tags=tags
-            )
-            
-            if success:
-                self.tray_icon.show_message("保存成功", "灵感已保存到Notion ✅")
-                logger.info(f"快速输入已保存到Notion，优先级: {priority}, 标签: {tags}")
-            else:
-                self.tray_icon.show_message("保存失败", "保存到Notion失败 ❌")
-                logger.error("保存到Notion失败")
-                
-        elif platform == "flomo":
-            # 保存到Flomo
-            if not self.flomo_api:
-                self.tray_icon.show_message("配置错误", "请先在设置界面配置Flomo API")
-                logger.error("Flomo API未初始化")
+        config_hints = {
+            "notion": "请先在设置界面配置Notion API",
+            "flomo": "请先在设置界面配置Flomo API",
+            "ticktick": "请先在设置界面配置滴答清单邮箱信息",
+        }
+        if platform not in config_hints:
+            logger.warning(f"未知的平台: {platform}")
+            return
+        if not self.dispatcher.has(platform):
+            self.tray_icon.show_message("配置错误", config_hints[platform])
+            logger.error(f"{self.dispatcher.display_name(platform)} 未初始化")
+            return
+        
+        # Flomo 的标签是空格分隔的字符串，Notion 的标签是列表
+        tags = extra_params.get("tags", "闪念" if platform == "flomo" else [])
+        if isinstance(tags, str):
+            tags = [tag.strip() for tag in tags.split() if tag.strip()]
+        
+        note = Note(
+            content,
+            tags=list(tags),
+            priority=extra_params.get("priority", "中"),
+            status=extra_params.get("status", "待处理"),
+            source="quick_input"
+        )
+        targets = self._fanout_targets(platform)
+        target_names = "、".join(self.dispatcher.display_name(name) for name in targets)
+        self.tray_icon.show_message("处理中", f"正在保存到{target_names}...")
+        
+        def on_done(future):
+            # 在I/O循环线程中执行：只取出结果，通知经信号交给主线程显示
+            if future.cancelled():
+                self.quick_input_done_signal.emit([], "保存已取消")
                 return
-            
-            self.tray_icon.show_message("处理中", "正在保存到Flomo...")
-            
-            # 从额外参数中获取标签
-            tags_str = extra_params.get("tags", "闪念")
-            # 解析标签（空格分隔）
-            tag_list = [tag.strip() for tag in tags_str.split() if tag.strip()]
-            
-            success = self.flomo_api.add_memo(content, tags=tag_list)
-            
-            if success:
-                tags_display = ", ".join(tag_list) if tag_list else ""
-                self.tray_icon.show_message("保存成功", f"已保存到Flomo ✅\n标签: {tags_display}")
-                logger.info(f"快速输入已保存到Flomo，标签: {tag_list}")
-            else:
-                self.tray_icon.show_message("保存失败", "保存到Flomo失败 ❌")
-                logger.error("保存到Flomo失败")
-                
-        elif platform == "ticktick":
-            # 保存到滴答清单（通过邮件）
-            if not self.ticktick_api:
-                self.tray_icon.show_message("配置错误", "请先在设置界面配置滴答清单邮箱信息")
-                logger.error("TickTick API未初始化")
+            error = future.exception()
+            if error is not None:
+                logger.error(f"快速输入保存出错: {error}")
+                self.quick_input_done_signal.emit([], f"保存出错: {error}")
                 return
-            
-            self.tray_icon.show_message("处理中", "正在保存到滴答清单...")
-            
-            # 处理优先级转换：识别文本中的优先级关键词并转换为!1/!2/!3/!4格式
-            logger.info(f"开始处理优先级，原始内容: '{content}'")
-            processed_content, priority_mark = self._process_ticktick_priority(content)
-            logger.info(f"优先级处理完成，处理后内容: '{processed_content}', 优先级标记: '{priority_mark}'")
-            
-            # 生成任务标题（取前50个字符，如果内容较长，但要保留优先级标记）
-            if len(processed_content) > 50:
-                # 如果内容以优先级标记结尾，先移除标记，截断后再添加
-                if processed_content.endswith(('!1', '!2', '!3', '!4')):
-                    priority_suffix = processed_content[-2:]  # 获取!1/!2/!3/!4
-                    main_content = processed_content[:-2].strip()  # 移除优先级标记
-                    title = main_content[:50] + "..." + priority_suffix
-                else:
-                    title = processed_content[:50] + "..."
-            else:
-                title = processed_content
-            
-            # AI 提取时间信息（从处理后的内容中自动提取）
-            time_info = None
-            due_date = None
-            
-            if self.ai_processor:
-                try:
-                    # 从内容中提取时间信息（使用处理后的内容）
-                    time_info = self.ai_processor.extract_time_info(processed_content)
-                    if time_info and time_info.get("datetime_ticktick"):
-                        due_date = time_info.get("datetime_ticktick")
-                        logger.info(f"识别到时间: {due_date} (原文: {processed_content})")
-                except Exception as e:
-                    logger.warning(f"时间提取失败，将不设置截止时间: {e}")
-            
-            # 构建extra参数
-            extra_dict = {}
-            if due_date:
-                extra_dict["due_date"] = due_date
-            if priority_mark:
-                extra_dict["priority_mark"] = priority_mark
-            
-            success = self.ticktick_api.add_task(
-                title=title,
-                content=processed_content,
-                extra=extra_dict if extra_dict else None
-            )
-            
-            if success:
-                time_display = f" (提醒: {due_date})" if due_date else ""
-                self.tray_icon.show_message("保存成功", f"已保存到滴答清单 ✅{time_display}")
-                logger.info(f"快速输入已保存到滴答清单，提醒时间: {due_date or '无'}")
+            self.quick_input_done_signal.emit(future.result(), "")
+        
+        # 各目标在后台I/O循环中并行发送，不阻塞界面；完成后汇总为一条通知
+        self.dispatcher.dispatch(note, targets).add_done_callback(on_done)
+    
+    def _on_quick_input_done(self, results: list, error: str):
+        """快速输入保存完成（主线程）：汇总为一条通知"""
+        if error:
+            self.tray_icon.show_message("保存失败", f"{error} ❌")
+            return
+        title, message = summarize_results(results)
+        self.tray_icon.show_message(title, message)
+        for r in results:
+            if r.success:
+                logger.info(f"快速输入已保存到{r.display_name}（{r.latency_ms}ms）{r.detail}")
             else:
-                self.tray_icon.show_message("保存失败", "保存到滴答清单失败 ❌")
-                logger.error("保存到滴答清单失败")
-        else:
-            logger.warning(f"未知的平台: {platform}")
+                logger.error(f"快速输入保存到{r.display_name}失败: {r.error}")
     
     def _on_clipboard_content(self, content: str):
-        """处理剪切板内容"""
-        logger.info(f"检测到剪切板内容: {content[:50]}...")
-
-        # 自动同步去重：一两天内重复复制的内容直接忽略（不调用AI，不同步）
-        dedupe_decision = None
+        """剪切板新内容回调（监控线程）：取消旧内容的处理，并提交新内容"""
         try:
-            if hasattr(self, "clipboard_dedupe") and self.clipboard_dedupe:
-                dedupe_decision = self.clipboard_dedupe.check(content)
-                if dedupe_decision.is_duplicate:
-                    logger.info(
-                        f"剪切板内容命中去重缓存，已忽略（age={dedupe_decision.age_seconds}s, fp={dedupe_decision.fingerprint[:8]}）"
-                    )
-                    return
+            budget = self.ai_processor.classify_budget
         except Exception as e:
-            logger.warning(f"剪切板去重检查失败，将继续处理: {e}")
+            logger.warning(f"AI处理器不可用: {e}")
+            budget = 8
+        deadline = Deadline(budget, "剪切板分类")
+        with self._clip_lock:
+            previous = self._clip_deadline
+            self._clip_deadline = deadline
+        if previous is not None:
+            previous.cancel("已被新的剪切板内容取代")
+        self._clip_executor.submit(self._process_clipboard_content, content, deadline)
+    
+    def _process_clipboard_content(self, content: str, deadline: Deadline):
+        """处理剪切板内容（剪切板处理线程；新内容到来时 deadline 被取消）"""
+        logger.info(f"检测到剪切板内容: {content[:50]}...")
+        result = self.clip_pipeline.process(content, deadline=deadline)
+        self._record_clip_verdict(content, result.verdict or CLIP_STATUS_VERDICTS.get(result.status, "failed"))
         
-        if not self.ai_processor:
-            logger.warning("AI处理器未初始化，跳过剪切板内容处理")
-            return
+        if result.status == STATUS_DUPLICATE:
+            logger.info(f"剪切板内容已忽略（{result.reason}, fp={(result.fingerprint or '')[:8]}）")
+        elif result.status == STATUS_IGNORED:
+            logger.info("内容不符合保存规则，已忽略")
+        elif result.status == STATUS_UNROUTED:
+            logger.info(f"同步目标未配置，已忽略: {result.verdict}")
+        elif result.status == STATUS_CANCELLED:
+            logger.info(f"剪切板内容处理已取消: {result.reason}")
+        elif result.status in (STATUS_TIMEOUT, STATUS_ERROR) and not result.sinks:
+            logger.warning(f"剪切板内容处理失败: {result.reason}")
         
-        try:
-            # AI识别
-            result = self.ai_processor.classify_content(content)
-            
-            if not result.get("valuable"):
-                logger.info("内容不符合保存规则，已忽略")
-                return
-            
-            target_type = result.get("type")
-            
-            # 根据类型分流
-            if target_type == "notion":
-                # 保存到Notion
-                title = result.get("title")
-                priority = result.get("priority", "中")
-                tags = result.get("tags", [])
-                
-                # 强制添加标签：QuickNote_AI自动同步
-                forced_tag = "QuickNote_AI自动同步"
-                # 合并标签，去重，保持顺序（强制标签在前）
-                all_tags = [forced_tag] + [tag for tag in tags if tag != forced_tag]
-                
-                success = self.notion_api.add_inspiration(
-                    content,
-                    title=title,
-                    priority=priority,
-                    tags=all_tags
-                )
-                
-                if success:
-                    self.tray_icon.show_message(
-                        "已保存到Notion",
-                        f"{title or content[:30]}"
-                    )
-                    logger.info("剪切板内容已保存到Notion")
-                    # 记录去重（仅成功后）
-                    try:
-                        if dedupe_decision and hasattr(self, "clipboard_dedupe") and self.clipboard_dedupe:
-                            self.clipboard_dedupe.mark_fingerprint(dedupe_decision.fingerprint)
-                    except Exception as e:
-                        logger.warning(f"写入剪切板去重缓存失败: {e}")
-                
-            elif target_type == "flomo" and self.flomo_api:
-                # 保存到Flomo
-                category = result.get("category")
-                tags = result.get("tags", [])
-                if category and category not in tags:
-                    tags.insert(0, category)
-                
-                # 强制添加标签：Quick_Note_AI同步
-                forced_tag = "Quick_Note_AI同步"
-                if forced_tag not in tags:
-                    tags.append(forced_tag)
-                
-                success = self.flomo_api.add_memo(content, tags=tags)
-                
-                if success:
-                    self.tray_icon.show_message(
-                        "已保存到Flomo",
-                        f"{content[:30]}..."
-                    )
-                    logger.info("剪切板内容已保存到Flomo")
-                    try:
-                        if dedupe_decision and hasattr(self, "clipboard_dedupe") and self.clipboard_dedupe:
-                            self.clipboard_dedupe.mark_fingerprint(dedupe_decision.fingerprint)
-                    except Exception as e:
-                        logger.warning(f"写入剪切板去重缓存失败: {e}")
-            
-            elif target_type == "ticktick" and self.ticktick_api:
-                # 保存到滴答清单
-                # 处理优先级转换：识别文本中的优先级关键词并转换为!1/!2/!3/!4格式
-                logger.info(f"剪切板自动同步 - 开始处理优先级，原始内容: '{content}'")
-                processed_content, priority_mark = self._process_ticktick_priority(content)
-                logger.info(f"剪切板自动同步 - 优先级处理完成，处理后内容: '{processed_content}', 优先级标记: '{priority_mark}'")
-                
-                # 生成任务标题（取前50个字符，如果内容较长，但要保留优先级标记）
-                if len(processed_content) > 50:
-                    # 如果内容以优先级标记结尾，先移除标记，截断后再添加
-                    if processed_content.endswith(('!1', '!2', '!3', '!4')):
-                        priority_suffix = processed_content[-2:]  # 获取!1/!2/!3/!4
-                        main_content = processed_content[:-2].strip()  # 移除优先级标记
-                        title = main_content[:50] + "..." + priority_suffix
-                    else:
-                        title = processed_content[:50] + "..."
-                else:
-                    title = processed_content
-                
-                # 提取时间信息（使用处理后的内容）
-                time_info = None
-                due_date = None
-                try:
-                    time_info = self.ai_processor.extract_time_info(processed_content)
-                    if time_info and time_info.get("has_time"):
-                        due_date = time_info.get("datetime_ticktick") or time_info.get("datetime")
-                        logger.info(f"识别到时间: {due_date}")
-                except Exception as e:
-                    logger.warning(f"时间提取失败: {e}")
-                
-                extra_params = {}
-                if due_date:
-                    extra_params["due_date"] = due_date
-                if priority_mark:
-                    extra_params["priority_mark"] = priority_mark
-                
-                success = self.ticktick_api.add_task(
-                    title=title,
-                    content=processed_content,
-                    extra=extra_params if extra_params else None
-                )
-                
-                if success:
-                    self.tray_icon.show_message(
-                        "已保存到滴答清单",
-                        f"{content[:30]}..."
-                    )
-                    logger.info("剪切板内容已保存到滴答清单")
-                    try:
-                        if dedupe_decision and hasattr(self, "clipboard_dedupe") and self.clipboard_dedupe:
-                            self.clipboard_dedupe.mark_fingerprint(dedupe_decision.fingerprint)
-                    except Exception as e:
-                        logger.warning(f"写入剪切板去重缓存失败: {e}")
-            
-        except Exception as e:
-            logger.error(f"处理剪切板内容失败: {e}")
+        for r in result.sinks:
+            if not r.success:
+                logger.warning(f"剪切板内容同步到{r.display_name}失败: {r.error}")
+        succeeded = [r for r in result.sinks if r.success]
+        if succeeded:
+            _, message = summarize_results(result.sinks)
+            names = "、".join(r.display_name for r in succeeded)
+            self.tray_icon.show_message(f"已保存到{names}", f"{result.title or content[:30]}\n{message}")
+            logger.info(f"剪切板内容已保存到{names}")
+    
+    def _record_clip_verdict(self, content: str, verdict: Optional[str]):
+        """在剪切板历史中记录分类结论（同步目标或 ignored/duplicate/failed）"""
+        if self.clipboard_store is not None and verdict:
+            self.clipboard_store.set_verdict(content, verdict)
     
     def _check_and_heal_hotkey(self):
         """【自愈机制】检查快捷键状态，必要时重启"""
@@ -786,9 +863,31 @@ class QuickNoteApp(QObject):
         try:
             self.clipboard_monitor.stop()
             self.hotkey_listener.stop()
+            self._shutdown_clipboard_worker()
+            self._stop_config_watcher()
+            # 新实例从文件读取配置：先写入尚未写入的修改
+            config.flush()
+            self._stop_ingest_server()
+            self._stop_metrics_server()
+            if self.clipboard_store is not None:
+                self.clipboard_store.close()
+            close_flomo_api()
         except:
             pass
         
+        # 有单实例监听时把运行状态交给新实例（新实例以 --successor 启动并来取），否则直接停止写入队列
+        handoff = self.instance is not None and self.instance.server is not None
+        extra_args = []
+        if handoff:
+            from src.core.single_instance import SUCCESSOR_FLAG
+            self.instance.handoff_state = self._export_state()
+            extra_args = [SUCCESSOR_FLAG]
+        else:
+            try:
+                self.notion_writer.stop()
+            except:
+                pass
+        
         # 显示重启提示
         self.tray_icon.show_message("正在重启", "QuickNote AI 正在重启...")
         
@@ -804,7 +903,7 @@ class QuickNoteApp(QObject):
             logger.info(f"EXE模式重启，路径: {exe_path}")
             
             # 延迟启动新进程
-            QTimer.singleShot(300, lambda: self._do_restart_exe(exe_path, exe_dir))
+            QTimer.singleShot(300, lambda: self._do_restart_exe(exe_path, exe_dir, extra_args))
         else:
             # 开发模式（Python脚本）
             current_dir = Path(__file__).parent.parent
@@ -814,12 +913,33 @@ class QuickNoteApp(QObject):
             logger.info(f"开发模式重启，脚本: {script_path}")
             
             # 延迟启动新进程
-            QTimer.singleShot(300, lambda: self._do_restart_script(python_exe, script_path, current_dir))
+            QTimer.singleShot(300, lambda: self._do_restart_script(python_exe, script_path, current_dir, extra_args))
         
-        # 退出当前应用
-        QTimer.singleShot(500, lambda: self.app.quit())
+        # 退出当前应用（交接时等新实例取走状态再退出）
+        if handoff:
+            self.instance.handoff_delivered.connect(self._finish_handoff)
+            timeout = float(config.get("single_instance.handoff_timeout_seconds", 15))
+            QTimer.singleShot(int(timeout * 1000), self._abandon_handoff)
+        else:
+            QTimer.singleShot(500, lambda: self.app.quit())
+    
+    def _finish_handoff(self):
+        """状态已交给新实例：释放监听名称并退出"""
+        self.instance.close()
+        get_io_loop().stop()
+        self.app.quit()
+    
+    def _abandon_handoff(self):
+        """新实例迟迟没有来取状态：记录未写入的内容后退出，避免内容丢失且无迹可查"""
+        state = self.instance.handoff_state if self.instance else None
+        if state is None:
+            return
+        for item in state.get("notion_pending") or []:
+            logger.error(f"新实例未接收交接，未写入Notion的内容: {item.get('content')}")
+        logger.error("等待新实例接收运行状态超时，直接退出")
+        self._finish_handoff()
     
-    def _do_restart_exe(self, exe_path, exe_dir):
+    def _do_restart_exe(self, exe_path, exe_dir, extra_args=None):
         """执行EXE重启操作"""
         import subprocess
         import os
@@ -827,7 +947,7 @@ class QuickNoteApp(QObject):
         try:
             # 启动新的EXE进程
             subprocess.Popen(
-                [str(exe_path)],
+                [str(exe_path)] + list(extra_args or []),
                 cwd=str(exe_dir),
                 creationflags=subprocess.CREATE_NEW_CONSOLE if os.name == 'nt' else 0,
                 shell=False
@@ -837,7 +957,7 @@ class QuickNoteApp(QObject):
             logger.error(f"重启EXE失败: {e}", exc_info=True)
             self.tray_icon.show_message("重启失败", f"无法启动新进程: {str(e)}")
     
-    def _do_restart_script(self, python_exe, script_path, current_dir):
+    def _do_restart_script(self, python_exe, script_path, current_dir, extra_args=None):
         """执行脚本重启操作（开发模式）"""
         import subprocess
         import os
@@ -848,7 +968,7 @@ class QuickNoteApp(QObject):
             
             # 启动新进程
             subprocess.Popen(
-                [python_exe, str(script_path)],
+                [python_exe, str(script_path)] + list(extra_args or []),
                 cwd=str(current_dir),
                 creationflags=subprocess.CREATE_NEW_CONSOLE if os.name == 'nt' else 0
             )
@@ -856,6 +976,13 @@ class QuickNoteApp(QObject):
         except Exception as e:
             logger.error(f"重启脚本失败: {e}", exc_info=True)
     
+    def _shutdown_clipboard_worker(self):
+        """取消正在处理的剪切板内容并停止处理线程"""
+        with self._clip_lock:
+            if self._clip_deadline is not None:
+                self._clip_deadline.cancel("应用退出")
+        self._clip_executor.shutdown(wait=False, cancel_futures=True)
+    
     def _quit_app(self):
         """退出应用"""
         logger.info("正在退出应用...")
@@ -863,6 +990,18 @@ class QuickNoteApp(QObject):
         # 停止所有服务
         self.clipboard_monitor.stop()
         self.hotkey_listener.stop()
+        self._shutdown_clipboard_worker()
+        self._stop_config_watcher()
+        config.flush()
+        self._stop_ingest_server()
+        self._stop_metrics_server()
+        self.notion_writer.stop()
+        close_flomo_api()
+        get_io_loop().stop()
+        if self.clipboard_store is not None:
+            self.clipboard_store.close()
+        if self.instance is not None:
+            self.instance.close()
         
         # 退出应用
         self.app.quit()
@@ -877,13 +1016,30 @@ def main():
     QApplication.setAttribute(Qt.AA_UseHighDpiPixmaps, True)
     
     # 创建应用
-    app = QApplication(sys.argv)
-    app.setApplicationName("QuickNote AI")
-    app.setQuitOnLastWindowClosed(False)  # 关闭窗口不退出
+    with startup_tracer.phase("qapplication"):
+        app = QApplication(sys.argv)
+        app.setApplicationName("QuickNote AI")
+        app.setQuitOnLastWindowClosed(False)  # 关闭窗口不退出
+    
+    # 单实例：已有实例在运行时转发命令后退出；重启后的新实例先从旧实例取走运行状态
+    instance = None
+    handoff_state = None
+    if config.get("single_instance.enabled", True):
+        from src.core.single_instance import SingleInstance, SUCCESSOR_FLAG, command_from_argv
+        instance = SingleInstance()
+        if SUCCESSOR_FLAG in sys.argv:
+            with startup_tracer.phase("handoff"):
+                handoff_state = instance.take_over(float(config.get("single_instance.handoff_timeout_seconds", 15)))
+        elif not instance.listen():
+            command = command_from_argv(sys.argv)
+            reply = instance.forward(command)
+            logger.info(f"QuickNote AI 已在运行，已转发命令: {command}（回复: {reply}）")
+            sys.exit(0)
     
     try:
         # 创建主应用实例
-        quick_note = QuickNoteApp(app)
+        with startup_tracer.phase("app_init"):
+            quick_note = QuickNoteApp(app, instance=instance, handoff_state=handoff_state)
         
         # 显示启动成功提示
         quick_note.tray_icon.show_message(
@@ -891,6 +1047,21 @@ def main():
             "已启动！使用 Ctrl+Shift+Space 快速输入"
         )
         
+        # 事件循环开始处理事件时结束启动计时（QUICKNOTE_EXIT_AFTER_STARTUP 用于启动基准测试）
+        from PyQt5.QtCore import QTimer
+        
+        def on_event_loop_started():
+            startup_tracer.mark("event_loop")
+            if os.getenv("QUICKNOTE_EXIT_AFTER_STARTUP"):
+                # 模拟预热前按下快捷键：记录最坏情况下的快捷键到窗口可见耗时
+                with startup_tracer.phase("quick_input_show"):
+                    quick_note._show_quick_input()
+            startup_tracer.finish(config.root_dir / "data" / "diagnostics")
+            if os.getenv("QUICKNOTE_EXIT_AFTER_STARTUP"):
+                quick_note._quit_app()
+        
+        QTimer.singleShot(0, on_event_loop_started)
+        
         # 运行应用
         sys.exit(app.exec_())
         
@@ -5,8 +5,6 @@ import random
 import threading
 from typing import Dict, Optional, List
 from loguru import logger
-import requests
-import yaml
 
 
 class QuoteService:
@@ -158,15 +156,9 @@ class QuoteService:
         logger.info(f"金句服务已初始化 (API: {self.base_url}, Model: {self.model})")
     
     def _load_config(self) -> Dict:
-        """加载配置"""
-        try:
-            with open("config.yaml", "r", encoding="utf-8") as f:
-                config = yaml.safe_load(f)
-                meditation_config = config.get("meditation_quotes", {})
-                return meditation_config
-        except Exception as e:
-            logger.error(f"加载金句配置失败: {e}")
-            return {}
+        """加载配置（全局配置中的 meditation_quotes）"""
+        from src.utils.config import config
+        return config.get("meditation_quotes", {})
     
     def get_random_quote(self) -> Dict[str, str]:
         """获取随机金句（优先从AI生成，失败则使用备用）"""
@@ -192,6 +184,8 @@ class QuoteService:
     def _fetch_quote_from_ai(self) -> Optional[Dict[str, str]]:
         """从AI API获取金句"""
         try:
+            import requests  # 只在后台生成金句时导入，不拖慢启动
+            
             headers = {
                 "Authorization": f"Bearer {self.api_key}",
                 "Content-Type": "application/json"
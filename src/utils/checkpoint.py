@@ -0,0 +1,97 @@
+"""批量导入进度检查点
+
+以 JSON Lines 追加记录已处理完成的条目（每条一行，写入后立即落盘），
+中断或崩溃后重新运行时跳过已完成的条目。最后一行可能因崩溃而不完整，加载时忽略。
+
+条目键由来源位置和内容指纹组成：同一位置的内容改动后会被重新处理。
+"""
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Set
+
+from loguru import logger
+
+
+class Checkpoint:
+    """批量导入检查点（线程安全）"""
+
+    def __init__(self, path: Path, meta: Optional[Dict[str, Any]] = None, restart: bool = False, sync_every: int = 50):
+        """
+        打开检查点（不存在时新建）
+
+        Args:
+            path: 检查点文件路径
+            meta: 新建时写入首行的任务信息（输入路径等）
+            restart: 丢弃已有进度，从头开始
+            sync_every: 每写入多少条执行一次 fsync
+        """
+        self.path = Path(path)
+        self.sync_every = max(1, int(sync_every))
+        self.done: Set[str] = set()
+        self._lock = threading.Lock()
+        self._unsynced = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if restart and self.path.exists():
+            self.path.unlink()
+        if self.path.exists():
+            self._load()
+            self._file = open(self.path, "a", encoding="utf-8")
+        else:
+            self._file = open(self.path, "a", encoding="utf-8")
+            self._write({"meta": meta or {}, "created_at": time.time()})
+            self._sync()
+
+    def _load(self):
+        broken = 0
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    broken += 1
+                    continue
+                key = record.get("key")
+                if key:
+                    self.done.add(key)
+        if broken:
+            logger.warning(f"检查点中有 {broken} 行不完整，已忽略: {self.path}")
+        logger.info(f"已加载检查点: {self.path}（已完成 {len(self.done)} 条）")
+
+    def _write(self, record: Dict[str, Any]):
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def _sync(self):
+        try:
+            os.fsync(self._file.fileno())
+        except OSError:
+            pass
+        self._unsynced = 0
+
+    def is_done(self, key: str) -> bool:
+        with self._lock:
+            return key in self.done
+
+    def mark_done(self, key: str, status: str):
+        """记录一条已完成（重复记录同一键时忽略）"""
+        with self._lock:
+            if key in self.done or self._file.closed:
+                return
+            self.done.add(key)
+            self._write({"key": key, "status": status, "at": round(time.time(), 3)})
+            self._unsynced += 1
+            if self._unsynced >= self.sync_every:
+                self._sync()
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._sync()
+                self._file.close()
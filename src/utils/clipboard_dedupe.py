@@ -13,16 +13,24 @@ import json
 import re
 import threading
 import time
+import weakref
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Dict, Tuple, Optional
 
 from loguru import logger
 
+from src.utils.metrics import metrics
+
 
 _SPACE_RE = re.compile(r"[ \t]+")
 _MANY_NEWLINES_RE = re.compile(r"\n{3,}")
 
+CHECKS = metrics.counter("quicknote_dedupe_checks_total", "去重检查次数（hit 为命中重复）", ("result",))
+MARKED = metrics.counter("quicknote_dedupe_marked_total", "记录为已同步的指纹数")
+SAVE_SECONDS = metrics.histogram("quicknote_dedupe_save_seconds", "去重记录写盘耗时")
+ENTRIES = metrics.gauge("quicknote_dedupe_entries", "去重记录中的指纹数")
+
 
 def normalize_text(text: str) -> str:
     """对文本做温和归一化，尽量把“看起来一样”的内容变成同一指纹。"""
@@ -60,6 +68,14 @@ class ClipboardDedupeStore:
         self._lock = threading.RLock()
         self._items: Dict[str, float] = {}
         self._load()
+        # 弱引用：指标不延长存储对象的生命周期
+        ref = weakref.ref(self)
+
+        def count_entries() -> Optional[int]:
+            store = ref()
+            return None if store is None else len(store._items)
+
+        ENTRIES.set_function(count_entries)
 
     def _load(self) -> None:
         with self._lock:
@@ -119,12 +135,15 @@ class ClipboardDedupeStore:
         with self._lock:
             ts = self._items.get(fp)
             if not ts:
+                CHECKS.inc(result="miss")
                 return DedupeDecision(is_duplicate=False, fingerprint=fp, age_seconds=None)
             age = int(time.time() - ts)
             if age > self.ttl_seconds:
                 # 过期，视为非重复并顺便清掉
                 self._items.pop(fp, None)
+                CHECKS.inc(result="expired")
                 return DedupeDecision(is_duplicate=False, fingerprint=fp, age_seconds=age)
+            CHECKS.inc(result="hit")
             return DedupeDecision(is_duplicate=True, fingerprint=fp, age_seconds=age)
 
     def mark_fingerprint(self, fingerprint: str) -> None:
@@ -133,12 +152,43 @@ class ClipboardDedupeStore:
             return
         with self._lock:
             self._items[str(fingerprint)] = time.time()
+            MARKED.inc()
             pruned = self._prune_locked()
             try:
-                self._save_locked()
+                with SAVE_SECONDS.time():
+                    self._save_locked()
             except Exception as e:
                 logger.warning(f"保存剪切板去重缓存失败: {e}")
             if pruned:
                 logger.debug(f"剪切板去重缓存已清理过期项: {pruned} 条")
 
+    def export(self) -> Dict[str, float]:
+        """导出未过期的记录（重启交接给新实例）。"""
+        with self._lock:
+            self._prune_locked()
+            return dict(self._items)
+
+    def merge(self, items: Dict[str, float]) -> int:
+        """合并交接来的记录（同一 fingerprint 取较新的时间），返回新增条数。"""
+        if not items:
+            return 0
+        now = time.time()
+        added = 0
+        with self._lock:
+            for fp, ts in items.items():
+                try:
+                    tsf = float(ts)
+                except Exception:
+                    continue
+                if now - tsf > self.ttl_seconds:
+                    continue
+                if str(fp) not in self._items:
+                    added += 1
+                self._items[str(fp)] = max(tsf, self._items.get(str(fp), 0.0))
+            try:
+                self._save_locked()
+            except Exception as e:
+                logger.warning(f"保存剪切板去重缓存失败: {e}")
+        return added
+
 
@@ -0,0 +1,299 @@
+"""剪切板历史持久化存储
+
+SQLite（WAL 模式）保存剪切板历史，FTS5 全文索引（trigram 分词，支持中文子串搜索）：
+- 写入：剪切板监控线程只把记录放入内存批次，后台写线程按批次合并为一个事务写入
+- 保留：按条数和天数清理旧记录（写入后定期执行）
+- 查询：最近记录、全文搜索、按分类结论筛选，均走索引；before_id 按 id 翻页（深处翻页与第一页同样快）
+
+搜索词不足3个字符时 trigram 索引无法使用，改为在最新的 short_query_window 条记录中做 LIKE 匹配
+（从新到旧扫描，取到足够条数即停止），保证无结果时的最坏耗时也有上限。
+"""
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from loguru import logger
+
+from src.utils.clipboard_dedupe import fingerprint_text
+
+
+# 分类结论（verdict 字段）：同步目标（notion/flomo/ticktick）或以下取值
+VERDICT_IGNORED = "ignored"        # AI判定不需要保存
+VERDICT_DUPLICATE = "duplicate"    # 命中去重缓存
+VERDICT_FAILED = "failed"          # 处理失败、超时或取消
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS clips (
+    id INTEGER PRIMARY KEY,
+    created_at REAL NOT NULL,
+    content TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    verdict TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_clips_created ON clips(created_at);
+CREATE INDEX IF NOT EXISTS idx_clips_verdict ON clips(verdict, id);
+CREATE INDEX IF NOT EXISTS idx_clips_fingerprint ON clips(fingerprint, id);
+CREATE VIRTUAL TABLE IF NOT EXISTS clips_fts USING fts5(
+    content, content='clips', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS clips_ai AFTER INSERT ON clips BEGIN
+    INSERT INTO clips_fts(rowid, content) VALUES (new.id, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS clips_ad AFTER DELETE ON clips BEGIN
+    INSERT INTO clips_fts(clips_fts, rowid, content) VALUES ('delete', old.id, old.content);
+END;
+"""
+
+
+@dataclass
+class ClipEntry:
+    """一条剪切板历史"""
+    id: int
+    created_at: float
+    content: str
+    verdict: Optional[str] = None
+
+
+class ClipboardHistoryStore:
+    """剪切板历史存储（线程安全；写入在后台线程批量执行）"""
+
+    def __init__(
+        self,
+        path: Path,
+        max_entries: int = 100000,
+        max_age_days: float = 180,
+        batch_size: int = 100,
+        flush_interval: float = 0.5,
+        short_query_window: int = 5000
+    ):
+        """
+        初始化存储
+
+        Args:
+            path: 数据库文件路径
+            max_entries: 最多保留条数（0 表示不限）
+            max_age_days: 最多保留天数（0 表示不限）
+            batch_size: 单个事务最多写入的操作数
+            flush_interval: 批次最长等待时间（秒）
+            short_query_window: 短搜索词（不足3个字符）只在最新的多少条记录中查找
+        """
+        self.path = Path(path)
+        self.max_entries = int(max_entries)
+        self.max_age_days = float(max_age_days)
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = float(flush_interval)
+        self.short_query_window = int(short_query_window)
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+        finally:
+            conn.close()
+
+        self._local = threading.local()
+        self._ops: List[Tuple] = []
+        self._cond = threading.Condition()
+        self._closed = False
+        self._in_flight = 0
+        self._last_prune = 0.0
+        self._writer = threading.Thread(target=self._write_loop, name="clipboard-store", daemon=True)
+        self._writer.start()
+        logger.info(f"剪切板历史存储已打开: {self.path}（共 {self.count()} 条）")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.path), timeout=10)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _reader(self) -> sqlite3.Connection:
+        """每个线程一个只读连接（WAL 模式下读写互不阻塞）"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+        return conn
+
+    # ---------- 写入 ----------
+
+    def add(self, content: str, created_at: Optional[float] = None):
+        """记录一条剪切板内容（立即返回，由后台线程批量写入）"""
+        self._enqueue(("add", created_at or time.time(), content, fingerprint_text(content)))
+
+    def set_verdict(self, content: str, verdict: str):
+        """记录该内容最近一条历史的分类结论"""
+        self._enqueue(("verdict", fingerprint_text(content), verdict))
+
+    def _enqueue(self, op: Tuple):
+        with self._cond:
+            if self._closed:
+                return
+            self._ops.append(op)
+            if len(self._ops) >= self.batch_size:
+                self._cond.notify()
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """等待已提交的内容写入完成"""
+        end = time.monotonic() + timeout
+        with self._cond:
+            self._cond.notify()
+            while self._ops or self._in_flight:
+                remaining = end - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(min(remaining, 0.05))
+        return True
+
+    def close(self, timeout: float = 5.0):
+        """写完剩余内容后关闭"""
+        self.flush(timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._writer.join(timeout)
+
+    def _write_loop(self):
+        conn = self._connect()
+        while True:
+            with self._cond:
+                if not self._ops and not self._closed:
+                    self._cond.wait(self.flush_interval)
+                if not self._ops:
+                    if self._closed:
+                        break
+                    continue
+                batch = self._ops[:self.batch_size]
+                del self._ops[:self.batch_size]
+                self._in_flight = len(batch)
+            try:
+                self._write_batch(conn, batch)
+                if time.monotonic() - self._last_prune > 60:
+                    self._prune(conn)
+            except Exception as e:
+                logger.error(f"写入剪切板历史失败（{len(batch)} 条）: {e}")
+            finally:
+                with self._cond:
+                    self._in_flight = 0
+                    self._cond.notify_all()
+        conn.close()
+
+    def _write_batch(self, conn: sqlite3.Connection, batch: List[Tuple]):
+        with conn:
+            for op in batch:
+                if op[0] == "add":
+                    _, created_at, content, fingerprint = op
+                    conn.execute(
+                        "INSERT INTO clips(created_at, content, fingerprint) VALUES (?, ?, ?)",
+                        (created_at, content, fingerprint)
+                    )
+                else:
+                    _, fingerprint, verdict = op
+                    conn.execute(
+                        "UPDATE clips SET verdict = ? WHERE id = "
+                        "(SELECT id FROM clips WHERE fingerprint = ? ORDER BY id DESC LIMIT 1)",
+                        (verdict, fingerprint)
+                    )
+
+    def _prune(self, conn: sqlite3.Connection):
+        """按天数和条数清理旧记录"""
+        self._last_prune = time.monotonic()
+        deleted = 0
+        with conn:
+            if self.max_age_days > 0:
+                cutoff = time.time() - self.max_age_days * 86400
+                deleted += conn.execute("DELETE FROM clips WHERE created_at < ?", (cutoff,)).rowcount
+            if self.max_entries > 0:
+                row = conn.execute(
+                    "SELECT id FROM clips ORDER BY id DESC LIMIT 1 OFFSET ?", (self.max_entries,)
+                ).fetchone()
+                if row:
+                    deleted += conn.execute("DELETE FROM clips WHERE id <= ?", (row[0],)).rowcount
+        if deleted:
+            logger.info(f"剪切板历史已清理 {deleted} 条旧记录")
+
+    # ---------- 查询 ----------
+
+    @staticmethod
+    def _entries(rows) -> List[ClipEntry]:
+        return [ClipEntry(*row) for row in rows]
+
+    def recent(self, limit: int = 50, offset: int = 0, before_id: Optional[int] = None) -> List[ClipEntry]:
+        """
+        最近的记录（最新的在前）
+
+        Args:
+            limit: 条数
+            offset: 跳过的条数
+            before_id: 只返回 id 小于它的记录（翻页用，比 offset 更快）
+        """
+        rows = self._reader().execute(
+            "SELECT id, created_at, content, verdict FROM clips WHERE id < ? ORDER BY id DESC LIMIT ? OFFSET ?",
+            (self._upper(before_id), int(limit), int(offset))
+        ).fetchall()
+        return self._entries(rows)
+
+    def search(
+        self,
+        query: str,
+        limit: int = 50,
+        before_id: Optional[int] = None,
+        verdict: Optional[str] = None
+    ) -> List[ClipEntry]:
+        """
+        全文搜索（子串匹配，最新的在前）
+
+        Args:
+            query: 搜索词
+            limit: 条数
+            before_id: 只返回 id 小于它的记录（翻页用）
+            verdict: 只返回该分类结论的记录（None 表示不筛选）
+        """
+        query = (query or "").strip()
+        if not query:
+            if verdict is not None:
+                return self.by_verdict(verdict, limit, before_id)
+            return self.recent(limit, before_id=before_id)
+        verdict_sql = " AND c.verdict = ?" if verdict is not None else ""
+        verdict_params = (verdict,) if verdict is not None else ()
+        if len(query) >= 3:
+            # trigram 索引：整个搜索词作为短语匹配
+            phrase = '"' + query.replace('"', '""') + '"'
+            rows = self._reader().execute(
+                "SELECT c.id, c.created_at, c.content, c.verdict FROM clips_fts f "
+                "JOIN clips c ON c.id = f.rowid WHERE clips_fts MATCH ? AND f.rowid < ?" + verdict_sql +
+                " ORDER BY f.rowid DESC LIMIT ?",
+                (phrase, self._upper(before_id)) + verdict_params + (int(limit),)
+            ).fetchall()
+        else:
+            pattern = "%" + query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            rows = self._reader().execute(
+                "SELECT c.id, c.created_at, c.content, c.verdict FROM clips c "
+                "WHERE c.id > (SELECT coalesce(max(id), 0) FROM clips) - ? AND c.id < ? "
+                "AND c.content LIKE ? ESCAPE '\\'" + verdict_sql + " ORDER BY c.id DESC LIMIT ?",
+                (self.short_query_window, self._upper(before_id), pattern) + verdict_params + (int(limit),)
+            ).fetchall()
+        return self._entries(rows)
+
+    def by_verdict(self, verdict: Optional[str], limit: int = 50, before_id: Optional[int] = None) -> List[ClipEntry]:
+        """按分类结论筛选（verdict 为None时返回尚未分类的记录）"""
+        if verdict is None:
+            sql = ("SELECT id, created_at, content, verdict FROM clips WHERE verdict IS NULL AND id < ? "
+                   "ORDER BY id DESC LIMIT ?")
+            params = (self._upper(before_id), int(limit))
+        else:
+            sql = ("SELECT id, created_at, content, verdict FROM clips WHERE verdict = ? AND id < ? "
+                   "ORDER BY id DESC LIMIT ?")
+            params = (verdict, self._upper(before_id), int(limit))
+        return self._entries(self._reader().execute(sql, params).fetchall())
+
+    @staticmethod
+    def _upper(before_id: Optional[int]) -> int:
+        # SQLite 整数主键上限
+        return int(before_id) if before_id is not None else 2 ** 63 - 1
+
+    def count(self) -> int:
+        return self._reader().execute("SELECT count(*) FROM clips").fetchone()[0]
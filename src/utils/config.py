@@ -1,15 +1,233 @@
-"""配置管理模块"""
+"""配置管理模块
+
+配置在每次加载时编译成一个不可变的快照（ConfigSnapshot）：环境变量和 config.yaml 只在加载时
+读取一次，常用字段转换为带类型的属性，点号路径预先展开成一层字典，get() 只是一次字典查找。
+重新加载时构建新快照后整体替换引用，读取方要么看到旧配置、要么看到新配置，不会读到一半更新的配置；
+需要在一次处理中保持配置一致的代码先取 config.snapshot 再读取。
+
+Config 也是配置文件唯一的写入方：config.yaml 只解析一次，update() 修改内存中的文档并立即替换快照、
+通知订阅者，文件写入防抖合并后原子替换；文件未被外部修改时 reload() 不再重新解析。
+"""
+import atexit
+import io
 import os
 import sys
+import threading
+import time
 import yaml
+from dataclasses import dataclass, field, fields
 from pathlib import Path
-from typing import Dict, Any
-from dotenv import load_dotenv
+from types import MappingProxyType
+from typing import Callable, Dict, Any, FrozenSet, List, Mapping, Optional, Tuple
+from dotenv import dotenv_values
 from loguru import logger
 
 
+# 有 libyaml 时使用 C 实现的解析和输出（配置中有多段较长的提示词）
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+_YAML_DUMPER = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+# 不参与变化比较的快照字段
+_UNTRACKED_FIELDS = frozenset({"version", "loaded_at", "_flat"})
+
+
+def _freeze(value: Any) -> Any:
+    """转换为只读结构：字典 → 只读映射（MappingProxyType），列表 → 元组"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _thaw(value: Any) -> Any:
+    """_freeze 的逆转换（得到可修改的副本）"""
+    if isinstance(value, Mapping):
+        return {key: _thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(item) for item in value]
+    return value
+
+
+def _flatten(data: Mapping[str, Any], prefix: str = "", out: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """把嵌套字典展开为 {点号路径: 值}（中间层的字典也保留）"""
+    out = {} if out is None else out
+    for key, value in data.items():
+        path = f"{prefix}{key}"
+        out[path] = value
+        if isinstance(value, Mapping):
+            _flatten(value, path + ".", out)
+    return out
+
+
+def _typed(flat: Dict[str, Any], key: str, kind: type, default: Any) -> Any:
+    """按类型读取配置项，类型不符时记录警告并使用默认值"""
+    value = flat.get(key)
+    if value is None:
+        return default
+    try:
+        if kind is bool:
+            if isinstance(value, str):
+                return value.strip().lower() not in ("false", "0", "no", "off", "")
+            return bool(value)
+        if kind is str:
+            return str(value)
+        return kind(value)
+    except (TypeError, ValueError):
+        logger.warning(f"配置项 {key} 的值无效（{value!r}），使用默认值 {default!r}")
+        return default
+
+
+@dataclass(frozen=True)
+class RuleSettings:
+    """剪切板分类规则（ai_rules），每条剪切板内容都会读取"""
+    clipboard_monitor: bool
+    ticktick_enabled: bool
+    ticktick_prompt: str
+    flomo_enabled: bool
+    flomo_prompt: str
+    notion_enabled: bool
+    notion_prompt: str
+
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    """一次加载得到的完整配置（不可变）"""
+    version: int
+    loaded_at: float
+    # 环境变量
+    ai_provider: str
+    openai_api_key: str
+    openai_base_url: str
+    openai_model: str
+    anthropic_api_key: str
+    notion_api_key: str
+    notion_database_id: str
+    notion_base_url: str
+    flomo_api_url: str
+    ticktick_smtp_host: str
+    ticktick_smtp_port: int
+    ticktick_smtp_ssl: bool
+    ticktick_smtp_user: str
+    ticktick_smtp_pass: str
+    ticktick_email: str
+    # config.yaml
+    hotkey_quick_input: str
+    hotkey_toggle_clipboard: str
+    clipboard_enabled: bool
+    clipboard_check_interval: float
+    clipboard_min_length: int
+    clipboard_max_length: int
+    rules: RuleSettings
+    # 点号路径 → 值（构建时冻结：字典为只读映射，列表为元组，读取时不必复制）
+    _flat: Dict[str, Any] = field(repr=False, compare=False)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """获取配置项（支持点号路径；字典返回只读映射，列表返回元组）"""
+        value = self._flat.get(key)
+        return default if value is None else value
+
+    def changed_keys(self, other: "ConfigSnapshot") -> FrozenSet[str]:
+        """
+        与另一份快照相比发生变化的配置项
+
+        Returns:
+            变化的带类型字段名（如 "hotkey_quick_input"、"rules"）和 config.yaml 中值变化的点号路径（只含叶子节点）
+        """
+        changed = {
+            f.name for f in fields(self)
+            if f.name not in _UNTRACKED_FIELDS and getattr(self, f.name) != getattr(other, f.name)
+        }
+        for key in self._flat.keys() | other._flat.keys():
+            old, new = other._flat.get(key), self._flat.get(key)
+            if isinstance(old, Mapping) and isinstance(new, Mapping):
+                continue
+            if old != new:
+                changed.add(key)
+        return frozenset(changed)
+
+    @property
+    def data(self) -> Dict[str, Any]:
+        """完整的 YAML 配置（可修改的副本）"""
+        return {key: _thaw(value) for key, value in self._flat.items() if "." not in key}
+
+    @classmethod
+    def build(cls, data: Dict[str, Any], env=os.environ, version: int = 1) -> "ConfigSnapshot":
+        """
+        由 YAML 配置和环境变量构建快照（值按类型校验，无效时使用默认值）
+
+        Args:
+            data: config.yaml 的内容
+            env: 环境变量
+            version: 快照版本号（每次重新加载加1）
+        """
+        flat = _flatten(_freeze(data or {}))
+
+        def env_str(key: str, default: str = "") -> str:
+            return env.get(key, default)
+
+        provider = env_str("AI_PROVIDER", "deepseek")  # 默认改为deepseek
+        try:
+            smtp_port = int(env_str("TICKTICK_SMTP_PORT", "465"))
+        except ValueError:
+            smtp_port = 465
+        rules = RuleSettings(
+            clipboard_monitor=_typed(flat, "ai_rules.clipboard_monitor", bool, True),
+            ticktick_enabled=_typed(flat, "ai_rules.ticktick.enabled", bool, True),
+            ticktick_prompt=_typed(flat, "ai_rules.ticktick.prompt", str, ""),
+            flomo_enabled=_typed(flat, "ai_rules.flomo.enabled", bool, True),
+            flomo_prompt=_typed(flat, "ai_rules.flomo.prompt", str, ""),
+            notion_enabled=_typed(flat, "ai_rules.notion.enabled", bool, True),
+            notion_prompt=_typed(flat, "ai_rules.notion.prompt", str, ""),
+        )
+        min_length = _typed(flat, "clipboard.min_length", int, 10)
+        max_length = _typed(flat, "clipboard.max_length", int, 5000)
+        if min_length > max_length:
+            logger.warning(f"clipboard.min_length（{min_length}）大于 max_length（{max_length}），使用默认值")
+            min_length, max_length = 10, 5000
+        check_interval = _typed(flat, "clipboard.check_interval", float, 1.0)
+        if check_interval <= 0:
+            logger.warning(f"clipboard.check_interval 必须大于0（{check_interval}），使用默认值")
+            check_interval = 1.0
+        return cls(
+            version=version,
+            loaded_at=time.time(),
+            ai_provider=provider,
+            openai_api_key=env_str("OPENAI_API_KEY"),
+            # 如果provider是deepseek，使用DeepSeek的URL，否则使用配置的值或默认OpenAI
+            openai_base_url=env_str(
+                "OPENAI_BASE_URL",
+                "https://api.deepseek.com/v1" if provider == "deepseek" else "https://api.openai.com/v1"
+            ),
+            # 根据provider返回对应的默认模型
+            openai_model=env_str("OPENAI_MODEL", "deepseek-chat" if provider == "deepseek" else "gpt-4o-mini"),
+            anthropic_api_key=env_str("ANTHROPIC_API_KEY"),
+            notion_api_key=env_str("NOTION_API_KEY"),
+            notion_database_id=env_str("NOTION_DATABASE_ID"),
+            notion_base_url=env_str("NOTION_BASE_URL"),
+            flomo_api_url=env_str("FLOMO_API_URL"),
+            ticktick_smtp_host=env_str("TICKTICK_SMTP_HOST", "smtp.qq.com"),
+            ticktick_smtp_port=smtp_port,
+            ticktick_smtp_ssl=env_str("TICKTICK_SMTP_SSL", "true").strip().lower() not in ("false", "0", "no"),
+            ticktick_smtp_user=env_str("TICKTICK_SMTP_USER"),
+            ticktick_smtp_pass=env_str("TICKTICK_SMTP_PASS"),
+            ticktick_email=env_str("TICKTICK_EMAIL"),
+            hotkey_quick_input=_typed(flat, "hotkeys.quick_input", str, "ctrl+shift+space"),
+            hotkey_toggle_clipboard=_typed(flat, "hotkeys.toggle_clipboard", str, "ctrl+shift+c"),
+            clipboard_enabled=_typed(flat, "clipboard.enabled", bool, True),
+            clipboard_check_interval=check_interval,
+            clipboard_min_length=min_length,
+            clipboard_max_length=max_length,
+            rules=rules,
+            _flat=flat,
+        )
+
+
 class Config:
-    """配置管理类"""
+    """配置管理类（对外接口不变，读取都转发到当前快照；config.yaml 和 .env 只由这里写入）"""
+    
+    # 修改后延迟写入的时间（秒），期间的多次修改合并为一次写入
+    WRITE_DEBOUNCE_SECONDS = 0.5
     
     def __init__(self):
         # 获取项目根目录
@@ -23,38 +241,226 @@ class Config:
         
         self.config_file = self.root_dir / "config.yaml"
         self.env_file = self.root_dir / ".env"
+        self._lock = threading.RLock()
+        self._subscribers: List[Callable[[ConfigSnapshot, ConfigSnapshot], None]] = []
+        # 内存中的 config.yaml 文档（只解析一次，修改直接作用于此）和待写入的 .env 内容
+        self._document: Dict[str, Any] = {}
+        self._pending_env: Optional[str] = None
+        self._dirty = False
+        self._write_timer: Optional[threading.Timer] = None
+        # 最近一次读取或写入后的文件状态（修改时间、大小），未变化时重新加载不再解析
+        self._stamps = (None, None)
+        # 来自 .env 的变量在应用 .env 之前的值（原来没有为 None），从 .env 中删除后据此恢复
+        self._env_base: Dict[str, Optional[str]] = {}
         
-        # 加载环境变量
+        # 加载环境变量（已有的环境变量优先）
         if self.env_file.exists():
-            load_dotenv(self.env_file)
+            self._apply_env(dotenv_values(self.env_file), override=False)
             logger.info("已加载环境变量")
         else:
             logger.warning(f".env文件不存在: {self.env_file}")
         
         # 加载配置文件
-        self.config = self._load_config()
+        self._document = self._load_config()
+        self._stamps = self._file_stamps()
+        self._snapshot = ConfigSnapshot.build(self._document)
+        atexit.register(self.flush)
+        
+    def _apply_env(self, values: Dict[str, Optional[str]], override: bool = True):
+        """
+        把 .env 的内容应用到环境变量
         
+        上一次 .env 中有、这次没有的变量恢复为应用 .env 之前的值（原来没有则删除），
+        否则删掉的密钥会一直留在环境变量中继续生效。
+        """
+        for name in [name for name in self._env_base if name not in values]:
+            base = self._env_base.pop(name)
+            if base is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = base
+        for name, value in values.items():
+            if name not in self._env_base:
+                self._env_base[name] = os.environ.get(name)
+            if override or name not in os.environ:
+                os.environ[name] = value or ""
+    
+    def _read_config_file(self) -> Dict[str, Any]:
+        """读取YAML配置文件（失败时抛出异常）"""
+        with open(self.config_file, 'r', encoding='utf-8') as f:
+            data = yaml.load(f, Loader=_YAML_LOADER) or {}
+        if not isinstance(data, dict):
+            raise ValueError("config.yaml 顶层必须是字典")
+        return data
+    
     def _load_config(self) -> Dict[str, Any]:
         """加载YAML配置文件"""
         try:
-            with open(self.config_file, 'r', encoding='utf-8') as f:
-                config = yaml.safe_load(f)
-                logger.info("配置文件加载成功")
-                return config
+            config = self._read_config_file()
+            logger.info("配置文件加载成功")
+            return config
         except Exception as e:
             logger.error(f"配置文件加载失败: {e}")
             return {}
     
+    @staticmethod
+    def _stamp(path: Path) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+    
+    def _file_stamps(self) -> Tuple[Optional[Tuple[int, int]], Optional[Tuple[int, int]]]:
+        return self._stamp(self.config_file), self._stamp(self.env_file)
+    
+    @property
+    def snapshot(self) -> ConfigSnapshot:
+        """当前配置快照（一次处理中需要前后一致时，先取快照再读取）"""
+        return self._snapshot
+    
+    @property
+    def config(self) -> Dict[str, Any]:
+        """完整的 YAML 配置（副本，修改不会生效；修改请用 update()）"""
+        return self._snapshot.data
+    
+    def subscribe(self, callback: Callable[[ConfigSnapshot, ConfigSnapshot], None]):
+        """
+        订阅配置变化
+        
+        Args:
+            callback: 快照替换后调用 callback(旧快照, 新快照)，在修改或重新加载配置的线程中执行
+        """
+        with self._lock:
+            self._subscribers.append(callback)
+    
+    def unsubscribe(self, callback: Callable[[ConfigSnapshot, ConfigSnapshot], None]):
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+    
+    def _swap(self, snapshot: ConfigSnapshot):
+        """替换快照并通知订阅者（调用方已持有锁；通知在锁外进行）"""
+        old, self._snapshot = self._snapshot, snapshot
+        return old, list(self._subscribers)
+    
+    @staticmethod
+    def _notify(old: ConfigSnapshot, new: ConfigSnapshot, subscribers: list):
+        for callback in subscribers:
+            try:
+                callback(old, new)
+            except Exception as e:
+                logger.error(f"配置变化通知失败: {e}", exc_info=True)
+    
+    def update(self, values: Optional[Dict[str, Any]] = None, env_content: Optional[str] = None) -> ConfigSnapshot:
+        """
+        修改配置：立即生效并通知订阅者，文件稍后合并写入
+        
+        Args:
+            values: {点号路径: 值}，写入 config.yaml（如 {"hotkeys.quick_input": "ctrl+alt+n"}）
+            env_content: .env 的完整新内容（可选）
+        
+        Returns:
+            新的配置快照
+        """
+        with self._lock:
+            for key, value in (values or {}).items():
+                node = self._document
+                *parents, leaf = key.split(".")
+                for part in parents:
+                    child = node.get(part)
+                    if not isinstance(child, dict):
+                        child = node[part] = {}
+                    node = child
+                # 传回的快照值（只读映射、元组）转换为普通字典和列表，YAML 才能写出
+                node[leaf] = _thaw(value)
+            if env_content is not None:
+                self._pending_env = env_content
+                self._apply_env(dotenv_values(stream=io.StringIO(env_content)))
+            snapshot = ConfigSnapshot.build(self._document, version=self._snapshot.version + 1)
+            old, subscribers = self._swap(snapshot)
+            self._dirty = True
+            self._schedule_write()
+        logger.info(f"配置已修改（版本 {snapshot.version}）: {', '.join(values or {}) or '.env'}")
+        self._notify(old, snapshot, subscribers)
+        return snapshot
+    
+    def _schedule_write(self):
+        if self._write_timer is not None:
+            self._write_timer.cancel()
+        self._write_timer = threading.Timer(self.WRITE_DEBOUNCE_SECONDS, self.flush)
+        self._write_timer.daemon = True
+        self._write_timer.start()
+    
+    @staticmethod
+    def _write_atomic(path: Path, text: str):
+        """先写临时文件再替换，其他进程和文件监视不会读到写了一半的文件"""
+        tmp = path.with_name(f".{path.name}.tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    
+    def flush(self) -> bool:
+        """
+        立即写入尚未写入的修改（退出、重启前调用）
+        
+        Returns:
+            是否已全部写入（写入失败时保留修改，下次修改或调用时重试）
+        """
+        with self._lock:
+            if self._write_timer is not None:
+                self._write_timer.cancel()
+                self._write_timer = None
+            if not self._dirty:
+                return True
+            try:
+                if self._pending_env is not None:
+                    self._write_atomic(self.env_file, self._pending_env)
+                    self._pending_env = None
+                text = yaml.dump(
+                    self._document, Dumper=_YAML_DUMPER,
+                    allow_unicode=True, default_flow_style=False, sort_keys=False
+                )
+                self._write_atomic(self.config_file, text)
+                self._dirty = False
+                self._stamps = self._file_stamps()
+                logger.info("配置已写入文件")
+                return True
+            except Exception as e:
+                logger.error(f"写入配置文件失败: {e}")
+                return False
+    
+    def reload(self) -> ConfigSnapshot:
+        """
+        重新读取 .env 和 config.yaml，构建新快照后整体替换（文件自上次读取或写入后未变化时直接返回当前快照）
+        
+        Raises:
+            Exception: 配置文件读取或解析失败（此时继续使用当前配置）
+        """
+        with self._lock:
+            stamps = self._file_stamps()
+            if stamps == self._stamps:
+                return self._snapshot
+            if self._dirty:
+                # 内存中的修改尚未写入：以内存为准，写入后覆盖外部修改
+                logger.warning("配置文件被外部修改，但还有未写入的修改，忽略外部修改")
+                self.flush()
+                return self._snapshot
+            self._apply_env(dotenv_values(self.env_file) if self.env_file.exists() else {})
+            document = self._read_config_file()
+            self._document = document
+            self._stamps = stamps
+            snapshot = ConfigSnapshot.build(document, version=self._snapshot.version + 1)
+            old, subscribers = self._swap(snapshot)
+        logger.info(f"配置已重新加载（版本 {snapshot.version}）")
+        self._notify(old, snapshot, subscribers)
+        return snapshot
+    
     def get(self, key: str, default: Any = None) -> Any:
         """获取配置项（支持点号路径）"""
-        keys = key.split('.')
-        value = self.config
-        for k in keys:
-            if isinstance(value, dict):
-                value = value.get(k)
-            else:
-                return default
-        return value if value is not None else default
+        return self._snapshot.get(key, default)
     
     def get_env(self, key: str, default: str = "") -> str:
         """获取环境变量"""
@@ -63,109 +469,107 @@ class Config:
     @property
     def openai_api_key(self) -> str:
         """OpenAI/DeepSeek API Key"""
-        return self.get_env("OPENAI_API_KEY")
+        return self._snapshot.openai_api_key
     
     @property
     def openai_base_url(self) -> str:
         """OpenAI/DeepSeek Base URL"""
-        # 如果provider是deepseek，使用DeepSeek的URL，否则使用配置的值或默认OpenAI
-        provider = self.ai_provider
-        if provider == "deepseek":
-            return self.get_env("OPENAI_BASE_URL", "https://api.deepseek.com/v1")
-        return self.get_env("OPENAI_BASE_URL", "https://api.openai.com/v1")
+        return self._snapshot.openai_base_url
     
     @property
     def openai_model(self) -> str:
         """OpenAI/DeepSeek Model"""
-        # 根据provider返回对应的默认模型
-        provider = self.ai_provider
-        if provider == "deepseek":
-            return self.get_env("OPENAI_MODEL", "deepseek-chat")
-        return self.get_env("OPENAI_MODEL", "gpt-4o-mini")
+        return self._snapshot.openai_model
     
     @property
     def anthropic_api_key(self) -> str:
         """Anthropic API Key"""
-        return self.get_env("ANTHROPIC_API_KEY")
+        return self._snapshot.anthropic_api_key
     
     @property
     def ai_provider(self) -> str:
         """AI提供商（openai/deepseek/claude）"""
-        return self.get_env("AI_PROVIDER", "deepseek")  # 默认改为deepseek
+        return self._snapshot.ai_provider
     
     @property
     def notion_api_key(self) -> str:
         """Notion API Key"""
-        return self.get_env("NOTION_API_KEY")
+        return self._snapshot.notion_api_key
     
     @property
     def notion_database_id(self) -> str:
         """Notion Database ID"""
-        return self.get_env("NOTION_DATABASE_ID")
+        return self._snapshot.notion_database_id
+    
+    @property
+    def notion_base_url(self) -> str:
+        """Notion API地址（留空使用官方地址，可指向本地模拟服务）"""
+        return self._snapshot.notion_base_url
     
     @property
     def flomo_api_url(self) -> str:
         """Flomo Webhook URL"""
-        return self.get_env("FLOMO_API_URL")
+        return self._snapshot.flomo_api_url
     
     @property
     def ticktick_smtp_host(self) -> str:
         """TickTick 邮件发送 - SMTP服务器地址"""
-        return self.get_env("TICKTICK_SMTP_HOST", "smtp.qq.com")
+        return self._snapshot.ticktick_smtp_host
     
     @property
     def ticktick_smtp_port(self) -> int:
         """TickTick 邮件发送 - SMTP端口"""
-        port_str = self.get_env("TICKTICK_SMTP_PORT", "465")
-        try:
-            return int(port_str)
-        except ValueError:
-            return 465
+        return self._snapshot.ticktick_smtp_port
+    
+    @property
+    def ticktick_smtp_ssl(self) -> bool:
+        """TickTick 邮件发送 - 是否使用SSL连接（本地模拟服务使用明文连接）"""
+        return self._snapshot.ticktick_smtp_ssl
     
     @property
     def ticktick_smtp_user(self) -> str:
         """TickTick 邮件发送 - 发件邮箱地址"""
-        return self.get_env("TICKTICK_SMTP_USER")
+        return self._snapshot.ticktick_smtp_user
     
     @property
     def ticktick_smtp_pass(self) -> str:
         """TickTick 邮件发送 - SMTP授权码"""
-        return self.get_env("TICKTICK_SMTP_PASS")
+        return self._snapshot.ticktick_smtp_pass
     
     @property
     def ticktick_email(self) -> str:
         """TickTick 专属邮箱地址（格式：todo+xxxxx@mail.dida365.com）"""
-        return self.get_env("TICKTICK_EMAIL")
+        return self._snapshot.ticktick_email
     
     @property
     def hotkey_quick_input(self) -> str:
         """快速输入快捷键"""
-        return self.get("hotkeys.quick_input", "ctrl+shift+space")
+        return self._snapshot.hotkey_quick_input
     
     @property
     def hotkey_toggle_clipboard(self) -> str:
         """切换剪切板监控快捷键"""
-        return self.get("hotkeys.toggle_clipboard", "ctrl+shift+c")
+        return self._snapshot.hotkey_toggle_clipboard
     
     @property
     def clipboard_enabled(self) -> bool:
         """剪切板监控是否启用"""
-        return self.get("clipboard.enabled", True)
+        return self._snapshot.clipboard_enabled
     
     @property
     def clipboard_check_interval(self) -> float:
         """剪切板检查间隔"""
-        return self.get("clipboard.check_interval", 1.0)
+        return self._snapshot.clipboard_check_interval
     
     @property
     def clipboard_min_length(self) -> int:
         """剪切板内容最小长度"""
-        return self.get("clipboard.min_length", 10)
+        return self._snapshot.clipboard_min_length
     
     @property
     def clipboard_max_length(self) -> int:
         """剪切板内容最大长度"""
-        return self.get("clipboard.max_length", 5000)
+        return self._snapshot.clipboard_max_length
     
     def validate(self) -> bool:
         """验证配置是否完整"""
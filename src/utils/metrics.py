@@ -0,0 +1,389 @@
+"""进程内指标（计数器、仪表、延迟直方图）
+
+各模块在导入时登记自己的指标（同名重复登记返回同一个对象），运行时调用 inc / set / observe：
+
+    CLIPS_SEEN = metrics.counter("quicknote_clipboard_changes_total", "剪切板内容变化次数")
+    CLIPS_SEEN.inc()
+    SINK_LATENCY.observe(0.35, sink="flomo")
+
+采集默认关闭（metrics.enabled 为 False），关闭时每次调用只多一次属性判断；
+托盘应用按 metrics.enabled 配置开启。指标可在托盘「性能」面板查看，或由可选的本机
+HTTP 端点以 Prometheus 文本格式导出（/metrics）。
+
+延迟直方图采用 HDR 风格的对数线性分桶：以微秒为单位，每个2的幂区间再均分16个子桶，
+相对误差不超过约6%，桶按需创建（稀疏存储），记录一次只是一次整数运算和一次字典更新。
+"""
+import math
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from loguru import logger
+
+# 导出为 Prometheus 直方图时使用的桶上限（秒）
+EXPORT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# 对数线性分桶：每个2的幂区间的子桶数（2**4）
+_SUB_BITS = 4
+_SUB_COUNT = 1 << _SUB_BITS
+_LINEAR_LIMIT = _SUB_COUNT * 2
+
+_NULL_TIMER = nullcontext()
+
+
+def bucket_index(micros: int) -> int:
+    """微秒值 → 桶序号（32微秒以下每微秒一个桶）"""
+    if micros < _LINEAR_LIMIT:
+        return max(0, micros)
+    shift = micros.bit_length() - _SUB_BITS - 1
+    return _SUB_COUNT * shift + (micros >> shift)
+
+
+def bucket_bounds(index: int) -> Tuple[int, int]:
+    """桶序号 → [下限, 上限) 微秒"""
+    if index < _LINEAR_LIMIT:
+        return index, index + 1
+    shift = index // _SUB_COUNT - 1
+    mantissa = index - _SUB_COUNT * shift
+    return mantissa << shift, (mantissa + 1) << shift
+
+
+def _label_key(labelnames: Tuple[str, ...], labels: Dict[str, Any]) -> Tuple[str, ...]:
+    return tuple(str(labels.get(name, "")) for name in labelnames)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(pairs: List[Tuple[str, str]]) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, registry: "MetricsRegistry", name: str, help: str, labelnames: Tuple[str, ...]):
+        self._registry = registry
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def reset(self):
+        raise NotImplementedError
+
+    def samples(self) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """只增不减的计数"""
+
+    kind = "counter"
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        if not self._registry.enabled:
+            return
+        key = _label_key(self.labelnames, labels) if labels else ("",) * len(self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(_label_key(self.labelnames, labels), 0)
+
+    def total(self) -> float:
+        """所有标签组合的合计"""
+        with self._lock:
+            return sum(self._values.values())
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+    def samples(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [{"labels": dict(zip(self.labelnames, key)), "value": value} for key, value in items]
+
+
+class Gauge(Counter):
+    """可增可减的当前值；也可以用回调在采集时读取"""
+
+    kind = "gauge"
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self._callback: Optional[Callable[[], Optional[float]]] = None
+
+    def set(self, value: float, **labels):
+        if not self._registry.enabled:
+            return
+        with self._lock:
+            self._values[_label_key(self.labelnames, labels)] = value
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, callback: Optional[Callable[[], Optional[float]]]):
+        """采集时调用 callback 取值（返回None时不输出；替换之前的回调）"""
+        self._callback = callback
+
+    def samples(self) -> List[Dict[str, Any]]:
+        callback = self._callback
+        if callback is None:
+            return super().samples()
+        try:
+            value = callback()
+        except Exception as e:
+            logger.debug(f"读取指标 {self.name} 失败: {e}")
+            return []
+        return [] if value is None else [{"labels": {}, "value": value}]
+
+
+class _HistogramData:
+    __slots__ = ("buckets", "count", "sum", "max")
+
+    def __init__(self):
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def quantile(self, q: float) -> Optional[float]:
+        """分位数（秒，取所在桶的中点，不超过最大值）"""
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(q * self.count))
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                low, high = bucket_bounds(index)
+                return min((low + high) / 2 / 1e6, self.max)
+        return self.max
+
+    def cumulative(self, bounds: Tuple[float, ...]) -> List[int]:
+        """各上限（秒）以内的累计次数（按桶中点归属）"""
+        result = []
+        ordered = sorted(self.buckets.items())
+        position = 0
+        running = 0
+        for bound in bounds:
+            while position < len(ordered):
+                low, high = bucket_bounds(ordered[position][0])
+                if (low + high) / 2 / 1e6 > bound:
+                    break
+                running += ordered[position][1]
+                position += 1
+            result.append(running)
+        return result
+
+
+class Histogram(_Metric):
+    """延迟直方图（单位：秒）"""
+
+    kind = "histogram"
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self._data: Dict[Tuple[str, ...], _HistogramData] = {}
+
+    def observe(self, seconds: float, **labels):
+        if not self._registry.enabled:
+            return
+        key = _label_key(self.labelnames, labels) if labels else ("",) * len(self.labelnames)
+        index = bucket_index(int(seconds * 1e6))
+        with self._lock:
+            data = self._data.get(key)
+            if data is None:
+                data = self._data[key] = _HistogramData()
+            data.buckets[index] = data.buckets.get(index, 0) + 1
+            data.count += 1
+            data.sum += seconds
+            if seconds > data.max:
+                data.max = seconds
+
+    def time(self, **labels):
+        """计时上下文：with HIST.time(sink="flomo"): ...（关闭采集时不计时）"""
+        if not self._registry.enabled:
+            return _NULL_TIMER
+        return self._timer(labels)
+
+    @contextmanager
+    def _timer(self, labels: Dict[str, Any]) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def reset(self):
+        with self._lock:
+            self._data.clear()
+
+    def _copy(self) -> List[Tuple[Tuple[str, ...], _HistogramData]]:
+        with self._lock:
+            copies = []
+            for key, data in sorted(self._data.items()):
+                copy = _HistogramData()
+                copy.buckets = dict(data.buckets)
+                copy.count, copy.sum, copy.max = data.count, data.sum, data.max
+                copies.append((key, copy))
+        return copies
+
+    def samples(self) -> List[Dict[str, Any]]:
+        result = []
+        for key, data in self._copy():
+            result.append({
+                "labels": dict(zip(self.labelnames, key)),
+                "count": data.count,
+                "sum": data.sum,
+                "p50": data.quantile(0.5),
+                "p90": data.quantile(0.9),
+                "p99": data.quantile(0.99),
+                "max": data.max,
+            })
+        return result
+
+    def exposition(self) -> List[str]:
+        lines = []
+        for key, data in self._copy():
+            pairs = list(zip(self.labelnames, key))
+            for bound, count in zip(EXPORT_BUCKETS, data.cumulative(EXPORT_BUCKETS)):
+                lines.append(f"{self.name}_bucket{_format_labels(pairs + [('le', _format_value(bound))])} {count}")
+            lines.append(f"{self.name}_bucket{_format_labels(pairs + [('le', '+Inf')])} {data.count}")
+            lines.append(f"{self.name}_sum{_format_labels(pairs)} {_format_value(data.sum)}")
+            lines.append(f"{self.name}_count{_format_labels(pairs)} {data.count}")
+        return lines
+
+
+class MetricsRegistry:
+    """指标登记表（线程安全）"""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, help: str, labelnames: Tuple[str, ...]):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(self, name, help, tuple(labelnames))
+            elif type(metric) is not cls:
+                raise ValueError(f"指标 {name} 已登记为 {metric.kind}")
+            return metric
+
+    def counter(self, name: str, help: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self._get_or_create(Counter, name, help, labelnames)
+
+    def gauge(self, name: str, help: str, labelnames: Tuple[str, ...] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, help, labelnames)
+
+    def histogram(self, name: str, help: str, labelnames: Tuple[str, ...] = ()) -> Histogram:
+        return self._get_or_create(Histogram, name, help, labelnames)
+
+    def get(self, name: str) -> Optional[_Metric]:
+        with self._lock:
+            return self._metrics.get(name)
+
+    def reset(self):
+        """清零所有计数和直方图（仪表回调保留）"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            metric.reset()
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """所有指标的当前值（按名称排序，性能面板使用）"""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        return [
+            {"name": m.name, "type": m.kind, "help": m.help, "samples": m.samples()}
+            for m in metrics
+        ]
+
+    def render_text(self) -> str:
+        """Prometheus 文本格式（0.0.4）"""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {_escape(metric.help)}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            if isinstance(metric, Histogram):
+                lines.extend(metric.exposition())
+                continue
+            for sample in metric.samples():
+                pairs = list(sample["labels"].items())
+                lines.append(f"{metric.name}{_format_labels(pairs)} {_format_value(sample['value'])}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+
+class _MetricsRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "QuickNoteMetrics/1.0"
+
+    def log_message(self, format, *args):
+        logger.debug(f"[metrics] {self.address_string()} {format % args}")
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            body, status, content_type = b"not found\n", 404, "text/plain; charset=utf-8"
+        else:
+            body = self.server.registry.render_text().encode("utf-8")
+            status, content_type = 200, "text/plain; version=0.0.4; charset=utf-8"
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class _MetricsHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+
+class MetricsServer:
+    """在后台线程中以 Prometheus 文本格式导出指标（GET /metrics）"""
+
+    def __init__(self, registry: MetricsRegistry = metrics, host: str = "127.0.0.1", port: int = 9464):
+        self.httpd = _MetricsHTTPServer((host, int(port)), _MetricsRequestHandler)
+        self.httpd.registry = registry
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/metrics"
+
+    def start(self) -> "MetricsServer":
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="metrics-server", daemon=True)
+        self.thread.start()
+        logger.info(f"指标导出已启动: {self.url}")
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
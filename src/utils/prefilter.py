@@ -0,0 +1,39 @@
+"""剪切板内容预过滤
+
+在调用AI之前跳过明显不需要分类的内容（空内容、长度不符、纯数字、单个URL）。
+剪切板监控和处理链路（src/core/pipeline.py）共用；只依赖指标模块，不会引入AI、同步目标等重模块。
+"""
+from typing import Optional
+
+from src.utils.metrics import metrics
+
+# 默认长度限制（与 config.yaml 中 clipboard.min_length / max_length 的默认值一致）
+DEFAULT_MIN_LENGTH = 10
+DEFAULT_MAX_LENGTH = 5000
+# 视为单个链接的前缀
+URL_PREFIXES = ('http://', 'https://', 'www.')
+
+PREFILTERED = metrics.counter("quicknote_prefilter_rejected_total", "预过滤跳过的内容数", ("reason",))
+
+
+def prefilter(content: str, min_length: int = DEFAULT_MIN_LENGTH, max_length: int = DEFAULT_MAX_LENGTH) -> Optional[str]:
+    """
+    预过滤明显不需要分类的内容
+
+    Returns:
+        跳过原因；内容有效时返回None
+    """
+    if not content or not content.strip():
+        PREFILTERED.inc(reason="empty")
+        return "空内容"
+    content_length = len(content)
+    if content_length < min_length or content_length > max_length:
+        PREFILTERED.inc(reason="length")
+        return f"内容长度不符合要求: {content_length}"
+    if content.strip().isdigit():
+        PREFILTERED.inc(reason="digits")
+        return "纯数字内容"
+    if content.strip().startswith(URL_PREFIXES):
+        PREFILTERED.inc(reason="url")
+        return "URL"
+    return None
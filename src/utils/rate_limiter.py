@@ -0,0 +1,120 @@
+"""令牌桶限流器
+
+用于把对外部服务的请求速率控制在对方的限额以内（例如 Notion 平均每秒约3次请求）。
+"""
+import asyncio
+import threading
+import time
+from typing import Callable, Optional
+
+
+class TokenBucket:
+    """令牌桶（线程安全）"""
+
+    # 异步等待时检查取消的间隔（秒）
+    CANCEL_POLL_SECONDS = 0.1
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        初始化令牌桶
+
+        Args:
+            rate: 每秒补充的令牌数（即长期平均请求速率）
+            capacity: 桶容量（允许的突发请求数，默认等于 rate）
+        """
+        if rate <= 0:
+            raise ValueError("rate 必须大于0")
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._updated = now
+
+    def try_acquire(self, tokens: float = 1.0) -> float:
+        """
+        尝试取出令牌
+
+        Returns:
+            0 表示已取到；否则为还需等待的秒数（本次未取出令牌）
+        """
+        with self._lock:
+            now = time.monotonic()
+            if now < self._paused_until:
+                return self._paused_until - now
+            self._refill(now)
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def acquire(self, tokens: float = 1.0, timeout: Optional[float] = None) -> bool:
+        """
+        阻塞直到取到令牌
+
+        Args:
+            tokens: 需要的令牌数
+            timeout: 最长等待时间（秒），None 表示一直等待
+
+        Returns:
+            是否取到令牌
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self.try_acquire(tokens)
+            if wait <= 0:
+                return True
+            if deadline is not None:
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    return False
+                wait = min(wait, left)
+            time.sleep(wait)
+
+    async def acquire_async(
+        self,
+        tokens: float = 1.0,
+        timeout: Optional[float] = None,
+        cancelled: Optional[Callable[[], bool]] = None
+    ) -> bool:
+        """
+        异步等待令牌（在事件循环中使用，不阻塞线程）
+
+        Args:
+            tokens: 需要的令牌数
+            timeout: 最长等待时间（秒），None 表示一直等待；剩余时间等不到下一个令牌时立即放弃
+            cancelled: 取消检查函数（等待期间定期调用，返回 True 时放弃等待）
+
+        Returns:
+            是否取到令牌
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if cancelled is not None and cancelled():
+                return False
+            wait = self.try_acquire(tokens)
+            if wait <= 0:
+                return True
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            if cancelled is not None:
+                wait = min(wait, self.CANCEL_POLL_SECONDS)
+            await asyncio.sleep(wait)
+
+    def pause(self, seconds: float):
+        """
+        暂停发放令牌（收到服务端 429 / Retry-After 时调用）
+
+        暂停结束后桶内令牌清空，从0开始按速率补充，避免恢复瞬间再次突发触发限流。
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._paused_until = max(self._paused_until, now + max(0.0, seconds))
+            self._tokens = 0.0
+            self._updated = self._paused_until
@@ -0,0 +1,269 @@
+"""进程资源监控
+
+定期采样进程资源（RSS、Python堆、线程数、Qt控件数、句柄数），记录趋势；
+只有连续多次超过配置的阈值时才建议重启，重启前保存诊断快照
+（最近的采样、tracemalloc 分配最多的代码位置、线程列表）。
+
+psutil 为可选依赖：未安装时 RSS 和句柄数改用系统接口读取（Windows / Linux），
+都读不到时对应指标记为 None，不参与阈值判断。
+"""
+import ctypes
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from loguru import logger
+
+from src.utils.metrics import metrics
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+def _rss_bytes() -> Optional[int]:
+    """当前进程的常驻内存（字节）"""
+    try:
+        if psutil is not None:
+            return psutil.Process().memory_info().rss
+        if sys.platform == "win32":
+            class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+                _fields_ = [
+                    ("cb", ctypes.c_ulong),
+                    ("PageFaultCount", ctypes.c_ulong),
+                    ("PeakWorkingSetSize", ctypes.c_size_t),
+                    ("WorkingSetSize", ctypes.c_size_t),
+                    ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                    ("PagefileUsage", ctypes.c_size_t),
+                    ("PeakPagefileUsage", ctypes.c_size_t),
+                ]
+            counters = PROCESS_MEMORY_COUNTERS()
+            counters.cb = ctypes.sizeof(counters)
+            handle = ctypes.windll.kernel32.GetCurrentProcess()
+            if ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+                return counters.WorkingSetSize
+            return None
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except Exception:
+        return None
+
+
+def _handle_count() -> Optional[int]:
+    """当前进程打开的句柄数（Windows）或文件描述符数（其他平台）"""
+    try:
+        if psutil is not None:
+            process = psutil.Process()
+            return process.num_handles() if sys.platform == "win32" else process.num_fds()
+        if sys.platform == "win32":
+            count = ctypes.c_ulong()
+            handle = ctypes.windll.kernel32.GetCurrentProcess()
+            if ctypes.windll.kernel32.GetProcessHandleCount(handle, ctypes.byref(count)):
+                return count.value
+            return None
+        return len(os.listdir("/proc/self/fd"))
+    except Exception:
+        return None
+
+
+def _mb(value: Optional[int]) -> Optional[float]:
+    return round(value / 1024 / 1024, 1) if value is not None else None
+
+
+metrics.gauge("quicknote_process_resident_memory_bytes", "进程常驻内存（字节）").set_function(_rss_bytes)
+metrics.gauge("quicknote_process_open_handles", "进程打开的句柄数或文件描述符数").set_function(_handle_count)
+metrics.gauge("quicknote_process_threads", "进程线程数").set_function(threading.active_count)
+
+
+@dataclass
+class ResourceSample:
+    """一次资源采样"""
+    ts: float
+    rss_mb: Optional[float]
+    heap_mb: Optional[float]
+    threads: int
+    widgets: Optional[int]
+    handles: Optional[int]
+
+
+@dataclass
+class ResourceThresholds:
+    """重启阈值（0 表示不检查该项）"""
+    rss_mb: float = 600
+    heap_mb: float = 300
+    threads: int = 80
+    widgets: int = 2000
+    handles: int = 5000
+
+    @classmethod
+    def from_config(cls, values: Optional[Dict]) -> "ResourceThresholds":
+        thresholds = cls()
+        for key, value in (values or {}).items():
+            if hasattr(thresholds, key):
+                try:
+                    setattr(thresholds, key, float(value))
+                except (TypeError, ValueError):
+                    logger.warning(f"资源阈值配置无效，已忽略: {key}={value}")
+        return thresholds
+
+
+@dataclass
+class MonitorVerdict:
+    """一次检查的结论"""
+    sample: ResourceSample
+    breaches: List[str] = field(default_factory=list)
+    should_restart: bool = False
+
+
+class ResourceMonitor:
+    """进程资源监控（check() 由调用方定时调用，需要统计Qt控件时应在界面线程调用）"""
+
+    def __init__(
+        self,
+        thresholds: ResourceThresholds,
+        snapshot_dir: Path,
+        widget_counter: Optional[Callable[[], int]] = None,
+        consecutive: int = 3,
+        min_uptime_seconds: float = 1800,
+        history_size: int = 720,
+        tracemalloc_frames: int = 1
+    ):
+        """
+        初始化资源监控
+
+        Args:
+            thresholds: 重启阈值
+            snapshot_dir: 诊断快照目录
+            widget_counter: 返回当前Qt控件数的函数（可选）
+            consecutive: 连续超过阈值多少次才建议重启（避免瞬时峰值）
+            min_uptime_seconds: 启动后至少运行多久才允许重启（避免阈值低于启动基线时反复重启）
+            history_size: 保留的采样数（用于趋势和快照）
+            tracemalloc_frames: tracemalloc 记录的调用栈深度（0 表示不跟踪Python堆）
+        """
+        self.thresholds = thresholds
+        self.snapshot_dir = Path(snapshot_dir)
+        self.widget_counter = widget_counter
+        self.consecutive = max(1, int(consecutive))
+        self.min_uptime_seconds = float(min_uptime_seconds)
+        self.history: deque = deque(maxlen=history_size)
+        self.started_at = time.time()
+        self._breach_streak = 0
+        if tracemalloc_frames > 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(int(tracemalloc_frames))
+            logger.info(f"tracemalloc 已启动（调用栈深度 {tracemalloc_frames}）")
+
+    def sample(self) -> ResourceSample:
+        """采样一次并加入历史"""
+        widgets = None
+        if self.widget_counter:
+            try:
+                widgets = int(self.widget_counter())
+            except Exception:
+                widgets = None
+        heap = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+        sample = ResourceSample(
+            ts=time.time(),
+            rss_mb=_mb(_rss_bytes()),
+            heap_mb=_mb(heap),
+            threads=threading.active_count(),
+            widgets=widgets,
+            handles=_handle_count()
+        )
+        self.history.append(sample)
+        return sample
+
+    def _breaches(self, sample: ResourceSample) -> List[str]:
+        breaches = []
+        for key in ("rss_mb", "heap_mb", "threads", "widgets", "handles"):
+            limit = getattr(self.thresholds, key)
+            value = getattr(sample, key)
+            if limit and value is not None and value > limit:
+                breaches.append(f"{key}={value} > {limit:g}")
+        return breaches
+
+    def check(self) -> MonitorVerdict:
+        """采样并判断是否需要重启"""
+        sample = self.sample()
+        verdict = MonitorVerdict(sample, self._breaches(sample))
+        if not verdict.breaches:
+            self._breach_streak = 0
+            return verdict
+
+        self._breach_streak += 1
+        logger.warning(f"资源超过阈值（连续 {self._breach_streak}/{self.consecutive} 次）: {', '.join(verdict.breaches)}")
+        if self._breach_streak >= self.consecutive:
+            uptime = time.time() - self.started_at
+            if uptime < self.min_uptime_seconds:
+                logger.warning(f"启动仅 {int(uptime)} 秒，阈值可能低于正常基线，暂不重启")
+            else:
+                verdict.should_restart = True
+        return verdict
+
+    def trend(self, window_seconds: float = 3600) -> Dict[str, Optional[float]]:
+        """最近一段时间各指标的变化速率（每小时），用于发现缓慢泄漏"""
+        cutoff = time.time() - window_seconds
+        samples = [s for s in self.history if s.ts >= cutoff]
+        rates: Dict[str, Optional[float]] = {}
+        for key in ("rss_mb", "heap_mb", "threads", "widgets", "handles"):
+            points = [(s.ts, getattr(s, key)) for s in samples if getattr(s, key) is not None]
+            if len(points) < 2 or points[-1][0] - points[0][0] < 1:
+                rates[key] = None
+                continue
+            # 最小二乘斜率
+            n = len(points)
+            mean_t = sum(t for t, _ in points) / n
+            mean_v = sum(v for _, v in points) / n
+            var_t = sum((t - mean_t) ** 2 for t, _ in points)
+            slope = sum((t - mean_t) * (v - mean_v) for t, v in points) / var_t if var_t else 0.0
+            rates[key] = round(slope * 3600, 2)
+        return rates
+
+    def log_summary(self):
+        """记录当前值和趋势"""
+        if not self.history:
+            return
+        latest = self.history[-1]
+        logger.info(
+            f"资源状态: RSS={latest.rss_mb}MB, Python堆={latest.heap_mb}MB, 线程={latest.threads}, "
+            f"控件={latest.widgets}, 句柄={latest.handles}; 每小时变化: {self.trend()}"
+        )
+
+    def save_snapshot(self, reasons: List[str], top: int = 25) -> Optional[Path]:
+        """保存诊断快照（重启前调用）"""
+        try:
+            snapshot = {
+                "time": datetime.now().isoformat(timespec="seconds"),
+                "reasons": reasons,
+                "uptime_seconds": int(time.time() - self.started_at),
+                "trend_per_hour": self.trend(),
+                "samples": [asdict(s) for s in list(self.history)[-120:]],
+                "threads": sorted(t.name for t in threading.enumerate()),
+                "top_allocations": [],
+            }
+            if tracemalloc.is_tracing():
+                stats = tracemalloc.take_snapshot().statistics("lineno")
+                snapshot["top_allocations"] = [
+                    {"location": str(stat.traceback), "size_kb": round(stat.size / 1024, 1), "count": stat.count}
+                    for stat in stats[:top]
+                ]
+            self.snapshot_dir.mkdir(parents=True, exist_ok=True)
+            path = self.snapshot_dir / f"resource_{datetime.now():%Y%m%d_%H%M%S}.json"
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f, ensure_ascii=False, indent=2)
+            logger.info(f"资源诊断快照已保存: {path}")
+            return path
+        except Exception as e:
+            logger.error(f"保存资源诊断快照失败: {e}")
+            return None
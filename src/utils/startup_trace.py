@@ -0,0 +1,114 @@
+"""启动阶段计时
+
+记录 QuickNoteApp 启动过程中各阶段（导入、配置验证、窗口、托盘、快捷键、去重记录加载等）的耗时，
+以及关键时间点（托盘可见、快捷键可用、事件循环开始），启动结束后把汇总写入日志和JSON文件。
+
+时间以本模块首次导入时为起点（main.py 最先导入本模块，接近进程启动）。
+设置环境变量 QUICKNOTE_STARTUP_TRACE 可指定JSON文件路径（基准测试使用），
+否则写入 data/diagnostics/startup_latest.json。
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from loguru import logger
+
+
+class StartupTracer:
+    """启动阶段计时器（阶段可嵌套，嵌套阶段记录缩进层级）"""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.phases: List[Dict] = []
+        self.marks: Dict[str, float] = {}
+        self.finished = False
+        self._depth = 0
+        self._lock = threading.Lock()
+
+    def _elapsed_ms(self) -> float:
+        return round((time.perf_counter() - self.started_at) * 1000, 1)
+
+    @contextmanager
+    def phase(self, name: str):
+        """
+        记录一个启动阶段的耗时
+
+        Args:
+            name: 阶段名称（英文标识，便于基准测试按名称设置预算）
+        """
+        start = time.perf_counter()
+        begin_ms = self._elapsed_ms()
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            with self._lock:
+                self.phases.append({
+                    "name": name,
+                    "start_ms": begin_ms,
+                    "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+                    "depth": self._depth,
+                })
+
+    def mark(self, name: str):
+        """记录关键时间点（距启动的毫秒数，同名只记录第一次）"""
+        with self._lock:
+            self.marks.setdefault(name, self._elapsed_ms())
+
+    def summary(self) -> Dict:
+        with self._lock:
+            phases = sorted(self.phases, key=lambda p: (p["start_ms"], p["depth"]))
+            return {
+                "time": datetime.now().isoformat(timespec="seconds"),
+                "pid": os.getpid(),
+                "total_ms": self._elapsed_ms(),
+                "marks": dict(self.marks),
+                "phases": phases,
+            }
+
+    def finish(self, default_dir: Optional[Path] = None) -> Optional[Path]:
+        """
+        结束计时：把汇总写入日志和JSON文件（只执行一次）
+
+        Args:
+            default_dir: 未设置 QUICKNOTE_STARTUP_TRACE 时JSON文件所在目录
+
+        Returns:
+            JSON文件路径（写入失败或未指定目录时为None）
+        """
+        if self.finished:
+            return None
+        self.finished = True
+        summary = self.summary()
+
+        lines = [f"启动耗时 {summary['total_ms']:.0f}ms:"]
+        for phase in summary["phases"]:
+            indent = "  " * (phase["depth"] + 1)
+            lines.append(f"{indent}{phase['name']}: {phase['duration_ms']:.1f}ms（@{phase['start_ms']:.0f}ms）")
+        for name, at in summary["marks"].items():
+            lines.append(f"  [{name}] @{at:.0f}ms")
+        logger.info("\n".join(lines))
+
+        target = os.getenv("QUICKNOTE_STARTUP_TRACE")
+        path = Path(target) if target else (Path(default_dir) / "startup_latest.json" if default_dir else None)
+        if path is None:
+            return None
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(summary, f, ensure_ascii=False, indent=2)
+            logger.debug(f"启动计时已保存: {path}")
+            return path
+        except Exception as e:
+            logger.warning(f"保存启动计时失败: {e}")
+            return None
+
+
+# 全局计时器（导入即开始计时）
+startup_tracer = StartupTracer()